@@ -6,7 +6,6 @@ import urllib.request
 import urllib.error
 import subprocess
 from datetime import datetime, timezone, timedelta
-from openai import OpenAI
 
 DATA_DIR = "data"
 MANUAL_RELEASES_FILE = os.path.join(DATA_DIR, "manual_releases.json")
@@ -176,6 +175,8 @@ Respond ONLY with a raw JSON object containing these keys:
   "platform": "Switch"
 }}
 """
+    from openai import OpenAI  # imported here: runs without new repositories never need it
+
     # 1. Attempt Local Gemini Web2API (http://localhost:8081/v1) with gemini-3.5-flash-thinking
     if is_local_web2api_online():
         try:
@@ -9,7 +9,7 @@ import os
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Set
+from typing import Awaitable, List, Dict, Optional, Set
 import aiohttp
 from digest.homebrew import homebrew_digest_manager
 from services.translation import translate_ru_to_ua
@@ -20,6 +20,7 @@ logger = logging.getLogger(__name__)
 # Module-level constants (avoid Python 3.14 scoping issues with os inside functions)
 DEFAULT_LIST_PATH = os.path.join('data', 'list_hb.json')
 DEFAULT_STATE_PATH = os.path.join('data', 'hb_state.json')
+LAST_RUN_FILE = os.path.join('data', 'last_hb_collect_run.json')
 HOMEBREW_LAST_RUN_PATH = os.path.join('data', 'last_homebrew_digest_run.json')
 
 # Universal-DB API (3DS/DS)
@@ -308,28 +309,33 @@ class HomebrewUpdatesCollector:
         if not notes or not notes.strip():
             return None
         try:
-            from services import gpt
-            prompt = (
-                f"Summarize the following software update notes into exactly ONE concise sentence in Ukrainian.\n\n"
-                f"Rules:\n"
-                f"1. ONE sentence only — no more.\n"
-                f"2. Describe only WHAT was changed, fixed, or added in this update.\n"
-                f"3. Do NOT include thanks, credits, author names, or release ceremony text.\n"
-                f"4. Keep English brand names and technical terms untranslated.\n"
-                f"5. Output plain text only (no HTML, no markdown). End with a period.\n\n"
-                f"Update notes:\n{notes.strip()}\n\n"
-                f"One-sentence Ukrainian summary:"
-            )
-            result = await gpt.complete(prompt, max_tokens=100, model=GPT_MODEL, temperature=0.3, label="Homebrew Notes")
+            from services.translation import summarize_update_notes
+            result = await summarize_update_notes(notes)
             if result:
-                result = result.strip()
                 logger.info(f"Summarized update notes: {result[:80]}")
-                return result
-            return None
+            return result
         except Exception as e:
             logger.error(f"Error summarizing update notes: {e}")
             return None
 
+    def _queue_digest_entry(self, pending: List, description: Awaitable[str],
+                            notes: Optional[str] = None, **entry) -> None:
+        """
+        Queue a digest entry whose description (and summarized notes) are still being translated.
+        Translations queued by one source run concurrently and so share batched LLM requests;
+        _add_queued_digest_entries() adds the entries in queue order.
+        """
+        async def resolve() -> str:
+            text, summarized = await asyncio.gather(
+                description, self.summarize_and_translate_notes(notes) if notes else asyncio.sleep(0))
+            return f"{text}\n<i>{summarized}</i>" if summarized else text
+        pending.append((asyncio.ensure_future(resolve()), entry))
+
+    async def _add_queued_digest_entries(self, pending: List) -> None:
+        for task, entry in pending:
+            homebrew_digest_manager.add_entry(description=await task, **entry)
+        pending.clear()
+
     async def _get_description_cached(
         self, cache_key: str, local_entry: Optional[Dict],
         raw_text: str, fallback_name: str
@@ -727,6 +733,7 @@ class HomebrewUpdatesCollector:
         first_run_initialized = 0
         updates_from_udb = 0
         udb_checked = 0
+        pending_entries = []
 
         for udb_slug, udb_app in udb_data.items():
             systems = [s.upper() for s in udb_app.get('systems', [])]
@@ -779,16 +786,9 @@ class HomebrewUpdatesCollector:
             # Resolve local entry for this UDB app
             local_entry = local_by_slug.get((gh_slug or '').lower()) if gh_slug else None
 
-            # Get description (priority chain)
-            description = await self._get_description_for_udb_app(
-                udb_slug, udb_app, local_entry
-            )
-
-            # Summarize update notes if available
+            # Description (priority chain) and summarized update notes are translated after the loop
+            description = self._get_description_for_udb_app(udb_slug, udb_app, local_entry)
             update_notes_text = udb_app.get('update_notes') or udb_app.get('update_notes_md') or ''
-            summarized_notes = None
-            if update_notes_text.strip():
-                summarized_notes = await self.summarize_and_translate_notes(update_notes_text)
 
             # Determine release URL
             release_url = udb_app.get('download_page') or github_url or ''
@@ -808,17 +808,12 @@ class HomebrewUpdatesCollector:
             else:
                 platform = '/'.join(systems).replace('DS', 'DS(i)')
 
-            # Build final description (append summarized notes if available)
-            final_description = description
-            if summarized_notes:
-                final_description = f"{description}\n<i>{summarized_notes}</i>"
-
-            # Add to digest
-            homebrew_digest_manager.add_entry(
+            # Add to digest (description gets the summarized notes appended, if any)
+            self._queue_digest_entry(
+                pending_entries, description, update_notes_text,
                 app_name=app_title,
                 version=current_version,
                 release_url=release_url,
-                description=final_description,
                 platform=platform,
                 timestamp=datetime.now(),
                 release_date=release_date,
@@ -834,6 +829,7 @@ class HomebrewUpdatesCollector:
             self.updates_found += 1
             self.updated_apps.append(f"{app_title} {current_version} [UDB]")
 
+        await self._add_queued_digest_entries(pending_entries)
         logger.info(
             f"UDB phase complete: {updates_from_udb} updates, "
             f"{first_run_initialized} new entries initialized, "
@@ -900,6 +896,7 @@ class HomebrewUpdatesCollector:
 
         covered_github_slugs: Set[str] = set()
         first_run_initialized = 0
+        pending_entries = []
         updates_found = 0
         ftu_checked = 0
 
@@ -953,19 +950,16 @@ class HomebrewUpdatesCollector:
 
             # Get description (priority chain via shared cache)
             raw_desc = pkg.get('details') or pkg.get('description') or ''
-            description = await self._get_description_cached(
+            description = self._get_description_cached(
                 cache_key=state_key,
                 local_entry=local_entry,
                 raw_text=raw_desc,
                 fallback_name=app_title,
             )
 
-            # Summarize latest changelog block
+            # Latest changelog block, summarized together with the description after the loop
             changelog_raw = pkg.get('changelog', '')
             latest_cl = self._extract_latest_changelog(changelog_raw)
-            summarized_notes = None
-            if latest_cl:
-                summarized_notes = await self.summarize_and_translate_notes(latest_cl)
 
             # Release date from DD/MM/YYYY
             release_date = datetime.now()
@@ -981,16 +975,11 @@ class HomebrewUpdatesCollector:
             # Platform from local entry if available
             display_platform = local_entry.get('platform', platform) if local_entry else platform
 
-            # Final description with notes
-            final_description = description
-            if summarized_notes:
-                final_description = f"{description}\n<i>{summarized_notes}</i>"
-
-            homebrew_digest_manager.add_entry(
+            self._queue_digest_entry(
+                pending_entries, description, latest_cl,
                 app_name=app_title,
                 version=current_version,
                 release_url=release_url,
-                description=final_description,
                 platform=display_platform,
                 timestamp=datetime.now(),
                 release_date=release_date,
@@ -1007,6 +996,7 @@ class HomebrewUpdatesCollector:
             self.updates_found += 1
             self.updated_apps.append(f"{app_title} {current_version} [{platform}/FTU]")
 
+        await self._add_queued_digest_entries(pending_entries)
         logger.info(
             f"ForTheUsers [{platform}] complete: {updates_found} updates, "
             f"{first_run_initialized} initialized, {len(covered_github_slugs)} GitHub repos covered"
@@ -1065,6 +1055,7 @@ class HomebrewUpdatesCollector:
 
         covered_github_slugs: Set[str] = set()
         first_run_initialized = 0
+        pending_entries = []
         updates_found = 0
         vita_checked = 0
 
@@ -1124,19 +1115,16 @@ class HomebrewUpdatesCollector:
 
             # Get description via shared cache
             raw_desc = pkg.get('long_description') or pkg.get('description') or ''
-            description = await self._get_description_cached(
+            description = self._get_description_cached(
                 cache_key=state_key,
                 local_entry=local_entry,
                 raw_text=raw_desc,
                 fallback_name=app_name,
             )
 
-            # Summarize changelog
+            # Latest changelog block, summarized together with the description after the loop
             changelog_raw = pkg.get('changelog', '')
             latest_cl = self._extract_latest_changelog(changelog_raw)
-            summarized_notes = None
-            if latest_cl:
-                summarized_notes = await self.summarize_and_translate_notes(latest_cl)
 
             # Release date from YYYY-MM-DD
             release_date = datetime.now()
@@ -1149,16 +1137,11 @@ class HomebrewUpdatesCollector:
             # Release URL: prefer release_page, fallback to source
             release_url = pkg.get('release_page') or source_url or ''
 
-            # Final description with notes
-            final_description = description
-            if summarized_notes:
-                final_description = f"{description}\n<i>{summarized_notes}</i>"
-
-            homebrew_digest_manager.add_entry(
+            self._queue_digest_entry(
+                pending_entries, description, latest_cl,
                 app_name=app_name,
                 version=current_version,
                 release_url=release_url,
-                description=final_description,
                 platform=platform_name,
                 timestamp=datetime.now(),
                 release_date=release_date,
@@ -1175,6 +1158,7 @@ class HomebrewUpdatesCollector:
             self.updates_found += 1
             self.updated_apps.append(f"{app_name} {current_version} [{platform_name}/VitaForge]")
 
+        await self._add_queued_digest_entries(pending_entries)
         logger.info(
             f"VitaForge [{platform_name}] complete: {updates_found} updates, "
             f"{first_run_initialized} initialized, {len(covered_github_slugs)} GitHub repos covered"
@@ -1272,6 +1256,7 @@ class HomebrewUpdatesCollector:
 
         covered_slugs: Set[str] = set()
         first_run_initialized = 0
+        pending_entries = []
         updates_found = 0
         is_first_run = len(self._switchports_state) == 0
 
@@ -1323,18 +1308,18 @@ class HomebrewUpdatesCollector:
                 logger.info(f"New SwitchPorts entry found: {game_name} ({version})")
                 cache_key = f"switchports:{key}"
                 raw_desc = f"Port of {game_name} for Nintendo Switch."
-                description = await self._get_description_cached(
+                description = self._get_description_cached(
                     cache_key=cache_key,
                     local_entry=None,
                     raw_text=raw_desc,
                     fallback_name=f"Порт {game_name} для Nintendo Switch"
                 )
 
-                homebrew_digest_manager.add_entry(
+                self._queue_digest_entry(
+                    pending_entries, description,
                     app_name=f"{game_name} (Port)",
                     version=version or "1.0",
                     release_url=release_url or item['gbatemp_url'] or SWITCHPORTS_REPO_URL,
-                    description=description,
                     platform='Switch',
                     timestamp=datetime.now(),
                     is_new=True
@@ -1371,18 +1356,18 @@ class HomebrewUpdatesCollector:
 
             cache_key = f"switchports:{key}"
             raw_desc = f"Port of {game_name} for Nintendo Switch."
-            description = await self._get_description_cached(
+            description = self._get_description_cached(
                 cache_key=cache_key,
                 local_entry=None,
                 raw_text=raw_desc,
                 fallback_name=f"Порт {game_name} для Nintendo Switch"
             )
 
-            homebrew_digest_manager.add_entry(
+            self._queue_digest_entry(
+                pending_entries, description,
                 app_name=f"{game_name} (Port)",
                 version=version or "Update",
                 release_url=release_url or item['gbatemp_url'] or SWITCHPORTS_REPO_URL,
-                description=description,
                 platform='Switch',
                 timestamp=datetime.now(),
                 is_new=False
@@ -1391,6 +1376,7 @@ class HomebrewUpdatesCollector:
             self.updates_found += 1
             self.updated_apps.append(f"{game_name} (Port) [Update]")
 
+        await self._add_queued_digest_entries(pending_entries)
         logger.info(
             f"SwitchPorts complete: {updates_found} updates/new, "
             f"{first_run_initialized} initialized, {len(covered_slugs)} GitHub repos covered"
@@ -1580,8 +1566,8 @@ class HomebrewUpdatesCollector:
 
 
 
-async def main():
-    """Main entry point"""
+async def main(argv: Optional[List[str]] = None):
+    """Main entry point; `argv` defaults to the command line (scheduler_daemon.py passes [])."""
     import argparse
     from datetime import datetime, timedelta
 
@@ -1597,10 +1583,9 @@ async def main():
     parser.add_argument('--github-token', help='GitHub API token')
     parser.add_argument('--gitlab-token', help='GitLab API token')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Cooldown check: prevent running more than once every 20 hours unless forced or test mode
-    LAST_RUN_FILE = os.path.join("data", "last_hb_collect_run.json")
     current_time = datetime.now()
     is_forced = os.environ.get('FORCE_TASK') == 'run_collect_homebrew'
     if not args.test and not is_forced:
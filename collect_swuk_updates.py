@@ -22,6 +22,7 @@ logger = logging.getLogger(__name__)
 SWUK_FEED_URL = 'https://swuk.com.ua/feed/tg-updates/'
 SWUK_STATE_PATH = os.path.join('data', 'swuk_state.json')
 SWUK_STATS_PATH = os.path.join('data', 'swuk_collect_stats.json')
+LAST_RUN_FILE = os.path.join('data', 'last_swuk_collect_run.json')
 
 
 def load_swuk_state() -> Dict:
@@ -201,7 +202,6 @@ async def main():
     """Entry point."""
     from datetime import datetime, timedelta
     
-    LAST_RUN_FILE = os.path.join("data", "last_swuk_collect_run.json")
     current_time = datetime.now()
     is_forced = os.environ.get('FORCE_TASK') == 'run_collect_swuk'
     
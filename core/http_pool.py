@@ -0,0 +1,78 @@
+# --- START OF FILE http_pool.py ---
+"""
+Long-lived curl_cffi session for RuTracker pages.
+
+One AsyncSession per event loop keeps TLS connections alive between pages and holds a
+single cookie jar, so cookies set by RuTracker or handed back by FlareSolverr are reused by
+every later request. Requests to one host are limited to RUTRACKER_MAX_CONCURRENCY at a
+time. close_curl_session() is called from core.settings_loader.close_clients().
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from core.settings_loader import RUTRACKER_COOKIES, RUTRACKER_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+CURL_IMPERSONATE = "chrome110"
+COOKIE_DOMAIN = ".rutracker.org"
+
+_curl_session = None
+_curl_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_curl_session():
+    """Returns the shared curl_cffi AsyncSession for the running loop, creating it if necessary."""
+    global _curl_session, _curl_session_loop
+    loop = asyncio.get_running_loop()
+    if _curl_session is None or _curl_session_loop is not loop:
+        from curl_cffi.requests import AsyncSession as CurlSession
+        # A session is bound to its loop; one left over from a finished asyncio.run() is simply dropped
+        _curl_session = CurlSession(impersonate=CURL_IMPERSONATE, max_clients=max(10, RUTRACKER_MAX_CONCURRENCY * 2))
+        _curl_session_loop = loop
+        _host_limits.clear()
+        for name, value in (RUTRACKER_COOKIES or {}).items():
+            _curl_session.cookies.set(name, value, domain=COOKIE_DOMAIN)
+        logger.debug(f"Shared curl_cffi session initialized with {len(RUTRACKER_COOKIES or {})} RuTracker cookie(s).")
+    return _curl_session
+
+
+def host_limit(url: str) -> asyncio.Semaphore:
+    """Semaphore bounding concurrent requests to the host of `url`."""
+    get_curl_session()  # resets the limits when the loop changed
+    host = urlparse(url).hostname or ""
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(RUTRACKER_MAX_CONCURRENCY)
+    return _host_limits[host]
+
+
+def absorb_cookies(cookies: List[dict], domain: str = COOKIE_DOMAIN) -> None:
+    """Store cookies returned by FlareSolverr in RUTRACKER_COOKIES and the live session jar."""
+    session = get_curl_session()
+    for c in cookies or []:
+        if not (isinstance(c, dict) and "name" in c and "value" in c):
+            continue
+        if RUTRACKER_COOKIES is not None:
+            RUTRACKER_COOKIES[c["name"]] = c["value"]
+        session.cookies.set(c["name"], c["value"], domain=c.get("domain") or domain)
+
+
+async def close_curl_session() -> None:
+    """Closes the shared curl_cffi session if one is open on the running loop."""
+    global _curl_session, _curl_session_loop
+    session, session_loop = _curl_session, _curl_session_loop
+    _curl_session, _curl_session_loop = None, None
+    _host_limits.clear()
+    if session is None:
+        return
+    try:
+        if session_loop is asyncio.get_running_loop():
+            await session.close()
+            logger.info("Shared curl_cffi session closed.")
+    except Exception as e:
+        logger.error(f"Error closing shared curl_cffi session: {e}")
+
+# --- END OF FILE http_pool.py ---
@@ -21,9 +21,10 @@ def setup_logging(log_level=logging.INFO, log_file="log/bot.log", log_to_console
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
 
-    # Clear existing handlers
-    if root_logger.hasHandlers():
-        root_logger.handlers.clear()
+    # Clear existing handlers (closed, so repeated calls in one process do not leak log files)
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
 
     # Append + rotate: every script in a run cycle writes to the same file,
     # so overwrite mode loses the log of whichever ran first.
@@ -0,0 +1,228 @@
+# --- START OF FILE scheduler.py ---
+"""
+In-process job scheduler used by scheduler_daemon.py.
+
+Jobs have an IntervalTrigger (every N seconds) or a CronTrigger (a 5-field cron expression,
+evaluated in UTC like the GitHub Actions schedule). Jobs run one at a time, in the order in
+which they fall due, so two jobs never touch the state files at once. Jobs that are overdue
+on start-up, and ties, go by registration order. A run that is missed, because another job was still busy or the
+process was down, runs once as soon as possible. Missed runs are never queued up.
+
+A job with a `last_run` callable (e.g. digest.runner.get_last_run_time on the job's own
+stamp file) is due at the first trigger time after its last run. A digest whose 06:00 run
+was missed while the daemon was down is therefore sent on start-up, and the job's own
+cooldown check still guards against a double send. Jobs without one start right away
+(interval) or at the next trigger time (cron).
+
+A failing job (an exception, sys.exit(), or its timeout) is logged and the schedule goes on.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Awaitable, Callable, FrozenSet, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+MAX_SLEEP_SECONDS = 60  # re-check the clock at least this often (suspend, clock changes)
+DEFAULT_JOB_TIMEOUT = 3600
+
+# (lowest, highest) value of each cron field: minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(dt: datetime) -> datetime:
+    """Naive datetimes (as written by the digest scripts) are local time."""
+    return dt.astimezone(timezone.utc) if dt.tzinfo is None else dt
+
+
+class IntervalTrigger:
+    """Every `seconds`, counted from the start of the previous run."""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {seconds}")
+        self.interval = timedelta(seconds=seconds)
+
+    def next_after(self, after: datetime) -> datetime:
+        return _aware(after) + self.interval
+
+    def __repr__(self) -> str:
+        return f"every {self.interval}"
+
+
+def _parse_cron_field(spec: str, lowest: int, highest: int) -> FrozenSet[int]:
+    values = set()
+    for part in spec.split(","):
+        value_range, has_step, step = part.partition("/")
+        step = int(step) if has_step else 1
+        if value_range == "*":
+            start, end = lowest, highest
+        elif "-" in value_range:
+            start, end = (int(v) for v in value_range.split("-", 1))
+        else:
+            start = int(value_range)
+            end = highest if has_step else start
+        if step < 1 or not lowest <= start <= end <= highest:
+            raise ValueError(f"Invalid cron field '{spec}' (allowed {lowest}-{highest})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronTrigger:
+    """Standard 5-field cron expression ("minute hour day-of-month month day-of-week")."""
+
+    def __init__(self, expression: str, tz: tzinfo = timezone.utc):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got '{expression}'")
+        self.expression = expression
+        self.tz = tz
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(spec, *limits) for spec, limits in zip(fields, _CRON_FIELDS))
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        # As in cron: if both day fields are restricted, a day matching either of them counts
+        self._days_restricted, self._weekdays_restricted = fields[2] != "*", fields[4] != "*"
+
+    def _day_matches(self, t: datetime) -> bool:
+        day_ok = t.day in self.days
+        weekday_ok = (t.weekday() + 1) % 7 in self.weekdays  # cron counts from Sunday = 0
+        if self._days_restricted and self._weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`."""
+        t = _aware(after).astimezone(self.tz).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 4 + 1)  # covers every Feb 29
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t.astimezone(timezone.utc)
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def __repr__(self) -> str:
+        return f"cron '{self.expression}'"
+
+
+Trigger = Union[IntervalTrigger, CronTrigger]
+
+
+class JobExit(Exception):
+    """A job called sys.exit()."""
+
+    def __init__(self, code):
+        super().__init__(f"exited with status {code}")
+        self.code = code
+
+
+async def _without_exit(func: Callable[[], Awaitable]) -> None:
+    # The scripts sys.exit(1) on errors; a SystemExit escaping a task would stop the event loop
+    try:
+        await func()
+    except SystemExit as e:
+        raise JobExit(e.code) from None
+
+
+@dataclass(slots=True)
+class Job:
+    name: str
+    func: Callable[[], Awaitable]
+    trigger: Trigger
+    last_run: Optional[Callable[[], Optional[datetime]]] = None  # when the job last did its work
+    timeout: Optional[float] = DEFAULT_JOB_TIMEOUT
+    next_run: Optional[datetime] = None
+    runs: int = 0
+    failures: int = 0
+
+    def first_run(self, now: datetime) -> datetime:
+        if self.last_run is not None:
+            try:
+                last = self.last_run()
+            except Exception as e:
+                logger.warning(f"Job {self.name}: could not read its last run time: {e}")
+                last = None
+            return max(self.trigger.next_after(last), now) if last else now
+        return now if isinstance(self.trigger, IntervalTrigger) else self.trigger.next_after(now)
+
+
+class Scheduler:
+    """Runs its jobs one at a time on their triggers until stop() is called."""
+
+    def __init__(self):
+        self.jobs: List[Job] = []
+        self._stop: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def add_job(self, name: str, func: Callable[[], Awaitable], trigger: Trigger,
+                last_run: Optional[Callable[[], Optional[datetime]]] = None,
+                timeout: Optional[float] = DEFAULT_JOB_TIMEOUT) -> Job:
+        if any(job.name == name for job in self.jobs):
+            raise ValueError(f"Duplicate job name '{name}'")
+        job = Job(name, func, trigger, last_run, timeout)
+        self.jobs.append(job)
+        return job
+
+    def schedule(self, now: Optional[datetime] = None) -> None:
+        """Set the first run of every job that has none yet."""
+        now = now or _now()
+        for job in self.jobs:
+            if job.next_run is None:
+                job.next_run = job.first_run(now)
+
+    def stop(self) -> None:
+        """Stop after the job that is running now (if any) has finished."""
+        self._stopping = True
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run_job(self, job: Job) -> bool:
+        """Run `job` once and set its next run. True if it finished without error."""
+        started, started_clock = _now(), time.monotonic()
+        logger.info(f"Scheduler: starting job {job.name}")
+        ok = False
+        try:
+            await asyncio.wait_for(_without_exit(job.func), job.timeout)
+            ok = True
+        except asyncio.TimeoutError:
+            logger.error(f"Scheduler: job {job.name} timed out after {job.timeout:.0f}s")
+        except JobExit as e:
+            logger.error(f"Scheduler: job {job.name} exited with status {e.code}")
+        except Exception as e:
+            logger.exception(f"Scheduler: job {job.name} failed: {e}")
+        job.runs += 1
+        job.failures += not ok
+        job.next_run = job.trigger.next_after(started)
+        logger.info(f"Scheduler: job {job.name} {'finished' if ok else 'failed'} in "
+                    f"{time.monotonic() - started_clock:.1f}s; next run {job.next_run:%Y-%m-%d %H:%M:%S} UTC")
+        return ok
+
+    async def run_forever(self) -> None:
+        self._stop = asyncio.Event()
+        if self._stopping:
+            return
+        self.schedule()
+        while self.jobs and not self._stop.is_set():
+            job = min(self.jobs, key=lambda j: j.next_run)  # ties: registration order
+            delay = (job.next_run - _now()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), min(delay, MAX_SLEEP_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run_job(job)
+
+# --- END OF FILE scheduler.py ---
@@ -2,12 +2,14 @@ import sys
 import os
 import json
 import logging
-from typing import Dict, Optional, Any, List
-from telebot.async_telebot import AsyncTeleBot
-from openai import AsyncOpenAI
-import aiohttp
+from typing import TYPE_CHECKING, Dict, Optional, Any, List
 from core.logger_setup import setup_logging
 
+if TYPE_CHECKING:  # imported on first use: cron runs that never post or translate skip them entirely
+    import aiohttp
+    from openai import AsyncOpenAI
+    from telebot.async_telebot import AsyncTeleBot
+
 # Function load_config remains the same
 def load_config(file_path: str) -> Optional[Dict[str, Any]]:
     """Loads configuration from a JSON file."""
@@ -109,6 +111,13 @@ OPENAI_API_KEY = OPENROUTER_API_KEY or get_env_or_setting(settings, 'OPENAI_API'
 FEED_URL = settings.get('FEED_URL', 'https://feed.rutracker.cc/atom/f/1605.atom')
 YOUTUBE_API_KEY = get_env_or_setting(settings, 'YOUTUBE_API_KEY', 'YOUTUBE_API_KEY')
 FLARESOLVERR_URL = settings.get('FLARESOLVERR_URL', 'http://localhost:8191/v1')
+# Feed pipeline: entries are prepared by up to PIPELINE_WORKERS workers, posts go out in feed order
+PIPELINE_WORKERS = max(1, int(settings.get('PIPELINE_WORKERS', 3)))
+POST_DELAY_SECONDS = float(settings.get('POST_DELAY_SECONDS', 60))
+# Send fan-out: after the first group, up to SEND_FANOUT_LIMIT groups receive a post in parallel
+SEND_FANOUT_LIMIT = max(1, int(settings.get('SEND_FANOUT_LIMIT', 5)))
+# RuTracker pages: requests in flight per host on the shared curl_cffi session (core/http_pool.py)
+RUTRACKER_MAX_CONCURRENCY = max(1, int(settings.get('RUTRACKER_MAX_CONCURRENCY', 4)))
 
 GROUPS = settings.get('GROUPS', [])
 TEST_GROUPS = settings.get('TEST_GROUPS', [])
@@ -116,19 +125,61 @@ ERROR_TG = settings.get('ERROR_TG', [])
 RUTRACKER_COOKIES: Optional[Dict[str, str]] = settings.get('RUTRACKER_COOKIES', None)
 # Get the test link ONLY if in test mode
 TEST_LAST_ENTRY_LINK = settings.get('test_last_entry_link') if IS_TEST_MODE else None
+# RuTracker page cache (parsers/page_cache.py): conditional GETs, evicted by age and total size
+PAGE_CACHE_MAX_AGE_HOURS = float(settings.get('PAGE_CACHE_MAX_AGE_HOURS', 72))
+PAGE_CACHE_MAX_MB = float(settings.get('PAGE_CACHE_MAX_MB', 50))
+# TitleDB screenshots kept in data/screenshot_cache/ (services/titledb_manager.py), least recently used dropped first
+SCREENSHOT_CACHE_MAX_MB = float(settings.get('SCREENSHOT_CACHE_MAX_MB', 200))
+# Translation cache (services/translation_cache.py): entries unused this long are dropped, then LRU past the size cap
+TRANSLATION_CACHE_MAX_AGE_DAYS = float(settings.get('TRANSLATION_CACHE_MAX_AGE_DAYS', 365))
+TRANSLATION_CACHE_MAX_MB = float(settings.get('TRANSLATION_CACHE_MAX_MB', 20))
+# services/gpt.py: stream completions; start the next model when one has sent no token for this long
+GPT_STREAMING = str(settings.get('GPT_STREAMING', True)).lower() == 'true'
+GPT_FIRST_TOKEN_SECONDS = float(settings.get('GPT_FIRST_TOKEN_SECONDS', 15))
+# services/youtube_search.py: daily Data API quota (each search costs 100 units); titles without a trailer are retried after this many hours
+YOUTUBE_DAILY_QUOTA = int(settings.get('YOUTUBE_DAILY_QUOTA', 10000))
+YOUTUBE_NEGATIVE_TTL_HOURS = float(settings.get('YOUTUBE_NEGATIVE_TTL_HOURS', 72))
+# scheduler_daemon.py: feed check and Gist upload intervals; {"job": "cron expression"} overrides the daily jobs ("" disables one)
+SCHEDULER_FEED_INTERVAL_MINUTES = float(settings.get('SCHEDULER_FEED_INTERVAL_MINUTES', 15))
+SCHEDULER_GIST_SYNC_MINUTES = float(settings.get('SCHEDULER_GIST_SYNC_MINUTES', 15))
+SCHEDULER_CRON = dict(settings.get('SCHEDULER_CRON', {}))
+# Test mode only: replay cached pages without network access (pages missing from the cache are fetched and recorded)
+PAGE_CACHE_OFFLINE = IS_TEST_MODE and str(settings.get('page_cache_offline', False)).lower() == 'true'
 
 # --- Validate Critical Settings ---
 if not TOKEN: logging.critical("TELEGRAM_BOT_TOKEN is not configured."); sys.exit("Error: TELEGRAM_BOT_TOKEN is not configured.")
 if not OPENAI_API_KEY and not OPENAI_BASE_URL: logging.warning("OPENROUTER_API_KEY / OPENAI_API_KEY and OPENAI_BASE_URL not configured. GPT translation disabled.")
 
-# --- Initialize API Clients ---
-try:
-    bot = AsyncTeleBot(TOKEN)
-    logging.info(f"Telegram AsyncBot initialized with token ending in ...{TOKEN[-5:]}")
-except Exception as e: logging.error(f"Error initializing Telegram Bot: {e}"); sys.exit(f"Error initializing Telegram Bot: {e}")
+# --- API Clients (created on first use) ---
+# `from core.settings_loader import bot` / `openai_client` still work (module __getattr__ below),
+# but create the client at import time; modules imported by the cron scripts call get_bot() /
+# get_openai_client() when they actually need one.
+OPENAI_CONFIGURED = bool(OPENAI_API_KEY or OPENAI_BASE_URL)
+_bot: Optional["AsyncTeleBot"] = None
+_openai_client: Optional["AsyncOpenAI"] = None
+_openai_client_failed = False
+
+def get_bot() -> "AsyncTeleBot":
+    """Returns the shared Telegram AsyncTeleBot, creating it on first use."""
+    global _bot
+    if _bot is None:
+        from telebot.async_telebot import AsyncTeleBot
+        try:
+            _bot = AsyncTeleBot(TOKEN)
+            logging.info(f"Telegram AsyncBot initialized with token ending in ...{TOKEN[-5:]}")
+        except Exception as e: logging.error(f"Error initializing Telegram Bot: {e}"); sys.exit(f"Error initializing Telegram Bot: {e}")
+    return _bot
 
-openai_client: Optional[AsyncOpenAI] = None
-if OPENAI_API_KEY or OPENAI_BASE_URL:
+def get_openai_client() -> Optional["AsyncOpenAI"]:
+    """Returns the shared OpenAI / OpenRouter client, creating it on first use; None if not configured."""
+    global _openai_client, _openai_client_failed
+    if _openai_client is not None or _openai_client_failed:
+        return _openai_client
+    if not OPENAI_CONFIGURED:
+        logging.info("OpenAI/OpenRouter client not initialized (no API key or base_url).")
+        _openai_client_failed = True
+        return None
+    from openai import AsyncOpenAI
     try:
         # Determine if using OpenRouter
         is_openrouter = (
@@ -140,7 +191,7 @@ if OPENAI_API_KEY or OPENAI_BASE_URL:
         if is_openrouter:
             base_url = OPENAI_BASE_URL or "https://openrouter.ai/api/v1"
             key = OPENROUTER_API_KEY or OPENAI_API_KEY or ""
-            openai_client = AsyncOpenAI(
+            _openai_client = AsyncOpenAI(
                 api_key=key.strip(),
                 base_url=base_url,
                 default_headers={
@@ -152,21 +203,29 @@ if OPENAI_API_KEY or OPENAI_BASE_URL:
             logging.info(f"OpenRouter client initialized with base_url: {base_url}")
         elif OPENAI_BASE_URL:
             # For custom OpenAI-compatible APIs
-            openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY or "", base_url=OPENAI_BASE_URL, default_headers={}, timeout=120.0)
+            _openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY or "", base_url=OPENAI_BASE_URL, default_headers={}, timeout=120.0)
             logging.info(f"OpenAI Async client initialized with custom base_url: {OPENAI_BASE_URL}")
         else:
-            openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=120.0)
+            _openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=120.0)
             logging.info("OpenAI Async client initialized.")
-    except Exception as e: logging.warning(f"Error initializing OpenAI/OpenRouter client: {e}. GPT functions disabled.")
-else: logging.info("OpenAI/OpenRouter client not initialized (no API key or base_url).")
+    except Exception as e:
+        logging.warning(f"Error initializing OpenAI/OpenRouter client: {e}. GPT functions disabled.")
+        _openai_client_failed = True
+    return _openai_client
+
+def __getattr__(name: str) -> Any:
+    if name == 'bot': return get_bot()
+    if name == 'openai_client': return get_openai_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Shared aiohttp Session ---
-app_session: Optional[aiohttp.ClientSession] = None
+app_session: Optional["aiohttp.ClientSession"] = None
 
-def get_session() -> aiohttp.ClientSession:
+def get_session() -> "aiohttp.ClientSession":
     """Returns the shared aiohttp.ClientSession, initializing it if necessary."""
     global app_session
     if app_session is None or app_session.closed:
+        import aiohttp
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'}
         cookies = RUTRACKER_COOKIES or {}
         app_session = aiohttp.ClientSession(headers=headers, cookies=cookies)
@@ -177,23 +236,39 @@ def get_session() -> aiohttp.ClientSession:
     return app_session
 
 # --- Cleanup ---
-async def close_clients():
-    """Closes all initialized API clients."""
-    if 'bot' in globals() and bot:
-        try:
-            await bot.close_session()
-            logging.info("Telegram AsyncBot session closed.")
-        except Exception:
-            pass  # session may not have been initialized
+_clients_kept_open = False
 
-    global openai_client
-    if openai_client:
+def keep_clients_open(enabled: bool = True) -> None:
+    """While enabled, close_clients() without force=True does nothing: the jobs of a long-running process share warm clients."""
+    global _clients_kept_open
+    _clients_kept_open = enabled
+
+async def close_clients(force: bool = False):
+    """Closes all initialized API clients (unless keep_clients_open() is in effect)."""
+    if _clients_kept_open and not force:
+        return
+    # Only clients that were created; closing must not create them.
+    # telebot keeps one aiohttp session for every AsyncTeleBot, so close it whenever telebot was used.
+    if 'telebot.asyncio_helper' in sys.modules:
+        session = sys.modules['telebot.asyncio_helper'].session_manager.session
+        if session and not session.closed:
+            try:
+                await session.close()
+                logging.info("Telegram AsyncBot session closed.")
+            except Exception:
+                pass
+
+    if _openai_client:
         try:
-            await openai_client.close()
+            await _openai_client.close()
             logging.info("OpenAI Async client closed.")
         except Exception as e:
             logging.error(f"Error closing OpenAI client: {e}")
 
+    # Needs the aiohttp session below to reach FlareSolverr
+    if 'parsers.flaresolverr' in sys.modules:
+        await sys.modules['parsers.flaresolverr'].close_flaresolverr_session()
+
     global app_session
     if app_session and not app_session.closed:
         try:
@@ -202,6 +277,9 @@ async def close_clients():
         except Exception as e:
             logging.error(f"Error closing shared aiohttp session: {e}")
 
+    if 'core.http_pool' in sys.modules:
+        await sys.modules['core.http_pool'].close_curl_session()
+
 # Warnings about GROUPS/ERROR_TG/TEST_GROUPS
 if not GROUPS: logging.warning("No 'GROUPS' defined in settings. Posting to groups will not work.")
 if IS_TEST_MODE and not TEST_GROUPS: logging.warning("Test mode is active, but no 'TEST_GROUPS' are defined in settings.")
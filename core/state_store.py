@@ -0,0 +1,277 @@
+# --- START OF FILE state_store.py ---
+"""
+Central bot state in one SQLite database (WAL mode): data/state.db.
+
+Each state file moved here is a collection of key -> JSON value rows. get()/put()/delete()
+read or write one row instead of loading and rewriting a whole JSON file, and every put()
+commits on its own. transaction() groups several writes into one atomic commit. With WAL,
+a crash never leaves a half-written state behind.
+
+The JSON files in data/ (STATE_FILES) stay the sync format for sync_gist_state.py, in the
+same {key: value} layout as before. When one changes behind the store's back (a Gist
+download, a merge on upload, or the file of an older version), it replaces its collection
+when the store is opened or import_changed_json() runs. export_json() writes a collection
+back to its file; sync_gist_state.py exports them all right before an upload. Export by hand with:
+    python -m core.state_store export
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "data"
+STATE_DB = os.path.join(DATA_DIR, "state.db")
+
+# Collection -> its JSON file in data/ (the layout sync_gist_state.py syncs)
+STATE_FILES = {
+    "posted_links": "posted_links.json",
+    "user_subscriptions": "user_subscriptions.json",
+    "eshop_wishlist": "eshop_wishlist.json",
+    "eshop_region_prices": "eshop_region_prices_cache.json",
+}
+
+
+def _file_signature(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class Collection:
+    """Keyed JSON values of one collection; every write is a single-row commit."""
+
+    def __init__(self, store: "StateStore", name: str):
+        self.store = store
+        self.name = name
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self.store._execute("SELECT value FROM state WHERE collection = ? AND key = ?",
+                                  (self.name, key)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __contains__(self, key: str) -> bool:
+        return self.store._execute("SELECT 1 FROM state WHERE collection = ? AND key = ?",
+                                   (self.name, key)).fetchone() is not None
+
+    def put(self, key: str, value: Any) -> None:
+        self.store._execute(
+            "INSERT INTO state (collection, key, value, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (collection, key) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+            (self.name, key, json.dumps(value, ensure_ascii=False), time.time()))
+
+    def delete(self, key: str) -> bool:
+        return self.store._execute("DELETE FROM state WHERE collection = ? AND key = ?",
+                                   (self.name, key)).rowcount > 0
+
+    def delete_if(self, predicate: Callable[[str, Any], bool]) -> int:
+        """Drop the entries for which predicate(key, value) is true, in one transaction. Returns the count."""
+        doomed = [(self.name, key) for key, value in self.items() if predicate(key, value)]
+        if doomed:
+            with self.store.transaction():
+                self.store._executemany("DELETE FROM state WHERE collection = ? AND key = ?", doomed)
+        return len(doomed)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        rows = self.store._execute("SELECT key, value FROM state WHERE collection = ? ORDER BY rowid",
+                                   (self.name,)).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __len__(self) -> int:
+        return self.store._execute("SELECT count(*) FROM state WHERE collection = ?", (self.name,)).fetchone()[0]
+
+    def replace(self, data: Dict[str, Any], keep_newer_than: Optional[float] = None) -> None:
+        """Make the collection exactly `data`, in one transaction.
+
+        With `keep_newer_than` (a time.time() value), rows written at or after it are kept as
+        they are: `data` was read from a file exported before those writes.
+        """
+        now = time.time()
+        with self.store.transaction():
+            if keep_newer_than is None:
+                self.store._execute("DELETE FROM state WHERE collection = ?", (self.name,))
+                fresh = set()
+            else:
+                self.store._execute("DELETE FROM state WHERE collection = ? AND updated < ?",
+                                    (self.name, keep_newer_than))
+                fresh = {key for key, in self.store._execute(
+                    "SELECT key FROM state WHERE collection = ?", (self.name,)).fetchall()}
+            self.store._executemany(
+                "INSERT INTO state (collection, key, value, updated) VALUES (?, ?, ?, ?)",
+                [(self.name, str(k), json.dumps(v, ensure_ascii=False), now)
+                 for k, v in data.items() if str(k) not in fresh])
+
+
+class StateStore:
+    """The state database; `data_dir` holds the JSON files it imports and exports (None: no JSON sync).
+
+    Changed JSON files are imported when the store is opened, unless `import_on_open` is False.
+    """
+
+    def __init__(self, db_path: str = STATE_DB, data_dir: Optional[str] = DATA_DIR,
+                 json_files: Optional[Dict[str, str]] = None, import_on_open: bool = True):
+        self.db_path = db_path
+        self.data_dir = data_dir
+        self.json_files = STATE_FILES if json_files is None else json_files
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS state (
+                collection TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated REAL NOT NULL,
+                PRIMARY KEY (collection, key));
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+        """)
+        if data_dir and import_on_open:
+            self.import_changed_json()
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _executemany(self, sql: str, rows: list) -> None:
+        with self._lock:
+            self._conn.executemany(sql, rows)
+
+    def collection(self, name: str) -> Collection:
+        return Collection(self, name)
+
+    @contextmanager
+    def transaction(self) -> Iterator["StateStore"]:
+        """All writes inside commit together, or not at all if the block raises. Nested blocks join the outer one."""
+        with self._lock:
+            if self._conn.in_transaction:
+                yield self
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # --- JSON import / export ---
+
+    def _json_path(self, name: str) -> str:
+        return os.path.join(self.data_dir, self.json_files[name])
+
+    def _set_json_signature(self, name: str) -> None:
+        self._execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                      (f"json_signature:{name}", _file_signature(self._json_path(name))))
+
+    def import_json(self, name: str, path: Optional[str] = None,
+                    keep_newer_than: Optional[float] = None) -> Optional[int]:
+        """Replace collection `name` with a {key: value} JSON file (see Collection.replace). Returns the entry count, None if unreadable."""
+        path = path or self._json_path(name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load state file {path}: {e}")
+            return None
+        if not isinstance(data, dict):
+            logger.warning(f"State file {path} is not a JSON object, not imported.")
+            return None
+        self.collection(name).replace(data, keep_newer_than)
+        return len(data)
+
+    def import_changed_json(self, keep_newer_than: Optional[float] = None) -> List[str]:
+        """Import the JSON files that changed since the store last read or wrote them. Returns their collections."""
+        imported = []
+        for name in self.json_files:
+            signature = _file_signature(self._json_path(name))
+            if signature is None:
+                continue
+            row = self._execute("SELECT value FROM meta WHERE key = ?", (f"json_signature:{name}",)).fetchone()
+            if row and row[0] == signature:
+                continue
+            count = self.import_json(name, keep_newer_than=keep_newer_than)
+            self._set_json_signature(name)
+            if count is not None:
+                imported.append(name)
+                logger.info(f"State store: imported {count} entries of {name} from {self._json_path(name)}.")
+        return imported
+
+    def export_json(self, name: str, path: Optional[str] = None) -> int:
+        """Write collection `name` as {key: value} (the old file layout). Returns the entry count."""
+        own_file = path is None
+        path = path or self._json_path(name)
+        data = self.collection(name).to_dict()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        if own_file:
+            self._set_json_signature(name)  # our own export is not imported back
+        return len(data)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[StateStore] = None
+
+
+def get_state_store() -> StateStore:
+    """The shared store of this process, opened on first use."""
+    global _store
+    if _store is None:
+        _store = StateStore()
+    return _store
+
+
+def export_state_files(db_path: str = STATE_DB, data_dir: str = DATA_DIR,
+                       names: Optional[List[str]] = None) -> Optional[Dict[str, int]]:
+    """Export collections (default: all) to their JSON files if the database exists; {collection: count} or None."""
+    if not os.path.exists(db_path):
+        return None
+    store = StateStore(db_path, data_dir)
+    try:
+        return {name: store.export_json(name) for name in (names or store.json_files)}
+    finally:
+        store.close()
+
+
+def import_state_files(db_path: str = STATE_DB, data_dir: str = DATA_DIR,
+                       keep_newer_than: Optional[float] = None) -> List[str]:
+    """Pull changed JSON files into an existing database (a missing one imports them when first opened).
+
+    Pass the time of the export the files were merged from as `keep_newer_than`, so rows the bot
+    wrote since then are not overwritten by the older file.
+    """
+    if not os.path.exists(db_path):
+        return []
+    store = StateStore(db_path, data_dir, import_on_open=False)
+    try:
+        return store.import_changed_json(keep_newer_than)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if sys.argv[1:] != ["export"]:
+        sys.exit("Usage: python -m core.state_store export")
+    counts = export_state_files()
+    if counts is None:
+        print(f"{STATE_DB} does not exist")
+    for name, count in (counts or {}).items():
+        print(f"Exported {count} entries of {name} to {os.path.join(DATA_DIR, STATE_FILES[name])}")
+
+# --- END OF FILE state_store.py ---
@@ -160,7 +160,7 @@ class BaseDigest:
             since_time: Optional start time for digest (defaults to last 24 hours)
             translate_to_ua: Whether to translate Russian text to Ukrainian
         """
-        from core.settings_loader import bot
+        from services.send_scheduler import scheduled_bot
         from services.telegram_sender import send_message_to_admin
 
         now = datetime.now()
@@ -196,7 +196,7 @@ class BaseDigest:
         try:
             # Telegram max message length is 4096 chars
             if len(message) <= 4096:
-                await bot.send_message(
+                await scheduled_bot.send_message(
                     chat_id=target_chat_id,
                     message_thread_id=target_topic_id,
                     text=message,
@@ -210,7 +210,7 @@ class BaseDigest:
                 logger.info(f"{self.digest_name}: message too long ({len(message)} chars), splitting into {len(parts)} parts")
                 for i, part in enumerate(parts):
                     clean_part = fix_html_for_telegram(part)
-                    await bot.send_message(
+                    await scheduled_bot.send_message(
                         chat_id=target_chat_id,
                         message_thread_id=target_topic_id,
                         text=clean_part,
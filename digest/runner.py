@@ -23,14 +23,17 @@ COOLDOWN = timedelta(hours=20)
 DEFAULT_TEST_CHAT_ID = -1001960832921
 
 
-def get_last_run_time(path: str, default_age: timedelta) -> datetime:
-    """Last send time from `path`, or now - default_age when missing/unreadable."""
+def get_last_run_time(path: str, default_age: timedelta, key: str = 'last_digest_time') -> datetime:
+    """Last send time from `path`, or now - default_age when missing/unreadable.
+
+    The collectors stamp their files under 'last_run_time' instead.
+    """
     fallback = datetime.now() - default_age
     if not os.path.exists(path):
         return fallback
     try:
         with open(path, 'r', encoding='utf-8') as f:
-            return datetime.fromisoformat(json.load(f)['last_digest_time'])
+            return datetime.fromisoformat(json.load(f)[key])
     except Exception as e:
         logger.error(f"Error reading last run time from {path}: {e}")
         return fallback
@@ -114,13 +117,13 @@ def stats_target() -> tuple:
 
 async def send_to_groups(manager, groups: List[Dict], since_time: datetime,
                          label: str, translate: Optional[Callable[[Dict], bool]] = None) -> int:
-    """Send the digest to every group, one second apart. Returns how many succeeded.
+    """Send the digest to every group concurrently. Returns how many succeeded.
 
+    Pacing is left to services.send_scheduler, which rate-limits each chat on its own.
     A failing group is logged and skipped — one bad chat_id must not block the rest.
     `translate` decides per group; None means the manager takes no translate flag.
     """
-    sent_count = 0
-    for group in groups:
+    async def _send_one(group: Dict) -> bool:
         try:
             chat_id = int(group['chat_id'])
             topic_id = parse_topic_id(group.get('topic_id'))
@@ -136,13 +139,15 @@ async def send_to_groups(manager, groups: List[Dict], since_time: datetime,
                 since_time=since_time,
                 **extra,
             )
-            sent_count += 1
             logger.info(f"{label} sent to {group['name']}")
-            await asyncio.sleep(1)
+            return True
 
         except Exception as group_err:
             logger.error(f"Failed to send {label} to {group['name']}: {group_err}")
+            return False
 
+    results = await asyncio.gather(*(_send_one(group) for group in groups))
+    sent_count = sum(results)
     logger.info(f"{label} sent to {sent_count}/{len(groups)} groups")
     return sent_count
 
@@ -4,65 +4,74 @@ import time
 import traceback
 import html
 import re
-import json
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import os
 import logging
 
 from core.settings_loader import (
     LOG, IS_TEST_MODE, FEED_URL, TEST_LAST_ENTRY_LINK, YOUTUBE_API_KEY,
+    PIPELINE_WORKERS, POST_DELAY_SECONDS,
     last_entry_file_path, current_directory, close_clients
 )
+from core.state_store import get_state_store
 from parsers.feed_handler import (
     read_last_entry_link, write_last_entry_link, get_new_feed_entries
 )
 from parsers.tracker_parser import parse_tracker_entry, is_homebrew_genre
-from services.youtube_search import search_trailer_on_youtube
-from services.ai_validator import validate_yt_title_with_gpt
+from parsers.parsed_entry import get_parsed_entry, remember_parsed_entry, forget_parsed_entry
+from services.youtube_search import find_trailer_candidates, get_cached_trailer, remember_trailer
+from services.ai_validator import has_verdicts, select_yt_candidate
 from services.titledb_manager import TitleDBManager, DEFAULT_TMP_SCREENSHOT_DIR
-from services.telegram_sender import send_to_telegram, send_error_to_telegram, notify_mismatched_trailer, send_message_to_admin, send_document_to_admin
+from services.telegram_sender import send_to_telegram, prepare_message_texts, send_error_to_telegram, notify_mismatched_trailer, send_message_to_admin, send_document_to_admin
 from digest.daily import digest_manager
 
 logger = logging.getLogger(__name__)
 
-# --- Posted links deduplication ---
-POSTED_LINKS_FILE = os.path.join("data", "posted_links.json")
+# --- Posted links deduplication (collection of core/state_store.py, synced as data/posted_links.json) ---
+POSTED_LINKS_MAX_AGE_SECONDS = 30 * 86400
 
 def load_posted_links() -> dict:
-    """Load set of already posted URLs with timestamps"""
-    if not os.path.exists(POSTED_LINKS_FILE):
-        return {}
-    try:
-        with open(POSTED_LINKS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return {}
+    """All posted URLs with their posting time"""
+    return get_state_store().collection("posted_links").to_dict()
+
+def get_posted_link(url: str) -> Optional[str]:
+    """Posting time of `url`, or None if it was not posted"""
+    return get_state_store().collection("posted_links").get(url)
 
 def save_posted_link(url: str):
     """Add URL to posted links tracker"""
-    links = load_posted_links()
-    links[url] = datetime.now().isoformat()
-    # Clean entries older than 30 days
-    cutoff = datetime.now().timestamp() - 30 * 86400
-    links = {u: t for u, t in links.items()
-             if datetime.fromisoformat(t).timestamp() > cutoff}
     try:
-        with open(POSTED_LINKS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(links, f, indent=2)
+        get_state_store().collection("posted_links").put(url, datetime.now().isoformat())
     except Exception as e:
         logger.error(f"Error saving posted links: {e}")
 
-# Initialize TitleDB Manager
+def prune_posted_links():
+    """Drop entries older than 30 days (once per cycle, not on every post)"""
+    cutoff = datetime.now().timestamp() - POSTED_LINKS_MAX_AGE_SECONDS
+    try:
+        get_state_store().collection("posted_links").delete_if(
+            lambda url, posted: datetime.fromisoformat(posted).timestamp() <= cutoff)
+    except Exception as e:
+        logger.error(f"Error pruning posted links: {e}")
+
+# TitleDB Manager, created when the first entry needs screenshots (runs without new entries skip it)
 titledb_json_dir_relative = "titledb"
 titledb_json_dir_absolute = os.path.join(current_directory, titledb_json_dir_relative)
 db_manager: Optional[TitleDBManager] = None
-try:
-    db_manager = TitleDBManager(titledb_json_path=titledb_json_dir_relative)
-except FileNotFoundError as e:
-    logger.error(f"Error initializing TitleDBManager: {e}")
-    logger.warning("Screenshots from titledb will be unavailable.")
+_db_manager_failed = False
+
+def get_db_manager() -> Optional[TitleDBManager]:
+    global db_manager, _db_manager_failed
+    if db_manager is None and not _db_manager_failed:
+        try:
+            db_manager = TitleDBManager(titledb_json_path=titledb_json_dir_relative)
+        except FileNotFoundError as e:
+            _db_manager_failed = True
+            logger.error(f"Error initializing TitleDBManager: {e}")
+            logger.warning("Screenshots from titledb will be unavailable.")
+    return db_manager
 
 def get_youtube_video_id(url: Optional[str]) -> Optional[str]:
     """Extracts YouTube video ID from various URL formats."""
@@ -76,6 +85,300 @@ def get_youtube_video_id(url: Optional[str]) -> Optional[str]:
     except Exception as e: logger.error(f"Error parsing YouTube URL {url}: {e}")
     return None
 
+# --- Entry pipeline ---
+# prepare_entry() (fetch/parse, trailer lookup, screenshots, translation) runs for several
+# entries at once in a PIPELINE_WORKERS-bounded pool; publish_entry() consumes the results
+# strictly in feed order, so last_entry.txt only moves past entries that were really posted.
+entry_link_in_progress = "N/A"
+
+
+def _build_update_description(raw_update_text: Optional[str]) -> Optional[str]:
+    """Short, HTML-safe update note for the daily digest (links kept, 200 chars max)."""
+    if not raw_update_text:
+        return None
+    # Strip the "<b>Оновлено:</b>" / "<b>Обновлено:</b>" prefix (keeping the <a> link if present)
+    update_text = re.sub(r'^<b>(<a[^>]+>(?:Оновлено|Обновлено)</a>):</b>\s*\n*', r'\1:\n', raw_update_text)
+    update_text = re.sub(r'^<b>(?:Оновлено|Обновлено):</b>\s*\n*', '', update_text)
+    # Remove HTML tags EXCEPT <a> tags (keep links)
+    update_text = re.sub(r'<(?!/?a\b)[^>]+>', '', update_text)
+
+    # Escape HTML entities but preserve <a> tags
+    parts = re.split(r'(<a\s+[^>]*>.*?</a>)', update_text)
+    escaped_parts = []
+    for part in parts:
+        if part.startswith('<a '):
+            escaped_parts.append(part)  # Keep <a> tags as-is
+        else:
+            escaped_parts.append(html.escape(part))  # Escape text
+    update_text = ''.join(escaped_parts)
+
+    update_description = update_text[:200]  # Limit length
+    # Fix broken HTML tags from truncation
+    # Remove any incomplete HTML tag at the very end (like `<a` or `</` or `<`)
+    update_description = re.sub(r'<[^>]*$', '', update_description)
+    # Close any unclosed <a> tag at the end to keep HTML tags balanced
+    open_tags = len(re.findall(r'<a\s', update_description))
+    close_tags = len(re.findall(r'</a>', update_description))
+    if open_tags > close_tags:
+        update_description += '</a>'
+    return update_description.strip() or None
+
+
+async def _find_trailer(title_for_search: str) -> Tuple[Optional[str], Optional[str]]:
+    """(trailer_url, video_id) of the YouTube candidate chosen by select_yt_candidate(), cached per game."""
+    if not YOUTUBE_API_KEY:
+        return None, None
+    cached = get_cached_trailer(title_for_search)
+    if cached is not None:
+        logger.info(f"Trailer lookup cached for '{title_for_search}': {cached.url or 'no trailer'}")
+        return cached.url, cached.video_id
+    try:
+        candidates, search_complete = await find_trailer_candidates(title_for_search, YOUTUBE_API_KEY)
+        # All candidates are judged together: cached verdicts first, then at most one LLM request
+        best_index = await select_yt_candidate(title_for_search, [title for _, title in candidates])
+        validated_trailer = candidates[best_index] if best_index is not None else None
+
+        if validated_trailer:
+            trailer_url, found_yt_title = validated_trailer
+            video_id = get_youtube_video_id(trailer_url)
+            if video_id:
+                logger.info(f"Trailer validated: '{found_yt_title}' — {trailer_url}")
+            remember_trailer(title_for_search, candidates, video_id)
+            return trailer_url, video_id
+        elif candidates:
+            # No candidate passed — report the best (first) one
+            best_url, best_title = candidates[0]
+            logger.warning(f"No candidate passed validation. Best: '{best_title}'")
+            await notify_mismatched_trailer(title_for_search, best_title, best_url)
+        # "No trailer" is cached only if every query and every Layer 3 request got an answer
+        if search_complete and has_verdicts(title_for_search, [title for _, title in candidates]):
+            remember_trailer(title_for_search, candidates, None)
+        else:
+            logger.info(f"Trailer lookup for '{title_for_search}' not cached: the search or validation did not finish.")
+
+    except Exception as yt_err:
+        logger.warning(f"YouTube search/validation failed: {yt_err}")
+    return None, None
+
+
+async def _find_screenshots(title_for_lookup: str, page_display_title: str,
+                            genres: List[str], description: str) -> List[str]:
+    """Download TitleDB screenshots for the release (skipped for Homebrew)."""
+    if is_homebrew_genre(genres=genres, description=description, title=page_display_title):
+        logger.info(f"Homebrew release detected ('{page_display_title}'). Skipping screenshot lookup/download.")
+        return []
+    titledb = get_db_manager()
+    if not titledb:
+        return []
+    game_db_data = await asyncio.to_thread(titledb.find_game_data, title_for_lookup)
+    if not game_db_data:
+        return []
+    screenshot_urls_from_db = game_db_data.get('screenshots', [])
+    if not screenshot_urls_from_db or not isinstance(screenshot_urls_from_db, list):
+        return []
+    logger.debug(f"Found {len(screenshot_urls_from_db)} screenshot URLs in titledb.")
+    return await titledb.download_screenshots(
+        screenshot_urls_from_db, nsuid=game_db_data.get('nsuId'), game_title=title_for_lookup
+    )
+
+
+async def prepare_entry(entry: dict) -> dict:
+    """
+    Everything that can run ahead of posting: parse, trailer, screenshots, translation.
+
+    Returns a dict with 'status': 'ready' (plus the post data), 'skip' (already posted or a
+    content error, already reported) or 'stop' (fetch failure — this and later entries wait
+    for the next run).
+    """
+    entry_link = entry.get('link')
+    entry_title_feed_or_placeholder = entry.get('title', 'TEST_MODE_FETCH_TITLE')
+    if not entry_link:
+        logger.warning("Skipping entry with missing link.")
+        return {'status': 'skip', 'link': None}
+
+    logger.info(f"--- Preparing Entry --- {entry_link}")
+
+    # Deduplication: skip if already posted (but allow updates through)
+    is_updated_entry = "[Обновлено]" in entry_title_feed_or_placeholder or "[Updated]" in entry_title_feed_or_placeholder
+    posted_at = get_posted_link(entry_link)
+    if posted_at and not IS_TEST_MODE and not is_updated_entry:
+        logger.info(f"SKIP: Already posted {entry_link} on {posted_at}")
+        return {'status': 'skip', 'link': entry_link}
+
+    # A parse kept from a run whose Telegram send failed is published without fetching the page again
+    parsed = get_parsed_entry(entry_link, entry_title_feed_or_placeholder)
+    if parsed:
+        logger.info(f"Reusing parsed entry from {datetime.fromtimestamp(parsed.parsed_at):%Y-%m-%d %H:%M} for {entry_link}")
+    try:
+        if not parsed:
+            parsed = await parse_tracker_entry(entry_link, entry_title_feed_or_placeholder)
+    except ValueError as parse_err:
+        err_msg = str(parse_err)
+        logger.warning(f"Parse failed for {entry_link}: {err_msg}")
+        await send_error_to_telegram(
+            f"Failed to parse tracker page.\n\n<b>Reason</b>: {html.escape(err_msg)}",
+            entry_url=entry_link
+        )
+        # Any fetch failure: stop — entry will be retried on next run
+        # (continue only for content parse errors, not fetch errors)
+        if "fetch page content" in err_msg.lower():
+            return {'status': 'stop', 'link': entry_link}
+        return {'status': 'skip', 'link': entry_link}
+    except Exception as parse_err:
+        logger.error(f"Unexpected error parsing {entry_link}: {parse_err}")
+        await send_error_to_telegram(
+            f"Unexpected parse error.\n\n<b>Error</b>: {html.escape(type(parse_err).__name__)}: {html.escape(str(parse_err))}",
+            entry_url=entry_link
+        )
+        return {'status': 'skip', 'link': entry_link}
+
+    if not parsed:
+        logger.warning(f"Failed to parse data for entry: {entry_link}. Skipping.")
+        await send_error_to_telegram(f"Parser returned empty data (no exception raised).\n\n<b>Reason</b>: Unknown — check bot.log for details", entry_url=entry_link)
+        return {'status': 'skip', 'link': entry_link}
+
+    page_display_title = parsed.display_title
+    if not page_display_title or page_display_title == "Unknown Title":
+        logger.error(f"Parser failed to extract display title for {entry_link}. Skipping.")
+        await send_error_to_telegram(f"Parser failed to extract display title for link: {entry_link}", entry_url=entry_link)
+        return {'status': 'skip', 'link': entry_link}
+    if not parsed.search_title:
+        logger.warning(f"Parser failed to extract title block for YT search. Using display title '{page_display_title}' as fallback.")
+        parsed.search_title = page_display_title
+    title_text_for_youtube = parsed.search_title
+    remember_parsed_entry(parsed)
+    logger.debug(f"Parsed in {parsed.parse_seconds:.2f}s (+{parsed.fetch_seconds:.2f}s fetch)")
+
+    logger.info(f"Display Title: '{page_display_title}'")
+    logger.info(f"Title for Search/Lookup: '{title_text_for_youtube}'")
+
+    update_prefix = "<b>[Обновлено]</b> " if is_updated_entry else ""
+    title_link_html = f'<a href="{entry_link}">{html.escape(page_display_title)}</a>'
+    final_title_for_telegram = f"{update_prefix}{title_link_html}"
+
+    # Trailer lookup and TitleDB screenshots are independent of each other
+    (trailer_url, video_id_for_thumbnail), local_screenshot_paths = await asyncio.gather(
+        _find_trailer(title_text_for_youtube),
+        _find_screenshots(title_text_for_youtube, page_display_title, parsed.genres, parsed.description),
+    )
+    if trailer_url and 'Trailer</a>' not in final_title_for_telegram:
+        final_title_for_telegram += f' | <a href="{trailer_url}">Trailer</a>'
+
+    prepared_texts = await prepare_message_texts(final_title_for_telegram, parsed.magnet_link, parsed.description, parsed.torrent_size)
+
+    return {
+        'status': 'ready',
+        'link': entry_link,
+        'parsed': parsed,
+        'title_for_telegram': final_title_for_telegram,
+        'trailer_url': trailer_url,
+        'video_id': video_id_for_thumbnail,
+        'screenshots': local_screenshot_paths,
+        'texts': prepared_texts,
+    }
+
+
+async def publish_entry(prepared: dict, cycle_log_file: str) -> bool:
+    """Send a prepared entry, add it to the daily digest and advance the checkpoint. True if sent."""
+    entry_link = prepared['link']
+    parsed = prepared['parsed']
+    logger.info(f"--- Publishing Entry --- {entry_link}")
+    try:
+        await send_to_telegram(
+            prepared['title_for_telegram'],
+            parsed.image_url,
+            parsed.magnet_link,
+            parsed.description,
+            entry_link,
+            prepared['video_id'],
+            prepared['screenshots'],
+            cycle_log_file=cycle_log_file,
+            torrent_size=parsed.torrent_size,
+            prepared_texts=prepared['texts'],
+        )
+    except TypeError as te:
+        logger.error(f"TypeError calling send_to_telegram: {te}. Check function signature.")
+        logger.error(traceback.format_exc())
+        await send_error_to_telegram(f"TypeError calling send_to_telegram for {entry_link}.", entry_url=entry_link)
+        return False
+    except Exception as tg_err:
+        logger.error(f"Error sending entry {entry_link} to Telegram: {tg_err}")
+        # Don't write last entry link if sending failed; the parse stays stored for the retry
+        return False
+
+    forget_parsed_entry(entry_link)
+
+    # Add to daily digest after successful send
+    try:
+        update_description = _build_update_description(parsed.update_text) if parsed.is_updated else None
+
+        # Add to daily digest (skip in test mode to avoid duplicates)
+        if not IS_TEST_MODE:
+            digest_manager.add_entry(
+                title=parsed.display_title,
+                entry_url=entry_link,
+                size=parsed.torrent_size,
+                language=parsed.torrent_language,
+                is_updated=parsed.is_updated,
+                update_description=update_description,
+                genres=parsed.genres,
+                trailer_url=prepared['trailer_url']
+            )
+            logger.info(f"Added to daily digest: {parsed.display_title}")
+        else:
+            logger.debug(f"TEST MODE: Skipped adding to digest: {parsed.display_title}")
+    except Exception as digest_err:
+        logger.warning(f"Failed to add entry to digest: {digest_err}")
+
+    if not IS_TEST_MODE:
+        await asyncio.to_thread(write_last_entry_link, last_entry_file_path, entry_link)
+        save_posted_link(entry_link)
+    return True
+
+
+async def process_entries(entries_to_process: List[dict], cycle_log_file: str) -> int:
+    """Prepare entries concurrently, publish them in order POST_DELAY_SECONDS apart. Returns posts sent."""
+    global entry_link_in_progress
+    semaphore = asyncio.Semaphore(PIPELINE_WORKERS)
+
+    async def _prepare(entry: dict) -> dict:
+        async with semaphore:
+            return await prepare_entry(entry)
+
+    logger.info(f"Preparing {len(entries_to_process)} entries with {PIPELINE_WORKERS} worker(s)...")
+    tasks = [asyncio.create_task(_prepare(entry)) for entry in entries_to_process]
+    processed_count = 0
+    last_sent_at: Optional[float] = None
+    try:
+        for entry, task in zip(entries_to_process, tasks):
+            entry_link_in_progress = entry.get('link') or "N/A"
+            prepared = await task
+            if prepared['status'] == 'stop':
+                logger.warning("Stopping entry processing due to fetch error. Remaining entries will be retried next run.")
+                break
+            if prepared['status'] != 'ready':
+                continue
+
+            # Pace posts; time spent waiting for preparation counts towards the delay
+            if last_sent_at is not None and not IS_TEST_MODE:
+                wait = POST_DELAY_SECONDS - (time.monotonic() - last_sent_at)
+                if wait > 0:
+                    logger.info(f"Waiting {wait:.0f} seconds before posting next entry...")
+                    await asyncio.sleep(wait)
+
+            if await publish_entry(prepared, cycle_log_file):
+                processed_count += 1
+            last_sent_at = time.monotonic()
+    finally:
+        # Entries prepared past a stop (or a crash) are dropped; they come back on the next run
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    entry_link_in_progress = "N/A"
+    return processed_count
+
+
 async def main_loop():
     logger.info("-------------------------------------")
     logger.info("Starting RuTracker Feed Checker...")
@@ -83,7 +386,7 @@ async def main_loop():
     logger.info(f"Log enabled: {LOG}")
     logger.info("-------------------------------------")
 
-    entry_link_in_progress = "N/A"; processed_count = 0
+    processed_count = 0
 
     try:
         if IS_TEST_MODE:
@@ -107,215 +410,19 @@ async def main_loop():
             f.write(f"=== BOT RUN CYCLE {datetime.now().isoformat()} ===\n")
             f.write(f"Entries to process: {len(entries_to_process)}\n\n")
 
-        for entry in entries_to_process:
-            entry_link = entry.get('link')
-            entry_title_feed_or_placeholder = entry.get('title', 'TEST_MODE_FETCH_TITLE')
-            if not entry_link: logger.warning("Skipping entry with missing link."); continue
-            entry_link_in_progress = entry_link
-
-            logger.info(f"\n--- Processing Entry ---")
-            logger.info(f"Link: {entry_link}")
-
-            # Deduplication: skip if already posted (but allow updates through)
-            is_updated_entry = "[Обновлено]" in entry_title_feed_or_placeholder or "[Updated]" in entry_title_feed_or_placeholder
-            posted_links = load_posted_links()
-            if entry_link in posted_links and not IS_TEST_MODE and not is_updated_entry:
-                logger.info(f"SKIP: Already posted {entry_link} on {posted_links[entry_link]}")
-                continue
-
-            try:
-                parsed_data = await parse_tracker_entry(entry_link, entry_title_feed_or_placeholder)
-            except ValueError as parse_err:
-                err_msg = str(parse_err)
-                logger.warning(f"Parse failed for {entry_link}: {err_msg}")
-                await send_error_to_telegram(
-                    f"Failed to parse tracker page.\n\n<b>Reason</b>: {html.escape(err_msg)}",
-                    entry_url=entry_link
-                )
-                # Any fetch failure: stop — entry will be retried on next run
-                # (continue only for content parse errors, not fetch errors)
-                if "fetch page content" in err_msg.lower():
-                    logger.warning("Stopping entry processing due to fetch error. Remaining entries will be retried next run.")
-                    break
-                continue
-            except Exception as parse_err:
-                logger.error(f"Unexpected error parsing {entry_link}: {parse_err}")
-                await send_error_to_telegram(
-                    f"Unexpected parse error.\n\n<b>Error</b>: {html.escape(type(parse_err).__name__)}: {html.escape(str(parse_err))}",
-                    entry_url=entry_link
-                )
-                continue
-
-            if parsed_data:
-                page_display_title, title_text_for_youtube, cover_image_url, magnet_link, cleaned_description, torrent_size, torrent_language, genres, raw_update_text = parsed_data
-
-                if not page_display_title or page_display_title == "Unknown Title":
-                     logger.error(f"Parser failed to extract display title for {entry_link}. Skipping.")
-                     await send_error_to_telegram(f"Parser failed to extract display title for link: {entry_link}", entry_url=entry_link); continue
-                if not title_text_for_youtube:
-                     logger.warning(f"Parser failed to extract title block for YT search. Using display title '{page_display_title}' as fallback.")
-                     title_text_for_youtube = page_display_title
-
-                logger.info(f"Display Title: '{page_display_title}'")
-                logger.info(f"Title for Search/Lookup: '{title_text_for_youtube}'")
-
-                is_updated = is_updated_entry
-                update_prefix = "<b>[Обновлено]</b> " if is_updated else ""
-                title_link_html = f'<a href="{entry_link}">{html.escape(page_display_title)}</a>'
-                final_title_for_telegram = f"{update_prefix}{title_link_html}"
-
-                # Search for Trailer & Prepare Thumbnail
-                trailer_thumbnail_url = None # Initialize
-                video_id_for_thumbnail = None # Initialize video ID
-                current_trailer_url = None # For digest
-                try:
-                    candidates = await search_trailer_on_youtube(title_text_for_youtube, YOUTUBE_API_KEY)
-                    validated_trailer = None
-
-                    for candidate_url, candidate_title in candidates:
-                        is_relevant = await validate_yt_title_with_gpt(title_text_for_youtube, candidate_title)
-                        if is_relevant:
-                            validated_trailer = (candidate_url, candidate_title)
-                            break
-
-                    if validated_trailer:
-                        trailer_url, found_yt_title = validated_trailer
-                        current_trailer_url = trailer_url
-                        video_id_for_thumbnail = get_youtube_video_id(trailer_url)
-                        if video_id_for_thumbnail:
-                            logger.info(f"Trailer validated: '{found_yt_title}' — {trailer_url}")
-                        if 'Trailer</a>' not in final_title_for_telegram:
-                            final_title_for_telegram += f' | <a href="{trailer_url}">Trailer</a>'
-                    elif candidates:
-                        # No candidate passed — report the best (first) one
-                        best_url, best_title = candidates[0]
-                        logger.warning(f"No candidate passed validation. Best: '{best_title}'")
-                        await notify_mismatched_trailer(title_text_for_youtube, best_title, best_url)
-
-                except Exception as yt_err:
-                    logger.warning(f"YouTube search/validation failed: {yt_err}")
-
-                # Get and Download Screenshots from TitleDB (Skip for Homebrew releases)
-                local_screenshot_paths: List[str] = []
-                is_homebrew = is_homebrew_genre(genres=genres, description=cleaned_description, title=page_display_title)
-                if is_homebrew:
-                    logger.info(f"Homebrew release detected ('{page_display_title}'). Skipping screenshot lookup/download.")
-                elif db_manager:
-                    game_db_data = await asyncio.to_thread(db_manager.find_game_data, title_text_for_youtube)
-                    if game_db_data:
-                        nsuid_from_db = game_db_data.get('nsuId')
-                        screenshot_urls_from_db = game_db_data.get('screenshots', [])
-                        if screenshot_urls_from_db and isinstance(screenshot_urls_from_db, list):
-                             logger.debug(f"Found {len(screenshot_urls_from_db)} screenshot URLs in titledb.")
-                             local_screenshot_paths = await db_manager.download_screenshots(
-                                 screenshot_urls_from_db, nsuid=nsuid_from_db, game_title=title_text_for_youtube
-                             )
-
-                # Send to Telegram
-                try:
-                     await send_to_telegram(
-                          final_title_for_telegram,
-                          cover_image_url,
-                          magnet_link,
-                          cleaned_description,
-                          entry_link,
-                          video_id_for_thumbnail,
-                          local_screenshot_paths,
-                          cycle_log_file=cycle_log_file,
-                          torrent_size=torrent_size
-                     )
-                     processed_count += 1
-
-                     # Add to daily digest after successful send
-                     try:
-                         # Build update_description directly from parser's raw update text
-                         update_description = None
-                         if is_updated and raw_update_text:
-                             # Strip the "<b>Оновлено:</b>" / "<b>Обновлено:</b>" prefix (keeping the <a> link if present)
-                             update_text = re.sub(r'^<b>(<a[^>]+>(?:Оновлено|Обновлено)</a>):</b>\s*\n*', r'\1:\n', raw_update_text)
-                             update_text = re.sub(r'^<b>(?:Оновлено|Обновлено):</b>\s*\n*', '', update_text)
-                             # Remove HTML tags EXCEPT <a> tags (keep links)
-                             update_text = re.sub(r'<(?!/?a\b)[^>]+>', '', update_text)
-
-                             # Escape HTML entities but preserve <a> tags
-                             parts = re.split(r'(<a\s+[^>]*>.*?</a>)', update_text)
-                             escaped_parts = []
-                             for part in parts:
-                                 if part.startswith('<a '):
-                                     escaped_parts.append(part)  # Keep <a> tags as-is
-                                 else:
-                                     escaped_parts.append(html.escape(part))  # Escape text
-                             update_text = ''.join(escaped_parts)
-
-                             update_description = update_text[:200]  # Limit length
-                             # Fix broken HTML tags from truncation
-                             # Remove any incomplete HTML tag at the very end (like `<a` or `</` or `<`)
-                             update_description = re.sub(r'<[^>]*$', '', update_description)
-                             # Close any unclosed <a> tag at the end to keep HTML tags balanced
-                             open_tags = len(re.findall(r'<a\s', update_description))
-                             close_tags = len(re.findall(r'</a>', update_description))
-                             if open_tags > close_tags:
-                                 update_description += '</a>'
-                             update_description = update_description.strip() or None
-
-                         # Add to daily digest (skip in test mode to avoid duplicates)
-                         if not IS_TEST_MODE:
-                             digest_manager.add_entry(
-                                 title=page_display_title,
-                                 entry_url=entry_link,
-                                 size=torrent_size,
-                                 language=torrent_language,
-                                 is_updated=is_updated,
-                                 update_description=update_description,
-                                 genres=genres,
-                                 trailer_url=current_trailer_url
-                             )
-                             logger.info(f"Added to daily digest: {page_display_title}")
-                         else:
-                             logger.debug(f"TEST MODE: Skipped adding to digest: {page_display_title}")
-                     except Exception as digest_err:
-                         logger.warning(f"Failed to add entry to digest: {digest_err}")
-
-                     if not IS_TEST_MODE:
-                         await asyncio.to_thread(write_last_entry_link, last_entry_file_path, entry_link)
-                         save_posted_link(entry_link)
-                except TypeError as te:
-                     logger.error(f"TypeError calling send_to_telegram: {te}. Check function signature.")
-                     logger.error(traceback.format_exc())
-                     await send_error_to_telegram(f"TypeError calling send_to_telegram for {entry_link}.", entry_url=entry_link)
-                     continue
-                except Exception as tg_err:
-                     logger.error(f"Error sending entry {entry_link} to Telegram: {tg_err}")
-                     # Don't write last entry link if sending failed
-                     continue
-
-                # Delay
-                if not IS_TEST_MODE and len(entries_to_process) > 1 and entry is not entries_to_process[-1]:
-                    logger.info("Waiting 60 seconds before processing next entry...")
-                    await asyncio.sleep(60)
-            else:
-                logger.warning(f"Failed to parse data for entry: {entry_link}. Skipping.")
-                send_error = True;
-                # Avoid sending error if the feed itself failed (new_entries would be None)
-                if not IS_TEST_MODE and 'new_entries' in locals() and new_entries is None: send_error = False
-                if send_error: await send_error_to_telegram(f"Parser returned empty data (no exception raised).\n\n<b>Reason</b>: Unknown — check bot.log for details", entry_url=entry_link)
+        processed_count = await process_entries(entries_to_process, cycle_log_file)
+        prune_posted_links()
 
         # Loop Finished
         if processed_count > 0: logger.info(f"Successfully processed {processed_count} entries.")
-        elif IS_TEST_MODE and processed_count == 0: logger.info("Test run finished, but the test entry failed processing.")
-        elif not IS_TEST_MODE and 'entries_to_process' in locals() and not entries_to_process: pass # Normal case: no new entries
-        elif not IS_TEST_MODE and 'entries_to_process' in locals() and entries_to_process and processed_count == 0:
+        elif IS_TEST_MODE: logger.info("Test run finished, but the test entry failed processing.")
+        elif entries_to_process:
              logger.info("Finished processing feed, but no entries were successfully parsed and sent.")
              
         # Send log file to admin if any entries were processed to check formatting
         if processed_count > 0 and os.path.exists(cycle_log_file):
              await send_document_to_admin(cycle_log_file, caption=f"Cycle Log: Processed {processed_count} entries")
 
-
-
-
-        entry_link_in_progress = "N/A"
-
     except Exception as e:
         error_type = type(e).__name__; error_message = str(e); stack_trace = traceback.format_exc()
         error_details = (f"Unhandled error in main loop.\n"
@@ -0,0 +1,203 @@
+# --- START OF FILE flaresolverr.py ---
+"""
+FlareSolverr client with a Cloudflare clearance cache.
+
+Challenges are solved inside one FlareSolverr browser session (`sessions.create`) per run.
+The resulting `cf_clearance` cookies and the browser's user agent are stored per host with
+their expiry in data/cf_clearance.json and fed into the shared curl_cffi session, so later
+pages, and the next run on the same machine, skip FlareSolverr until the clearance expires.
+Concurrent fetches that hit a challenge on the same host are solved one at a time, so the
+first earns the clearance and the rest reuse it in the same browser session.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from core.settings_loader import get_session, RUTRACKER_COOKIES, FLARESOLVERR_URL
+from core.http_pool import absorb_cookies
+
+logger = logging.getLogger(__name__)
+
+CLEARANCE_FILE = os.path.join("data", "cf_clearance.json")
+CLEARANCE_DEFAULT_TTL = 30 * 60     # used when FlareSolverr reports no cookie expiry
+CLEARANCE_MARGIN_SECONDS = 60       # treat clearance as expired this long before it really is
+
+_clearance_memory: Optional[dict] = None
+_fs_session_id: Optional[str] = None
+_fs_sessions_supported = True
+_locks: Dict[str, asyncio.Lock] = {}
+_locks_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_clearances() -> dict:
+    """Load persisted clearances, keyed by host."""
+    global _clearance_memory
+    if _clearance_memory is None:
+        if os.path.exists(CLEARANCE_FILE):
+            try:
+                with open(CLEARANCE_FILE, "r", encoding="utf-8") as f:
+                    _clearance_memory = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not load Cloudflare clearance cache: {e}")
+                _clearance_memory = {}
+        else:
+            _clearance_memory = {}
+    return _clearance_memory
+
+
+def _save_clearances() -> None:
+    if _clearance_memory is None:
+        return
+    try:
+        os.makedirs("data", exist_ok=True)
+        with open(CLEARANCE_FILE, "w", encoding="utf-8") as f:
+            json.dump(_clearance_memory, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save Cloudflare clearance cache: {e}")
+
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or ""
+
+
+def get_clearance(url: str) -> Optional[dict]:
+    """Unexpired clearance ({"cookies", "user_agent", "expires_at"}) for the host of `url`, or None."""
+    entry = _get_clearances().get(_host(url))
+    if entry and entry.get("expires_at", 0) - CLEARANCE_MARGIN_SECONDS > time.time():
+        return entry
+    return None
+
+
+def invalidate_clearance(url: str) -> None:
+    """Forget the clearance for the host of `url` (Cloudflare challenged us despite it)."""
+    if _get_clearances().pop(_host(url), None) is not None:
+        _save_clearances()
+
+
+def apply_clearance(url: str) -> Optional[str]:
+    """Load a valid clearance into the shared cookie jar; returns the user agent it is bound to."""
+    entry = get_clearance(url)
+    if not entry:
+        return None
+    absorb_cookies(entry.get("cookies", []))
+    return entry.get("user_agent")
+
+
+def _store_clearance(url: str, cookies: List[dict], user_agent: Optional[str]) -> None:
+    clearance = [c for c in cookies if isinstance(c, dict) and c.get("name") == "cf_clearance"]
+    if not clearance or not user_agent:
+        return
+    expires = clearance[0].get("expiry") or clearance[0].get("expires")
+    expires_at = float(expires) if expires and float(expires) > 0 else time.time() + CLEARANCE_DEFAULT_TTL
+    _get_clearances()[_host(url)] = {
+        "cookies": [{k: c[k] for k in ("name", "value", "domain") if k in c} for c in cookies
+                    if isinstance(c, dict) and "name" in c and "value" in c],
+        "user_agent": user_agent,
+        "expires_at": expires_at,
+    }
+    _save_clearances()
+    logger.info(f"Cached Cloudflare clearance for {_host(url)} until {time.strftime('%Y-%m-%d %H:%M', time.localtime(expires_at))}.")
+
+
+def _lock(key: str) -> asyncio.Lock:
+    """Module lock for `key` ("session" or "solve:<host>")."""
+    global _locks_loop
+    # Locks belong to one event loop; scripts and tests may asyncio.run() more than once
+    loop = asyncio.get_running_loop()
+    if loop is not _locks_loop:
+        _locks_loop = loop
+        _locks.clear()
+    if key not in _locks:
+        _locks[key] = asyncio.Lock()
+    return _locks[key]
+
+
+async def _call(payload: Dict, timeout: int) -> Optional[dict]:
+    """POST a command to FlareSolverr; returns the JSON reply or None on HTTP/transport errors."""
+    session = get_session()
+    async with session.post(FLARESOLVERR_URL, json=payload, timeout=timeout + 10) as response:
+        if response.status != 200:
+            logger.error(f"FlareSolverr returned HTTP {response.status} for {payload.get('cmd')}")
+            return None
+        return await response.json()
+
+
+async def _ensure_fs_session(timeout: int) -> Optional[str]:
+    """Id of this run's FlareSolverr browser session, creating it on first use."""
+    global _fs_session_id, _fs_sessions_supported
+    if _fs_session_id or not _fs_sessions_supported:
+        return _fs_session_id
+    async with _lock("session"):
+        if _fs_session_id or not _fs_sessions_supported:
+            return _fs_session_id  # created while we waited
+        try:
+            data = await _call({"cmd": "sessions.create"}, timeout)
+        except Exception as e:
+            logger.warning(f"FlareSolverr sessions.create failed ({e}); using one-off requests.")
+            data = None
+        if data and data.get("status") == "ok" and data.get("session"):
+            _fs_session_id = data["session"]
+            logger.info(f"FlareSolverr session {_fs_session_id} created.")
+        else:
+            _fs_sessions_supported = False
+    return _fs_session_id
+
+
+async def solve_challenge(url: str, timeout: int = 120) -> Optional[str]:
+    """Fetch `url` through FlareSolverr and cache the clearance it earned; returns the page HTML."""
+    if not FLARESOLVERR_URL:
+        return None
+
+    payload = {
+        "cmd": "request.get",
+        "url": url,
+        "maxTimeout": timeout * 1000
+    }
+    # Pass cf_clearance if present in RUTRACKER_COOKIES, but omit bb_session to avoid invalid session challenge loops
+    if RUTRACKER_COOKIES and "cf_clearance" in RUTRACKER_COOKIES:
+        payload["cookies"] = [{"name": "cf_clearance", "value": RUTRACKER_COOKIES["cf_clearance"], "domain": ".rutracker.org"}]
+
+    try:
+        fs_session = await _ensure_fs_session(timeout)
+        if fs_session:
+            payload["session"] = fs_session
+        async with _lock(f"solve:{_host(url)}"):
+            clearance = get_clearance(url)
+            if clearance:  # earned by a concurrent solve while we waited
+                payload["cookies"] = clearance.get("cookies", [])
+            logger.info(f"Attempting FlareSolverr bypass for {url} via {FLARESOLVERR_URL}...")
+            data = await _call(payload, timeout)
+        if data is None:
+            return None
+        if data.get("status") == "ok" and "solution" in data:
+            solution = data["solution"]
+            cookies = solution.get("cookies", [])
+            # Later curl_cffi requests reuse the clearance cookies via the shared jar
+            absorb_cookies(cookies)
+            _store_clearance(url, cookies, solution.get("userAgent"))
+            logger.info(f"Successfully fetched {url} via FlareSolverr.")
+            return solution.get("response", "")
+        logger.error(f"FlareSolverr response error: {data.get('message')}")
+        return None
+    except Exception as e:
+        logger.error(f"FlareSolverr request failed for {url}: {e}")
+        return None
+
+
+async def close_flaresolverr_session() -> None:
+    """Destroys this run's FlareSolverr browser session, if one was created."""
+    global _fs_session_id
+    session_id, _fs_session_id = _fs_session_id, None
+    if not session_id or not FLARESOLVERR_URL:
+        return
+    try:
+        await _call({"cmd": "sessions.destroy", "session": session_id}, 30)
+        logger.info(f"FlareSolverr session {session_id} destroyed.")
+    except Exception as e:
+        logger.debug(f"Could not destroy FlareSolverr session {session_id}: {e}")
+
+# --- END OF FILE flaresolverr.py ---
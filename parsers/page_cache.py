@@ -0,0 +1,160 @@
+# --- START OF FILE page_cache.py ---
+"""
+On-disk cache of RuTracker pages for conditional GETs.
+
+Each page is stored gzip-compressed under the SHA-256 of its URL, with the ETag and
+Last-Modified it was served with. fetch_page_content() sends them back as If-None-Match /
+If-Modified-Since and reads the body from disk on a 304. Entries older than
+PAGE_CACHE_MAX_AGE_HOURS are dropped; past PAGE_CACHE_MAX_MB the least recently used go first.
+With `page_cache_offline` in test mode, cached pages are served without any request.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from core.settings_loader import PAGE_CACHE_MAX_AGE_HOURS, PAGE_CACHE_MAX_MB, PAGE_CACHE_OFFLINE
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_DIR = os.path.join("data", "page_cache")
+INDEX_FILE_NAME = "index.json"
+
+_index_memory: Optional[dict] = None
+
+
+def _index_path() -> str:
+    return os.path.join(PAGE_CACHE_DIR, INDEX_FILE_NAME)
+
+
+def _body_path(key: str) -> str:
+    return os.path.join(PAGE_CACHE_DIR, f"{key}.html.gz")
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _get_index() -> dict:
+    """Load the cache index: key -> {url, etag, last_modified, fetched_at, last_used, size}."""
+    global _index_memory
+    if _index_memory is None:
+        try:
+            with open(_index_path(), "r", encoding="utf-8") as f:
+                _index_memory = json.load(f)
+        except FileNotFoundError:
+            _index_memory = {}
+        except Exception as e:
+            logger.warning(f"Could not load page cache index: {e}")
+            _index_memory = {}
+    return _index_memory
+
+
+def _save_index() -> None:
+    if _index_memory is None:
+        return
+    try:
+        os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+        with open(_index_path(), "w", encoding="utf-8") as f:
+            json.dump(_index_memory, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save page cache index: {e}")
+
+
+def _drop(key: str) -> None:
+    _get_index().pop(key, None)
+    try:
+        os.remove(_body_path(key))
+    except OSError:
+        pass
+
+
+def _evict() -> None:
+    """Drop expired entries, then least recently used ones until the cache fits PAGE_CACHE_MAX_MB."""
+    index = _get_index()
+    max_age = PAGE_CACHE_MAX_AGE_HOURS * 3600
+    now = time.time()
+    for key in [k for k, e in index.items() if now - e.get("fetched_at", 0) > max_age]:
+        _drop(key)
+    max_bytes = PAGE_CACHE_MAX_MB * 1024 * 1024
+    total = sum(e.get("size", 0) for e in index.values())
+    for key in sorted(index, key=lambda k: index[k].get("last_used", 0)):
+        if total <= max_bytes:
+            break
+        total -= index[key].get("size", 0)
+        _drop(key)
+
+
+def _entry(url: str) -> Optional[dict]:
+    entry = _get_index().get(_key(url))
+    if not entry or time.time() - entry.get("fetched_at", 0) > PAGE_CACHE_MAX_AGE_HOURS * 3600:
+        return None
+    if not os.path.exists(_body_path(_key(url))):
+        return None
+    return entry
+
+
+def conditional_headers(url: str) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since for a cached copy of `url` (empty when there is none)."""
+    entry = _entry(url)
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def load(url: str, revalidated: bool = False) -> Optional[bytes]:
+    """Cached body of `url`; `revalidated=True` after a 304 restarts its max-age clock."""
+    entry = _entry(url)
+    if not entry:
+        return None
+    try:
+        with gzip.open(_body_path(_key(url)), "rb") as f:
+            body = f.read()
+    except Exception as e:
+        logger.warning(f"Could not read cached page for {url}: {e}")
+        _drop(_key(url))
+        return None
+    entry["last_used"] = time.time()
+    if revalidated:
+        entry["fetched_at"] = entry["last_used"]
+    _save_index()
+    return body
+
+
+def load_offline(url: str) -> Optional[bytes]:
+    """Cached body for offline test-mode replay; None when replay is off or the page is missing."""
+    if not PAGE_CACHE_OFFLINE:
+        return None
+    return load(url)
+
+
+def store(url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+    """Save a freshly fetched page with its validators."""
+    key = _key(url)
+    try:
+        os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+        compressed = gzip.compress(body)
+        with open(_body_path(key), "wb") as f:
+            f.write(compressed)
+    except Exception as e:
+        logger.debug(f"Failed to cache page {url}: {e}")
+        return
+    now = time.time()
+    _get_index()[key] = {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": now,
+        "last_used": now,
+        "size": len(compressed),
+    }
+    _evict()
+    _save_index()
+
+# --- END OF FILE page_cache.py ---
@@ -0,0 +1,113 @@
+# --- START OF FILE parsed_entry.py ---
+"""
+ParsedEntry — the result of parsing one RuTracker topic — and its on-disk store.
+
+parse_tracker_entry() returns a ParsedEntry. main.py keeps it in data/parsed_entries.json
+until the post is sent, so an entry whose Telegram send failed is published on the next run
+without fetching and parsing the page again. Stored entries are keyed by topic URL and only
+reused for the same feed title (an update to the topic changes the title). They expire after
+PARSED_ENTRY_TTL_SECONDS.
+"""
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field, fields
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+PARSED_ENTRIES_FILE = os.path.join("data", "parsed_entries.json")
+PARSED_ENTRY_TTL_SECONDS = 24 * 3600
+
+_cache_memory: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class ParsedEntry:
+    """Fields parsed from a RuTracker topic page, plus when and how long parsing took."""
+
+    url: str
+    feed_title: str
+    display_title: str
+    search_title: str
+    image_url: Optional[str]
+    magnet_link: str
+    description: str
+    torrent_size: str = "N/A"
+    torrent_language: str = "N/A"
+    genres: List[str] = field(default_factory=list)
+    update_text: Optional[str] = None
+    parsed_at: float = field(default_factory=time.time)
+    fetch_seconds: float = 0.0
+    parse_seconds: float = 0.0
+
+    @property
+    def is_updated(self) -> bool:
+        return "[Обновлено]" in self.feed_title or "[Updated]" in self.feed_title
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParsedEntry":
+        """Build from to_dict() output; keys this version does not know are ignored."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+def _get_cache() -> dict:
+    """Load stored entries: url -> ParsedEntry.to_dict()."""
+    global _cache_memory
+    if _cache_memory is None:
+        if os.path.exists(PARSED_ENTRIES_FILE):
+            try:
+                with open(PARSED_ENTRIES_FILE, "r", encoding="utf-8") as f:
+                    _cache_memory = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not load parsed entries: {e}")
+                _cache_memory = {}
+        else:
+            _cache_memory = {}
+    return _cache_memory
+
+
+def _save_cache() -> None:
+    """Drop expired entries and persist."""
+    if _cache_memory is None:
+        return
+    now = time.time()
+    for url in [u for u, e in _cache_memory.items() if now - e.get("parsed_at", 0) >= PARSED_ENTRY_TTL_SECONDS]:
+        del _cache_memory[url]
+    try:
+        os.makedirs("data", exist_ok=True)
+        with open(PARSED_ENTRIES_FILE, "w", encoding="utf-8") as f:
+            json.dump(_cache_memory, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save parsed entries: {e}")
+
+
+def get_parsed_entry(url: str, feed_title: str) -> Optional[ParsedEntry]:
+    """Stored, unexpired parse of `url` made for the same feed title, or None."""
+    data = _get_cache().get(url)
+    if not data or data.get("feed_title") != feed_title:
+        return None
+    if time.time() - data.get("parsed_at", 0) >= PARSED_ENTRY_TTL_SECONDS:
+        return None
+    try:
+        return ParsedEntry.from_dict(data)
+    except TypeError as e:
+        logger.warning(f"Discarding unreadable parsed entry for {url}: {e}")
+        return None
+
+
+def remember_parsed_entry(entry: ParsedEntry) -> None:
+    _get_cache()[entry.url] = entry.to_dict()
+    _save_cache()
+
+
+def forget_parsed_entry(url: str) -> None:
+    if _get_cache().pop(url, None) is not None:
+        _save_cache()
+
+# --- END OF FILE parsed_entry.py ---
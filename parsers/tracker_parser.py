@@ -1,16 +1,18 @@
 # --- START OF FILE tracker_parser.py ---
 import aiohttp
 import asyncio
-from curl_cffi.requests import AsyncSession as CurlSession
-from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 import re
 import time
 import html # Import html for escaping
 import logging
-from typing import Optional, Tuple, List # Import Optional, Tuple, List
+from typing import Optional, List, Union
 # --- Import functions moved to html_utils ---
-from utils.html_utils import clean_description_html, make_tag, sanitize_html_for_telegram
-from core.settings_loader import get_session, RUTRACKER_COOKIES, FLARESOLVERR_URL
+from utils.html_utils import clean_description_html, make_tag, parse_page, sanitize_html_for_telegram
+from core.http_pool import get_curl_session, host_limit
+from parsers.flaresolverr import solve_challenge, apply_clearance, invalidate_clearance
+from parsers import page_cache
+from parsers.parsed_entry import ParsedEntry
 # --------------------------------------------
 
 logger = logging.getLogger(__name__)
@@ -55,42 +57,10 @@ def is_homebrew_genre(
 
 async def fetch_via_flaresolverr(url: str, timeout: int = 120) -> Optional[BeautifulSoup]:
     """Fetch page content via FlareSolverr proxy to bypass Cloudflare challenge."""
-    if not FLARESOLVERR_URL:
-        return None
-
-    session = get_session()
-    payload = {
-        "cmd": "request.get",
-        "url": url,
-        "maxTimeout": timeout * 1000
-    }
-    # Pass cf_clearance if present in RUTRACKER_COOKIES, but omit bb_session to avoid invalid session challenge loops
-    if RUTRACKER_COOKIES and "cf_clearance" in RUTRACKER_COOKIES:
-        payload["cookies"] = [{"name": "cf_clearance", "value": RUTRACKER_COOKIES["cf_clearance"], "domain": ".rutracker.org"}]
-
-    try:
-        logger.info(f"Attempting FlareSolverr bypass for {url} via {FLARESOLVERR_URL}...")
-        async with session.post(FLARESOLVERR_URL, json=payload, timeout=timeout + 10) as response:
-            if response.status != 200:
-                logger.error(f"FlareSolverr returned HTTP {response.status}")
-                return None
-            data = await response.json()
-            if data.get("status") == "ok" and "solution" in data:
-                html_content = data["solution"].get("response", "")
-                returned_cookies = data["solution"].get("cookies", [])
-                for c in returned_cookies:
-                    if isinstance(c, dict) and "name" in c and "value" in c:
-                        if RUTRACKER_COOKIES is not None:
-                            RUTRACKER_COOKIES[c["name"]] = c["value"]
-                soup = BeautifulSoup(html_content, "html.parser")
-                logger.info(f"Successfully fetched {url} via FlareSolverr.")
-                return soup
-            else:
-                logger.error(f"FlareSolverr response error: {data.get('message')}")
-                return None
-    except Exception as e:
-        logger.error(f"FlareSolverr request failed for {url}: {e}")
+    html_content = await solve_challenge(url, timeout=timeout)
+    if html_content is None:
         return None
+    return parse_page(html_content)
 
 async def fetch_page_content(url: str, retries: int = 15, delay: int = 1) -> Optional[BeautifulSoup]:
     """Fetch a RuTracker page using curl_cffi with Chrome TLS impersonation and FlareSolverr fallback."""
@@ -101,37 +71,58 @@ async def fetch_page_content(url: str, retries: int = 15, delay: int = 1) -> Opt
         'Upgrade-Insecure-Requests': '1',
         'Referer': 'https://rutracker.org/forum/index.php'
     }
-    cookies = RUTRACKER_COOKIES or {}
+
+    offline_body = page_cache.load_offline(url)
+    if offline_body is not None:
+        logger.info(f"Replaying cached page (offline test mode): {url}")
+        return parse_page(offline_body)
 
     for attempt in range(retries):
         try:
-            async with CurlSession(impersonate="chrome110") as session:
-                response = await session.get(
-                    url, headers=headers, cookies=cookies, timeout=90
-                )
-                if response.status_code == 404:
-                    return None
-                if response.status_code == 403 or "Just a moment..." in response.text:
-                    logger.warning(f"Cloudflare challenge detected (HTTP {response.status_code}) fetching {url}. Trying FlareSolverr...")
-                    flaresolverr_soup = await fetch_via_flaresolverr(url)
-                    if not flaresolverr_soup and "rutracker.org" in url:
-                        alt_url = url.replace("rutracker.org", "rutracker.net")
-                        logger.info(f"Retrying FlareSolverr with alternative mirror: {alt_url}")
-                        flaresolverr_soup = await fetch_via_flaresolverr(alt_url)
-                    if flaresolverr_soup:
-                        return flaresolverr_soup
-                    logger.error(f"FlareSolverr fallback failed for {url} (Attempt {attempt + 1}/{retries})")
-                elif response.status_code != 200:
-                    logger.error(f"HTTP {response.status_code} fetching {url} (Attempt {attempt + 1}/{retries})")
-                else:
-                    soup = BeautifulSoup(response.content, "html.parser")
-                    return soup
-
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay}s... ({attempt + 2}/{retries})")
-                    await asyncio.sleep(delay)
-                    continue
-                raise ValueError(f"Failed to fetch page content (HTTP error {response.status_code} after {retries} attempts)")
+            # Shared keep-alive session: cookies (incl. FlareSolverr's) live in its jar
+            session = get_curl_session()
+            # A cached cf_clearance only works together with the user agent that earned it
+            clearance_user_agent = apply_clearance(url)
+            request_headers = {**headers, **page_cache.conditional_headers(url)}
+            if clearance_user_agent:
+                request_headers['User-Agent'] = clearance_user_agent
+            async with host_limit(url):
+                response = await session.get(url, headers=request_headers, timeout=90)
+            if response.status_code == 304:
+                cached_body = page_cache.load(url, revalidated=True)
+                if cached_body is not None:
+                    logger.debug(f"Page not modified, using cached copy: {url}")
+                    return parse_page(cached_body)
+                # Cache entry vanished between the request and now: fetch unconditionally
+                request_headers = {k: v for k, v in request_headers.items() if not k.startswith('If-')}
+                async with host_limit(url):
+                    response = await session.get(url, headers=request_headers, timeout=90)
+            if response.status_code == 404:
+                return None
+            if response.status_code == 403 or "Just a moment..." in response.text:
+                logger.warning(f"Cloudflare challenge detected (HTTP {response.status_code}) fetching {url}. Trying FlareSolverr...")
+                if clearance_user_agent:
+                    invalidate_clearance(url)
+                flaresolverr_soup = await fetch_via_flaresolverr(url)
+                if not flaresolverr_soup and "rutracker.org" in url:
+                    alt_url = url.replace("rutracker.org", "rutracker.net")
+                    logger.info(f"Retrying FlareSolverr with alternative mirror: {alt_url}")
+                    flaresolverr_soup = await fetch_via_flaresolverr(alt_url)
+                if flaresolverr_soup:
+                    return flaresolverr_soup
+                logger.error(f"FlareSolverr fallback failed for {url} (Attempt {attempt + 1}/{retries})")
+            elif response.status_code != 200:
+                logger.error(f"HTTP {response.status_code} fetching {url} (Attempt {attempt + 1}/{retries})")
+            else:
+                page_cache.store(url, response.content,
+                                 etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+                return parse_page(response.content)
+
+            if attempt < retries - 1:
+                logger.info(f"Retrying in {delay}s... ({attempt + 2}/{retries})")
+                await asyncio.sleep(delay)
+                continue
+            raise ValueError(f"Failed to fetch page content (HTTP error {response.status_code} after {retries} attempts)")
         except ValueError:
             raise
         except Exception as e:
@@ -143,87 +134,119 @@ async def fetch_page_content(url: str, retries: int = 15, delay: int = 1) -> Opt
                 logger.error(f"Failed to fetch {url} after {retries} attempts.")
                 raise ValueError(f"Failed to fetch page content (timeout or connection error after {retries} attempts)")
 
-# get_last_post_with_phrase remains the same
-async def get_last_post_with_phrase(phrase: str, base_url: str, max_pages_to_check: int = 5) -> Optional[str]:
-    logger.debug(f"Searching for update phrase '{phrase}'...")
-    posts_per_page = 30; last_page_offset = -1
-    soup_first_page = await fetch_page_content(base_url)
-    if soup_first_page:
-        last_page_link = soup_first_page.find('a', class_='pg', string='Last')
-        match = None
-        if last_page_link and 'href' in last_page_link.attrs: match = re.search(r'start=(\d+)', last_page_link['href'])
-        if match: last_page_offset = int(match.group(1))
-        if last_page_offset == -1:
-             page_links = soup_first_page.select('a.pg:not([rel="prev"]):not([rel="next"])'); highest_offset = 0
-             for link in page_links:
-                 match = re.search(r'start=(\d+)', link.get('href', ''))
-                 if match:
-                     highest_offset = max(highest_offset, int(match.group(1)))
-             if highest_offset > 0: last_page_offset = highest_offset
-    if last_page_offset == -1: last_page_offset = max(0, (max_pages_to_check - 1) * posts_per_page)
-    checked_urls = set()
+UPDATE_PHRASES = ["Раздача обновлена", "Distribution updated"]
+POSTS_PER_PAGE = 30
+
+
+def _last_page_offset(soup_first_page: Optional[BeautifulSoup]) -> int:
+    """`start=` offset of the topic's last page according to its pagination links, -1 if unknown."""
+    if not soup_first_page:
+        return -1
+    last_page_link = soup_first_page.find('a', class_='pg', string='Last')
+    match = None
+    if last_page_link and 'href' in last_page_link.attrs: match = re.search(r'start=(\d+)', last_page_link['href'])
+    if match: return int(match.group(1))
+    page_links = soup_first_page.select('a.pg:not([rel="prev"]):not([rel="next"])'); highest_offset = 0
+    for link in page_links:
+        match = re.search(r'start=(\d+)', link.get('href', ''))
+        if match:
+            highest_offset = max(highest_offset, int(match.group(1)))
+    return highest_offset if highest_offset > 0 else -1
+
+
+def _extract_update_from_post(post: Tag, phrases: List[str], base_url: str) -> Optional[str]:
+    """Formatted update text from one post, for the first of `phrases` it contains outside quotes."""
+    post_body_div = post.find("div", class_="post_body")
+    if not post_body_div: return None
+
+    # Remove quote blocks before checking for phrase
+    post_body_copy = post_body_div.__copy__()
+    for quote in post_body_copy.find_all("div", class_="q-wrap"):
+        quote.decompose()
+
+    for br in post_body_copy.find_all("br"): br.replace_with("\n")
+    post_text_content = post_body_copy.get_text(separator=" ", strip=True) # Check text content without quotes
+    for phrase in phrases:
+        if phrase not in post_text_content: continue
+        relevant_html_content = ""; found_phrase = False; stop_collecting = False
+        for element in post_body_div.children:
+            element_str = str(element)
+            if phrase in element_str:
+                found_phrase = True
+                parts = element_str.split(phrase, 1)
+                if len(parts) > 1:
+                    relevant_html_content += parts[1]
+                continue
+
+            if found_phrase and not stop_collecting:
+                is_stop_marker = False
+                if isinstance(element, Tag):
+                     if element.name == 'hr' or \
+                        (element.get('class') and ('sp-wrap' in element.get('class') or 'q-wrap' in element.get('class'))) or \
+                        (element.name == 'span' and element.get('class') and 'post-br' in element.get('class')): is_stop_marker = True
+                if is_stop_marker: stop_collecting = True
+                else: relevant_html_content += element_str
+
+        if not found_phrase: continue
+
+        update_text_html = relevant_html_content.strip()
+        # Strips leading commas, periods, and other common separator punctuation
+        update_text_html = re.sub(r'^[.,\s!?:;-]+', '', update_text_html).strip()
+
+        post_link_tag = post.find("a", class_="p-link small", href=re.compile(r'viewtopic\.php\?p='))
+        post_url = ("https://rutracker.org/forum/" + post_link_tag["href"]) if post_link_tag else base_url
+        cleaned_update_text = sanitize_html_for_telegram(update_text_html)
+        # Strip trailing user-directed messages (author addressing another user)
+        # Pattern: username (bold or plain) followed by a message like "Попробуйте..."
+        cleaned_update_text = re.sub(r'\s*(?:<b>[^<]+</b>|[A-Za-z0-9_а-яА-ЯёЁіІїЇєЄґҐ]+)\s*[,.]?\s*(?:Попробуйте|попробуйте|Пожалуйста|пожалуйста|Обновите|обновите).*$', '', cleaned_update_text, flags=re.DOTALL)
+        logger.info(f"Found update phrase '{phrase}' in post {post_url}")
+        return f'<b><a href="{post_url}">Оновлено:</a></b>\n<blockquote>{cleaned_update_text}</blockquote>'
+    return None
+
+
+async def get_last_post_with_phrase(phrases: Union[str, List[str]], base_url: str, max_pages_to_check: int = 5,
+                                    first_page: Optional[BeautifulSoup] = None) -> Optional[str]:
+    """
+    Update text from the newest post containing any of `phrases`, searching the last
+    `max_pages_to_check` pages of the topic. `first_page` is the already fetched soup of
+    `base_url`; it is used for pagination and is not requested again.
+
+    The tail pages are requested concurrently (bounded by the per-host limit of the shared
+    session) and scanned newest first, each once for all phrases; outstanding requests are
+    cancelled as soon as a match is found. Within one post the earlier phrase wins.
+    """
+    phrases = [phrases] if isinstance(phrases, str) else list(phrases)
+    logger.debug(f"Searching for update phrases {phrases}...")
+    soup_first_page = first_page if first_page is not None else await fetch_page_content(base_url)
+    last_page_offset = _last_page_offset(soup_first_page)
+    if last_page_offset == -1: last_page_offset = max(0, (max_pages_to_check - 1) * POSTS_PER_PAGE)
+
+    offsets = []
     for i in range(max_pages_to_check):
-        current_offset = max(0, last_page_offset - (i * posts_per_page)); page_url = f"{base_url}&start={current_offset}"
-        if page_url in checked_urls:
-            continue
-        if len(checked_urls) > 0:
-            await asyncio.sleep(1.5)
-        checked_urls.add(page_url)
-        soup = await fetch_page_content(page_url)
-        if not soup:
-            if current_offset == 0:
-                break
-            continue
-        user_posts = soup.find_all("tbody", class_=re.compile(r"row[12]"))
-        if not user_posts: continue
-        for post in reversed(user_posts):
-            post_body_div = post.find("div", class_="post_body")
-            if not post_body_div: continue
-
-            # Remove quote blocks before checking for phrase
-            post_body_copy = post_body_div.__copy__()
-            for quote in post_body_copy.find_all("div", class_="q-wrap"):
-                quote.decompose()
-
-            for br in post_body_copy.find_all("br"): br.replace_with("\n")
-            post_text_content = post_body_copy.get_text(separator=" ", strip=True) # Check text content without quotes
-            if phrase in post_text_content:
-                logger.info(f"Found update phrase '{phrase}' in post on {page_url}")
-                relevant_html_content = ""; found_phrase = False; stop_collecting = False
-                for element in post_body_div.children:
-                    element_str = str(element)
-                    if phrase in element_str:
-                        found_phrase = True
-                        parts = element_str.split(phrase, 1)
-                        if len(parts) > 1:
-                            relevant_html_content += parts[1]
-                        continue 
-
-                    if found_phrase and not stop_collecting:
-                        is_stop_marker = False
-                        if isinstance(element, Tag):
-                             if element.name == 'hr' or \
-                                (element.get('class') and ('sp-wrap' in element.get('class') or 'q-wrap' in element.get('class'))) or \
-                                (element.name == 'span' and element.get('class') and 'post-br' in element.get('class')): is_stop_marker = True
-                        if is_stop_marker: stop_collecting = True
-                        else: relevant_html_content += element_str
-
-                if not found_phrase: continue 
-
-                update_text_html = relevant_html_content.strip()
-                # Strips leading commas, periods, and other common separator punctuation
-                update_text_html = re.sub(r'^[.,\s!?:;-]+', '', update_text_html).strip()
-                
-                post_link_tag = post.find("a", class_="p-link small", href=re.compile(r'viewtopic\.php\?p='))
-                post_url = ("https://rutracker.org/forum/" + post_link_tag["href"]) if post_link_tag else base_url
-                cleaned_update_text = sanitize_html_for_telegram(update_text_html)
-                # Strip trailing user-directed messages (author addressing another user)
-                # Pattern: username (bold or plain) followed by a message like "Попробуйте..."
-                cleaned_update_text = re.sub(r'\s*(?:<b>[^<]+</b>|[A-Za-z0-9_а-яА-ЯёЁіІїЇєЄґҐ]+)\s*[,.]?\s*(?:Попробуйте|попробуйте|Пожалуйста|пожалуйста|Обновите|обновите).*$', '', cleaned_update_text, flags=re.DOTALL)
-                return f'<b><a href="{post_url}">Оновлено:</a></b>\n<blockquote>{cleaned_update_text}</blockquote>'
-        if current_offset == 0: break 
-    return None 
+        current_offset = max(0, last_page_offset - (i * POSTS_PER_PAGE))
+        if current_offset not in offsets: offsets.append(current_offset)
 
+    async def fetch_page(offset: int) -> Optional[BeautifulSoup]:
+        if offset == 0 and soup_first_page is not None:
+            return soup_first_page
+        return await fetch_page_content(f"{base_url}&start={offset}")
+
+    pages = [asyncio.create_task(fetch_page(offset)) for offset in offsets]
+    try:
+        for offset, page in zip(offsets, pages):
+            soup = await page
+            if not soup:
+                continue
+            for post in reversed(soup.find_all("tbody", class_=re.compile(r"row[12]"))):
+                update_text = _extract_update_from_post(post, phrases, base_url)
+                if update_text:
+                    logger.debug(f"Update post found on page start={offset}")
+                    return update_text
+        return None
+    finally:
+        for page in pages:
+            page.cancel()
+        await asyncio.gather(*pages, return_exceptions=True)
 
 async def get_update_from_author_post(soup: BeautifulSoup, base_url: str) -> Optional[str]:
     """
@@ -283,12 +306,7 @@ async def get_update_from_author_post(soup: BeautifulSoup, base_url: str) -> Opt
 
 async def _strategy_phrase_search(soup: BeautifulSoup, base_url: str) -> Optional[str]:
     """Strategy 1: Search for 'Раздача обновлена' / 'Distribution updated' phrase in posts."""
-    update_phrases = ["Раздача обновлена", "Distribution updated"]
-    for phrase in update_phrases:
-        result = await get_last_post_with_phrase(phrase, base_url)
-        if result:
-            return result
-    return None
+    return await get_last_post_with_phrase(UPDATE_PHRASES, base_url, first_page=soup)
 
 
 async def _strategy_author_update_post(soup: BeautifulSoup, base_url: str) -> Optional[str]:
@@ -299,9 +317,10 @@ async def _strategy_author_update_post(soup: BeautifulSoup, base_url: str) -> Op
 
 
 
-# parse_tracker_entry remains the same (uses functions from html_utils)
-async def parse_tracker_entry(entry_url: str, entry_title_from_feed: str) -> Optional[Tuple[str, str, Optional[str], str, str, str, str, List[str], Optional[str]]]:
+async def parse_tracker_entry(entry_url: str, entry_title_from_feed: str) -> Optional[ParsedEntry]:
+    started_at = time.perf_counter()
     soup = await fetch_page_content(entry_url)
+    fetch_seconds = time.perf_counter() - started_at
     if not soup:
         raise ValueError(f"Failed to fetch page content (timeout or HTTP error)")
 
@@ -380,13 +399,14 @@ async def parse_tracker_entry(entry_url: str, entry_title_from_feed: str) -> Opt
     except Exception as e:
         logger.warning(f"Could not extract language: {e}")
 
-    title_elements_html = []; description_elements_html = []; collecting_title = True
+    # Post nodes are kept as parsed elements: nothing below is serialized and parsed again
+    title_elements = []; description_elements = []; collecting_title = True
     description_start_keywords = ["Год выпуска", "Release year", "Жанр", "Genre", "Разработчик", "Developer", "Описание", "Description"]
     stop_title_collection_tags = ['hr', 'div', 'ol', 'ul']
     title_text_for_youtube = None
 
     for element in post_body.children:
-        element_str = str(element); stop = False
+        stop = False
         if collecting_title:
             if isinstance(element, Tag):
                 if element.name in stop_title_collection_tags:
@@ -397,22 +417,21 @@ async def parse_tracker_entry(entry_url: str, entry_title_from_feed: str) -> Opt
                      if b_text in description_start_keywords: stop = True
                 elif element.name == 'span' and element.find('br') and not element.find(text=True, recursive=False): stop = True
                 elif element.name == 'img' and 'postImgAligned' in element.get('class', []): stop = True
-            if stop: collecting_title = False; description_elements_html.append(element_str); continue
+            if stop: collecting_title = False; description_elements.append(element); continue
         if collecting_title:
              if not (isinstance(element, Tag) and element.name == 'img' and 'postImgAligned' in element.get('class', [])):
-                  title_elements_html.append(element_str)
-        else: description_elements_html.append(element_str)
-
-    if title_elements_html:
-        title_soup = BeautifulSoup("".join(title_elements_html), 'html.parser')
-        for br in title_soup.find_all('br'): br.decompose()
-        title_text_for_youtube = title_soup.get_text(separator=' ', strip=True)
-        title_text_for_youtube = re.sub(r'\s+', ' ', title_text_for_youtube).strip()
+                  title_elements.append(element)
+        else: description_elements.append(element)
+
+    if title_elements:
+        title_strings = []
+        for element in title_elements:
+            if isinstance(element, Tag): title_strings.extend(element.stripped_strings)
+            elif type(element) in (NavigableString, CData) and element.strip(): title_strings.append(element.strip())
+        title_text_for_youtube = re.sub(r'\s+', ' ', ' '.join(title_strings)).strip()
     if not title_text_for_youtube or len(title_text_for_youtube) < 3:
         title_text_for_youtube = page_display_title
 
-    cleaned_description = clean_description_html("".join(description_elements_html))
-
     is_updated = "[Обновлено]" in entry_title_from_feed or "[Updated]" in entry_title_from_feed
     last_post_text = None
     if is_updated:
@@ -462,6 +481,9 @@ async def parse_tracker_entry(entry_url: str, entry_title_from_feed: str) -> Opt
     except Exception as e:
         raise ValueError(f"Error extracting magnet link: {e}")
 
+    # Moves the description nodes out of the page, so it runs after everything that reads post_body
+    cleaned_description = clean_description_html(description_elements)
+
     # Extract genres for digest
     genres = []
     try:
@@ -486,6 +508,20 @@ async def parse_tracker_entry(entry_url: str, entry_title_from_feed: str) -> Opt
     final_description = make_tag(final_description, "Release year")
     if last_post_text: final_description += f"\n\n{last_post_text}"
 
-    return page_display_title, title_text_for_youtube, image_url, magnet_link, final_description, torrent_size, torrent_language, genres, last_post_text
+    return ParsedEntry(
+        url=entry_url,
+        feed_title=entry_title_from_feed,
+        display_title=page_display_title,
+        search_title=title_text_for_youtube,
+        image_url=image_url,
+        magnet_link=magnet_link,
+        description=final_description,
+        torrent_size=torrent_size,
+        torrent_language=torrent_language,
+        genres=genres,
+        update_text=last_post_text,
+        fetch_seconds=round(fetch_seconds, 3),
+        parse_seconds=round(time.perf_counter() - started_at - fetch_seconds, 3),
+    )
 
 # --- END OF FILE tracker_parser.py ---
@@ -0,0 +1,210 @@
+"""
+Scheduler daemon: runs the jobs of .github/workflows/bot_runner.yml in one long-lived process.
+
+The feed check, collectors, digests, eShop deals and the Gist upload share one event loop,
+so the Telegram/OpenAI clients, the aiohttp sessions, the TitleDB indexes and the in-memory
+caches stay warm between runs instead of being rebuilt by a new interpreter every time.
+Jobs never overlap (see core/scheduler.py). Each job keeps its own cooldown/interval check
+and its last-run stamp file, so the daemon and one-off runs of the scripts stay interchangeable.
+
+Run either the daemon or the cron workflow for the same bot, not both.
+
+Usage:
+    python scheduler_daemon.py                 # all jobs; state is downloaded from the Gist on start
+    python scheduler_daemon.py --interactive   # also answer bot commands (bot_interactive.py) in the same loop
+    python scheduler_daemon.py --no-gist       # no Gist download/upload
+    python scheduler_daemon.py --list          # show the jobs and when they run next
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import signal
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core.scheduler import CronTrigger, IntervalTrigger, Scheduler
+from core.settings_loader import (
+    LOG, SCHEDULER_CRON, SCHEDULER_FEED_INTERVAL_MINUTES, SCHEDULER_GIST_SYNC_MINUTES,
+    close_clients, keep_clients_open, setup_logging,
+)
+from digest import runner
+
+logger = logging.getLogger("scheduler_daemon")
+
+# Same times as bot_runner.yml (UTC); SCHEDULER_CRON in settings.json overrides them
+DEFAULT_CRON = {
+    "collect_homebrew": "0 5 * * *",
+    "collect_swuk": "0 5 * * *",
+    "daily_digest": "0 6 * * *",
+    "homebrew_digest": "0 6 * * *",
+    "swuk_digest": "0 6 * * *",
+    "eshop_deals": "0 6 * * *",
+}
+
+# Digest job -> (script module, age assumed when it has no stamp file yet, as in the script)
+DIGESTS = {
+    "daily_digest": ("send_daily_digest", timedelta(hours=24)),
+    "homebrew_digest": ("send_homebrew_digest", timedelta(days=7)),
+    "swuk_digest": ("send_swuk_digest", timedelta(days=7)),
+}
+
+
+# --- Jobs (modules are imported on the first run and then stay loaded) ---
+
+async def feed_check():
+    import main
+    await main.main_loop()
+
+
+def _digest_job(module_name: str):
+    async def job():
+        await importlib.import_module(module_name).send_digest()
+    return job
+
+
+def _digest_last_run(module_name: str, default_age: timedelta):
+    return lambda: runner.get_last_run_time(importlib.import_module(module_name).LAST_RUN_FILE, default_age)
+
+
+async def collect_homebrew():
+    import collect_homebrew_updates
+    await collect_homebrew_updates.main([])
+
+
+async def collect_swuk():
+    import collect_swuk_updates
+    await collect_swuk_updates.main()
+
+
+def _collector_last_run(module_name: str):
+    # No stamp file yet: a day ago, i.e. due now
+    return lambda: runner.get_last_run_time(importlib.import_module(module_name).LAST_RUN_FILE,
+                                            timedelta(days=1), key='last_run_time')
+
+
+# Collector job -> (job, script module with its LAST_RUN_FILE)
+COLLECTORS = {
+    "collect_homebrew": (collect_homebrew, "collect_homebrew_updates"),
+    "collect_swuk": (collect_swuk, "collect_swuk_updates"),
+}
+
+
+async def eshop_deals():
+    from send_eshop_deals import send_eshop_deals
+    await send_eshop_deals()
+
+
+def eshop_deals_last_run() -> Optional[datetime]:
+    from send_eshop_deals import load_last_run
+    last_ts = load_last_run().get("last_run_timestamp", 0)
+    return datetime.fromtimestamp(last_ts) if last_ts else None
+
+
+def _gist_job(action: str, gist_id: str, token: str):
+    async def job():
+        import sync_gist_state
+        sync = sync_gist_state.download_state if action == "download" else sync_gist_state.upload_state
+        await asyncio.to_thread(sync, gist_id, token)  # urllib, blocking
+    return job
+
+
+def build_scheduler(gist_credentials: Optional[tuple] = None) -> Scheduler:
+    """All jobs, in the order bot_runner.yml runs them; the Gist upload goes last."""
+    cron = {**DEFAULT_CRON, **SCHEDULER_CRON}
+    scheduler = Scheduler()
+    scheduler.add_job("feed_check", feed_check, IntervalTrigger(SCHEDULER_FEED_INTERVAL_MINUTES * 60), timeout=1800)
+    for name, (job, module_name) in COLLECTORS.items():
+        if cron.get(name):
+            scheduler.add_job(name, job, CronTrigger(cron[name]),
+                              last_run=_collector_last_run(module_name))
+    for name, (module_name, default_age) in DIGESTS.items():
+        if cron.get(name):
+            scheduler.add_job(name, _digest_job(module_name), CronTrigger(cron[name]),
+                              last_run=_digest_last_run(module_name, default_age))
+    if cron.get("eshop_deals"):
+        scheduler.add_job("eshop_deals", eshop_deals, CronTrigger(cron["eshop_deals"]), last_run=eshop_deals_last_run)
+    if gist_credentials:
+        # State was just downloaded on start-up: the first upload comes one interval later
+        scheduler.add_job("gist_upload", _gist_job("upload", *gist_credentials),
+                          IntervalTrigger(SCHEDULER_GIST_SYNC_MINUTES * 60), last_run=datetime.now, timeout=600)
+    return scheduler
+
+
+async def _run_interactive():
+    import bot_interactive
+    try:
+        await bot_interactive.main()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception(f"Interactive bot stopped: {e}")
+
+
+async def run_daemon(interactive: bool = False, use_gist: bool = True):
+    setup_logging(log_level=logging.DEBUG if LOG else logging.INFO)
+    gist_credentials = None
+    if use_gist:
+        from sync_gist_state import get_gist_credentials
+        gist_id, token, _ = get_gist_credentials()
+        if gist_id and token:
+            gist_credentials = (gist_id, token)
+        else:
+            logger.warning("GIST_ID / GIST_TOKEN not set: state is not synced with the Gist.")
+
+    scheduler = build_scheduler(gist_credentials)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, scheduler.stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+    keep_clients_open()
+    polling = None
+    try:
+        if gist_credentials:
+            try:
+                await _gist_job("download", *gist_credentials)()
+            except Exception as e:
+                logger.error(f"Could not download state from the Gist, starting with local state: {e}")
+        if interactive:
+            polling = asyncio.create_task(_run_interactive())
+        logger.info(f"Scheduler daemon started with {len(scheduler.jobs)} jobs.")
+        await scheduler.run_forever()
+    finally:
+        logger.info("Scheduler daemon stopping...")
+        if polling:
+            polling.cancel()
+            await asyncio.gather(polling, return_exceptions=True)
+        upload = next((job for job in scheduler.jobs if job.name == "gist_upload"), None)
+        if upload:
+            await scheduler.run_job(upload)
+        keep_clients_open(False)
+        await close_clients()
+
+
+def list_jobs():
+    scheduler = build_scheduler(("-", "-"))
+    scheduler.schedule()
+    for job in sorted(scheduler.jobs, key=lambda j: j.next_run):
+        print(f"{job.name:<18} {job.trigger!r:<24} next run {job.next_run.astimezone():%Y-%m-%d %H:%M %Z}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all bot jobs in one long-lived process.")
+    parser.add_argument("--interactive", action="store_true", help="Also poll Telegram for bot commands (bot_interactive.py).")
+    parser.add_argument("--no-gist", action="store_true", help="Do not download/upload state from/to the Gist.")
+    parser.add_argument("--list", action="store_true", help="Print the jobs and their next run, then exit.")
+    args = parser.parse_args()
+    if args.list:
+        list_jobs()
+        return
+    try:
+        asyncio.run(run_daemon(interactive=args.interactive, use_gist=not args.no_gist))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
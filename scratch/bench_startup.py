@@ -0,0 +1,88 @@
+"""
+Benchmark: cold-start import time of the cron entry points (python -X importtime).
+
+Usage: python scratch/bench_startup.py [ENTRY...] [--rounds N] [--top K] [--json FILE] [--budget-ms MS]
+Imports each entry module (default: all cron scripts) in a fresh interpreter and reports the
+median time until its imports are done, i.e. until the script can start useful work. The
+interpreter start itself is shown separately. It also lists the slowest imports from the last
+round, and any heavy clients (openai, telebot, Pillow, googleapiclient) loaded at import time.
+These should only be imported on first use.
+
+--json appends the results to FILE (one JSON object per line) so runs can be compared over time;
+--budget-ms exits with status 1 if an entry point's median exceeds MS.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENTRY_POINTS = [
+    "main", "send_daily_digest", "send_homebrew_digest", "send_eshop_deals", "send_swuk_digest",
+    "collect_homebrew_updates", "collect_custom_releases", "collect_swuk_updates", "sync_gist_state",
+]
+HEAVY_MODULES = ("openai", "telebot", "PIL", "googleapiclient")
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(entry):
+    """(import ms of `entry`, wall ms of the whole interpreter, {module: cumulative ms} of its direct imports, heavy modules)."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {entry}"], cwd=ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {entry} failed:\n{proc.stderr[-2000:]}")
+    entry_ms, direct, heavy = None, {}, set()
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms, depth, module = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        if module.split(".")[0] in HEAVY_MODULES:
+            heavy.add(module.split(".")[0])
+        if depth == 1 and module == entry:
+            entry_ms = cumulative_ms
+        elif depth == 3:  # imported directly by the entry module
+            direct[module] = cumulative_ms
+    return entry_ms, wall_ms, direct, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entries", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--json", dest="json_file")
+    parser.add_argument("--budget-ms", type=float)
+    args = parser.parse_args()
+
+    results, over_budget = {}, []
+    for entry in args.entries:
+        rounds = [measure(entry) for _ in range(args.rounds)]
+        import_ms = statistics.median(r[0] for r in rounds)
+        wall_ms = statistics.median(r[1] for r in rounds)
+        direct, heavy = rounds[-1][2], rounds[-1][3]
+        results[entry] = {"import_ms": round(import_ms, 1), "wall_ms": round(wall_ms, 1), "heavy": heavy}
+        print(f"{entry:<26} imports {import_ms:7.1f} ms   interpreter total {wall_ms:7.1f} ms"
+              + (f"   heavy at import: {', '.join(heavy)}" if heavy else ""))
+        for module, ms in sorted(direct.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {ms:7.1f} ms  {module}")
+        if args.budget_ms is not None and import_ms > args.budget_ms:
+            over_budget.append(entry)
+
+    if args.json_file:
+        with open(args.json_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                                "rounds": args.rounds, "results": results}) + "\n")
+    if over_budget:
+        print(f"Over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
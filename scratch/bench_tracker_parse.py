@@ -0,0 +1,104 @@
+"""
+Benchmark: parse + clean a RuTracker topic page, legacy string pipeline vs single-parse pipeline.
+
+Usage: python scratch/bench_tracker_parse.py [DIR_OR_FILES...] [--rounds N]
+Reads saved pages (*.html or *.html.gz; default data/page_cache/) and reports the mean
+time per page for:
+  legacy  - html.parser, description joined to a string, re-parsed by clean_description_html
+            and serialized/re-parsed again by sanitize_html_for_telegram
+  single  - parse_page() (lxml when installed) and the node-based description pipeline
+"""
+import argparse
+import glob
+import gzip
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bs4 import BeautifulSoup, Tag
+
+from utils.html_utils import PAGE_PARSER, clean_description_html, parse_page
+
+
+def load_pages(paths):
+    files = []
+    for path in paths or [os.path.join("data", "page_cache")]:
+        if os.path.isdir(path):
+            files += glob.glob(os.path.join(path, "*.html")) + glob.glob(os.path.join(path, "*.html.gz"))
+        else:
+            files.append(path)
+    pages = []
+    for file in sorted(files):
+        opener = gzip.open if file.endswith(".gz") else open
+        with opener(file, "rb") as f:
+            pages.append((os.path.basename(file), f.read()))
+    return pages
+
+
+def split_post(post_body):
+    """Same title/description split as parse_tracker_entry (simplified to the stop tags)."""
+    title, description, collecting = [], [], True
+    for element in post_body.children:
+        if collecting and isinstance(element, Tag) and (element.name in ("hr", "ol", "ul") or "sp-wrap" in element.get("class", [])):
+            collecting = False
+        (title if collecting else description).append(element)
+    return title, description
+
+
+def legacy(body: bytes) -> str:
+    soup = BeautifulSoup(body, "html.parser")
+    post_body = soup.find("div", class_="post_body")
+    if not post_body:
+        return ""
+    title, description = split_post(post_body)
+    title_soup = BeautifulSoup("".join(str(e) for e in title), "html.parser")
+    re.sub(r"\s+", " ", title_soup.get_text(separator=" ", strip=True))
+    return clean_description_html("".join(str(e) for e in description))
+
+
+def single(body: bytes) -> str:
+    soup = parse_page(body)
+    post_body = soup.find("div", class_="post_body")
+    if not post_body:
+        return ""
+    title, description = split_post(post_body)
+    re.sub(r"\s+", " ", " ".join(s for e in title if isinstance(e, Tag) for s in e.stripped_strings))
+    return clean_description_html(description)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.paths)
+    if not pages:
+        print("No saved pages found. Run the bot once (pages land in data/page_cache/) or pass HTML files.")
+        return
+    print(f"{len(pages)} page(s), {args.rounds} round(s), page parser: {PAGE_PARSER}")
+
+    totals = {"legacy": 0.0, "single": 0.0}
+    mismatches = 0
+    for name, body in pages:
+        for label, fn in (("legacy", legacy), ("single", single)):
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                out = fn(body)
+            totals[label] += (time.perf_counter() - start) / args.rounds
+            if label == "legacy":
+                expected = out
+        if out != expected:
+            mismatches += 1
+            print(f"  output differs: {name}")
+
+    for label, total in totals.items():
+        print(f"{label:>7}: {total / len(pages) * 1000:8.2f} ms/page")
+    print(f"speedup: {totals['legacy'] / totals['single']:.2f}x, mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
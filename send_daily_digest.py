@@ -55,7 +55,7 @@ async def send_digest():
         return
 
     # PRODUCTION MODE: full digest to GROUPS + DIGEST_CHANNEL, short stats to test channel
-    from core.settings_loader import bot
+    from services.send_scheduler import scheduled_bot
     config = await runner.load_settings_or_exit(__file__, "Daily digest")
 
     entries = digest_manager.get_entries_since(last_run_time)
@@ -96,7 +96,7 @@ async def send_digest():
             logger.error(f"Error counting pending manual releases for stats: {e}")
 
         stats_chat_id, stats_topic_id = runner.stats_target()
-        await bot.send_message(
+        await scheduled_bot.send_message(
             chat_id=stats_chat_id,
             message_thread_id=stats_topic_id,
             text=(
@@ -19,7 +19,6 @@ from core.settings_loader import (
     GROUPS,
     IS_TEST_MODE,
     TEST_GROUPS,
-    bot,
     close_clients,
     load_config,
     default_settings_path,
@@ -35,7 +34,11 @@ from services.eshop import (
     RegionPriceService,
     format_eshop_deal_message,
     download_and_badge_cover,
+    platform_badge,
 )
+from services import media_cache
+from services.title_matching import TitleMatcher, titles_match
+from services.send_scheduler import scheduled_bot
 from services.telegram_sender import send_message_to_admin
 
 logger = logging.getLogger("send_eshop_deals")
@@ -71,7 +74,7 @@ async def safe_delete_showcase_message(
         return False
 
     try:
-        await bot.delete_message(chat_id=chat_id, message_id=int(message_id))
+        await scheduled_bot.delete_message(chat_id=chat_id, message_id=int(message_id))
         logger.info(f"🗑 [SAFE DELETE] Deleted showcase message {message_id} ('{title}') from topic {topic_id} in chat {chat_id}")
         return True
     except Exception as e:
@@ -79,6 +82,50 @@ async def safe_delete_showcase_message(
         return False
 
 
+async def send_deal_photo(chat_id: int, topic_id: Optional[int], deal: GameDeal, caption: str):
+    """
+    Send a deal's badged cover with `caption`, reusing the cached Telegram file_id when the
+    same cover was uploaded before. Returns the sent message, or None if the deal has no image.
+    """
+    source_url = deal.banner_url or deal.image_url
+    # The badge drawn depends on the deal's platforms, so it is part of the key
+    cache_source = f"badged:{platform_badge(deal)}:{source_url}" if source_url else None
+
+    cached_file_id = media_cache.get_file_id(cache_source)
+    if cached_file_id:
+        try:
+            return await scheduled_bot.send_photo(
+                chat_id=chat_id,
+                message_thread_id=topic_id,
+                photo=cached_file_id,
+                caption=caption,
+                parse_mode="HTML",
+                allow_sending_without_reply=True,
+            )
+        except Exception as e:
+            if not media_cache.is_file_id_error(e):
+                raise
+            logger.debug(f"Cached cover for '{deal.title}' rejected ({e}), uploading again...")
+            media_cache.forget(cache_source)
+
+    badged_img = await download_and_badge_cover(deal)
+    photo_payload = badged_img.getvalue() if badged_img else source_url
+    if not photo_payload:
+        return None
+
+    sent_msg = await scheduled_bot.send_photo(
+        chat_id=chat_id,
+        message_thread_id=topic_id,
+        photo=photo_payload,
+        caption=caption,
+        parse_mode="HTML",
+        allow_sending_without_reply=True,
+    )
+    if badged_img and getattr(sent_msg, "photo", None):
+        media_cache.remember_file_id(cache_source, sent_msg.photo[-1].file_id, photo_payload)
+    return sent_msg
+
+
 def _normalize_title_key(title: str) -> str:
     return re.sub(r"[^a-z0-9]", "", title.lower()) if title else ""
 
@@ -323,7 +370,6 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
                             message_id=int(m_id),
                             title=m_title,
                         )
-                        await asyncio.sleep(0.08)
             showcase_data = {}
             save_active_showcase(showcase_data)
             posted_history = {}
@@ -435,6 +481,11 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
             existing_fsids = {str(it.get("fs_id")) for it in surviving_items if it.get("fs_id")}
             existing_nsuids = {str(it.get("nsuid")) for it in surviving_items if it.get("nsuid")}
 
+            # Near-duplicates too: "Hogwarts Legacy" vs "Hogwarts Legacy Deluxe Edition"
+            showcase_matcher = TitleMatcher()
+            for it in surviving_items:
+                showcase_matcher.add(it.get("title", ""))
+
             deals_to_post: List[GameDeal] = []
             seen_batch_titles = set()
             seen_batch_ids = set()
@@ -453,8 +504,13 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
 
                 if _is_deal_already_posted(d, fresh_history, cooldown_seconds, now_ts):
                     continue
+                duplicate = showcase_matcher.near_duplicate(d.title)
+                if duplicate:
+                    logger.debug(f"Skipping '{d.title}': same game as '{duplicate.title}' ({duplicate.score:.2f}).")
+                    continue
 
                 seen_batch_titles.add(d_norm)
+                showcase_matcher.add(d.title)
                 if d_fsid:
                     seen_batch_ids.add(d_fsid)
                 if d_nsuid:
@@ -468,26 +524,16 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
             for deal in deals_to_post:
                 enriched = await filter_engine.enrich_deal(deal, fetch_regions=True)
                 msg_text = format_eshop_deal_message(enriched, language=lang, currency_service=currency_service)
-                badged_img = await download_and_badge_cover(enriched)
-                photo_payload = badged_img.getvalue() if badged_img else (enriched.banner_url or enriched.image_url)
 
                 sent_msg = None
-                if photo_payload:
-                    try:
-                        sent_msg = await bot.send_photo(
-                            chat_id=chat_id_int,
-                            message_thread_id=topic_id_int,
-                            photo=photo_payload,
-                            caption=msg_text,
-                            parse_mode="HTML",
-                            allow_sending_without_reply=True,
-                        )
-                    except Exception as pe:
-                        logger.debug(f"send_photo failed ({pe}), falling back to text message...")
+                try:
+                    sent_msg = await send_deal_photo(chat_id_int, topic_id_int, enriched, msg_text)
+                except Exception as pe:
+                    logger.debug(f"send_photo failed ({pe}), falling back to text message...")
 
                 if not sent_msg:
                     try:
-                        sent_msg = await bot.send_message(
+                        sent_msg = await scheduled_bot.send_message(
                             chat_id=chat_id_int,
                             message_thread_id=topic_id_int,
                             text=msg_text,
@@ -512,7 +558,6 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
                     })
                     _record_deal_in_history(fresh_history, deal, now_ts)
                     total_posted_this_run += 1
-                await asyncio.sleep(1)
 
             showcase_data[showcase_key] = surviving_items
 
@@ -554,20 +599,11 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
                                 alert_text = alert_prefix + format_eshop_deal_message(
                                     enriched_deal, language="UA", currency_service=currency_service
                                 )
-                                badged_img = await download_and_badge_cover(enriched_deal)
-                                photo_payload = badged_img.getvalue() if badged_img else (enriched_deal.banner_url or enriched_deal.image_url)
-
-                                if photo_payload:
-                                    await bot.send_photo(
-                                        chat_id=int(w_chat_id),
-                                        message_thread_id=int(w_topic_id) if w_topic_id else None,
-                                        photo=photo_payload,
-                                        caption=alert_text,
-                                        parse_mode="HTML",
-                                        allow_sending_without_reply=True,
-                                    )
-                                else:
-                                    await bot.send_message(
+                                sent_alert = await send_deal_photo(
+                                    int(w_chat_id), int(w_topic_id) if w_topic_id else None, enriched_deal, alert_text
+                                )
+                                if not sent_alert:
+                                    await scheduled_bot.send_message(
                                         chat_id=int(w_chat_id),
                                         message_thread_id=int(w_topic_id) if w_topic_id else None,
                                         text=alert_text,
@@ -576,7 +612,6 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
                                     )
                                 wl_service.update_notification(wl_key, w_title, w_deal.discount_percent)
                                 logger.info(f"Sent wishlist alert for '{w_deal.title}' to {w_chat_id}")
-                                await asyncio.sleep(1)
                     except Exception as wl_item_err:
                         logger.debug(f"Error checking wishlist item '{w_title}': {wl_item_err}")
         except Exception as wl_err:
@@ -585,6 +620,7 @@ async def send_eshop_deals(force: bool = False, reset: bool = False):
         logger.info(f"Showcase cycle completed. Posted {total_posted_this_run} deal(s).")
 
     finally:
+        media_cache.flush()
         await eshop_service.close()
         await rating_service.close()
         await region_price_service.close()
@@ -628,8 +664,11 @@ async def remove_showcase_deals(remove_arg: str):
 
     if is_title_search:
         target_title_norm = clean_arg.lower()
-        to_delete = [it for it in items if target_title_norm in it.get("title", "").lower()]
-        surviving = [it for it in items if target_title_norm not in it.get("title", "").lower()]
+        to_delete = [
+            it for it in items
+            if target_title_norm in it.get("title", "").lower() or titles_match(target_title_norm, it.get("title", ""))
+        ]
+        surviving = [it for it in items if it not in to_delete]
         if not to_delete:
             logger.info(f"ℹ️ No tracked deals matching '{remove_arg}' found in showcase database.")
             print(f"ℹ️ No tracked deals matching '{remove_arg}' found in showcase database.")
@@ -664,7 +703,6 @@ async def remove_showcase_deals(remove_arg: str):
                 if deleted:
                     total_deleted += 1
                     deleted_msg_ids.add(int(msg_id))
-                await asyncio.sleep(0.08)
 
         # Update showcase state and release cooldown history for deleted games
         showcase_data[showcase_key] = surviving
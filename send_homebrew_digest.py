@@ -82,7 +82,7 @@ async def send_digest():
     if manual_count > 0:
         logger.info(f"Added {manual_count} manual releases to digest")
 
-    from core.settings_loader import bot
+    from services.send_scheduler import scheduled_bot
 
     if IS_TEST_MODE:
         # TEST MODE: Send full digest to all test groups
@@ -106,7 +106,7 @@ async def send_digest():
                 )
 
                 # Send stats report to each test channel
-                await bot.send_message(
+                await scheduled_bot.send_message(
                     chat_id=chat_id,
                     message_thread_id=topic_id,
                     text=f"📊 <b>Тест-дайджест відправлено</b>{build_stats_text(manual_count)}",
@@ -156,7 +156,7 @@ async def send_digest():
             logger.info(f"Cleared homebrew entries older than {cleanup_time}")
 
         stats_chat_id, stats_topic_id = runner.stats_target()
-        await bot.send_message(
+        await scheduled_bot.send_message(
             chat_id=stats_chat_id,
             message_thread_id=stats_topic_id,
             text=(
@@ -55,7 +55,7 @@ async def send_digest():
         return
 
     # PRODUCTION MODE: use same GROUPS + DIGEST_CHANNEL as homebrew digest
-    from core.settings_loader import bot
+    from services.send_scheduler import scheduled_bot
     config = await runner.load_settings_or_exit(__file__, "Swuk digest")
     target_groups = runner.collect_target_groups(config)
 
@@ -75,7 +75,7 @@ async def send_digest():
             swuk_digest_manager.clear_old_entries(datetime.now() - timedelta(days=7))
 
         stats_chat_id, stats_topic_id = runner.stats_target()
-        await bot.send_message(
+        await scheduled_bot.send_message(
             chat_id=stats_chat_id,
             message_thread_id=stats_topic_id,
             text=(
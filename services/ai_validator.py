@@ -1,7 +1,12 @@
 # --- START OF FILE ai_validator.py ---
 from services import gpt
-from typing import Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
 import re
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +16,50 @@ _STOP_WORDS = {
     'is', 'it', 'its', 'be', 'as', 'by', 'with', 'that', 'this', 'from',
 }
 
+# Layer 3 verdicts by normalized (searched title, YouTube title) pair: updated torrents re-run
+# the trailer search and get the same candidates again
+VERDICT_CACHE_FILE = os.path.join("data", "yt_validation_cache.json")
+VERDICT_CACHE_TTL_SECONDS = 90 * 24 * 3600  # 90 days
+VERDICT_CACHE_MAX_ENTRIES = 5000
+
+_cache_memory: Optional[dict] = None
+_in_flight: Dict[str, "asyncio.Task"] = {}
+
+
+def _get_cache() -> dict:
+    """Load the persistent verdict cache."""
+    global _cache_memory
+    if _cache_memory is None:
+        if os.path.exists(VERDICT_CACHE_FILE):
+            try:
+                with open(VERDICT_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _cache_memory = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not load YT validation cache: {e}")
+                _cache_memory = {}
+        else:
+            _cache_memory = {}
+    return _cache_memory
+
+
+def _save_cache() -> None:
+    """Drop expired verdicts, trim to VERDICT_CACHE_MAX_ENTRIES (oldest first) and persist."""
+    if _cache_memory is None:
+        return
+    now = time.time()
+    for key in [k for k, e in _cache_memory.items() if now - e.get("stored_at", 0) >= VERDICT_CACHE_TTL_SECONDS]:
+        del _cache_memory[key]
+    if len(_cache_memory) > VERDICT_CACHE_MAX_ENTRIES:
+        by_age = sorted(_cache_memory, key=lambda k: _cache_memory[k].get("stored_at", 0))
+        for key in by_age[:len(_cache_memory) - VERDICT_CACHE_MAX_ENTRIES]:
+            del _cache_memory[key]
+    try:
+        os.makedirs(os.path.dirname(VERDICT_CACHE_FILE) or ".", exist_ok=True)
+        with open(VERDICT_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(_cache_memory, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save YT validation cache: {e}")
+
 
 def _word_overlap_ratio(searched: str, found: str) -> float:
     """Return ratio of significant searched words that appear in found title."""
@@ -22,23 +71,21 @@ def _word_overlap_ratio(searched: str, found: str) -> float:
     return matched / len(words)
 
 
-async def validate_yt_title_with_gpt(searched_title: str, found_yt_title: str, model: str = gpt.DEFAULT_MODEL) -> bool:
-    """
-    3-layer validation for YouTube trailer relevance:
-      Layer 1 — Exact contains: searched title is a substring of found title.
-      Layer 2 — Word overlap: ≥60% of significant words from searched title appear in found title.
-      Layer 3 — GPT with structured RELEVANT/NOT_RELEVANT + REASON response.
+def _prompt_title(searched_title: str) -> str:
+    """Searched title without bracketed parts, as shown to the model."""
+    return re.sub(r'\[.*?\]|\(.*?\)', '', searched_title).strip()
 
-    Args:
-        searched_title: The game title that was searched for.
-        found_yt_title: The title of the YouTube video found by the search.
-        model: Primary GPT model to use.
 
-    Returns:
-        True if the video is considered relevant, False otherwise.
-    """
-    prompt_searched_title = re.sub(r'\[.*?\]|\(.*?\)', '', searched_title).strip()
-    clean_searched = prompt_searched_title.lower().strip()
+def _verdict_key(searched_title: str, found_yt_title: str) -> str:
+    """Cache key of a pair: both titles lower-cased with whitespace collapsed."""
+    searched = " ".join(_prompt_title(searched_title).lower().split())
+    found = " ".join(found_yt_title.lower().split())
+    return hashlib.sha256(f"{searched}\n{found}".encode("utf-8")).hexdigest()[:32]
+
+
+def _cheap_verdict(searched_title: str, found_yt_title: str) -> bool:
+    """Layers 1 and 2: True if the titles match without asking the model."""
+    clean_searched = _prompt_title(searched_title).lower().strip()
     clean_found = found_yt_title.lower().strip()
 
     # --- Layer 1: Exact contains ---
@@ -51,13 +98,61 @@ async def validate_yt_title_with_gpt(searched_title: str, found_yt_title: str, m
     if overlap >= 0.6:
         logger.info(f"YT Layer 2 (word overlap {overlap:.0%}): '{searched_title}' ~ '{found_yt_title}' — ACCEPTED")
         return True
-    else:
-        logger.debug(f"YT Layer 2 (word overlap {overlap:.0%}): below threshold, proceeding to GPT")
+    logger.debug(f"YT Layer 2 (word overlap {overlap:.0%}): below threshold, proceeding to GPT")
+    return False
+
+
+def _fresh_verdict(searched_title: str, found_yt_title: str) -> Optional[dict]:
+    entry = _get_cache().get(_verdict_key(searched_title, found_yt_title))
+    if not entry or time.time() - entry.get("stored_at", 0) >= VERDICT_CACHE_TTL_SECONDS:
+        return None
+    return entry
+
+
+def _cached_verdict(searched_title: str, found_yt_title: str) -> Optional[bool]:
+    entry = _fresh_verdict(searched_title, found_yt_title)
+    if entry is None:
+        return None
+    logger.info(f"YT Layer 3 (cached): {'RELEVANT' if entry['relevant'] else 'NOT RELEVANT'} — '{found_yt_title}'")
+    return entry["relevant"]
 
-    # --- Layer 3: GPT with structured response ---
+
+def _store_verdicts(searched_title: str, verdicts: Dict[str, Tuple[bool, str]]) -> None:
+    """Cache Layer 3 verdicts: YouTube title -> (relevant, reason)."""
+    cache, now = _get_cache(), time.time()
+    for found_yt_title, (relevant, reason) in verdicts.items():
+        cache[_verdict_key(searched_title, found_yt_title)] = {
+            "searched": _prompt_title(searched_title), "found": found_yt_title,
+            "relevant": relevant, "reason": reason, "stored_at": now,
+        }
+    _save_cache()
+
+
+def has_verdicts(searched_title: str, found_yt_titles: List[str]) -> bool:
+    """True if every candidate has a Layer 3 verdict: the model answered for each (failed requests are not cached)."""
+    return all(_fresh_verdict(searched_title, title) is not None for title in found_yt_titles)
+
+
+async def _deduplicated(key: str, factory: Callable[[], Awaitable]):
+    """Run factory() once for concurrent callers with the same key; they all get its result."""
+    if key in _in_flight:
+        return await asyncio.shield(_in_flight[key])
+    task = asyncio.ensure_future(factory())
+    _in_flight[key] = task
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if task.done():
+            _in_flight.pop(key, None)
+        else:
+            task.add_done_callback(lambda _t: _in_flight.pop(key, None))
+
+
+async def _gpt_verdict(searched_title: str, found_yt_title: str, model: str) -> bool:
+    """Layer 3 for one pair: GPT with structured RELEVANT/NOT_RELEVANT + REASON response."""
     prompt = (
         f"You are a strict game trailer validation assistant.\n\n"
-        f"Searched Game Title: \"{prompt_searched_title}\"\n"
+        f"Searched Game Title: \"{_prompt_title(searched_title)}\"\n"
         f"Found YouTube Video Title: \"{found_yt_title}\"\n\n"
         f"Task: Determine if the YouTube video is specifically about the searched game "
         f"(official trailer, gameplay, announcement, review). "
@@ -72,7 +167,7 @@ async def validate_yt_title_with_gpt(searched_title: str, found_yt_title: str, m
 
     raw = await gpt.complete(prompt, max_tokens=60, model=model, temperature=0.1, label="YT Layer 3")
     if raw is None:
-        return False
+        return False  # not cached: the next search asks again
 
     raw = raw.strip()
     logger.debug(f"YT Layer 3 GPT raw: {raw!r}")
@@ -84,8 +179,125 @@ async def validate_yt_title_with_gpt(searched_title: str, found_yt_title: str, m
     is_relevant = 'yes' in relevant_line.lower()
 
     logger.info(f"YT Layer 3: {'RELEVANT' if is_relevant else 'NOT RELEVANT'} — {reason}")
+    if relevant_line:
+        _store_verdicts(searched_title, {found_yt_title: (is_relevant, reason)})
     return is_relevant
 
+
+async def validate_yt_title_with_gpt(searched_title: str, found_yt_title: str, model: str = gpt.DEFAULT_MODEL) -> bool:
+    """
+    3-layer validation for YouTube trailer relevance:
+      Layer 1 — Exact contains: searched title is a substring of found title.
+      Layer 2 — Word overlap: ≥60% of significant words from searched title appear in found title.
+      Layer 3 — GPT with structured RELEVANT/NOT_RELEVANT + REASON response, cached per title pair.
+
+    Args:
+        searched_title: The game title that was searched for.
+        found_yt_title: The title of the YouTube video found by the search.
+        model: Primary GPT model to use.
+
+    Returns:
+        True if the video is considered relevant, False otherwise.
+    """
+    if _cheap_verdict(searched_title, found_yt_title):
+        return True
+    cached = _cached_verdict(searched_title, found_yt_title)
+    if cached is not None:
+        return cached
+    return await _deduplicated(_verdict_key(searched_title, found_yt_title),
+                               lambda: _gpt_verdict(searched_title, found_yt_title, model))
+
+
+def parse_batch_verdicts(raw: Optional[str], count: int) -> Tuple[Dict[int, Tuple[bool, str]], Optional[int]]:
+    """
+    Parse a batch answer: `N: Yes|No — reason` lines and a `BEST: N` line.
+    Returns ({0-based index: (relevant, reason)}, 0-based best index or None).
+    """
+    verdicts: Dict[int, Tuple[bool, str]] = {}
+    best = None
+    for line in (raw or "").splitlines():
+        match = re.match(r'\s*(\d+)\s*[:.)]\s*(yes|no)\b[\s—:-]*(.*)', line, re.IGNORECASE)
+        if match and 1 <= int(match.group(1)) <= count:
+            verdicts.setdefault(int(match.group(1)) - 1, (match.group(2).lower() == 'yes', match.group(3).strip()))
+            continue
+        match = re.match(r'\s*BEST\s*:\s*(\d+)', line, re.IGNORECASE)
+        if match and 1 <= int(match.group(1)) <= count:
+            best = int(match.group(1)) - 1
+    return verdicts, best
+
+
+async def _gpt_batch_verdicts(searched_title: str, found_yt_titles: List[str],
+                              model: str) -> Tuple[Dict[int, Tuple[bool, str]], Optional[int]]:
+    """Layer 3 for several candidates in one request; verdicts it returns are cached."""
+    numbered = "\n".join(f"{n}. \"{title}\"" for n, title in enumerate(found_yt_titles, 1))
+    prompt = (
+        f"You are a strict game trailer validation assistant.\n\n"
+        f"Searched Game Title: \"{_prompt_title(searched_title)}\"\n"
+        f"Found YouTube Video Titles:\n{numbered}\n\n"
+        f"Task: For EACH video, determine if it is specifically about the searched game "
+        f"(official trailer, gameplay, announcement, review). "
+        f"Consider alternate spellings, subtitles, and localized names. "
+        f"Then pick the video that matches the searched game best.\n\n"
+        f"Respond in EXACTLY this format, one line per video and a final BEST line:\n"
+        f"1: Yes — one sentence\n"
+        f"2: No — one sentence\n"
+        f"BEST: number of the best relevant video, or 0 if none is relevant"
+    )
+    raw = await gpt.complete(prompt, max_tokens=40 + 50 * len(found_yt_titles), model=model,
+                             temperature=0.1, label=f"YT Layer 3 (batch of {len(found_yt_titles)})")
+    logger.debug(f"YT Layer 3 batch GPT raw: {raw!r}")
+    verdicts, best = parse_batch_verdicts(raw, len(found_yt_titles))
+    if best is not None and not verdicts.get(best, (False, ""))[0]:
+        best = None
+    for n, (relevant, reason) in sorted(verdicts.items()):
+        logger.info(f"YT Layer 3 (batch): '{found_yt_titles[n]}' — {'RELEVANT' if relevant else 'NOT RELEVANT'} — {reason}")
+    if verdicts:
+        _store_verdicts(searched_title, {found_yt_titles[n]: v for n, v in verdicts.items()})
+    return verdicts, best
+
+
+async def select_yt_candidate(searched_title: str, found_yt_titles: List[str],
+                              model: str = gpt.DEFAULT_MODEL) -> Optional[int]:
+    """
+    Index of the YouTube candidate to use as the trailer, or None if none is relevant.
+
+    Candidates are ranked as the search returned them. Layers 1-2 and cached verdicts decide
+    first; only the undecided candidates ranked above the first accepted one still matter, and
+    those go to the model in ONE request that judges each and names the best. The model's
+    pick wins among them; otherwise the highest-ranked relevant candidate is used. Candidates
+    the batch answer does not cover are validated one by one, as validate_yt_title_with_gpt() does.
+    """
+    verdicts: List[Optional[bool]] = []
+    for title in found_yt_titles:
+        verdict = True if _cheap_verdict(searched_title, title) else _cached_verdict(searched_title, title)
+        verdicts.append(verdict)
+        if verdict:
+            break  # lower-ranked candidates cannot win
+    undecided = [n for n, verdict in enumerate(verdicts) if verdict is None]
+    if not undecided:
+        return len(verdicts) - 1 if verdicts and verdicts[-1] else None
+
+    best = None
+    if len(undecided) > 1:
+        titles = [found_yt_titles[n] for n in undecided]
+        batch_key = _verdict_key(searched_title, "\n".join(titles))
+        judged, best_of_batch = await _deduplicated(batch_key, lambda: _gpt_batch_verdicts(searched_title, titles, model))
+        for i, (relevant, _reason) in judged.items():
+            verdicts[undecided[i]] = relevant
+        best = undecided[best_of_batch] if best_of_batch is not None else None
+        if len(judged) < len(titles):
+            logger.info(f"YT Layer 3 batch covered {len(judged)} of {len(titles)} candidates, validating the rest one by one.")
+    if best is not None:
+        return best
+    for n, verdict in enumerate(verdicts):
+        if verdict is None:
+            verdict = verdicts[n] = await _deduplicated(
+                _verdict_key(searched_title, found_yt_titles[n]),
+                lambda: _gpt_verdict(searched_title, found_yt_titles[n], model))
+        if verdict:
+            return n
+    return None
+
 async def summarize_description_with_ai(description: str, target_length: int = 6000, model: str = gpt.DEFAULT_MODEL) -> str:
     """
     Summarizes a long description using an AI model to fit within a target length.
@@ -7,7 +7,7 @@ from services.eshop.region_price_service import RegionPriceService
 from services.eshop.rating_service import RatingService
 from services.eshop.deal_filter import DealFilterEngine
 from services.eshop.formatters import format_eshop_deal_message
-from services.eshop.banner_service import download_and_badge_cover, overlay_platform_badge
+from services.eshop.banner_service import download_and_badge_cover, overlay_platform_badge, platform_badge
 from services.eshop.wishlist_service import WishlistService
 
 __all__ = [
@@ -23,4 +23,5 @@ __all__ = [
     "format_eshop_deal_message",
     "download_and_badge_cover",
     "overlay_platform_badge",
+    "platform_badge",
 ]
@@ -7,7 +7,6 @@ import re
 import ssl
 from typing import List, Optional
 import aiohttp
-from PIL import Image, ImageDraw, ImageFont
 
 from services.eshop.models import GameDeal
 
@@ -35,11 +34,29 @@ def _get_upgraded_image_urls(url: Optional[str]) -> List[str]:
     return candidates
 
 
+# Badge text, fill, border colour and border width per platform_badge() variant
+_BADGE_STYLES = {
+    "switch2-exclusive": ("Nintendo Switch 2  •  EXCLUSIVE", (195, 5, 25, 245), (255, 215, 60, 230), 3),
+    "switch1-2": ("Nintendo Switch 1 & 2", (228, 0, 15, 245), (255, 255, 255, 230), 2),
+    "switch": ("Nintendo Switch", (228, 0, 15, 245), (255, 255, 255, 230), 2),
+}
+
+
+def platform_badge(deal: GameDeal) -> str:
+    """Badge variant drawn on the deal's cover: "switch2-exclusive", "switch1-2" or "switch"."""
+    if deal.is_switch_2_exclusive:
+        return "switch2-exclusive"
+    if "Nintendo Switch 2" in deal.system_names:
+        return "switch1-2"
+    return "switch"
+
+
 def overlay_platform_badge(image_bytes: bytes, deal: GameDeal) -> io.BytesIO:
     """
     Overlay a refined, sleek, high-definition platform badge (Switch, Switch 2, or Switch 1 & 2)
     on top of the game cover image using 2x supersampling and lossless color preservation.
     """
+    from PIL import Image, ImageDraw, ImageFont  # Pillow is only needed once a banner is drawn
     base_img = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
     w, h = base_img.size
 
@@ -50,24 +67,8 @@ def overlay_platform_badge(image_bytes: bytes, deal: GameDeal) -> io.BytesIO:
         base_img = base_img.resize((target_w, target_h), Image.Resampling.LANCZOS)
         w, h = base_img.size
 
-    # Badge specs
-    if deal.is_switch_2_exclusive:
-        badge_text = "Nintendo Switch 2  •  EXCLUSIVE"
-        bg_fill = (195, 5, 25, 245)
-        border_col = (255, 215, 60, 230)  # Gold accent border
-        border_w = 3
-    elif "Nintendo Switch 2" in deal.system_names or (
-        "Nintendo Switch" in deal.system_names and "Nintendo Switch 2" in deal.system_names
-    ):
-        badge_text = "Nintendo Switch 1 & 2"
-        bg_fill = (228, 0, 15, 245)
-        border_col = (255, 255, 255, 230)
-        border_w = 2
-    else:
-        badge_text = "Nintendo Switch"
-        bg_fill = (228, 0, 15, 245)
-        border_col = (255, 255, 255, 230)
-        border_w = 2
+    # Badge specs (the exclusive badge has a gold accent border)
+    badge_text, bg_fill, border_col, border_w = _BADGE_STYLES[platform_badge(deal)]
 
     # Render at 2x scale for anti-aliasing / supersampling
     scale = 2
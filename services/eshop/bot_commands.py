@@ -15,7 +15,8 @@ from services.eshop.formatters import format_eshop_deal_message
 from services.eshop.banner_service import download_and_badge_cover
 from services.eshop.models import QualityCriteria
 from services.eshop.rating_service import RatingService
-from services.eshop.region_price_service import RegionPriceService, _is_title_match
+from services.eshop.region_price_service import RegionPriceService
+from services.title_matching import titles_match
 from services.eshop.wishlist_service import WishlistService
 from services.subscription_service import SubscriptionService
 
@@ -1003,7 +1004,7 @@ def register_eshop_handlers(
             target_title_norm = target_arg.lower()
             to_delete = [
                 it for it in items
-                if target_title_norm in it.get("title", "").lower() or _is_title_match(target_title_norm, it.get("title", ""))
+                if target_title_norm in it.get("title", "").lower() or titles_match(target_title_norm, it.get("title", ""))
             ]
             surviving = [it for it in items if it not in to_delete]
             if not to_delete:
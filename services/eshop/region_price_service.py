@@ -1,21 +1,20 @@
 """Service for fetching multi-regional pricing from Nintendo eShop with caching and fallback."""
 
 import asyncio
-import json
 import logging
-import os
 import re
 import ssl
 import time
 from typing import Any, Dict, List, Optional
 import aiohttp
 
+from core.state_store import StateStore, get_state_store
 from services.eshop.models import RegionalPrice
 from services.eshop.currency_service import CurrencyService
+from services.title_matching import TitleMatcher, titles_match
 
 logger = logging.getLogger(__name__)
 
-CACHE_FILE = os.path.join("data", "eshop_region_prices_cache.json")
 CACHE_TTL_SECONDS = 12 * 3600  # 12 hours
 
 EUROPE_PAL_REGIONS: Dict[str, str] = {
@@ -50,52 +49,9 @@ ASIA_OTHER_REGIONS: Dict[str, str] = {
 TRACKED_REGIONS: Dict[str, str] = {**EUROPE_PAL_REGIONS, **AMERICA_REGIONS, **ASIA_OTHER_REGIONS}
 
 
-def _load_cache() -> Dict[str, Any]:
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
-
-
-def _save_cache(data: Dict[str, Any]) -> None:
-    try:
-        os.makedirs("data", exist_ok=True)
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-
 def _is_title_match(title1: str, title2: str) -> bool:
     """Check if two game titles match by checking meaningful token sets and containment."""
-    if not title1 or not title2:
-        return False
-
-    def _get_tokens(s: str) -> set:
-        s = re.sub(r"\[.*?\]|\(.*?\)", "", s.lower())
-        s = re.sub(r"[^\w\s]", " ", s)
-        tokens = set(s.split())
-        stop_words = {
-            "the", "a", "an", "and", "of", "for", "in", "to", "nintendo", "switch",
-            "edition", "deluxe", "bundle", "game", "digital", "hd", "remastered", "remake"
-        }
-        meaningful = tokens - stop_words
-        return meaningful or tokens
-
-    w1 = _get_tokens(title1)
-    w2 = _get_tokens(title2)
-    if not w1 or not w2:
-        return False
-
-    # True if one is exact subset of another (e.g. 'Hogwarts Legacy' in 'Hogwarts Legacy: Digital Deluxe')
-    if w1.issubset(w2) or w2.issubset(w1):
-        return True
-
-    # Word-level Jaccard index
-    return (len(w1 & w2) / len(w1 | w2)) >= 0.65
+    return titles_match(title1, title2)
 
 
 class RegionPriceService:
@@ -117,12 +73,14 @@ class RegionPriceService:
         currency_service: Optional[CurrencyService] = None,
         tracked_regions: Optional[Dict[str, str]] = None,
         session: Optional[aiohttp.ClientSession] = None,
+        store: Optional[StateStore] = None,
     ):
         self.currency_service = currency_service or CurrencyService()
         self.tracked_regions = tracked_regions or TRACKED_REGIONS
         self._session = session
         self._owns_session = False
-        self._cache = _load_cache()
+        # Prices by "<nsuid>_<title>" in the state store (synced as data/eshop_region_prices_cache.json)
+        self._cache = (store or get_state_store()).collection("eshop_region_prices")
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
@@ -141,8 +99,12 @@ class RegionPriceService:
         return self._session
 
     async def close(self) -> None:
-        """Close managed session and persist cache."""
-        _save_cache(self._cache)
+        """Close managed session and drop expired cache entries."""
+        now_ts = time.time()
+        try:
+            self._cache.delete_if(lambda _key, entry: now_ts - entry.get("timestamp", 0) >= CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.debug(f"Could not prune region price cache: {e}")
         if self._owns_session and self._session and not self._session.closed:
             await self._session.close()
 
@@ -161,11 +123,14 @@ class RegionPriceService:
             ) as resp:
                 if resp.status == 200:
                     data = await resp.json()
-                    hits = data.get("hits", [])
-                    for hit in hits:
-                        hit_title = hit.get("title", "")
-                        if _is_title_match(clean_title, hit_title):
-                            return hit
+                    # Best-scoring acceptable hit, not just the first one (e.g. the base game over a bundle)
+                    matcher = TitleMatcher()
+                    for hit in data.get("hits", []):
+                        if _is_title_match(clean_title, hit.get("title", "")):
+                            matcher.add(hit.get("title", ""), hit)
+                    best = matcher.best_match(clean_title, min_score=0.0)
+                    if best:
+                        return best.payload
         except Exception as e:
             logger.debug(f"Could not query Algolia for '{title}': {e}")
         return None
@@ -243,11 +208,11 @@ class RegionPriceService:
         if not nsuid and not game_title:
             return []
 
-        # 1. Check in-memory / JSON cache
+        # 1. Check the state store cache
         cache_key = f"{nsuid}_{game_title or ''}".strip("_")
         now_ts = time.time()
-        if cache_key in self._cache:
-            entry = self._cache[cache_key]
+        entry = self._cache.get(cache_key)
+        if entry:
             if (now_ts - entry.get("timestamp", 0)) < CACHE_TTL_SECONDS:
                 cached_list = []
                 for p_dict in entry.get("prices", []):
@@ -317,7 +282,7 @@ class RegionPriceService:
 
         # 5. Store in cache if we obtained prices
         if valid_prices:
-            self._cache[cache_key] = {
+            self._cache.put(cache_key, {
                 "timestamp": now_ts,
                 "prices": [
                     {
@@ -333,7 +298,6 @@ class RegionPriceService:
                     }
                     for p in valid_prices
                 ],
-            }
-            _save_cache(self._cache)
+            })
 
         return valid_prices
@@ -1,8 +1,24 @@
-"""Single entry point for OpenAI chat calls: primary model, one fallback, no duplication."""
+"""
+Single entry point for OpenAI chat calls: primary model, fallbacks, no duplication.
+
+Completions are streamed. When the running model has not produced its first token within
+GPT_FIRST_TOKEN_SECONDS, the next model is started alongside it (a hedged request) and the
+first complete answer wins; a failed model hands over to the next one at once. Per-model
+stats (errors, time to first token, total latency) are kept in data/gpt_model_stats.json and
+decide the order of the fallbacks. A hedged model that is abandoned without a single token
+after GPT_FIRST_TOKEN_SECONDS counts as a failed call (a stall). A model that failed
+MODEL_DEMOTE_AFTER_ERRORS times in a row, the requested one included, is tried last for
+MODEL_DEMOTE_SECONDS.
+"""
+import asyncio
+import json
 import logging
-from typing import Optional
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
 
-from core.settings_loader import openai_client
+from core.settings_loader import get_openai_client, GPT_FIRST_TOKEN_SECONDS, GPT_STREAMING
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +26,127 @@ DEFAULT_MODEL = "openai/gpt-5.6-luna"
 FALLBACK_MODEL = "deepseek/deepseek-v4-flash-0731"
 SECONDARY_FALLBACK = "google/gemini-3.5-flash-lite"
 
+STREAM_CHUNK_TIMEOUT_SECONDS = 30   # a stream that stalls this long after its first token counts as failed
+MODEL_DEMOTE_AFTER_ERRORS = 3
+MODEL_DEMOTE_SECONDS = 600
+STATS_EWMA_ALPHA = 0.3
+MODEL_STATS_FILE = os.path.join("data", "gpt_model_stats.json")
+
+_stats_memory: Optional[Dict[str, "ModelStats"]] = None
+
+
+@dataclass(slots=True)
+class ModelStats:
+    calls: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    last_error_at: float = 0.0
+    first_token_seconds: Optional[float] = None  # moving averages of successful calls
+    latency_seconds: Optional[float] = None
+
+    @property
+    def demoted(self) -> bool:
+        return (self.consecutive_errors >= MODEL_DEMOTE_AFTER_ERRORS
+                and time.time() - self.last_error_at < MODEL_DEMOTE_SECONDS)
+
+
+def _get_stats() -> Dict[str, ModelStats]:
+    """Load per-model stats: model -> ModelStats."""
+    global _stats_memory
+    if _stats_memory is None:
+        _stats_memory = {}
+        if os.path.exists(MODEL_STATS_FILE):
+            try:
+                with open(MODEL_STATS_FILE, "r", encoding="utf-8") as f:
+                    _stats_memory = {m: ModelStats(**s) for m, s in json.load(f).items()}
+            except Exception as e:
+                logger.warning(f"Could not load GPT model stats: {e}")
+    return _stats_memory
+
+
+def _save_stats() -> None:
+    if _stats_memory is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(MODEL_STATS_FILE) or ".", exist_ok=True)
+        with open(MODEL_STATS_FILE, "w", encoding="utf-8") as f:
+            json.dump({m: asdict(s) for m, s in _stats_memory.items()}, f, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save GPT model stats: {e}")
+
+
+def _ewma(previous: Optional[float], value: float) -> float:
+    return value if previous is None else previous + STATS_EWMA_ALPHA * (value - previous)
+
+
+def _record(model: str, ok: bool, first_token: Optional[float] = None, latency: Optional[float] = None) -> None:
+    stats = _get_stats().setdefault(model, ModelStats())
+    stats.calls += 1
+    if ok:
+        stats.consecutive_errors = 0
+        stats.first_token_seconds = _ewma(stats.first_token_seconds, first_token)
+        stats.latency_seconds = _ewma(stats.latency_seconds, latency)
+    else:
+        stats.errors += 1; stats.consecutive_errors += 1; stats.last_error_at = time.time()
+    _save_stats()
+
+
+def attempt_order(model: str) -> List[str]:
+    """
+    Models to try for a call asking for `model`: the requested one first, then the fallbacks by
+    their average time to first token (models without stats keep their configured order).
+    Demoted models go last.
+    """
+    stats = _get_stats()
+    fallbacks = [m for m in dict.fromkeys((FALLBACK_MODEL, SECONDARY_FALLBACK)) if m != model]
+    fallbacks.sort(key=lambda m: stats[m].first_token_seconds
+                   if m in stats and stats[m].first_token_seconds is not None else float("inf"))
+    order = [model] + fallbacks
+    return [m for m in order if not (m in stats and stats[m].demoted)] + [m for m in order if m in stats and stats[m].demoted]
+
+
+async def _stream_attempt(model: str, prompt: str, extra: dict, first_token: asyncio.Event) -> str:
+    """One streamed completion; sets `first_token` when content starts arriving. Raises on failure."""
+    started = time.monotonic()
+    first_token_at = None
+    stream = await get_openai_client().chat.completions.create(
+        model=model, messages=[{"role": "user", "content": prompt}], stream=True, **extra)
+    parts = []
+    try:
+        chunks = stream.__aiter__()
+        while True:
+            timeout = STREAM_CHUNK_TIMEOUT_SECONDS if first_token_at is not None else None
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+            except StopAsyncIteration:
+                break
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if first_token_at is None:
+                    first_token_at = time.monotonic(); first_token.set()
+                parts.append(delta)
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            await close()
+    if not parts:
+        raise ValueError("empty completion")
+    _record(model, True, first_token_at - started, time.monotonic() - started)
+    return "".join(parts)
+
+
+async def _plain_attempt(model: str, prompt: str, extra: dict, first_token: asyncio.Event) -> str:
+    """One non-streamed completion (GPT_STREAMING off). Raises on failure."""
+    started = time.monotonic()
+    response = await get_openai_client().chat.completions.create(
+        model=model, messages=[{"role": "user", "content": prompt}], **extra)
+    content = response.choices[0].message.content
+    if not content:
+        raise ValueError("empty completion")
+    first_token.set()
+    _record(model, True, time.monotonic() - started, time.monotonic() - started)
+    return content
+
 
 async def complete(
     prompt: str,
@@ -18,33 +155,58 @@ async def complete(
     temperature: Optional[float] = None,
     label: str = "GPT",
 ) -> Optional[str]:
-    """Ask `model`, retry once on FALLBACK_MODEL, return raw content or None if both fail."""
-    if not openai_client:
+    """Ask `model`, hedging with the fallbacks as described above; return raw content or None if all fail."""
+    if not get_openai_client():
         logger.error(f"{label}: OpenAI / OpenRouter client not available.")
         return None
 
-    attempts = [model]
-    if FALLBACK_MODEL not in attempts:
-        attempts.append(FALLBACK_MODEL)
-    if SECONDARY_FALLBACK not in attempts:
-        attempts.append(SECONDARY_FALLBACK)
-
-    for attempt in attempts:
-        try:
-            extra = {"max_tokens": max_tokens}
-            if temperature is not None:
-                extra['temperature'] = temperature
-
-            response = await openai_client.chat.completions.create(
-                model=attempt,
-                messages=[{"role": "user", "content": prompt}],
-                **extra,
-            )
-            if attempt != model:
-                logger.info(f"{label}: used fallback model {attempt}.")
-            return response.choices[0].message.content
-
-        except Exception as e:
-            logger.warning(f"{label}: error with model {attempt}: {e}")
+    extra = {"max_tokens": max_tokens}
+    if temperature is not None:
+        extra['temperature'] = temperature
+    attempt = _stream_attempt if GPT_STREAMING else _plain_attempt
+    queue = attempt_order(model)
+    running: Dict[asyncio.Task, tuple] = {}  # task -> (model, first-token event, start time)
+    last_start = 0.0
+
+    def start_next() -> None:
+        nonlocal last_start
+        next_model = queue.pop(0)
+        event = asyncio.Event()
+        last_start = time.monotonic()
+        running[asyncio.ensure_future(attempt(next_model, prompt, extra, event))] = (next_model, event, last_start)
+
+    start_next()
+    try:
+        while running:
+            # Hedge only while no running model has started answering (non-streamed answers arrive whole)
+            can_hedge = GPT_STREAMING and queue and not any(event.is_set() for _, event, _ in running.values())
+            timeout = max(0.0, last_start + GPT_FIRST_TOKEN_SECONDS - time.monotonic()) if can_hedge else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if not any(event.is_set() for _, event, _ in running.values()):
+                    logger.info(f"{label}: no tokens from {', '.join(m for m, _, _ in running.values())} after "
+                                f"{GPT_FIRST_TOKEN_SECONDS:g}s, also trying {queue[0]}.")
+                    start_next()
+                continue
+            for task in done:
+                attempt_model, _, _ = running.pop(task)
+                if task.exception() is None:
+                    if attempt_model != model:
+                        logger.info(f"{label}: used fallback model {attempt_model}.")
+                    return task.result()
+                _record(attempt_model, False)
+                logger.warning(f"{label}: error with model {attempt_model}: {task.exception()}")
+            if not running and queue:
+                start_next()
+    finally:
+        now = time.monotonic()
+        for task, (attempt_model, event, started) in running.items():
+            task.cancel()
+            if not event.is_set() and now - started >= GPT_FIRST_TOKEN_SECONDS:
+                # Never recorded otherwise: a primary that always stalls would stay first forever
+                logger.info(f"{label}: abandoned {attempt_model} without a token after {now - started:.1f}s, counted as failed.")
+                _record(attempt_model, False)
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
 
     return None
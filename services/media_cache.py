@@ -0,0 +1,125 @@
+# --- START OF FILE media_cache.py ---
+"""
+Persistent cache of Telegram file_ids for images the bot has already uploaded.
+
+Entries are keyed by the image source (URL, or `file:<name>` for local screenshots) and
+carry a hash of the uploaded bytes. A lookup made with the bytes in hand only hits when the
+hash matches, so a changed image at the same URL is uploaded again. Entries expire after
+MEDIA_CACHE_TTL_SECONDS; beyond MEDIA_CACHE_MAX_ENTRIES the least recently used are dropped.
+Changes stay in memory until flush(), which senders call once per post or run.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_FILE = os.path.join("data", "telegram_media_cache.json")
+MEDIA_CACHE_TTL_SECONDS = 30 * 24 * 3600  # 30 days
+MEDIA_CACHE_MAX_ENTRIES = 2000
+
+_cache_memory: Optional[dict] = None
+_dirty = False
+
+
+def _get_cache() -> dict:
+    """Load the persistent file_id cache."""
+    global _cache_memory
+    if _cache_memory is None:
+        if os.path.exists(MEDIA_CACHE_FILE):
+            try:
+                with open(MEDIA_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _cache_memory = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not load media cache: {e}")
+                _cache_memory = {}
+        else:
+            _cache_memory = {}
+    return _cache_memory
+
+
+def _save_cache() -> None:
+    """Drop expired entries, trim to MEDIA_CACHE_MAX_ENTRIES by last use and persist."""
+    if _cache_memory is None:
+        return
+    now = time.time()
+    for source in [s for s, e in _cache_memory.items() if now - e.get("stored_at", 0) >= MEDIA_CACHE_TTL_SECONDS]:
+        del _cache_memory[source]
+    if len(_cache_memory) > MEDIA_CACHE_MAX_ENTRIES:
+        by_last_use = sorted(_cache_memory, key=lambda s: _cache_memory[s].get("last_used", 0))
+        for source in by_last_use[:len(_cache_memory) - MEDIA_CACHE_MAX_ENTRIES]:
+            del _cache_memory[source]
+    try:
+        os.makedirs("data", exist_ok=True)
+        with open(MEDIA_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(_cache_memory, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save media cache: {e}")
+
+
+def flush() -> None:
+    """Persist the cache if anything changed since the last flush."""
+    global _dirty
+    if _dirty:
+        _dirty = False
+        _save_cache()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def get_file_id(source: Optional[str], data: Optional[bytes] = None) -> Optional[str]:
+    """
+    Cached file_id for `source`, or None.
+
+    :param source: Image URL or other stable source key.
+    :param data: Image bytes, if already downloaded; the cached hash must match them.
+    """
+    if not source:
+        return None
+    entry = _get_cache().get(source)
+    if not entry:
+        return None
+    now = time.time()
+    if now - entry.get("stored_at", 0) >= MEDIA_CACHE_TTL_SECONDS:
+        return None
+    if data is not None and entry.get("hash") != content_hash(data):
+        return None
+    global _dirty
+    entry["last_used"] = now
+    _dirty = True
+    return entry.get("file_id")
+
+
+def remember_file_id(source: Optional[str], file_id: Optional[str], data: Optional[bytes] = None) -> None:
+    """Store the file_id Telegram returned for an upload of `source` (saved by the next flush())."""
+    global _dirty
+    if not source or not file_id:
+        return
+    now = time.time()
+    _get_cache()[source] = {
+        "file_id": file_id,
+        "hash": content_hash(data) if data is not None else None,
+        "stored_at": now,
+        "last_used": now,
+    }
+    _dirty = True
+
+
+def forget(source: Optional[str]) -> None:
+    """Drop a file_id Telegram no longer accepts (e.g. after a bot token change)."""
+    global _dirty
+    if source and _get_cache().pop(source, None) is not None:
+        _dirty = True
+
+
+def is_file_id_error(exc: Exception) -> bool:
+    """True for Telegram's 'wrong file identifier' style rejections of a cached file_id."""
+    text = str(exc).lower()
+    return "file identifier" in text or "file_id" in text or "wrong file" in text
+
+# --- END OF FILE media_cache.py ---
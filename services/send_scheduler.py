@@ -0,0 +1,167 @@
+"""Rate-limited front for the Telegram bot client.
+
+Telegram allows about 30 messages/s per bot, 1 message/s per chat and 20 messages/min
+per group. Every send goes through a per-chat and a global token bucket here instead of
+ad-hoc asyncio.sleep() calls at the call sites, so different chats are served in parallel
+and a 429 only pauses the chat that hit it.
+
+Usage: `await scheduled_bot.send_message(chat_id=..., ...)` — same signatures as AsyncTeleBot.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from core.settings_loader import get_bot
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_RATE = 30.0           # messages/s for the whole bot
+CHAT_RATE = 1.0              # messages/s within one chat
+GROUP_RATE = 20.0 / 60.0     # messages/s within one group or channel (20 per minute)
+GROUP_BURST = 20.0
+MAX_429_RETRIES = 3
+
+# Methods that post into a chat and count against the per-chat/group limits
+_SEND_METHODS = {
+    "send_message", "send_photo", "send_media_group", "send_document",
+    "send_video", "send_animation", "copy_message", "forward_message",
+}
+# Edits and deletes still target a chat but only share the global bucket
+_CHAT_METHODS = _SEND_METHODS | {
+    "edit_message_text", "edit_message_caption", "edit_message_media", "delete_message",
+}
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations: reserve() says how long to wait, never blocks."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """Take `cost` tokens (going into debt if needed); return seconds until they are covered."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= cost
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+def _is_group_chat(chat_id: Any) -> bool:
+    """Groups, supergroups and channels have negative ids."""
+    try:
+        return int(chat_id) < 0
+    except (TypeError, ValueError):
+        return False
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Seconds from a 429 'Too Many Requests' error, None for any other error."""
+    if getattr(exc, 'error_code', None) != 429:
+        return None
+    params = (getattr(exc, 'result_json', None) or {}).get('parameters') or {}
+    return float(params.get('retry_after', 5))
+
+
+def _message_count(method: str, args: tuple, kwargs: dict) -> int:
+    """Messages a call posts: Telegram counts every item of a media group against the limits."""
+    if method != "send_media_group":
+        return 1
+    media = kwargs.get('media', args[1] if len(args) > 1 else None)
+    return max(1, len(media)) if isinstance(media, (list, tuple)) else 1
+
+
+def _rewind(args: tuple, kwargs: dict):
+    """Seek file-like payloads (and InputMedia.media) back to 0 before a retry."""
+    for value in list(args) + list(kwargs.values()):
+        items = value if isinstance(value, (list, tuple)) else [value]
+        for item in items:
+            payload = getattr(item, 'media', item)
+            if hasattr(payload, 'seek'):
+                try:
+                    payload.seek(0)
+                except Exception:
+                    pass
+
+
+class SendScheduler:
+    """Wraps an AsyncTeleBot; chat-scoped calls are paced, everything else passes through."""
+
+    def __init__(self, telegram_bot=None, global_rate: float = GLOBAL_RATE, chat_rate: float = CHAT_RATE,
+                 group_rate: float = GROUP_RATE, group_burst: float = GROUP_BURST,
+                 bot_factory: Optional[Callable[[], Any]] = None):
+        self._bot = telegram_bot
+        self._bot_factory = bot_factory  # creates the bot on first use when none is given
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[str, TokenBucket] = {}
+        self._groups: Dict[str, TokenBucket] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._loop = None
+
+    @property
+    def bot(self):
+        if self._bot is None:
+            self._bot = self._bot_factory()
+        return self._bot
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.bot, name)
+        if name not in _CHAT_METHODS or not callable(attr):
+            return attr
+
+        async def scheduled(*args, **kwargs):
+            return await self.call(name, *args, **kwargs)
+        return scheduled
+
+    def _state_for(self, key: str):
+        # Locks belong to one event loop; scripts and tests may asyncio.run() more than once
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._locks.clear()
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+            self._chats.setdefault(key, TokenBucket(self.chat_rate, 1.0))
+            self._groups.setdefault(key, TokenBucket(self.group_rate, self.group_burst))
+        return self._locks[key], self._chats[key], self._groups[key]
+
+    async def call(self, method: str, *args, **kwargs):
+        """Run bot.<method> once the chat's and the bot's buckets allow it; retry 429s."""
+        func = getattr(self.bot, method)
+        chat_id = kwargs.get('chat_id', args[0] if args else None)
+        lock, chat_bucket, group_bucket = self._state_for(str(chat_id))
+        cost = _message_count(method, args, kwargs)
+        # Holding the chat lock across the send keeps each chat's messages in call order
+        async with lock:
+            for attempt in range(MAX_429_RETRIES + 1):
+                if method in _SEND_METHODS:
+                    wait = chat_bucket.reserve(cost)
+                    if _is_group_chat(chat_id):
+                        wait = max(wait, group_bucket.reserve(cost))
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                wait = self._global.reserve(cost)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    retry_after = _retry_after(e)
+                    if retry_after is None or attempt == MAX_429_RETRIES:
+                        raise
+                    logger.warning(f"Telegram 429 on {method} to {chat_id}: retrying in {retry_after:.0f}s "
+                                   f"(attempt {attempt + 1}/{MAX_429_RETRIES})")
+                    await asyncio.sleep(retry_after)
+                    _rewind(args, kwargs)
+
+
+scheduled_bot = SendScheduler(bot_factory=get_bot)
@@ -1,41 +1,25 @@
 """Service for managing user and chat notification subscriptions (RuTracker feed, digests, eShop deals)."""
 
-import json
 import logging
-import os
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-logger = logging.getLogger(__name__)
+from core.state_store import StateStore, get_state_store
 
-USER_SUBS_FILE = os.path.join("data", "user_subscriptions.json")
+logger = logging.getLogger(__name__)
 
 VALID_SUBSCRIPTION_TYPES = {"deals", "rutracker", "digests"}
 
 
 class SubscriptionService:
-    """Manages granular subscriptions per chat/user for deals, tracker feed, and digests."""
-
-    def __init__(self, filepath: str = USER_SUBS_FILE):
-        self.filepath = filepath
-
-    def _load_data(self) -> Dict[str, Any]:
-        if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to read user subscriptions file '{self.filepath}': {e}")
-                return {}
-        return {}
-
-    def _save_data(self, data: Dict[str, Any]) -> None:
-        try:
-            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save user subscriptions data: {e}")
+    """Manages granular subscriptions per chat/user for deals, tracker feed, and digests.
+
+    Records live in the "user_subscriptions" collection of the state store (synced as
+    data/user_subscriptions.json), one row per chat/topic.
+    """
+
+    def __init__(self, store: Optional[StateStore] = None):
+        self.records = (store or get_state_store()).collection("user_subscriptions")
 
     def _get_key(self, chat_id: int, topic_id: Optional[int] = None) -> str:
         return f"{chat_id}_{topic_id}" if topic_id else str(chat_id)
@@ -47,9 +31,7 @@ class SubscriptionService:
         Get active subscription status for a chat/user.
         By default in DMs/chats, ALL automated broadcasts are False.
         """
-        data = self._load_data()
-        key = self._get_key(chat_id, topic_id)
-        user_data = data.get(key, {})
+        user_data = self.records.get(self._get_key(chat_id, topic_id), {})
         subs = user_data.get("subscriptions", {})
         return {
             "deals": bool(subs.get("deals", False)),
@@ -71,11 +53,11 @@ class SubscriptionService:
         Enable or disable a specific subscription type ('deals', 'rutracker', 'digests', 'all').
         Returns the updated subscription dictionary.
         """
-        data = self._load_data()
         key = self._get_key(chat_id, topic_id)
+        record = self.records.get(key)
 
-        if key not in data:
-            data[key] = {
+        if record is None:
+            record = {
                 "chat_id": chat_id,
                 "chat_type": chat_type,
                 "title": title or f"Chat_{chat_id}",
@@ -89,7 +71,7 @@ class SubscriptionService:
                 "updated_at": datetime.now(timezone.utc).isoformat(),
             }
 
-        subs = data[key].setdefault(
+        subs = record.setdefault(
             "subscriptions", {"deals": False, "rutracker": False, "digests": False}
         )
 
@@ -102,17 +84,20 @@ class SubscriptionService:
         else:
             raise ValueError(f"Unknown subscription type: '{sub_type}'. Valid: {VALID_SUBSCRIPTION_TYPES | {'all'}}")
 
-        data[key]["updated_at"] = datetime.now(timezone.utc).isoformat()
+        record["updated_at"] = datetime.now(timezone.utc).isoformat()
         if title:
-            data[key]["title"] = title
+            record["title"] = title
         if chat_type:
-            data[key]["chat_type"] = chat_type
+            record["chat_type"] = chat_type
         if topic_id is not None:
-            data[key]["topic_id"] = topic_id
+            record["topic_id"] = topic_id
         if language:
-            data[key]["language"] = language
+            record["language"] = language
 
-        self._save_data(data)
+        try:
+            self.records.put(key, record)
+        except Exception as e:
+            logger.error(f"Failed to save user subscriptions data: {e}")
         return {
             "deals": bool(subs.get("deals", False)),
             "rutracker": bool(subs.get("rutracker", False)),
@@ -125,9 +110,8 @@ class SubscriptionService:
         Used by main.py, send_daily_digest.py, and send_eshop_deals.py.
         """
         sub_type_clean = sub_type.lower().strip()
-        data = self._load_data()
         subscribers = []
-        for key, record in data.items():
+        for key, record in self.records.items():
             subs = record.get("subscriptions", {})
             if subs.get(sub_type_clean, False):
                 subscribers.append({
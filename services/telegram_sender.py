@@ -3,7 +3,9 @@ from io import BytesIO
 
 from services.translation import translate_ru_to_ua
 from services.ai_validator import summarize_description_with_ai
-from core.settings_loader import GROUPS, ERROR_TG, bot, TOKEN, IS_TEST_MODE, TEST_GROUPS
+from core.settings_loader import GROUPS, ERROR_TG, TOKEN, IS_TEST_MODE, TEST_GROUPS, SEND_FANOUT_LIMIT
+from services.send_scheduler import scheduled_bot
+from services import media_cache
 import re
 import html
 import asyncio
@@ -11,8 +13,7 @@ import time
 import traceback
 import os
 import logging
-from telebot.types import InputMediaPhoto
-from typing import List, Optional, Tuple, IO # Import IO for type hinting file handles
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, IO # Import IO for type hinting file handles
 import shutil
 
 # --- Import functions moved to telegram_utils ---
@@ -34,6 +35,77 @@ GOOGLE_IMG_SEARCH_URL = "https://www.google.com/search?tbm=isch&q=Nintendo+Switc
 MAX_DESCRIPTION_LENGTH = 5000 # Summarize if longer than this (approx 2 posts limit)
 
 
+# --- Media reuse across groups ---
+# After the first successful upload, Telegram file_ids are remembered per media key
+# ("cover", "thumbnail" or the screenshot path) and sent instead of the bytes.
+# services.media_cache keeps them across posts and runs.
+def _photo_payload(media_file_ids: Optional[Dict[str, str]], key: str, image_file: BytesIO):
+    """Known file_id for `key`, else a private copy of the bytes (groups may send concurrently)."""
+    if media_file_ids and key in media_file_ids:
+        return media_file_ids[key]
+    return BytesIO(image_file.getvalue())
+
+
+def _remember_file_ids(media_file_ids: Optional[Dict[str, str]], keys: List[str], sent) -> None:
+    """Store the largest-size photo file_id of each sent message under its media key."""
+    if media_file_ids is None or sent is None:
+        return
+    messages = sent if isinstance(sent, list) else [sent]
+    for key, message in zip(keys, messages):
+        photos = getattr(message, 'photo', None)
+        if photos and key not in media_file_ids:
+            media_file_ids[key] = photos[-1].file_id
+
+
+def _screenshot_media(file_path: str, media_file_ids: Optional[Dict[str, str]], media_files_opened: List[IO]):
+    """file_id or an opened handle for a screenshot; None if the file is unusable."""
+    if media_file_ids and file_path in media_file_ids:
+        return media_file_ids[file_path]
+    if not os.path.exists(file_path):
+        logger.warning(f"Warning: Screenshot file not found: {file_path}")
+        return None
+    try:
+        file_handle = open(file_path, 'rb')
+        media_files_opened.append(file_handle) # Add handle to list for later closing
+        return file_handle
+    except Exception as open_err:
+        logger.error(f"Error opening screenshot file {file_path}: {open_err}")
+        return None
+
+
+async def _send_media(send: Callable[[bool], Awaitable], on_file_id_error: Optional[Callable[[Exception], bool]]):
+    """
+    send(False); if Telegram rejects a cached file_id and on_file_id_error() has dropped the
+    cached ids, send(True) again with fresh uploads. Only this call is repeated, so messages
+    already sent for the group are not posted twice.
+    """
+    try:
+        return await send(False)
+    except Exception as e:
+        if on_file_id_error is None or not on_file_id_error(e):
+            raise
+    return await send(True)
+
+
+def _collect_media_sources(cover_image_url: Optional[str], cover_image_file: Optional[BytesIO],
+                           video_id: Optional[str], thumbnail_resolution: Optional[str],
+                           trailer_thumbnail_file: Optional[BytesIO],
+                           local_screenshot_paths: List[str]) -> Dict[str, Tuple[str, bytes]]:
+    """Media key -> (media cache source, bytes) for every image of a post."""
+    sources: Dict[str, Tuple[str, bytes]] = {}
+    if cover_image_file and cover_image_url:
+        sources["cover"] = (cover_image_url, cover_image_file.getvalue())
+    if trailer_thumbnail_file and video_id:
+        sources["thumbnail"] = (f"youtube:{video_id}:{thumbnail_resolution}", trailer_thumbnail_file.getvalue())
+    for file_path in local_screenshot_paths:
+        try:
+            with open(file_path, 'rb') as f:
+                sources[file_path] = (f"file:{os.path.basename(file_path)}", f.read())
+        except OSError:
+            continue
+    return sources
+
+
 # --- Private Helper Function for Strategy 1 (Separate Media) ---
 async def _send_strategy_separate(
     chat_id: int,
@@ -43,36 +115,27 @@ async def _send_strategy_separate(
     trailer_thumbnail_file: Optional[BytesIO],
     local_screenshot_paths: List[str],
     group_name: str = "Unknown",
-    log_file: str = ""
+    log_file: str = "",
+    media_file_ids: Optional[Dict[str, str]] = None,
+    on_file_id_error: Optional[Callable[[Exception], bool]] = None
 ) -> List[IO]:
     """Handles sending logic when media count is below the threshold."""
+    from telebot.types import InputMediaPhoto  # telebot is only imported once something is sent
     media_files_opened: List[IO] = []
     caption_for_photo = ""
     remaining_text = message_text
     primary_photo_sent = False
 
-    # Try sending Cover first
+    # Cover first; if there is no cover, the trailer thumbnail
+    primary = None
     if cover_image_file:
-        logger.debug("Strategy 1: Sending cover image...")
-        cover_image_file.seek(0)
-        caption_parts = split_text(message_text, MAX_CAPTION_LENGTH)
-        caption_for_photo = convert_markdown_to_html(caption_parts[0]) if caption_parts else None
-        caption_for_photo = fix_html_for_telegram(caption_for_photo) if caption_for_photo else caption_for_photo
-        remaining_text = "\n\n".join(caption_parts[1:])
-        # Merge fragmented blockquotes tightly — no gaps between them
-        remaining_text = re.sub(r'</blockquote>\s*<blockquote>', '</blockquote><blockquote>', remaining_text, flags=re.IGNORECASE)
-
-        await bot.send_photo(chat_id=chat_id, message_thread_id=topic_id, photo=cover_image_file, caption=caption_for_photo, parse_mode="HTML")
-        if log_file:
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(f"\n=== [{group_name}] STRATEGY 1 PHOTO CAPTION (len {len(caption_for_photo)}) ===\n{caption_for_photo}\n")
-        await asyncio.sleep(1)
-        primary_photo_sent = True
-
-    # If no cover, try sending Thumbnail
+        primary = ("cover", cover_image_file, "PHOTO")
     elif trailer_thumbnail_file:
-        logger.debug("Strategy 1: No cover, sending trailer thumbnail...")
-        trailer_thumbnail_file.seek(0)
+        primary = ("thumbnail", trailer_thumbnail_file, "THUMBNAIL")
+
+    if primary:
+        media_key, image_file, log_label = primary
+        logger.debug(f"Strategy 1: Sending {media_key} image...")
         caption_parts = split_text(message_text, MAX_CAPTION_LENGTH)
         caption_for_photo = convert_markdown_to_html(caption_parts[0]) if caption_parts else None
         caption_for_photo = fix_html_for_telegram(caption_for_photo) if caption_for_photo else caption_for_photo
@@ -80,11 +143,13 @@ async def _send_strategy_separate(
         # Merge fragmented blockquotes tightly — no gaps between them
         remaining_text = re.sub(r'</blockquote>\s*<blockquote>', '</blockquote><blockquote>', remaining_text, flags=re.IGNORECASE)
 
-        await bot.send_photo(chat_id=chat_id, message_thread_id=topic_id, photo=trailer_thumbnail_file, caption=caption_for_photo, parse_mode="HTML")
+        sent = await _send_media(lambda retry: scheduled_bot.send_photo(
+            chat_id=chat_id, message_thread_id=topic_id, photo=_photo_payload(media_file_ids, media_key, image_file),
+            caption=caption_for_photo, parse_mode="HTML"), on_file_id_error)
+        _remember_file_ids(media_file_ids, [media_key], sent)
         if log_file:
             with open(log_file, "a", encoding="utf-8") as f:
-                f.write(f"\n=== [{group_name}] STRATEGY 1 THUMBNAIL CAPTION (len {len(caption_for_photo)}) ===\n{caption_for_photo}\n")
-        await asyncio.sleep(1)
+                f.write(f"\n=== [{group_name}] STRATEGY 1 {log_label} CAPTION (len {len(caption_for_photo)}) ===\n{caption_for_photo}\n")
         primary_photo_sent = True
 
     # Send Remaining Text (if any)
@@ -103,42 +168,38 @@ async def _send_strategy_separate(
                     with open(log_file, "a", encoding="utf-8") as f:
                         f.write(f"\n=== [{group_name}] STRATEGY 1 PART {i+1} (len {len(formatted_part)}) ===\n{formatted_part}\n")
                 try:
-                    await bot.send_message(chat_id=chat_id, message_thread_id=topic_id, text=formatted_part, parse_mode="HTML", disable_web_page_preview=(disable_first_preview or i > 0))
+                    await scheduled_bot.send_message(chat_id=chat_id, message_thread_id=topic_id, text=formatted_part, parse_mode="HTML", disable_web_page_preview=(disable_first_preview or i > 0))
                 except Exception as send_err:
                     # Capture exact HTML if it fails to parse
                     with open("failing_part.html", "w", encoding="utf-8") as dump_file:
                         dump_file.write(formatted_part)
                     logger.error(f"Saved failing HTML part ({len(formatted_part)} bytes) to failing_part.html. Error: {send_err}")
                     raise send_err
-                await asyncio.sleep(1)
             else:
                 logger.debug("Strategy 1: Skipped sending empty part of remaining text.")
     else:
         logger.debug("Strategy 1: No remaining text to send.")
 
     # Send ONLY Screenshots
-    if local_screenshot_paths:
+    async def send_screenshots(retry: bool) -> None:
         screenshot_media_group: List[InputMediaPhoto] = []
-        screenshots_added_count = 0
+        screenshot_keys: List[str] = []
         for file_path in local_screenshot_paths:
             if len(screenshot_media_group) >= MAX_MEDIA_GROUP_SIZE:
                 logger.warning(f"Reached max media group size ({MAX_MEDIA_GROUP_SIZE}), stopping screenshot add.")
                 break
-            if not os.path.exists(file_path):
-                logger.warning(f"Warning: Screenshot file not found: {file_path}")
-                continue
-            try:
-                file_handle = open(file_path, 'rb')
-                media_files_opened.append(file_handle) # Add handle to list for later closing
-                screenshot_media_group.append(InputMediaPhoto(media=file_handle))
-                screenshots_added_count += 1
-            except Exception as open_err:
-                logger.error(f"Error opening screenshot file {file_path}: {open_err}")
+            media = _screenshot_media(file_path, media_file_ids, media_files_opened)
+            if media is not None:
+                screenshot_media_group.append(InputMediaPhoto(media=media))
+                screenshot_keys.append(file_path)
 
         if screenshot_media_group:
-            logger.info(f"Sending screenshot-only media group ({screenshots_added_count} items)...")
-            await bot.send_media_group(chat_id=chat_id, message_thread_id=topic_id, media=screenshot_media_group)
-            await asyncio.sleep(2)
+            logger.info(f"Sending screenshot-only media group ({len(screenshot_media_group)} items)...")
+            sent = await scheduled_bot.send_media_group(chat_id=chat_id, message_thread_id=topic_id, media=screenshot_media_group)
+            _remember_file_ids(media_file_ids, screenshot_keys, sent)
+
+    if local_screenshot_paths:
+        await _send_media(send_screenshots, on_file_id_error)
 
     return media_files_opened
 
@@ -153,46 +214,44 @@ async def _send_strategy_grouped(
     local_screenshot_paths: List[str],
     is_max_res_thumbnail: bool,
     group_name: str = "Unknown",
-    log_file: str = ""
+    log_file: str = "",
+    media_file_ids: Optional[Dict[str, str]] = None,
+    on_file_id_error: Optional[Callable[[Exception], bool]] = None
 ) -> List[IO]:
     """Handles sending logic when media count meets or exceeds the threshold."""
+    from telebot.types import InputMediaPhoto
     media_files_opened: List[IO] = []
-    media_group_to_send: List[InputMediaPhoto] = []
     caption_for_group = ""
     remaining_text_group = message_text
 
-    # --- Build the media group ---
-    if is_max_res_thumbnail and trailer_thumbnail_file:
-        trailer_thumbnail_file.seek(0)
-        media_group_to_send.append(InputMediaPhoto(media=trailer_thumbnail_file))
-        if cover_image_file and len(media_group_to_send) < MAX_MEDIA_GROUP_SIZE:
-            cover_image_file.seek(0)
-            media_group_to_send.append(InputMediaPhoto(media=cover_image_file))
-    else:
-        if cover_image_file:
-            cover_image_file.seek(0)
-            media_group_to_send.append(InputMediaPhoto(media=cover_image_file))
-        if trailer_thumbnail_file and len(media_group_to_send) < MAX_MEDIA_GROUP_SIZE:
-            trailer_thumbnail_file.seek(0)
-            media_group_to_send.append(InputMediaPhoto(media=trailer_thumbnail_file))
-
-    # Add Screenshots
-    if local_screenshot_paths:
-        screenshots_added_count = 0
-        for file_path in local_screenshot_paths:
-            if len(media_group_to_send) >= MAX_MEDIA_GROUP_SIZE:
+    # --- Build the media group (again with fresh uploads if a cached file_id is rejected) ---
+    def build_media_group() -> Tuple[List[InputMediaPhoto], List[str]]:
+        media_group: List[InputMediaPhoto] = []
+        keys: List[str] = []
+        if is_max_res_thumbnail and trailer_thumbnail_file:
+            ordered_images = [("thumbnail", trailer_thumbnail_file), ("cover", cover_image_file)]
+        else:
+            ordered_images = [("cover", cover_image_file), ("thumbnail", trailer_thumbnail_file)]
+        for media_key, image_file in ordered_images:
+            if image_file and len(media_group) < MAX_MEDIA_GROUP_SIZE:
+                media_group.append(InputMediaPhoto(media=_photo_payload(media_file_ids, media_key, image_file)))
+                keys.append(media_key)
+
+        # Add Screenshots
+        for file_path in local_screenshot_paths or []:
+            if len(media_group) >= MAX_MEDIA_GROUP_SIZE:
                  logger.warning(f"Reached max media group size ({MAX_MEDIA_GROUP_SIZE}), stopping screenshot add.")
                  break
-            if not os.path.exists(file_path):
-                logger.warning(f"Warning: Screenshot file not found: {file_path}")
-                continue
-            try:
-                file_handle = open(file_path, 'rb')
-                media_files_opened.append(file_handle) # Add handle to list for later closing
-                media_group_to_send.append(InputMediaPhoto(media=file_handle))
-                screenshots_added_count += 1
-            except Exception as open_err:
-                logger.error(f"Error opening screenshot file {file_path}: {open_err}")
+            media = _screenshot_media(file_path, media_file_ids, media_files_opened)
+            if media is not None:
+                media_group.append(InputMediaPhoto(media=media))
+                keys.append(file_path)
+        if media_group and caption_for_group:
+            media_group[0].caption = caption_for_group
+            media_group[0].parse_mode = "HTML"
+        return media_group, keys
+
+    media_group_to_send, media_keys = build_media_group()
 
     # --- Assign Caption and Send ---
     if media_group_to_send:
@@ -210,20 +269,24 @@ async def _send_strategy_grouped(
             remaining_text_group = ""
 
         # Send Media Group or Single Photo
-        if len(media_group_to_send) > 1:
-            logger.info(f"Sending media group ({len(media_group_to_send)} items)...")
-            await bot.send_media_group(chat_id=chat_id, message_thread_id=topic_id, media=media_group_to_send)
-            await asyncio.sleep(2)
-        elif len(media_group_to_send) == 1:
-            logger.info("Sending single photo...")
+        async def send_media(retry: bool):
+            media_group, keys = build_media_group() if retry else (media_group_to_send, media_keys)
+            if len(media_group) > 1:
+                logger.info(f"Sending media group ({len(media_group)} items)...")
+                sent = await scheduled_bot.send_media_group(chat_id=chat_id, message_thread_id=topic_id, media=media_group)
+            else:
+                logger.info("Sending single photo...")
+                media_content = media_group[0].media
+                if hasattr(media_content, 'seek'): media_content.seek(0)
+                sent = await scheduled_bot.send_photo(chat_id=chat_id, message_thread_id=topic_id, photo=media_content, caption=media_group[0].caption, parse_mode="HTML")
+            _remember_file_ids(media_file_ids, keys, sent)
+
+        await _send_media(send_media, on_file_id_error)
+        if len(media_group_to_send) == 1:
             single_media_obj = media_group_to_send[0]
-            media_content = single_media_obj.media
-            if hasattr(media_content, 'seek'): media_content.seek(0)
-            await bot.send_photo(chat_id=chat_id, message_thread_id=topic_id, photo=media_content, caption=single_media_obj.caption, parse_mode="HTML")
             if log_file:
                 with open(log_file, "a", encoding="utf-8") as f:
                     f.write(f"\n=== [{group_name}] STRATEGY 2 SINGLE PHOTO CAPTION (len {len(single_media_obj.caption or '')}) ===\n{single_media_obj.caption}\n")
-            await asyncio.sleep(1)
 
     # Send Remaining Text (if any)
     if remaining_text_group.strip():
@@ -239,8 +302,7 @@ async def _send_strategy_grouped(
                  if log_file:
                      with open(log_file, "a", encoding="utf-8") as f:
                          f.write(f"\n=== [{group_name}] STRATEGY 2 PART {i+1} (len {len(formatted_part)}) ===\n{formatted_part}\n")
-                 await bot.send_message(chat_id=chat_id, message_thread_id=topic_id, text=formatted_part, parse_mode="HTML", disable_web_page_preview=True)
-                 await asyncio.sleep(1)
+                 await scheduled_bot.send_message(chat_id=chat_id, message_thread_id=topic_id, text=formatted_part, parse_mode="HTML", disable_web_page_preview=True)
              else:
                   logger.debug("Strategy 2: Skipped sending empty part of remaining text.")
     else:
@@ -249,25 +311,9 @@ async def _send_strategy_grouped(
     return media_files_opened
 
 
-# --- Main Sending Function (remains the same structure, calls helpers) ---
-async def send_to_telegram(title_for_caption: str,
-                     cover_image_url: Optional[str],
-                     magnet_link: str,
-                     description: str,
-                     entry_url: str,
-                     video_id_for_thumbnail: Optional[str] = None,
-                     local_screenshot_paths: Optional[List[str]] = None,
-                     cycle_log_file: Optional[str] = None,
-                     torrent_size: Optional[str] = None):
-    """
-    Sends the parsed tracker data to configured Telegram groups.
-    Handles translation, media grouping, and message splitting.
-    Uses helper functions for different sending strategies.
-    """
-    if not bot:
-        logger.error("ERROR in send_to_telegram: Bot is not initialized.")
-        return
-
+# --- Message preparation (shared by send_to_telegram and the main.py pipeline) ---
+def _collect_target_groups() -> List[dict]:
+    """GROUPS (or TEST_GROUPS) plus 'rutracker' subscribers not already listed."""
     target_groups = list(TEST_GROUPS) if IS_TEST_MODE else list(GROUPS)
     if not IS_TEST_MODE:
         try:
@@ -284,52 +330,40 @@ async def send_to_telegram(title_for_caption: str,
                     })
         except Exception as sub_err:
             logger.debug(f"Could not load rutracker subscribers: {sub_err}")
+    return target_groups
+
+
+async def _summarize_if_too_long(description: str) -> str:
+    """AI-summarize descriptions over MAX_DESCRIPTION_LENGTH and tell the admins what changed."""
+    if len(description) <= MAX_DESCRIPTION_LENGTH:
+        return description
+
+    logger.info(f"Description length ({len(description)}) exceeds {MAX_DESCRIPTION_LENGTH}. Summarizing with AI...")
+    original_description = description  # Keep a copy of the original
+    summarized_description = await summarize_description_with_ai(description, target_length=MAX_DESCRIPTION_LENGTH - 1000)
+
+    # Check if summarization was successful and different from original
+    if summarized_description == original_description:
+        logger.info("Summarization did not produce a different result. Using original description.")
+        return description
+
+    # Send a notification to the admin/log channel
+    log_message = (
+        f"📝 Description Summarized for Post\n\n"
+        f"Original Length: {len(original_description)}\n"
+        f"Summarized Length: {len(summarized_description)}\n\n"
+        f"--- ORIGINAL ---\n{html.escape(original_description[:1500])}...\n\n"
+        f"--- SUMMARY ---\n{html.escape(summarized_description[:1500])}..."
+    )
+    await send_message_to_admin(log_message)
+    return summarized_description
 
-    if not target_groups:
-        logger.warning(f"No target groups configured (IS_TEST_MODE: {IS_TEST_MODE}).")
-        return
-
-    if local_screenshot_paths is None:
-        local_screenshot_paths = []
-
-    # --- AI Summarization for long descriptions ---
-    if len(description) > MAX_DESCRIPTION_LENGTH:
-        logger.info(f"Description length ({len(description)}) exceeds {MAX_DESCRIPTION_LENGTH}. Summarizing with AI...")
-        original_description = description  # Keep a copy of the original
-        summarized_description = await summarize_description_with_ai(description, target_length=MAX_DESCRIPTION_LENGTH - 1000)
-
-        # Check if summarization was successful and different from original
-        if summarized_description != original_description:
-            description = summarized_description  # Replace original description
-            
-            # Send a notification to the admin/log channel
-            log_message = (
-                f"📝 Description Summarized for Post\n\n"
-                f"Original Length: {len(original_description)}\n"
-                f"Summarized Length: {len(summarized_description)}\n\n"
-                f"--- ORIGINAL ---\n{html.escape(original_description[:1500])}...\n\n"
-                f"--- SUMMARY ---\n{html.escape(summarized_description[:1500])}..."
-            )
-            await send_message_to_admin(log_message)
-        else:
-            logger.info("Summarization did not produce a different result. Using original description.")
-    # ---
-
-    # Download media needed for all groups first
-    cover_image_file = await download_cover_image_tg(cover_image_url)
-    trailer_thumbnail_file, thumbnail_resolution = await download_trailer_thumbnail_tg(video_id_for_thumbnail)
-
-    # Calculate total potential media items to decide strategy
-    potential_total_media = 0
-    if cover_image_file: potential_total_media += 1
-    if trailer_thumbnail_file: potential_total_media += 1
-    potential_total_media += len(local_screenshot_paths)
-
-    is_max_res_thumbnail = (thumbnail_resolution == "maxres")
 
-    # --- Assemble message text ONCE before the group loop ---
+def _assemble_message_text(title_for_caption: str, magnet_link: str, description: str,
+                           torrent_size: Optional[str] = None) -> str:
+    """Build the RU post body: title, magnet block and condensed description, joined by ###GAP###."""
     description_part = description.strip()
-    
+
     # Add a gap before the main description header (if found)
     description_headers = ["Описание", "Описание игры", "Description", "Опис", "Опис гри"]
     for header in description_headers:
@@ -346,11 +380,11 @@ async def send_to_telegram(title_for_caption: str,
             idx = description_part.find(f"<b>{header}</b>")
         if idx != -1 and (split_point_desc == -1 or idx < split_point_desc):
             split_point_desc = idx
-    
+
     quote_idx_desc = description_part.find("<blockquote>")
     if quote_idx_desc != -1 and (split_point_desc == -1 or quote_idx_desc < split_point_desc):
         split_point_desc = quote_idx_desc
-        
+
     if split_point_desc != -1:
         desc_params = description_part[:split_point_desc]
         desc_rest = description_part[split_point_desc:]
@@ -364,7 +398,7 @@ async def send_to_telegram(title_for_caption: str,
         download_label = f"<b>Скачать [{formatted_size}]:</b>"
     else:
         download_label = "<b>Скачать:</b>"
-    base_message_text = (
+    return (
         f"{title_for_caption}"
         f"###GAP###"
         f"{download_label}\n"
@@ -373,14 +407,89 @@ async def send_to_telegram(title_for_caption: str,
         f"{description_part}"
     )
 
-    # Translation cache — translate once, reuse for all UA groups
-    translated_message_text = None
 
-    # Track sent groups to avoid double posting
+async def _translate_message_text(base_message_text: str) -> str:
+    """Translate the assembled post to UA, protecting blockquotes and update links. Falls back to RU."""
+    try:
+        # Replace <blockquote> tags with opaque tokens before GPT translation.
+        prepared_text = base_message_text.replace("<blockquote>", "XBQSX")
+        prepared_text = prepared_text.replace("</blockquote>", "XBQEX")
+
+        # Protect update header links from GPT (GPT tends to strip/alter <a> inside <b>).
+        # Pattern: <b><a href="...">Оновлено:</a></b>
+        protected_links: dict = {}
+        link_counter = [0]
+        def _protect_link(m):
+            token = f'XUPDLNK{link_counter[0]}X'
+            protected_links[token] = m.group(0)
+            link_counter[0] += 1
+            return token
+        prepared_text = re.sub(
+            r'<b><a href="[^"]*">[^<]*</a></b>',
+            _protect_link,
+            prepared_text
+        )
+
+        translated_message_text = await translate_ru_to_ua(prepared_text)
+
+        # Restore protected update header links
+        for token, original_html in protected_links.items():
+            translated_message_text = translated_message_text.replace(token, original_html)
+
+        # Final safety: merge any consecutive blockquotes tightly (using the tokens)
+        translated_message_text = re.sub(r'XBQEX\s*XBQSX', 'XBQEXXBQSX', translated_message_text, flags=re.IGNORECASE)
+
+        # Restore blockquote tags
+        translated_message_text = translated_message_text.replace("XBQSX", "<blockquote>")
+        translated_message_text = translated_message_text.replace("XBQEX", "</blockquote>")
+        translated_message_text = re.sub(r'</blockquote>\s*<blockquote>', '</blockquote><blockquote>', translated_message_text, flags=re.IGNORECASE)
+
+        # Force consolidation of technical parameters ONLY by finding where they end in the translated text.
+        # We match any of our logical headers or blockquotes.
+        logical_headers_list_ua = "Опис|Особливост|Дод\\. інформаці|Додатков|Оновлен|Системн|Описан|Особенност|Доп\\.|Систем|Description|Features|Changelog|System"
+        match_boundary = re.search(r'<b>(?:' + logical_headers_list_ua + r')[^<]*?</b>|<blockquote>', translated_message_text, re.IGNORECASE)
+
+        if match_boundary:
+            split_point = match_boundary.start()
+            params_part = translated_message_text[:split_point]
+            rest_part = translated_message_text[split_point:]
+            params_part = re.sub(r"\n\n\s*<b>", "\n<b>", params_part)
+            translated_message_text = params_part + rest_part
+        else:
+            translated_message_text = re.sub(r"\n\n\s*<b>", "\n<b>", translated_message_text)
+
+        logger.debug(f"Cached translated message (len {len(translated_message_text)})")
+        return translated_message_text
+    except Exception as e:
+        logger.error(f"Error translating message: {e}. UA groups will receive original language.")
+        return base_message_text  # Fallback
+
+
+async def prepare_message_texts(title_for_caption: str,
+                                magnet_link: str,
+                                description: str,
+                                torrent_size: Optional[str] = None) -> Dict[str, str]:
+    """
+    Summarize, assemble and translate a post ahead of sending.
+
+    Returns {"RU": text} plus "UA" when any target group wants Ukrainian. main.py runs this
+    in its worker pool so the slow LLM calls overlap with other entries; the result is passed
+    to send_to_telegram(prepared_texts=...).
+    """
+    description = await _summarize_if_too_long(description)
+    base_message_text = _assemble_message_text(title_for_caption, magnet_link, description, torrent_size)
+    texts = {"RU": base_message_text}
+    if any(str(g.get('language', 'RU')).upper() == "UA" for g in _collect_target_groups()):
+        logger.info("Translating message to UA ahead of sending...")
+        texts["UA"] = await _translate_message_text(base_message_text)
+    return texts
+
+
+# --- Main Sending Function (remains the same structure, calls helpers) ---
+def _resolve_send_targets(target_groups: List[dict]) -> List[dict]:
+    """Validate chat/topic ids and drop duplicate group entries, keeping config order."""
+    targets = []
     sent_group_keys = set()
-    success_count = 0
-    
-    # Iterate through each configured group
     for group in target_groups:
         chat_id = group.get('chat_id')
         topic_id = None
@@ -408,71 +517,106 @@ async def send_to_telegram(title_for_caption: str,
             continue
         sent_group_keys.add(group_key)
 
-        group_lang = group.get('language', 'RU').upper()
+        targets.append({
+            'chat_id': chat_id,
+            'topic_id': topic_id,
+            'group_name': group_name,
+            'language': str(group.get('language', 'RU')).upper(),
+        })
+    return targets
 
-        logger.info(f"Processing message for group: {group_name} (Lang: {group_lang}, ChatID: {chat_id}, TopicID: {topic_id})")
 
-        # Use cached translated or original message
-        if group_lang == "UA":
-            if translated_message_text is None:
-                # Translate once and cache
-                logger.info("Translating message to UA (first UA group)...")
-                try: 
-                    # Replace <blockquote> tags with opaque tokens before GPT translation.
-                    prepared_text = base_message_text.replace("<blockquote>", "XBQSX")
-                    prepared_text = prepared_text.replace("</blockquote>", "XBQEX")
-
-                    # Protect update header links from GPT (GPT tends to strip/alter <a> inside <b>).
-                    # Pattern: <b><a href="...">Оновлено:</a></b>
-                    protected_links: dict = {}
-                    link_counter = [0]
-                    def _protect_link(m):
-                        token = f'XUPDLNK{link_counter[0]}X'
-                        protected_links[token] = m.group(0)
-                        link_counter[0] += 1
-                        return token
-                    prepared_text = re.sub(
-                        r'<b><a href="[^"]*">[^<]*</a></b>',
-                        _protect_link,
-                        prepared_text
-                    )
-
-                    translated_message_text = await translate_ru_to_ua(prepared_text)
-
-                    # Restore protected update header links
-                    for token, original_html in protected_links.items():
-                        translated_message_text = translated_message_text.replace(token, original_html)
-                    
-                    # Final safety: merge any consecutive blockquotes tightly (using the tokens)
-                    translated_message_text = re.sub(r'XBQEX\s*XBQSX', 'XBQEXXBQSX', translated_message_text, flags=re.IGNORECASE)
-
-                    # Restore blockquote tags
-                    translated_message_text = translated_message_text.replace("XBQSX", "<blockquote>")
-                    translated_message_text = translated_message_text.replace("XBQEX", "</blockquote>")
-                    translated_message_text = re.sub(r'</blockquote>\s*<blockquote>', '</blockquote><blockquote>', translated_message_text, flags=re.IGNORECASE)
-
-                    # Force consolidation of technical parameters ONLY by finding where they end in the translated text.
-                    # We match any of our logical headers or blockquotes.
-                    logical_headers_list_ua = "Опис|Особливост|Дод\\. інформаці|Додатков|Оновлен|Системн|Описан|Особенност|Доп\\.|Систем|Description|Features|Changelog|System"
-                    match_boundary = re.search(r'<b>(?:' + logical_headers_list_ua + r')[^<]*?</b>|<blockquote>', translated_message_text, re.IGNORECASE)
-                    
-                    if match_boundary:
-                        split_point = match_boundary.start()
-                        params_part = translated_message_text[:split_point]
-                        rest_part = translated_message_text[split_point:]
-                        params_part = re.sub(r"\n\n\s*<b>", "\n<b>", params_part)
-                        translated_message_text = params_part + rest_part
-                    else:
-                        translated_message_text = re.sub(r"\n\n\s*<b>", "\n<b>", translated_message_text)
-                    
-                    logger.debug(f"Cached translated message (len {len(translated_message_text)})")
-                except Exception as e: 
-                    logger.error(f"Error translating message: {e}. UA groups will receive original language.")
-                    translated_message_text = base_message_text  # Fallback
-            
-            message_text = translated_message_text
-        else:
-            message_text = base_message_text
+async def send_to_telegram(title_for_caption: str,
+                     cover_image_url: Optional[str],
+                     magnet_link: str,
+                     description: str,
+                     entry_url: str,
+                     video_id_for_thumbnail: Optional[str] = None,
+                     local_screenshot_paths: Optional[List[str]] = None,
+                     cycle_log_file: Optional[str] = None,
+                     torrent_size: Optional[str] = None,
+                     prepared_texts: Optional[Dict[str, str]] = None):
+    """
+    Sends the parsed tracker data to configured Telegram groups.
+    Handles translation, media grouping, and message splitting.
+    Uses helper functions for different sending strategies.
+    `prepared_texts` (from prepare_message_texts) skips summarization, assembly and translation.
+
+    The first group is sent on its own so its uploads yield Telegram file_ids; the remaining
+    groups then get the same media by file_id, up to SEND_FANOUT_LIMIT of them in parallel.
+    """
+    if not TOKEN:
+        logger.error("ERROR in send_to_telegram: Bot is not initialized.")
+        return
+
+    target_groups = _collect_target_groups()
+    if not target_groups:
+        logger.warning(f"No target groups configured (IS_TEST_MODE: {IS_TEST_MODE}).")
+        return
+
+    if local_screenshot_paths is None:
+        local_screenshot_paths = []
+
+    targets = _resolve_send_targets(target_groups)
+
+    # --- Assemble message text ONCE per language before the fan-out ---
+    if prepared_texts and prepared_texts.get("RU"):
+        base_message_text = prepared_texts["RU"]
+        # Translation cache — reuse the pipeline's translation for all UA groups
+        translated_message_text = prepared_texts.get("UA")
+    else:
+        description = await _summarize_if_too_long(description)
+        base_message_text = _assemble_message_text(title_for_caption, magnet_link, description, torrent_size)
+        translated_message_text = None
+    if translated_message_text is None and any(t['language'] == "UA" for t in targets):
+        logger.info("Translating message to UA (once for all UA groups)...")
+        translated_message_text = await _translate_message_text(base_message_text)
+    message_texts = {"RU": base_message_text, "UA": translated_message_text or base_message_text}
+
+    # Download media needed for all groups first
+    cover_image_file = await download_cover_image_tg(cover_image_url)
+    trailer_thumbnail_file, thumbnail_resolution = await download_trailer_thumbnail_tg(video_id_for_thumbnail)
+
+    # Calculate total potential media items to decide strategy
+    potential_total_media = 0
+    if cover_image_file: potential_total_media += 1
+    if trailer_thumbnail_file: potential_total_media += 1
+    potential_total_media += len(local_screenshot_paths)
+
+    is_max_res_thumbnail = (thumbnail_resolution == "maxres")
+
+    # Filled from the persistent media cache and by the first successful send, reused by every later group
+    media_sources = _collect_media_sources(cover_image_url, cover_image_file, video_id_for_thumbnail,
+                                           thumbnail_resolution, trailer_thumbnail_file, local_screenshot_paths)
+    media_file_ids: Dict[str, str] = {}
+    for media_key, (source, data) in media_sources.items():
+        cached_file_id = media_cache.get_file_id(source, data)
+        if cached_file_id:
+            media_file_ids[media_key] = cached_file_id
+    cached_media_keys = set(media_file_ids)
+    if cached_media_keys:
+        logger.info(f"Reusing {len(cached_media_keys)} cached Telegram file_id(s) for this post.")
+
+    had_cached_file_ids = bool(cached_media_keys)
+
+    def _drop_cached_file_ids(error: Exception) -> bool:
+        """True if `error` is a rejected file_id from the cache; the cached ids are then dropped for a fresh upload."""
+        if not (had_cached_file_ids and media_cache.is_file_id_error(error)):
+            return False
+        if cached_media_keys:
+            # file_ids from an earlier run were rejected (e.g. another bot token): upload again
+            logger.warning(f"Telegram rejected cached file_ids ({error}); re-uploading media.")
+            for media_key in cached_media_keys:
+                media_file_ids.pop(media_key, None)
+                media_cache.forget(media_sources[media_key][0])
+            cached_media_keys.clear()
+        return True
+
+    async def _send_to_group(target: dict) -> bool:
+        chat_id, topic_id, group_name = target['chat_id'], target['topic_id'], target['group_name']
+        group_lang = target['language']
+        logger.info(f"Processing message for group: {group_name} (Lang: {group_lang}, ChatID: {chat_id}, TopicID: {topic_id})")
+        message_text = message_texts["UA"] if group_lang == "UA" else message_texts["RU"]
 
         # --- Execute Sending Strategy ---
         opened_files_for_group: List[IO] = [] # Track files opened for this specific group send
@@ -480,20 +624,22 @@ async def send_to_telegram(title_for_caption: str,
             if potential_total_media < MIN_MEDIA_FOR_GROUP_STRATEGY:
                 opened_files_for_group = await _send_strategy_separate(
                     chat_id, topic_id, message_text, cover_image_file, trailer_thumbnail_file, local_screenshot_paths,
-                    group_name=group_name, log_file=cycle_log_file
+                    group_name=group_name, log_file=cycle_log_file, media_file_ids=media_file_ids,
+                    on_file_id_error=_drop_cached_file_ids
                 )
             else:
                 opened_files_for_group = await _send_strategy_grouped(
                     chat_id, topic_id, message_text, cover_image_file, trailer_thumbnail_file, local_screenshot_paths, is_max_res_thumbnail,
-                    group_name=group_name, log_file=cycle_log_file
+                    group_name=group_name, log_file=cycle_log_file, media_file_ids=media_file_ids,
+                    on_file_id_error=_drop_cached_file_ids
                 )
-            success_count += 1
-
+            return True
         except Exception as e:
             logger.error(f"!!! Failed to send message to group {group_name}: {type(e).__name__}: {e}")
             error_info = f"Failed sending to {group_name} ({chat_id}): {type(e).__name__}: {str(e)[:200]}"
             if hasattr(e, 'result_json'): error_info += f"\nAPI Response: {str(e.result_json)[:200]}..."
             await send_error_to_telegram(error_info, entry_url=entry_url)
+            return False
         finally:
             # --- Close files opened specifically for this group's send ---
             for f in opened_files_for_group:
@@ -503,8 +649,28 @@ async def send_to_telegram(title_for_caption: str,
                     except Exception as close_err:
                         logger.error(f"Error closing screenshot file handle {getattr(f, 'name', '')}: {close_err}")
 
-        # Pause between groups
-        await asyncio.sleep(2)
+    # Send one group at a time until the media has been uploaded once, then fan out
+    success_count = 0
+    remaining = list(targets)
+    while remaining and success_count == 0:
+        if await _send_to_group(remaining.pop(0)):
+            success_count += 1
+
+    if remaining:
+        fanout_limiter = asyncio.Semaphore(SEND_FANOUT_LIMIT)
+
+        async def _send_limited(target: dict) -> bool:
+            async with fanout_limiter:
+                return await _send_to_group(target)
+
+        results = await asyncio.gather(*(_send_limited(t) for t in remaining))
+        success_count += sum(1 for ok in results if ok)
+
+    for media_key, file_id in media_file_ids.items():
+        if media_key in media_sources and media_key not in cached_media_keys:
+            source, data = media_sources[media_key]
+            media_cache.remember_file_id(source, file_id, data)
+    media_cache.flush()
 
     if success_count == 0 and target_groups:
         raise Exception("Failed to send message to any of the configured target groups.")
@@ -520,7 +686,7 @@ async def send_to_telegram(title_for_caption: str,
 
 async def send_message_to_admin(message: str):
     """Sends a plain text or HTML message to all configured admin/error groups."""
-    if not bot:
+    if not TOKEN:
         logger.error("ERROR in send_message_to_admin: Bot not initialized.")
         return
     if not ERROR_TG:
@@ -539,13 +705,12 @@ async def send_message_to_admin(message: str):
             if not formatted_message.strip():
                 logger.warning("Attempted to send empty admin message, skipped.")
                 continue
-            await bot.send_message(chat_id=chat_id, message_thread_id=topic_id, text=formatted_message, parse_mode='HTML', disable_web_page_preview=True)
-            await asyncio.sleep(0.5)
+            await scheduled_bot.send_message(chat_id=chat_id, message_thread_id=topic_id, text=formatted_message, parse_mode='HTML', disable_web_page_preview=True)
         except Exception as e: logger.error(f"!!! CRITICAL: Failed to send admin message to {error_group.get('chat_id')} (Topic: {topic_id}): {type(e).__name__} - {e}")
 
 async def send_document_to_admin(file_path: str, caption: str = ""):
     """Sends a document to all configured admin/error groups."""
-    if not bot:
+    if not TOKEN:
         logger.error("ERROR in send_document_to_admin: Bot not initialized.")
         return
     if not ERROR_TG:
@@ -568,8 +733,7 @@ async def send_document_to_admin(file_path: str, caption: str = ""):
             with open(file_path, 'rb') as f:
                 from telebot.types import InputFile
                 input_file = InputFile(f)
-                await bot.send_document(chat_id=chat_id, message_thread_id=topic_id, document=input_file, caption=caption)
-            await asyncio.sleep(0.5)
+                await scheduled_bot.send_document(chat_id=chat_id, message_thread_id=topic_id, document=input_file, caption=caption)
         except Exception as e: logger.error(f"!!! CRITICAL: Failed to send document to {error_group.get('chat_id')} (Topic: {topic_id}): {type(e).__name__} - {e}")
 
 async def send_error_to_telegram(error_message: str, entry_url: Optional[str] = None):
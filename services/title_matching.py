@@ -0,0 +1,130 @@
+# --- START OF FILE title_matching.py ---
+"""
+Token-set title matching shared by TitleDB lookups and the eShop modules.
+
+Titles are reduced to sets of meaningful tokens: lower-cased, bracketed parts, trademark
+signs and punctuation dropped, Roman numerals written as digits and edition words
+("deluxe", "edition", ...) ignored. TitleMatcher keeps an inverted token index over many
+titles, so find_candidates() only scores titles sharing at least one token with the query.
+
+token_set_score() ranks candidates and favours a title containing the query, so a sequel
+("Hollow Knight: Silksong") still scores high against "Hollow Knight". Deciding that two titles
+are the same game uses jaccard_score() with NEAR_DUPLICATE_SCORE instead.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "of", "for", "in", "to", "nintendo", "switch",
+    "edition", "deluxe", "bundle", "game", "digital", "hd", "remastered", "remake",
+})
+# Bare "i", "v" and "x" are left alone: they are just as often a letter or a word
+ROMAN_NUMERALS = {
+    "ii": "2", "iii": "3", "iv": "4", "vi": "6", "vii": "7", "viii": "8",
+    "ix": "9", "xi": "11", "xii": "12", "xiii": "13",
+}
+JACCARD_MATCH_THRESHOLD = 0.65
+# jaccard_score() at which two titles are the same game: equal token sets, or at most one
+# token in ten differing. Sequels and spin-offs ("Persona 5 Tactica" vs "Persona 5") stay apart
+NEAR_DUPLICATE_SCORE = 0.9
+
+
+def title_tokens(title: str) -> FrozenSet[str]:
+    """Meaningful tokens of a title; all tokens if every one of them is a stop word."""
+    if not title:
+        return frozenset()
+    s = re.sub(r"\[.*?\]|\(.*?\)", "", title.lower())
+    s = s.replace("&", " and ").replace("'", "").replace("’", "")
+    s = re.sub(r"[^\w\s]|_", " ", s)
+    tokens = {ROMAN_NUMERALS.get(t, t) for t in s.split()}
+    return frozenset(tokens - STOP_WORDS or tokens)
+
+
+def token_set_score(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """
+    Similarity of two token sets in [0, 1]. Equal sets score 1.0; when one set contains the
+    other, the score is 0.6 plus 0.4 times their Jaccard index; otherwise it is the Jaccard index.
+    """
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    if not common:
+        return 0.0
+    jaccard = common / len(a | b)
+    if common == min(len(a), len(b)):
+        return 0.6 + 0.4 * jaccard
+    return jaccard
+
+
+def jaccard_score(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard index of two token sets, without token_set_score()'s bonus for containment."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def titles_match(title1: str, title2: str) -> bool:
+    """True if one title's tokens contain the other's, or their Jaccard index is at least 0.65."""
+    a, b = title_tokens(title1), title_tokens(title2)
+    if not a or not b:
+        return False
+    if a <= b or b <= a:
+        return True
+    return len(a & b) / len(a | b) >= JACCARD_MATCH_THRESHOLD
+
+
+@dataclass(slots=True, frozen=True)
+class TitleCandidate:
+    score: float
+    title: str
+    payload: Any = None
+
+
+class TitleMatcher:
+    """Inverted token index over titles, ranked by token_set_score()."""
+
+    def __init__(self):
+        self._titles: List[str] = []
+        self._tokens: List[FrozenSet[str]] = []
+        self._payloads: List[Any] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def add(self, title: str, payload: Any = None) -> None:
+        doc = len(self._titles)
+        tokens = title_tokens(title)
+        self._titles.append(title); self._tokens.append(tokens); self._payloads.append(payload)
+        for token in tokens:
+            self._postings[token].append(doc)
+
+    def find_candidates(self, title: str, k: int = 5, min_score: float = 0.0,
+                        scorer: Callable[[FrozenSet[str], FrozenSet[str]], float] = token_set_score
+                        ) -> List[TitleCandidate]:
+        """Up to `k` best-scoring titles (ties in insertion order) scoring at least `min_score`."""
+        query = title_tokens(title)
+        shared: Dict[int, int] = defaultdict(int)
+        for token in query:
+            for doc in self._postings.get(token, ()):
+                shared[doc] += 1
+        scored = []
+        for doc in shared:
+            score = scorer(query, self._tokens[doc])
+            if score > 0 and score >= min_score:
+                scored.append((-score, doc))
+        scored.sort()
+        return [TitleCandidate(-neg_score, self._titles[doc], self._payloads[doc]) for neg_score, doc in scored[:k]]
+
+    def best_match(self, title: str, min_score: float) -> Optional[TitleCandidate]:
+        candidates = self.find_candidates(title, k=1, min_score=min_score)
+        return candidates[0] if candidates else None
+
+    def near_duplicate(self, title: str) -> Optional[TitleCandidate]:
+        """The closest title that is the same game as `title` (see NEAR_DUPLICATE_SCORE), or None."""
+        candidates = self.find_candidates(title, k=1, min_score=NEAR_DUPLICATE_SCORE, scorer=jaccard_score)
+        return candidates[0] if candidates else None
+
+# --- END OF FILE title_matching.py ---
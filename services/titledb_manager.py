@@ -3,16 +3,19 @@
 import json
 import os
 import re
+import hashlib
 import time
+import threading
 import traceback
+from bisect import bisect_left
 
 from urllib.parse import urlparse
-import shutil
 import aiohttp
 import asyncio
 import logging
-from io import BytesIO 
-from typing import Optional, Dict, Any, List, Tuple, Set
+from typing import Optional, Dict, Any, FrozenSet, List, Tuple, Set
+
+from services.title_matching import NEAR_DUPLICATE_SCORE, jaccard_score, title_tokens, token_set_score
 
 logger = logging.getLogger(__name__)
 
@@ -22,9 +25,118 @@ DEFAULT_REGIONS_TO_CHECK: List[Tuple[str, str]] = [
 ]
 _SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # project root
 DEFAULT_TMP_SCREENSHOT_DIR = os.path.join(_SCRIPT_DIR, "tmp_screenshots")
+DEFAULT_SCREENSHOT_CACHE_DIR = os.path.join(_SCRIPT_DIR, "data", "screenshot_cache")
+SCREENSHOT_HOST_CONCURRENCY = 4
+SCREENSHOT_CHUNK_BYTES = 64 * 1024
+SCREENSHOT_CACHE_MAX_AGE_DAYS = 30  # size cap: SCREENSHOT_CACHE_MAX_MB setting
+PARTIAL_MATCH_MIN_LENGTH = 5  # shorter searches never match as a substring (level 2)
+FUZZY_MATCH_MIN_SCORE = NEAR_DUPLICATE_SCORE   # Jaccard index needed for a level 5 (fuzzy) match
+NGRAM_SIZE = 3
+
+
+def normalize_title_for_comparison(text: str, remove_spaces=True) -> str:
+    if not text: return ""
+    cleaned = text.lower(); cleaned = cleaned.replace('™', '').replace('®', '').replace('©', '')
+    cleaned = re.sub(r'[^\w\s\-]+', '', cleaned)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip(); cleaned = re.sub(r'\-+', '-', cleaned).strip('-')
+    if remove_spaces: cleaned = cleaned.replace(' ', '').replace('-', '')
+    return cleaned
+
+
+def title_ngrams(tight: str) -> Set[str]:
+    return {tight[i:i + NGRAM_SIZE] for i in range(len(tight) - NGRAM_SIZE + 1)}
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class RegionTitleIndex:
+    """
+    Normalized-title lookup structures for one region file, built once per load.
+
+    Every structure answers "first game, in file order, matching this rule", which is what
+    the former linear scan returned for each match level:
+      1. exact tight title      -> dict
+      2. tight substring        -> n-gram posting lists, candidates verified in file order
+      3. exact spaced title     -> dict (used with the part before a colon)
+      4. spaced prefix          -> sorted list, bisected
+    Title token postings for the fuzzy level are built on the first token_candidates() call.
+    """
+    __slots__ = ("games", "tight", "by_tight", "by_spaced", "sorted_spaced", "ngrams", "_token_index")
+
+    def __init__(self, region_data: Dict[str, Any]):
+        self.games: List[Dict[str, Any]] = []
+        self.tight: List[str] = []
+        self.by_tight: Dict[str, int] = {}
+        self.by_spaced: Dict[str, int] = {}
+        self.ngrams: Dict[str, List[int]] = {}
+        spaced_titles: List[Tuple[str, int]] = []
+        for game_db_data in region_data.values():
+            if not isinstance(game_db_data, dict) or 'name' not in game_db_data: continue
+            pos = len(self.games)
+            tight = normalize_title_for_comparison(game_db_data['name'], remove_spaces=True)
+            spaced = normalize_title_for_comparison(game_db_data['name'], remove_spaces=False)
+            self.games.append(game_db_data); self.tight.append(tight)
+            self.by_tight.setdefault(tight, pos)
+            self.by_spaced.setdefault(spaced, pos)
+            spaced_titles.append((spaced, pos))
+            for gram in title_ngrams(tight):
+                self.ngrams.setdefault(gram, []).append(pos)  # positions stay ascending
+        spaced_titles.sort()
+        self.sorted_spaced = spaced_titles
+        self._token_index: Optional[Tuple[Dict[str, List[int]], List[FrozenSet[str]]]] = None
+
+    def exact_tight(self, tight: str) -> Optional[int]:
+        return self.by_tight.get(tight)
+
+    def partial_tight(self, tight: str) -> Optional[int]:
+        """First game whose tight title contains `tight`."""
+        postings = []
+        for gram in title_ngrams(tight):
+            if gram not in self.ngrams: return None
+            postings.append(self.ngrams[gram])
+        if not postings: return None
+        for pos in min(postings, key=len):
+            if tight in self.tight[pos]: return pos
+        return None
+
+    def exact_spaced(self, spaced: str) -> Optional[int]:
+        return self.by_spaced.get(spaced)
+
+    def spaced_prefix(self, prefix: str) -> Optional[int]:
+        """First game whose spaced title starts with `prefix`."""
+        first = None
+        for i in range(bisect_left(self.sorted_spaced, (prefix, -1)), len(self.sorted_spaced)):
+            spaced, pos = self.sorted_spaced[i]
+            if not spaced.startswith(prefix): break
+            if first is None or pos < first: first = pos
+        return first
+
+    def token_candidates(self, tokens: FrozenSet[str]) -> List[Tuple[int, Optional[str], FrozenSet[str]]]:
+        """(position, title id, title tokens) of every game sharing a token with `tokens`, in file order."""
+        if self._token_index is None:
+            postings: Dict[str, List[int]] = {}
+            token_sets = [title_tokens(game['name']) for game in self.games]
+            for pos, game_tokens in enumerate(token_sets):
+                for token in game_tokens:
+                    postings.setdefault(token, []).append(pos)
+            self._token_index = (postings, token_sets)
+        postings, token_sets = self._token_index
+        positions = sorted({pos for token in tokens for pos in postings.get(token, ())})
+        return [(pos, self.games[pos].get('id'), token_sets[pos]) for pos in positions]
+
+    def game(self, pos: int) -> Dict[str, Any]:
+        return self.games[pos]
+
 
 class TitleDBManager:
-    def __init__(self, titledb_json_path: str, tmp_screenshot_dir: str = DEFAULT_TMP_SCREENSHOT_DIR):
+    def __init__(self, titledb_json_path: str, tmp_screenshot_dir: str = DEFAULT_TMP_SCREENSHOT_DIR, use_snapshots: bool = True,
+                 screenshot_cache_dir: str = DEFAULT_SCREENSHOT_CACHE_DIR):
         self.tmp_screenshot_dir = None; self.json_path = None
         potential_json_path = os.path.join(_SCRIPT_DIR, titledb_json_path) if not os.path.isabs(titledb_json_path) else titledb_json_path
         if os.path.isdir(potential_json_path): self.json_path = potential_json_path
@@ -37,14 +149,22 @@ class TitleDBManager:
             logger.error(f"Error creating tmp dir '{potential_tmp_path}': {e}")
         self._cache: Dict[Tuple[str, str], Dict[str, Any]] = {}; self._last_load_time: Dict[Tuple[str, str], float] = {}
         self._cache_ttl_seconds = 3600
+        self._index: Dict[Tuple[str, str], Tuple[Dict[str, Any], RegionTitleIndex]] = {}  # key -> (indexed data, index)
+        self._index_lock = threading.Lock()  # find_game_data runs in worker threads
+        # Compiled SQLite snapshots (services/titledb_snapshot.py) spare loading the JSON at all
+        self.use_snapshots = use_snapshots
+        self._snapshots: Dict[Tuple[str, str], Any] = {}
+        # Region -> signature of the JSON file no snapshot could be built from; retried once the file changes
+        self._snapshot_unavailable: Dict[Tuple[str, str], Optional[Tuple[int, int]]] = {}
+        self.screenshot_cache_dir = None
+        try:
+            os.makedirs(screenshot_cache_dir, exist_ok=True); self.screenshot_cache_dir = screenshot_cache_dir
+        except OSError as e:
+            logger.error(f"Error creating screenshot cache dir '{screenshot_cache_dir}': {e}")
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}; self._host_limits_loop = None
 
     def _normalize_title_for_comparison(self, text: str, remove_spaces=True) -> str:
-        if not text: return ""
-        cleaned = text.lower(); cleaned = cleaned.replace('™', '').replace('®', '').replace('©', '')
-        cleaned = re.sub(r'[^\w\s\-]+', '', cleaned)
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip(); cleaned = re.sub(r'\-+', '-', cleaned).strip('-')
-        if remove_spaces: cleaned = cleaned.replace(' ', '').replace('-', '')
-        return cleaned
+        return normalize_title_for_comparison(text, remove_spaces)
 
     def _load_region_data(self, region: str, language: str) -> Optional[Dict[str, Any]]:
         region_key = (region.upper(), language.lower()); file_name = f"{region_key[0]}.{region_key[1]}.json"
@@ -58,6 +178,36 @@ class TitleDBManager:
             logger.error(f"Error loading/parsing {file_path}: {e}")
         return None
 
+    def _get_region_index(self, region: str, language: str):
+        """
+        Title lookups for a region: its compiled snapshot when available (recompiled when the
+        JSON changes), otherwise an in-memory RegionTitleIndex rebuilt whenever the file is reloaded.
+        """
+        region_key = (region.upper(), language.lower())
+        json_file = os.path.join(self.json_path, f"{region_key[0]}.{region_key[1]}.json")
+        with self._index_lock:
+            failed_for = self._snapshot_unavailable.get(region_key, False)
+            if self.use_snapshots and (failed_for is False or failed_for != _file_signature(json_file)):
+                snapshot = self._snapshots.pop(region_key, None)
+                if snapshot is None or not snapshot.is_current():
+                    from services.titledb_snapshot import open_snapshot  # imports this module
+                    if snapshot is not None: snapshot.close()
+                    snapshot = open_snapshot(json_file)
+                if snapshot is not None:
+                    self._snapshot_unavailable.pop(region_key, None)
+                    self._snapshots[region_key] = snapshot
+                    return snapshot
+                logger.warning(f"No TitleDB snapshot for {region_key[0]}.{region_key[1]}; falling back to the JSON file until it changes.")
+                self._snapshot_unavailable[region_key] = _file_signature(json_file)
+            region_data = self._load_region_data(region, language)
+            if not region_data: return None
+            indexed = self._index.get(region_key)
+            if indexed is None or indexed[0] is not region_data:
+                started = time.perf_counter()
+                indexed = self._index[region_key] = (region_data, RegionTitleIndex(region_data))
+                logger.debug(f"Indexed {len(indexed[1].games)} titles of {region_key[0]}.{region_key[1]} in {time.perf_counter() - started:.2f}s")
+            return indexed[1]
+
     def find_game_data(self, game_title: str, regions_to_check: Optional[List[Tuple[str, str]]] = None) -> Optional[Dict[str, Any]]:
         if not game_title: return None
         if regions_to_check is None: regions_to_check = DEFAULT_REGIONS_TO_CHECK
@@ -73,40 +223,71 @@ class TitleDBManager:
         if search_before_colon_spaced: logger.debug(f"  Before colon: '{search_before_colon_spaced}'")
         if search_first_two_words: logger.debug(f"  First two: '{search_first_two_words}'")
 
-        found_ids: Set[str] = set(); best_match_level = 99; best_match_data = None
-
-        for region, language in regions_to_check:
-            region_data = self._load_region_data(region, language);
-            if not region_data: continue
-            for nsuid_str, game_db_data in region_data.items():
-                if not isinstance(game_db_data, dict) or 'name' not in game_db_data: continue
-                db_title_name = game_db_data['name']
-                db_title_normalized_tight = self._normalize_title_for_comparison(db_title_name, remove_spaces=True)
-                db_title_normalized_spaced = self._normalize_title_for_comparison(db_title_name, remove_spaces=False)
-                title_id = game_db_data.get('id'); current_match_level = 99; match_type = ""
-
-                if search_normalized_tight == db_title_normalized_tight: current_match_level = 1; match_type = "Exact tight"
-                elif len(search_normalized_tight) >= 5 and search_normalized_tight in db_title_normalized_tight: current_match_level = 2; match_type = "Partial tight (search in DB)"
-                elif search_before_colon_spaced and search_before_colon_spaced == db_title_normalized_spaced: current_match_level = 3; match_type = "Before colon spaced"
-                elif search_first_two_words and db_title_normalized_spaced.startswith(search_first_two_words): current_match_level = 4; match_type = "First two words spaced"
-
-                if current_match_level < best_match_level:
-                    if title_id and title_id in found_ids and current_match_level >= best_match_level: continue
-                    logger.debug(f"  Potential match ({match_type}, Lvl:{current_match_level}): '{db_title_name}' (R:{region})")
-                    best_match_level = current_match_level; best_match_data = game_db_data
-                    if title_id: found_ids.add(title_id)
-                    if best_match_level == 1:
-                        logger.info(f"Exact match found for '{game_title}' in {region}: '{db_title_name}'")
-
-            if best_match_level == 1:
-                 break
-
-        if best_match_data:
-            logger.info(f"Best match found (Level {best_match_level}): '{best_match_data.get('name')}'")
+        indexes = [(region, index) for region, language in regions_to_check
+                   if (index := self._get_region_index(region, language)) is not None]
+
+        # The lowest level wins; within a level, the first game in region order, then file order
+        match_levels = [
+            (1, "Exact tight", lambda index: index.exact_tight(search_normalized_tight)),
+            (2, "Partial tight (search in DB)", lambda index: index.partial_tight(search_normalized_tight)
+                if len(search_normalized_tight) >= PARTIAL_MATCH_MIN_LENGTH else None),
+            (3, "Before colon spaced", lambda index: index.exact_spaced(search_before_colon_spaced)
+                if search_before_colon_spaced else None),
+            (4, "First two words spaced", lambda index: index.spaced_prefix(search_first_two_words)
+                if search_first_two_words else None),
+        ]
+        for match_level, match_type, lookup in match_levels:
+            for region, index in indexes:
+                pos = lookup(index)
+                if pos is None: continue
+                best_match_data = index.game(pos)
+                logger.debug(f"  Match ({match_type}, Lvl:{match_level}): '{best_match_data.get('name')}' (R:{region})")
+                if match_level == 1:
+                    logger.info(f"Exact match found for '{game_title}' in {region}: '{best_match_data.get('name')}'")
+                logger.info(f"Best match found (Level {match_level}): '{best_match_data.get('name')}'")
+                return best_match_data
+
+        # Level 5: same tokens up to punctuation, Roman numerals and edition words; never a sequel
+        candidates = self._find_candidates_in(indexes, game_title, 1, FUZZY_MATCH_MIN_SCORE, scorer=jaccard_score)
+        if candidates:
+            score, best_match_data = candidates[0]
+            logger.info(f"Best match found (Level 5, fuzzy {score:.2f}): '{best_match_data.get('name')}'")
             return best_match_data
-        else:
-            logger.info(f"Game matching '{game_title}' not found after all checks.")
-            return None
+
+        logger.info(f"Game matching '{game_title}' not found after all checks.")
+        return None
+
+    def _find_candidates_in(self, indexes, game_title: str, k: int, min_score: float,
+                            scorer=token_set_score) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Games sharing a title token with `game_title`, from each index's token postings (stored in
+        the snapshot), ranked by `scorer` (token_set_score() by default). One entry per title id,
+        the first region wins; ties keep region order, then file order.
+        """
+        query = title_tokens(game_title)
+        if not indexes or not query: return []
+        scored, seen_ids = [], set()
+        for region_rank, (_, index) in enumerate(indexes):
+            for pos, title_id, game_tokens in index.token_candidates(query):
+                if title_id and title_id in seen_ids: continue
+                if title_id: seen_ids.add(title_id)
+                score = scorer(query, game_tokens)
+                if score > 0 and score >= min_score:
+                    scored.append((-score, region_rank, pos, index))
+        scored.sort(key=lambda item: item[:3])
+        return [(-neg_score, index.game(pos)) for neg_score, _, pos, index in scored[:k]]
+
+    def find_candidates(self, game_title: str, k: int = 5, regions_to_check: Optional[List[Tuple[str, str]]] = None,
+                        min_score: float = 0.0) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Up to `k` TitleDB games ranked by token-set similarity to `game_title`, across all
+        regions in one pass: [(score, game data), ...], best first. Scores are in [0, 1].
+        """
+        if not game_title: return []
+        if regions_to_check is None: regions_to_check = DEFAULT_REGIONS_TO_CHECK
+        indexes = [(region, index) for region, language in regions_to_check
+                   if (index := self._get_region_index(region, language)) is not None]
+        return self._find_candidates_in(indexes, game_title, k, min_score)
 
     def _get_file_extension_from_url(self, url: str) -> str:
         try:
@@ -117,60 +298,113 @@ class TitleDBManager:
         except Exception: pass
         return ".jpg"
 
-    async def _try_download_image(self, image_url: str, timeout: int = 15) -> Optional[BytesIO]:
-        if not image_url or not image_url.startswith(('http://', 'https://')): return None
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent screenshot downloads from the host of `url`."""
+        loop = asyncio.get_running_loop()
+        if self._host_limits_loop is not loop:
+            self._host_limits = {}; self._host_limits_loop = loop
+        host = urlparse(url).hostname or ""
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(SCREENSHOT_HOST_CONCURRENCY)
+        return self._host_limits[host]
+
+    async def _download_to_file(self, image_url: str, part_path: str, timeout: int = 15) -> bool:
+        """Stream `image_url` into `part_path` (file writes run in a worker thread). True on success."""
+        from core.settings_loader import get_session
         try:
-            from core.settings_loader import get_session
             session = get_session()
-            async with session.get(image_url, timeout=timeout) as response:
-                response.raise_for_status()
-                content = await response.read()
-                if not content:
-                    logger.warning(f"Download resulted in empty file: {image_url}")
-                    return None
-                return BytesIO(content)
+            async with self._host_limit(image_url):
+                async with session.get(image_url, timeout=timeout) as response:
+                    response.raise_for_status()
+                    f_out = await asyncio.to_thread(open, part_path, 'wb')
+                    try:
+                        async for chunk in response.content.iter_chunked(SCREENSHOT_CHUNK_BYTES):
+                            await asyncio.to_thread(f_out.write, chunk)
+                    finally:
+                        await asyncio.to_thread(f_out.close)
+            if os.path.getsize(part_path) == 0:
+                logger.warning(f"Download resulted in empty file: {image_url}")
+                os.remove(part_path)
+                return False
+            return True
         except Exception as e:
             logger.error(f"Download failed (Error: {e}): {image_url}")
+            try: os.remove(part_path)
+            except OSError: pass
+            return False
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, 'rb') as f: return f.read()
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        with open(path, 'wb') as f: f.write(data)
+
+    async def _get_screenshot(self, url: str, file_prefix: str) -> Optional[str]:
+        """
+        Path of the cached screenshot for `url`. On a cache miss it is downloaded and normalized
+        for Telegram (utils.telegram_utils.normalize_image); a re-encoded file gets its new extension.
+        """
+        from utils.telegram_utils import normalize_image
+        url_hash = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        base_path = os.path.join(self.screenshot_cache_dir, f"{file_prefix}_{url_hash}")
+        url_ext = self._get_file_extension_from_url(url)
+        for ext in dict.fromkeys((url_ext, '.jpg', '.webp')):
+            if os.path.isfile(base_path + ext) and os.path.getsize(base_path + ext) > 0:
+                os.utime(base_path + ext)  # last use, for eviction
+                return base_path + ext
+        part_path = f"{base_path}.part"
+        if not await self._download_to_file(url, part_path):
+            return None
+        try:
+            normalized = await normalize_image(await asyncio.to_thread(self._read_file, part_path))
+            save_path = base_path + (normalized.extension or url_ext)
+            if normalized.changed:
+                await asyncio.to_thread(self._write_file, part_path, normalized.data)
+            os.replace(part_path, save_path)
+            return save_path
+        except OSError as e:
+            logger.error(f"Could not store screenshot {url}: {e}")
+            try: os.remove(part_path)
+            except OSError: pass
             return None
 
-    def _clear_tmp_dir(self):
-        if not self.tmp_screenshot_dir or not os.path.isdir(self.tmp_screenshot_dir): return False
-        logger.debug(f"Clearing temporary screenshot directory: {self.tmp_screenshot_dir}")
-        cleared = True
-        for filename in os.listdir(self.tmp_screenshot_dir):
-            file_path = os.path.join(self.tmp_screenshot_dir, filename)
-            try:
-                if os.path.isfile(file_path) or os.path.islink(file_path): os.unlink(file_path)
-                elif os.path.isdir(file_path): shutil.rmtree(file_path)
-            except Exception as e:
-                logger.error(f'Failed to delete {file_path}. Reason: {e}')
-                cleared = False
-        return cleared
+    def _evict_screenshot_cache(self) -> None:
+        """Drop cached screenshots unused for SCREENSHOT_CACHE_MAX_AGE_DAYS, then the oldest past SCREENSHOT_CACHE_MAX_MB."""
+        from core.settings_loader import SCREENSHOT_CACHE_MAX_MB
+        try:
+            files = [e for e in os.scandir(self.screenshot_cache_dir) if e.is_file() and not e.name.endswith('.part')]
+        except OSError:
+            return
+        files.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        cutoff = time.time() - SCREENSHOT_CACHE_MAX_AGE_DAYS * 86400
+        max_bytes = SCREENSHOT_CACHE_MAX_MB * 1024 * 1024; total = 0
+        for entry in files:
+            total += entry.stat().st_size
+            if entry.stat().st_mtime < cutoff or total > max_bytes:
+                try: os.remove(entry.path)
+                except OSError: pass
 
     async def download_screenshots(self, screenshot_urls: List[str], nsuid: Optional[str] = None, game_title: Optional[str] = None, max_screenshots: int = 4) -> List[str]:
-        if not self.tmp_screenshot_dir:
-            logger.error("Temp screenshot dir not available.")
+        """
+        Paths of up to `max_screenshots` screenshots, in URL order. They come from the on-disk
+        screenshot cache (keyed by nsuId/title and URL), and only missing ones are downloaded,
+        concurrently and at most SCREENSHOT_HOST_CONCURRENCY per host.
+        """
+        if not self.screenshot_cache_dir:
+            logger.error("Screenshot cache dir not available.")
             return []
         if not screenshot_urls: return []
-        self._clear_tmp_dir()
         if nsuid: file_prefix = str(nsuid)
         elif game_title: file_prefix = re.sub(r'[^\w\-]+', '_', game_title.lower()).strip('_')[:50]
         else: file_prefix = "unknown_game"
-        urls_to_download = screenshot_urls[:max_screenshots]
-        logger.info(f"Starting download of {len(urls_to_download)} screenshots for '{file_prefix}'...")
-        downloaded_paths = []
-        for i, url in enumerate(urls_to_download):
-            if not url or not isinstance(url, str) or not url.startswith('http'): continue
-            extension = self._get_file_extension_from_url(url); filename = f"{file_prefix}_{i}{extension}"
-            save_path = os.path.join(self.tmp_screenshot_dir, filename)
-            image_data: Optional[BytesIO] = await self._try_download_image(url) # Download first
-            if image_data:
-                try: # Save the downloaded data
-                    with open(save_path, 'wb') as f_out: f_out.write(image_data.getbuffer())
-                    downloaded_paths.append(save_path)
-                except Exception as write_err:
-                    logger.error(f"FAILED to save downloaded image to {save_path}: {write_err}")
-            await asyncio.sleep(0.1)
+        urls_to_download = [url for url in screenshot_urls[:max_screenshots]
+                            if url and isinstance(url, str) and url.startswith('http')]
+        logger.info(f"Getting {len(urls_to_download)} screenshots for '{file_prefix}'...")
+        results = await asyncio.gather(*(self._get_screenshot(url, file_prefix) for url in urls_to_download))
+        downloaded_paths = [path for path in results if path]
+        await asyncio.to_thread(self._evict_screenshot_cache)
         logger.info(f"Finished download. Successfully got {len(downloaded_paths)} screenshots.")
         return downloaded_paths
 
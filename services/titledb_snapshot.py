@@ -0,0 +1,215 @@
+# --- START OF FILE titledb_snapshot.py ---
+"""
+Compact SQLite snapshots of TitleDB region files.
+
+A region file (e.g. titledb/GB.en.json, a few hundred MB) is compiled once into
+GB.en.snapshot.db next to it. The snapshot keeps only SNAPSHOT_FIELDS of each game plus the
+normalized titles, title trigrams and title tokens (services/title_matching.py) that
+find_game_data() and find_candidates() match against, all indexed.
+Snapshots are opened read-only and memory-mapped, so a lookup touches a few pages instead
+of loading the JSON into Python dicts. A snapshot is recompiled when the JSON's mtime or
+size no longer match the ones recorded at compile time.
+
+Compile ahead of time (e.g. right after downloading titledb):
+    python -m services.titledb_snapshot titledb
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from services.title_matching import title_tokens
+from services.titledb_manager import normalize_title_for_comparison, title_ngrams
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = "2"
+SNAPSHOT_SUFFIX = ".snapshot.db"
+SNAPSHOT_FIELDS = ("name", "id", "nsuId", "screenshots", "bannerUrl", "iconUrl")
+SNAPSHOT_MMAP_BYTES = 256 * 1024 * 1024
+
+
+def snapshot_path(json_file: str) -> str:
+    base = json_file[:-len(".json")] if json_file.endswith(".json") else json_file
+    return base + SNAPSHOT_SUFFIX
+
+
+def _source_signature(json_file: str) -> Optional[Dict[str, str]]:
+    try:
+        st = os.stat(json_file)
+    except OSError:
+        return None
+    return {"source_mtime": str(st.st_mtime_ns), "source_size": str(st.st_size)}
+
+
+def compile_snapshot(json_file: str) -> Optional[str]:
+    """Compile `json_file` into its snapshot; returns the snapshot path, or None on failure."""
+    signature = _source_signature(json_file)
+    if signature is None:
+        return None
+    started = time.perf_counter()
+    try:
+        with open(json_file, "r", encoding="utf-8") as f:
+            region_data = json.load(f)
+    except Exception as e:
+        logger.error(f"Could not read {json_file} for a snapshot: {e}")
+        return None
+
+    target = snapshot_path(json_file)
+    tmp_target = f"{target}.{os.getpid()}.tmp"
+    try:
+        if os.path.exists(tmp_target): os.remove(tmp_target)
+        conn = sqlite3.connect(tmp_target)
+        conn.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+            CREATE TABLE games (pos INTEGER PRIMARY KEY, tight TEXT, spaced TEXT, tokens TEXT, data TEXT);
+            CREATE TABLE grams (gram TEXT, pos INTEGER, PRIMARY KEY (gram, pos)) WITHOUT ROWID;
+            CREATE TABLE tokens (token TEXT, pos INTEGER, PRIMARY KEY (token, pos)) WITHOUT ROWID;
+        """)
+        games, grams, tokens, pos = [], [], [], 0
+        for game_db_data in region_data.values():
+            if not isinstance(game_db_data, dict) or 'name' not in game_db_data: continue
+            tight = normalize_title_for_comparison(game_db_data['name'], remove_spaces=True)
+            spaced = normalize_title_for_comparison(game_db_data['name'], remove_spaces=False)
+            game_tokens = title_tokens(game_db_data['name'])  # whitespace-free, so stored space-separated
+            data = {k: game_db_data[k] for k in SNAPSHOT_FIELDS if k in game_db_data}
+            games.append((pos, tight, spaced, " ".join(sorted(game_tokens)), json.dumps(data, ensure_ascii=False)))
+            grams.extend((gram, pos) for gram in title_ngrams(tight))
+            tokens.extend((token, pos) for token in game_tokens)
+            pos += 1
+        del region_data
+        conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?)", games)
+        conn.executemany("INSERT INTO grams VALUES (?, ?)", grams)
+        conn.executemany("INSERT INTO tokens VALUES (?, ?)", tokens)
+        conn.executescript("""
+            CREATE INDEX games_tight ON games (tight, pos);
+            CREATE INDEX games_spaced ON games (spaced, pos);
+        """)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                         [("format", SNAPSHOT_FORMAT_VERSION), *signature.items()])
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+        os.replace(tmp_target, target)
+    except Exception as e:
+        logger.error(f"Failed to compile TitleDB snapshot {target}: {e}")
+        try: os.remove(tmp_target)
+        except OSError: pass
+        return None
+    logger.info(f"Compiled TitleDB snapshot {os.path.basename(target)}: {pos} titles, "
+                f"{os.path.getsize(target) / 1024 / 1024:.1f} MB in {time.perf_counter() - started:.1f}s")
+    return target
+
+
+class RegionSnapshot:
+    """
+    Read-only view of one compiled snapshot with the same lookups as RegionTitleIndex.
+    Every lookup returns the file position of the first matching game, or None.
+    """
+
+    def __init__(self, json_file: str, path: str):
+        self.json_file = json_file
+        self.path = path
+        self._lock = threading.Lock()  # one connection shared by the to_thread workers
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size = {SNAPSHOT_MMAP_BYTES}")
+        self._meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+
+    def is_current(self) -> bool:
+        """True if the snapshot matches its JSON (or the JSON is gone and the snapshot is all we have)."""
+        if self._meta.get("format") != SNAPSHOT_FORMAT_VERSION:
+            return False
+        signature = _source_signature(self.json_file)
+        return signature is None or all(self._meta.get(k) == v for k, v in signature.items())
+
+    def _first(self, sql: str, *params) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def exact_tight(self, tight: str) -> Optional[int]:
+        return self._first("SELECT min(pos) FROM games WHERE tight = ?", tight)
+
+    def partial_tight(self, tight: str) -> Optional[int]:
+        counts = []
+        for gram in title_ngrams(tight):
+            count = self._first("SELECT count(*) FROM grams WHERE gram = ?", gram)
+            if not count: return None
+            counts.append((count, gram))
+        if not counts: return None
+        rarest = min(counts)[1]
+        return self._first(
+            "SELECT grams.pos FROM grams JOIN games ON games.pos = grams.pos "
+            "WHERE grams.gram = ? AND instr(games.tight, ?) > 0 ORDER BY grams.pos LIMIT 1", rarest, tight)
+
+    def exact_spaced(self, spaced: str) -> Optional[int]:
+        return self._first("SELECT min(pos) FROM games WHERE spaced = ?", spaced)
+
+    def spaced_prefix(self, prefix: str) -> Optional[int]:
+        # Code-point order = UTF-8 byte order, so every title starting with `prefix` sorts inside this range
+        return self._first("SELECT min(pos) FROM games WHERE spaced >= ? AND spaced < ? AND substr(spaced, 1, ?) = ?",
+                           prefix, prefix + "\U0010ffff", len(prefix), prefix)
+
+    def token_candidates(self, tokens: FrozenSet[str]) -> List[Tuple[int, Optional[str], FrozenSet[str]]]:
+        """(position, title id, title tokens) of every game sharing a token with `tokens`, in file order."""
+        if not tokens: return []
+        marks = ", ".join("?" * len(tokens))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT pos, json_extract(data, '$.id'), tokens FROM games "
+                f"WHERE pos IN (SELECT pos FROM tokens WHERE token IN ({marks})) ORDER BY pos", tuple(tokens)).fetchall()
+        return [(pos, title_id, frozenset(game_tokens.split())) for pos, title_id, game_tokens in rows]
+
+    def game(self, pos: int) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM games WHERE pos = ?", (pos,)).fetchone()
+        return json.loads(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _open_current(json_file: str, path: str) -> Optional[RegionSnapshot]:
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = RegionSnapshot(json_file, path)
+    except sqlite3.Error as e:
+        logger.warning(f"Unusable TitleDB snapshot {path}: {e}")
+        return None
+    if snapshot.is_current():
+        return snapshot
+    snapshot.close()
+    logger.info(f"TitleDB snapshot {os.path.basename(path)} is out of date.")
+    return None
+
+
+def open_snapshot(json_file: str) -> Optional[RegionSnapshot]:
+    """Open the snapshot of `json_file`, compiling it first if it is missing or stale."""
+    path = snapshot_path(json_file)
+    snapshot = _open_current(json_file, path)
+    if snapshot is None and compile_snapshot(json_file):
+        snapshot = _open_current(json_file, path)
+    return snapshot
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    titledb_dir = sys.argv[1] if len(sys.argv) > 1 else "titledb"
+    compiled = 0
+    for file_name in sorted(os.listdir(titledb_dir)):
+        if file_name.endswith(".json"):
+            json_file = os.path.join(titledb_dir, file_name)
+            snapshot = open_snapshot(json_file)
+            if snapshot:
+                snapshot.close(); compiled += 1
+    print(f"{compiled} TitleDB snapshot(s) ready in {titledb_dir}")
+
+# --- END OF FILE titledb_snapshot.py ---
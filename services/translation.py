@@ -1,47 +1,26 @@
 # --- START OF FILE translation.py ---
-import asyncio
 import hashlib
-import json
 import logging
-import os
 import re
-from typing import Optional
+from typing import List, Optional, Tuple
 
-from core.settings_loader import openai_client
+from core.settings_loader import get_openai_client, TRANSLATION_CACHE_MAX_AGE_DAYS, TRANSLATION_CACHE_MAX_MB
 from services import gpt
+from services.translation_batch import TranslationBatcher
+from services.translation_cache import TranslationCache
 from utils.html_utils import sanitize_html_for_telegram
 
 logger = logging.getLogger(__name__)
 
-CACHE_FILE = os.path.join("data", "translations_cache.json")
-_cache_memory: Optional[dict] = None
-
-
-def _get_cache() -> dict:
-    """Load persistent translation cache."""
-    global _cache_memory
-    if _cache_memory is None:
-        if os.path.exists(CACHE_FILE):
-            try:
-                with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                    _cache_memory = json.load(f)
-            except Exception as e:
-                logger.warning(f"Could not load translation cache: {e}")
-                _cache_memory = {}
-        else:
-            _cache_memory = {}
-    return _cache_memory
-
-
-def _save_cache() -> None:
-    """Persist translation cache to disk."""
-    if _cache_memory is not None:
-        try:
-            os.makedirs("data", exist_ok=True)
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(_cache_memory, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.debug(f"Failed to save translation cache: {e}")
+_cache: Optional[TranslationCache] = None
+
+
+def _get_cache() -> TranslationCache:
+    """Persistent translation cache (services/translation_cache.py), opened on first use."""
+    global _cache
+    if _cache is None:
+        _cache = TranslationCache(max_mb=TRANSLATION_CACHE_MAX_MB, max_age_days=TRANSLATION_CACHE_MAX_AGE_DAYS)
+    return _cache
 
 
 # Translate RU to UA function with select exact translate function
@@ -50,7 +29,7 @@ async def translate_ru_to_ua(text: str) -> str:
     Translates text from Russian to Ukrainian using the preferred method.
     Currently set to use GPT/OpenRouter if available, otherwise returns original text.
     """
-    if openai_client:
+    if get_openai_client():
         logger.info("Translating text RU -> UA using OpenRouter/GPT...")
         return await translate_ru_to_ua_gpt(text)
     else:
@@ -71,14 +50,93 @@ async def translate_ru_to_ua_gpt(text: str, model: str = gpt.DEFAULT_MODEL) -> s
         return text
 
     # Check persistent cache
-    cache = _get_cache()
     text_hash = hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
-    if text_hash in cache:
+    cached = _get_cache().get(text_hash)
+    if cached is not None:
         logger.info("Translation found in persistent cache. Skipping LLM request.")
-        return cache[text_hash]
+        return cached
 
     logger.info(f"Translating text RU -> UA using model: {model}...")
 
+    segments = split_translation_segments(text)
+    if sum(1 for segment, _ in segments if segment.strip()) > 1:
+        final_text = await _translate_segments(text, segments, model)
+    else:
+        cleaned_text = await _request_translation(text, model)
+        final_text = _finalize_translation(cleaned_text) if cleaned_text is not None else None
+    if final_text is None:
+        return text  # Both models failed — return original
+
+    # Save to persistent cache
+    _get_cache().put(text_hash, final_text)
+
+    logger.debug(f"GPT Response (final bytes {len(final_text)}): {final_text[:300]}...")
+    return final_text
+
+
+# Translation memory: a post is translated per segment (see split_translation_segments) and each
+# segment is cached, so an update re-post only sends the segments that changed to the LLM
+SEGMENT_SEPARATOR = re.compile(r"(\s*###GAP###\s*|\n[ \t]*\n\s*)")
+SEGMENT_JOIN = "\n###GAP###\n"
+
+
+def split_translation_segments(text: str) -> List[Tuple[str, str]]:
+    """
+    Split a post into (segment, separator after it) at ###GAP### markers and blank lines — the
+    sections clean_description_html() separates. A blockquote (XBQSX...XBQEX) is never split.
+    Joining every segment with its separator gives back `text`.
+    """
+    parts = SEGMENT_SEPARATOR.split(text)
+    segments: List[Tuple[str, str]] = []
+    current = ""
+    for i in range(0, len(parts), 2):
+        current += parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else ""
+        if separator and current.count("XBQSX") > current.count("XBQEX"):
+            current += separator  # inside a quote
+            continue
+        segments.append((current, separator))
+        current = ""
+    if current:
+        segments.append((current, ""))
+    return segments
+
+
+def _segment_key(segment: str) -> str:
+    return f"seg_{hashlib.sha256(segment.strip().encode('utf-8')).hexdigest()}"
+
+
+async def _translate_segments(text: str, segments: List[Tuple[str, str]], model: str) -> Optional[str]:
+    """
+    Translate only the segments missing from the translation memory, in one request with the
+    segments joined by ###GAP###. If the answer does not split back into as many segments, the
+    whole text is translated as before (and no segment is stored).
+    """
+    cache = _get_cache()
+    translated = [cache.get(_segment_key(segment)) if segment.strip() else segment for segment, _ in segments]
+    missing = [i for i, t in enumerate(translated) if t is None]
+    if missing:
+        logger.info(f"Translation memory: {len(segments) - len(missing)} of {len(segments)} segments cached, "
+                    f"translating {len(missing)}.")
+        cleaned_text = await _request_translation(SEGMENT_JOIN.join(segments[i][0].strip() for i in missing), model)
+        if cleaned_text is None:
+            return None
+        parts = [p.strip() for p in re.split(r"\s*###GAP###\s*", cleaned_text) if p.strip()]
+        if len(parts) != len(missing):
+            logger.warning(f"Translation memory: expected {len(missing)} segments, got {len(parts)}. "
+                           f"Translating the whole text.")
+            cleaned_text = await _request_translation(text, model)
+            return _finalize_translation(cleaned_text) if cleaned_text is not None else None
+        for i, part in zip(missing, parts):
+            translated[i] = part
+            cache.put(_segment_key(segments[i][0]), part)
+    else:
+        logger.info("Translation memory: every segment cached. Skipping LLM request.")
+    return _finalize_translation("".join(t + separator for t, (_, separator) in zip(translated, segments)))
+
+
+async def _request_translation(text: str, model: str) -> Optional[str]:
+    """Translate `text` with the post translation prompt; the cleaned answer, or None if every model failed."""
     # Check if text contains GAP markers
     has_gap_markers = "###GAP###" in text
     gap_instruction = ""
@@ -112,8 +170,12 @@ async def translate_ru_to_ua_gpt(text: str, model: str = gpt.DEFAULT_MODEL) -> s
 
     translated_text = await gpt.complete(prompt, max_tokens=8192, model=model, label="Translation")
     if translated_text is None:
-        return text  # Both models failed — return original
+        return None
+    return _clean_translation(translated_text)
+
 
+def _clean_translation(translated_text: str) -> str:
+    """Strip fences and prompt echoes, fix blockquote markers and BBCode, sanitize for Telegram."""
     # Clean trailing markdown code fences and whitespace
     cleaned_text = translated_text.strip()
     cleaned_text = re.sub(r"^(```html|```)", "", cleaned_text).strip()
@@ -149,28 +211,69 @@ async def translate_ru_to_ua_gpt(text: str, model: str = gpt.DEFAULT_MODEL) -> s
     cleaned_text = re.sub(r'\[u\](.*?)\[/u\]', r'<u>\1</u>', cleaned_text, flags=re.IGNORECASE | re.DOTALL)
     cleaned_text = re.sub(r'\[s\](.*?)\[/s\]', r'<s>\1</s>', cleaned_text, flags=re.IGNORECASE | re.DOTALL)
 
-    final_text = sanitize_html_for_telegram(cleaned_text)
+    return sanitize_html_for_telegram(cleaned_text)
+
 
+
+def _finalize_translation(text: str) -> str:
+    """Merge adjacent blockquotes and collapse blank lines across the assembled translation."""
     # AGGRESSIVE MERGE OF ALL POSSIBLE BLOCKQUOTE MARKERS
-    final_text = final_text.replace("<blockquote>", "XBQSX").replace("</blockquote>", "XBQEX")
+    final_text = text.replace("<blockquote>", "XBQSX").replace("</blockquote>", "XBQEX")
     final_text = re.sub(r'XBQEX[\s\S]*?XBQSX', 'XBQEXXBQSX', final_text, flags=re.IGNORECASE)
     final_text = final_text.replace("XBQSX", "<blockquote>")
     final_text = final_text.replace("XBQEX", "</blockquote>")
     final_text = re.sub(r'</blockquote>[ \t\n\r]*<blockquote>', '</blockquote><blockquote>', final_text, flags=re.IGNORECASE)
-    final_text = re.sub(r'\n{3,}', '\n\n', final_text).strip()
-
-    # Save to persistent cache
-    cache[text_hash] = final_text
-    _save_cache()
-
-    logger.debug(f"GPT Response (final bytes {len(final_text)}): {final_text[:300]}...")
-    return final_text
+    return re.sub(r'\n{3,}', '\n\n', final_text).strip()
+
+
+
+SHORT_DESCRIPTION_RULES = (
+    "Summarize the app description into exactly ONE short sentence in Ukrainian.\n\n"
+    "**Rules:**\n"
+    "1. ONE sentence only — no more.\n"
+    "2. Describe only WHAT the app/game IS and WHAT it does for the user.\n"
+    "3. Do NOT include technical implementation details (e.g. how a port was made, "
+    "what libraries it uses, how it loads executables, patching methods, etc.)\n"
+    "4. Example: instead of 'port that loads an ARMv7 binary into memory...', "
+    "write 'Порт гри Beat Hazard 2 для PS Vita.'\n"
+    "5. Keep English brand names, game titles, and technical terms untranslated.\n"
+    "6. Use natural, readable Ukrainian. End with a period.\n"
+    "7. STRICT: Do NOT add obvious, redundant, or wordy explanations like 'який дозволяє грати...', "
+    "'який дає змогу...', 'для консолі...', 'це порт...', 'щоб ви могли грати...'. "
+    "Keep it as concise and direct as possible. Example: 'Порт гри Adventures of Mana для Nintendo Switch.' "
+    "instead of 'Порт гри Adventures of Mana для Switch, який дозволяє вам грати в цю гру на консолі.'"
+)
+ESHOP_SYNOPSIS_RULES = (
+    "Translate the Nintendo Switch game synopsis into natural, engaging Ukrainian in 1-2 short sentences for a Telegram post.\n"
+    "Keep it concise, clear, and output ONLY the Ukrainian text without markdown formatting, quotes, or notes."
+)
+UPDATE_NOTES_RULES = (
+    "Summarize the software update notes into exactly ONE concise sentence in Ukrainian.\n\n"
+    "Rules:\n"
+    "1. ONE sentence only — no more.\n"
+    "2. Describe only WHAT was changed, fixed, or added in this update.\n"
+    "3. Do NOT include thanks, credits, author names, or release ceremony text.\n"
+    "4. Keep English brand names and technical terms untranslated.\n"
+    "5. Output plain text only (no HTML, no markdown). End with a period."
+)
+
+# Concurrent short translations of one kind share a single LLM request (services/translation_batch.py)
+_short_description_batcher = TranslationBatcher("Description summarization", SHORT_DESCRIPTION_RULES,
+                                                max_tokens_per_item=100, temperature=0.3)
+_eshop_synopsis_batcher = TranslationBatcher("eShop Excerpt", ESHOP_SYNOPSIS_RULES, max_tokens_per_item=250)
+_update_notes_batcher = TranslationBatcher("Homebrew Notes", UPDATE_NOTES_RULES, max_tokens_per_item=100,
+                                           temperature=0.3)
+
+
+def _strip_code_fences(text: str) -> str:
+    text = re.sub(r"^(```html|```)", "", text.strip()).strip()
+    return re.sub(r"```$", "", text).strip()
 
 
 async def translate_short_description(text: str, model: str = gpt.DEFAULT_MODEL) -> str:
     """
     Summarizes and translates a homebrew app description into 1 concise Ukrainian sentence.
-    Uses persistent disk cache.
+    Uses persistent disk cache; concurrent calls are batched into one request.
 
     :param text: App description text (any language).
     :param model: Model to use (primary).
@@ -179,50 +282,48 @@ async def translate_short_description(text: str, model: str = gpt.DEFAULT_MODEL)
     if not text or not text.strip():
         return text
 
-    cache = _get_cache()
     short_hash = f"short_{hashlib.sha256(text.strip().encode('utf-8')).hexdigest()}"
-    if short_hash in cache:
+    cached = _get_cache().get(short_hash)
+    if cached is not None:
         logger.info("Short description found in cache. Skipping LLM request.")
-        return cache[short_hash]
+        return cached
 
-    prompt = (
-        f"Summarize the following app description into exactly ONE short sentence in Ukrainian.\n\n"
-        f"**Rules:**\n"
-        f"1. ONE sentence only — no more.\n"
-        f"2. Describe only WHAT the app/game IS and WHAT it does for the user.\n"
-        f"3. Do NOT include technical implementation details (e.g. how a port was made, "
-        f"what libraries it uses, how it loads executables, patching methods, etc.)\n"
-        f"4. Example: instead of 'port that loads an ARMv7 binary into memory...', "
-        f"write 'Порт гри Beat Hazard 2 для PS Vita.'\n"
-        f"5. Keep English brand names, game titles, and technical terms untranslated.\n"
-        f"6. Use natural, readable Ukrainian. End with a period.\n"
-        f"7. STRICT: Do NOT add obvious, redundant, or wordy explanations like 'який дозволяє грати...', "
-        f"'який дає змогу...', 'для консолі...', 'це порт...', 'щоб ви могли грати...'. "
-        f"Keep it as concise and direct as possible. Example: 'Порт гри Adventures of Mana для Nintendo Switch.' "
-        f"instead of 'Порт гри Adventures of Mana для Switch, який дозволяє вам грати в цю гру на консолі.'\n\n"
-        f"**App description:**\n{text}\n\n**One-sentence Ukrainian summary:**"
-    )
+    async def single_call() -> Optional[str]:
+        prompt = f"{SHORT_DESCRIPTION_RULES}\n\n**App description:**\n{text}\n\n**One-sentence Ukrainian summary:**"
+        logger.info(f"Summarizing description using model: {model}...")
+        return await gpt.complete(prompt, max_tokens=100, model=model, temperature=0.3,
+                                  label="Description summarization")
 
-    logger.info(f"Summarizing description using model: {model}...")
-    translated_text = await gpt.complete(prompt, max_tokens=100, model=model, temperature=0.3,
-                                         label="Description summarization")
+    if model == _short_description_batcher.model:
+        translated_text = await _short_description_batcher.submit(text, single_call)
+    else:
+        translated_text = await single_call()
     if translated_text is None:
         return text  # Both models failed — caller decides whether to cache
 
-    # Clean any markdown artifacts
-    translated_text = re.sub(r"^(```html|```)", "", translated_text.strip()).strip()
-    result = re.sub(r"```$", "", translated_text).strip()
-
-    cache[short_hash] = result
-    _save_cache()
+    result = _strip_code_fences(translated_text)
+    _get_cache().put(short_hash, result)
     return result
 
 
+async def summarize_update_notes(notes: str) -> Optional[str]:
+    """Homebrew update notes as one Ukrainian sentence, or None on error. Concurrent calls are batched."""
+    if not notes or not notes.strip():
+        return None
+
+    async def single_call() -> Optional[str]:
+        prompt = f"{UPDATE_NOTES_RULES}\n\nUpdate notes:\n{notes.strip()}\n\nOne-sentence Ukrainian summary:"
+        return await gpt.complete(prompt, max_tokens=100, temperature=0.3, label="Homebrew Notes")
+
+    result = await _update_notes_batcher.submit(notes.strip(), single_call)
+    return result.strip() if result else None
+
+
 async def translate_eshop_synopsis(title: str, synopsis: str, fs_id: Optional[str] = None) -> str:
     """
     Translates a Nintendo Switch game synopsis into Ukrainian.
     Uses multi-key persistent disk cache (by title, fs_id, and content hash)
-    to guarantee zero redundant LLM requests.
+    to guarantee zero redundant LLM requests; concurrent calls are batched into one request.
     """
     if not synopsis or not synopsis.strip():
         return ""
@@ -234,27 +335,22 @@ async def translate_eshop_synopsis(title: str, synopsis: str, fs_id: Optional[st
 
     # Check cache
     for k in [content_hash, title_key, fsid_key]:
-        if k and k in cache and cache[k]:
+        cached = cache.get(k) if k else None
+        if cached:
             logger.info(f"⚡ [CACHE HIT] Using cached translation for '{title}' (key: {k})")
-            return cache[k]
+            return cached
 
-    prompt = (
-        "Translate the following Nintendo Switch game synopsis into natural, engaging Ukrainian in 1-2 short sentences for a Telegram post.\n"
-        "Keep it concise, clear, and output ONLY the Ukrainian text without markdown formatting, quotes, or notes.\n\n"
-        f"Game Title: {title}\n"
-        f"Original Synopsis:\n{synopsis.strip()}"
-    )
+    item = f"Game Title: {title}\nOriginal Synopsis:\n{synopsis.strip()}"
+
+    async def single_call() -> Optional[str]:
+        return await gpt.complete(f"{ESHOP_SYNOPSIS_RULES}\n\n{item}", max_tokens=250, label="eShop Excerpt")
 
     logger.info(f"🌐 [CACHE MISS] Requesting translation for '{title}' via OpenRouter...")
-    trans = await gpt.complete(prompt, max_tokens=250, label="eShop Excerpt")
+    trans = await _eshop_synopsis_batcher.submit(item, single_call)
     if trans and trans.strip():
         cleaned = trans.strip().replace('"', '').replace('«', '').replace('»', '')
         # Store in cache under all keys
-        cache[content_hash] = cleaned
-        cache[title_key] = cleaned
-        if fsid_key:
-            cache[fsid_key] = cleaned
-        _save_cache()
+        cache.put_many([k for k in (content_hash, title_key, fsid_key) if k], cleaned)
         return cleaned
 
     return synopsis
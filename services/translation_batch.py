@@ -0,0 +1,153 @@
+# --- START OF FILE translation_batch.py ---
+"""
+Micro-batching of short LLM translations.
+
+A TranslationBatcher collects the texts submitted within BATCH_WINDOW_SECONDS (or until
+BATCH_TOKEN_BUDGET / BATCH_MAX_ITEMS is reached) and sends them as ONE request: the items
+go in as a JSON list of {"id", "text"} and the model answers with a JSON object mapping each
+id to its result. Items the answer does not cover — or all of them, if the request fails or
+the answer is not valid JSON — fall back to the caller's own single-item request.
+
+Only concurrent submissions are batched, e.g. eShop deals enriched in parallel or the digest
+entries one homebrew source queues before awaiting them.
+"""
+import asyncio
+import json
+import logging
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from services import gpt
+
+logger = logging.getLogger(__name__)
+
+BATCH_WINDOW_SECONDS = 0.2
+BATCH_TOKEN_BUDGET = 6000   # estimated prompt tokens of the items in one batch
+BATCH_MAX_ITEMS = 20
+BATCH_MAX_OUTPUT_TOKENS = 8192
+
+SingleCall = Callable[[], Awaitable[Optional[str]]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for the batch budget."""
+    return len(text) // 4 + 1
+
+
+def parse_batch_answer(answer: Optional[str], ids: List[str]) -> Dict[str, str]:
+    """Results by item id from the model's JSON answer; missing, empty or non-string results are left out."""
+    if not answer:
+        return {}
+    cleaned = re.sub(r"^```(?:json)?|```$", "", answer.strip()).strip()
+    try:
+        data = json.loads(cleaned)
+    except ValueError:
+        match = re.search(r"\{.*\}", cleaned, re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        return {}
+    return {i: data[i].strip() for i in ids if isinstance(data.get(i), str) and data[i].strip()}
+
+
+class TranslationBatcher:
+    """Batches one kind of short translation; `instructions` are the rules applied to every item."""
+
+    def __init__(self, label: str, instructions: str, max_tokens_per_item: int,
+                 temperature: Optional[float] = None, model: str = gpt.DEFAULT_MODEL):
+        self.label = label
+        self.instructions = instructions
+        self.max_tokens_per_item = max_tokens_per_item
+        self.temperature = temperature
+        self.model = model
+        self._pending: List[Tuple[str, SingleCall, "asyncio.Future"]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Running batches: the event loop only keeps weak references to tasks
+        self._tasks: Set["asyncio.Task"] = set()
+        self.requests_sent = 0  # batch requests plus single-item fallbacks, for logging and tests
+
+    async def submit(self, text: str, single_call: SingleCall) -> Optional[str]:
+        """Result for `text`, or None. `single_call` makes the one-item request used as fallback."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._pending, self._pending_tokens, self._timer, self._loop = [], 0, None, loop
+            self._tasks = set()
+        tokens = estimate_tokens(text)
+        if self._pending and self._pending_tokens + tokens > BATCH_TOKEN_BUDGET:
+            self._flush()
+        future = loop.create_future()
+        self._pending.append((text, single_call, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= BATCH_MAX_ITEMS or self._pending_tokens >= BATCH_TOKEN_BUDGET:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(BATCH_WINDOW_SECONDS, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel(); self._timer = None
+        items, self._pending, self._pending_tokens = self._pending, [], 0
+        if items:
+            task = asyncio.ensure_future(self._run(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: List[Tuple[str, SingleCall, "asyncio.Future"]]) -> None:
+        """Run one batch; every submitter's future is resolved, failed or cancelled by the end."""
+        try:
+            await self._run_batch(items)
+        except asyncio.CancelledError:
+            for _, _, future in items:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"{self.label}: batch failed: {e!r}")
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _run_batch(self, items: List[Tuple[str, SingleCall, "asyncio.Future"]]) -> None:
+        results: Dict[int, str] = {}
+        if len(items) > 1:
+            ids = [str(n) for n in range(1, len(items) + 1)]
+            try:
+                answer = await gpt.complete(
+                    self._batch_prompt(ids, [text for text, _, _ in items]),
+                    max_tokens=min(BATCH_MAX_OUTPUT_TOKENS, self.max_tokens_per_item * len(items) + 100),
+                    model=self.model, temperature=self.temperature, label=f"{self.label} (batch of {len(items)})")
+                self.requests_sent += 1
+                results = {int(i) - 1: r for i, r in parse_batch_answer(answer, ids).items()}
+            except Exception as e:
+                logger.warning(f"{self.label}: batch request failed: {e}")
+            if len(results) < len(items):
+                logger.info(f"{self.label}: {len(items) - len(results)} of {len(items)} batch items "
+                            f"missing from the answer, requesting them one by one.")
+        await asyncio.gather(*(self._resolve(results.get(n), single_call, future)
+                               for n, (_, single_call, future) in enumerate(items)))
+
+    async def _resolve(self, result: Optional[str], single_call: SingleCall, future: "asyncio.Future") -> None:
+        if result is None:
+            self.requests_sent += 1
+            try:
+                result = await single_call()
+            except Exception as e:
+                logger.warning(f"{self.label}: single request failed: {e}")
+        if not future.done():
+            future.set_result(result)
+
+    def _batch_prompt(self, ids: List[str], texts: List[str]) -> str:
+        items = json.dumps([{"id": i, "text": t} for i, t in zip(ids, texts)], ensure_ascii=False, indent=1)
+        return (
+            f"{self.instructions}\n\n"
+            f"Apply these rules to EACH item below independently.\n"
+            f"Answer with ONLY a JSON object that maps every item id to its result string, "
+            f"e.g. {{\"1\": \"...\", \"2\": \"...\"}}. No markdown, no comments.\n\n"
+            f"**Items (JSON):**\n{items}"
+        )
+
+# --- END OF FILE translation_batch.py ---
@@ -0,0 +1,199 @@
+# --- START OF FILE translation_cache.py ---
+"""
+Persistent translation cache in SQLite (WAL mode): data/translations_cache.db.
+
+Each put() is a single-row upsert instead of a rewrite of the whole cache. Every entry
+keeps its hit count and last use. Entries unused for max_age_days are dropped, then the
+least recently used ones beyond max_mb. Eviction runs when the cache is opened and on export,
+never per insert.
+
+data/translations_cache.json stays the sync format for sync_gist_state.py (same {key: text}
+layout as before). Whenever that file changes (a Gist download, or the JSON cache of an
+older version), its entries are merged in on open. export_json() writes the cache back to
+it; sync_gist_state.py does that right before an upload. Export by hand with:
+    python -m services.translation_cache export
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_CACHE_DB = os.path.join("data", "translations_cache.db")
+TRANSLATION_CACHE_JSON = os.path.join("data", "translations_cache.json")
+DEFAULT_MAX_MB = 20
+DEFAULT_MAX_AGE_DAYS = 365
+
+
+def _file_signature(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class TranslationCache:
+    """Key -> translated text, with hit counts and last use for eviction."""
+
+    def __init__(self, db_path: str = TRANSLATION_CACHE_DB, json_path: Optional[str] = TRANSLATION_CACHE_JSON,
+                 max_mb: float = DEFAULT_MAX_MB, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.json_path = json_path
+        self.max_mb = max_mb
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0);
+            CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+        """)
+        if json_path:
+            self._import_json_if_changed()
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached text for `key` (counted as a hit), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE translations SET hits = hits + 1, last_used = ? WHERE key = ?",
+                               (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        self.put_many([key], value)
+
+    def put_many(self, keys: Iterable[str], value: str) -> None:
+        """Store `value` under every key (e.g. an eShop synopsis by content hash, title and fs_id)."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO translations (key, value, created, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, last_used = excluded.last_used",
+                [(key, value, now, now) for key in keys])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM translations").fetchone()[0]
+
+    def stats(self, key: str) -> Optional[Dict[str, float]]:
+        """Hit count, creation and last-use time of `key`, without counting a hit."""
+        with self._lock:
+            row = self._conn.execute("SELECT hits, created, last_used FROM translations WHERE key = ?",
+                                     (key,)).fetchone()
+        return dict(zip(("hits", "created", "last_used"), row)) if row else None
+
+    def evict(self) -> int:
+        """Drop entries unused for max_age_days, then least recently used ones past max_mb. Returns the count."""
+        cutoff = time.time() - self.max_age_days * 86400
+        max_bytes = self.max_mb * 1024 * 1024
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM translations WHERE last_used < ?", (cutoff,)).rowcount
+            total = self._conn.execute(
+                "SELECT coalesce(sum(length(CAST(key AS BLOB)) + length(CAST(value AS BLOB))), 0) FROM translations"
+            ).fetchone()[0]
+            if total > max_bytes:
+                # Keep the most recently used entries that fit; ties (e.g. one import) go by insertion order
+                order = "ORDER BY last_used DESC, rowid ASC"
+                kept_bytes, keep = 0, 0
+                for (size,) in self._conn.execute(
+                        f"SELECT length(CAST(key AS BLOB)) + length(CAST(value AS BLOB)) FROM translations {order}"):
+                    kept_bytes += size
+                    if kept_bytes > max_bytes: break
+                    keep += 1
+                removed += self._conn.execute(
+                    f"DELETE FROM translations WHERE rowid IN (SELECT rowid FROM translations {order} LIMIT -1 OFFSET ?)",
+                    (keep,)).rowcount
+        if removed:
+            logger.info(f"Translation cache: evicted {removed} entries.")
+        return removed
+
+    def import_json(self, path: str) -> int:
+        """Merge a {key: text} JSON file; existing entries are kept. Returns the number of new entries."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load translation cache JSON {path}: {e}")
+            return 0
+        if not isinstance(data, dict):
+            return 0
+        now = time.time()
+        rows = [(k, v, now, now) for k, v in data.items() if isinstance(k, str) and isinstance(v, str) and v]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO translations (key, value, created, last_used) VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def _import_json_if_changed(self) -> None:
+        signature = _file_signature(self.json_path)
+        if signature is None:
+            return
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_signature'").fetchone()
+        if row and row[0] == signature:
+            return
+        added = self.import_json(self.json_path)
+        self._set_json_signature()
+        logger.info(f"Translation cache: merged {added} entries from {self.json_path}.")
+
+    def _set_json_signature(self) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('json_signature', ?)",
+                               (_file_signature(self.json_path),))
+
+    def export_json(self, path: Optional[str] = None) -> int:
+        """Write the cache as {key: text} (most recently used first) for Gist sync. Returns the entry count."""
+        path = path or self.json_path
+        self.evict()
+        with self._lock:
+            data = dict(self._conn.execute("SELECT key, value FROM translations ORDER BY last_used DESC, rowid ASC"))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        if path == self.json_path:
+            self._set_json_signature()  # our own export is not merged back on the next open
+        return len(data)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def export_translation_cache(db_path: str = TRANSLATION_CACHE_DB, json_path: str = TRANSLATION_CACHE_JSON) -> Optional[int]:
+    """Export the SQLite cache to its JSON file if the database exists; returns the entry count or None."""
+    if not os.path.exists(db_path):
+        return None
+    cache = TranslationCache(db_path, json_path)
+    try:
+        return cache.export_json()
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if sys.argv[1:] != ["export"]:
+        sys.exit("Usage: python -m services.translation_cache export")
+    count = export_translation_cache()
+    print(f"Exported {count} translations to {TRANSLATION_CACHE_JSON}" if count is not None
+          else f"{TRANSLATION_CACHE_DB} does not exist")
+
+# --- END OF FILE translation_cache.py ---
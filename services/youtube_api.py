@@ -0,0 +1,71 @@
+# --- START OF FILE youtube_api.py ---
+"""
+Minimal async client for the two YouTube Data API v3 endpoints the bot uses: search.list
+and videos.list.
+
+Requests go straight to the REST endpoints on the shared aiohttp session (keep-alive,
+gzip), so there is no discovery document to fetch and no worker thread per call. The
+`fields` parameter trims the responses to what the callers read.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from core.settings_loader import get_session
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
+YOUTUBE_API_TIMEOUT = aiohttp.ClientTimeout(total=20)
+
+
+class YouTubeAPIError(Exception):
+    """Non-2xx answer from the Data API; `reason` is the first error reason (e.g. quotaExceeded)."""
+
+    def __init__(self, status: int, reason: str, message: str = ""):
+        super().__init__(f"YouTube API {status} {reason}: {message}".rstrip(": "))
+        self.status = status
+        self.reason = reason
+
+
+async def _get(endpoint: str, api_key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    query = {k: str(v) for k, v in params.items() if v is not None}
+    query["key"] = api_key
+    async with get_session().get(f"{YOUTUBE_API_BASE}/{endpoint}", params=query,
+                                 headers={"Accept-Encoding": "gzip"}, timeout=YOUTUBE_API_TIMEOUT) as response:
+        try:
+            data = await response.json(content_type=None)
+        except ValueError:
+            data = None
+        if response.status >= 400 or not isinstance(data, dict):
+            error = (data or {}).get("error", {}) if isinstance(data, dict) else {}
+            errors = error.get("errors") or [{}]
+            raise YouTubeAPIError(response.status, errors[0].get("reason", "") or response.reason or "",
+                                  error.get("message", ""))
+        return data
+
+
+async def search_list(api_key: str, q: str, max_results: int = 3, **params) -> List[Dict[str, str]]:
+    """
+    Videos matching `q` as [{"videoId", "title"}], in relevance order.
+    Extra keyword arguments are passed as API parameters (e.g. relevanceLanguage="en").
+    """
+    data = await _get("search", api_key, {
+        "part": "id,snippet", "type": "video", "q": q, "maxResults": max_results,
+        "fields": "items(id/videoId,snippet/title)", **params,
+    })
+    return [{"videoId": item["id"]["videoId"], "title": item["snippet"]["title"]}
+            for item in data.get("items", []) if item.get("id", {}).get("videoId")]
+
+
+async def videos_list(api_key: str, video_ids: Iterable[str], part: str = "snippet,status",
+                      fields: Optional[str] = "items(id,snippet/title,status/privacyStatus,status/embeddable)") -> List[Dict[str, Any]]:
+    """Resources of the given videos (up to 50 IDs); videos that no longer exist are missing from the result."""
+    ids = ",".join(video_ids)
+    if not ids:
+        return []
+    data = await _get("videos", api_key, {"part": part, "id": ids, "fields": fields})
+    return data.get("items", [])
+
+# --- END OF FILE youtube_api.py ---
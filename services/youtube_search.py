@@ -1,26 +1,253 @@
 # --- START OF FILE youtube_search.py ---
-import re
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+"""
+YouTube trailer search with a persistent lookup cache and daily quota accounting.
+
+Queries go through services/youtube_api.py on the shared aiohttp session. Every search.list
+call costs YOUTUBE_SEARCH_COST quota units. The first YOUTUBE_PARALLEL_QUERIES queries run
+concurrently, and the rest are only sent if those found fewer than TRAILER_CANDIDATES
+videos. Units are counted per Pacific-time day (when the API quota resets) in
+data/youtube_quota.json. Searching stops before YOUTUBE_DAILY_QUOTA would be exceeded, or
+for the rest of the day after a 403.
+
+data/yt_trailer_cache.json keeps the outcome of a lookup by normalized game title: the
+candidates and the validated video ID (None if no candidate passed). Found trailers are
+reused for TRAILER_CACHE_TTL_SECONDS; titles without one are retried after
+YOUTUBE_NEGATIVE_TTL_HOURS. find_trailer_candidates() reports whether the search got an answer
+to every query it needed, so a search cut short by an error or the quota is not cached as
+"no trailer".
+"""
+import asyncio
+import json
 import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Optional, Tuple, List
-import asyncio
+from zoneinfo import ZoneInfo
+
+from core.settings_loader import YOUTUBE_DAILY_QUOTA, YOUTUBE_NEGATIVE_TTL_HOURS
+from services import youtube_api
+from services.youtube_api import YouTubeAPIError
 
 logger = logging.getLogger(__name__)
 
-# Module-level cache for YouTube API client (build() is expensive — HTTP to discovery endpoint)
-_youtube_client = None
-_youtube_api_key_used = None
+TRAILER_CANDIDATES = 3
+YOUTUBE_PARALLEL_QUERIES = 3
+YOUTUBE_SEARCH_COST = 100
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+QUOTA_FILE = os.path.join("data", "youtube_quota.json")
+TRAILER_CACHE_FILE = os.path.join("data", "yt_trailer_cache.json")
+TRAILER_CACHE_TTL_SECONDS = 30 * 24 * 3600  # 30 days
+TRAILER_CACHE_MAX_ENTRIES = 5000
+
+_cache_memory: Optional[dict] = None
+_quota_memory: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class CachedTrailer:
+    video_id: Optional[str]  # None: no candidate passed validation
+    candidates: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def url(self) -> Optional[str]:
+        return f"https://www.youtube.com/watch?v={self.video_id}" if self.video_id else None
+
+
+def _clean_game_title(game_title: str) -> str:
+    cleaned_game_title = re.sub(r'\[.*?\]', '', game_title).strip()
+    cleaned_game_title = re.sub(
+        r'\b(Deluxe|Ultimate|Gold|Standard|Complete|GOTY|Edition)\b', '',
+        cleaned_game_title, flags=re.IGNORECASE
+    ).strip()
+    return re.sub(r'[^\w\s\-\:]+$', '', cleaned_game_title).strip()
+
+
+def trailer_cache_key(game_title: str) -> str:
+    """Cleaned title, lower-cased with whitespace collapsed: re-posts of a game share one entry."""
+    return " ".join(_clean_game_title(game_title).lower().split())
+
+
+# --- Quota accounting ---
+
+def _quota_day() -> str:
+    return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+
+def _get_quota() -> dict:
+    """Units used today ({"day", "used"}), starting from zero on a new quota day."""
+    global _quota_memory
+    if _quota_memory is None and os.path.exists(QUOTA_FILE):
+        try:
+            with open(QUOTA_FILE, "r", encoding="utf-8") as f:
+                _quota_memory = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load YouTube quota state: {e}")
+    day = _quota_day()
+    if not isinstance(_quota_memory, dict) or _quota_memory.get("day") != day:
+        _quota_memory = {"day": day, "used": 0}
+    return _quota_memory
+
+
+def _save_quota() -> None:
+    try:
+        os.makedirs(os.path.dirname(QUOTA_FILE) or ".", exist_ok=True)
+        with open(QUOTA_FILE, "w", encoding="utf-8") as f:
+            json.dump(_quota_memory, f, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save YouTube quota state: {e}")
+
+
+def quota_remaining() -> int:
+    return max(0, YOUTUBE_DAILY_QUOTA - _get_quota()["used"])
+
+
+def _reserve_quota(units: int = YOUTUBE_SEARCH_COST) -> bool:
+    """Count `units` against today's quota; False (nothing counted) if they do not fit."""
+    quota = _get_quota()
+    if quota["used"] + units > YOUTUBE_DAILY_QUOTA:
+        return False
+    quota["used"] += units
+    _save_quota()
+    return True
+
+
+def _mark_quota_exhausted() -> None:
+    _get_quota()["used"] = max(_get_quota()["used"], YOUTUBE_DAILY_QUOTA)
+    _save_quota()
+
+
+# --- Trailer cache ---
+
+def _get_cache() -> dict:
+    """Load the persistent trailer lookup cache."""
+    global _cache_memory
+    if _cache_memory is None:
+        if os.path.exists(TRAILER_CACHE_FILE):
+            try:
+                with open(TRAILER_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _cache_memory = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not load YouTube trailer cache: {e}")
+                _cache_memory = {}
+        else:
+            _cache_memory = {}
+    return _cache_memory
+
+
+def _entry_ttl(entry: dict) -> float:
+    return TRAILER_CACHE_TTL_SECONDS if entry.get("video_id") else YOUTUBE_NEGATIVE_TTL_HOURS * 3600
+
+
+def _save_cache() -> None:
+    """Drop expired lookups, trim to TRAILER_CACHE_MAX_ENTRIES (oldest first) and persist."""
+    if _cache_memory is None:
+        return
+    now = time.time()
+    for key in [k for k, e in _cache_memory.items() if now - e.get("stored_at", 0) >= _entry_ttl(e)]:
+        del _cache_memory[key]
+    if len(_cache_memory) > TRAILER_CACHE_MAX_ENTRIES:
+        by_age = sorted(_cache_memory, key=lambda k: _cache_memory[k].get("stored_at", 0))
+        for key in by_age[:len(_cache_memory) - TRAILER_CACHE_MAX_ENTRIES]:
+            del _cache_memory[key]
+    try:
+        os.makedirs(os.path.dirname(TRAILER_CACHE_FILE) or ".", exist_ok=True)
+        with open(TRAILER_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(_cache_memory, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.debug(f"Failed to save YouTube trailer cache: {e}")
+
+
+def get_cached_trailer(game_title: str) -> Optional[CachedTrailer]:
+    """The last lookup for this game if it is still fresh, else None."""
+    entry = _get_cache().get(trailer_cache_key(game_title))
+    if not entry or time.time() - entry.get("stored_at", 0) >= _entry_ttl(entry):
+        return None
+    return CachedTrailer(entry.get("video_id"), [tuple(c) for c in entry.get("candidates", [])])
+
+
+def remember_trailer(game_title: str, candidates: List[Tuple[str, str]], video_id: Optional[str]) -> None:
+    """
+    Store a lookup: the validated video ID, or None if no candidate passed.
+    A negative result is not stored while the quota is exhausted, as the search was cut short.
+    """
+    key = trailer_cache_key(game_title)
+    if not key or (not video_id and quota_remaining() < YOUTUBE_SEARCH_COST):
+        return
+    _get_cache()[key] = {"video_id": video_id, "candidates": [list(c) for c in candidates], "stored_at": time.time()}
+    _save_cache()
+
+
+# --- Search ---
+
+# Error reasons that mean the daily quota is gone; any other error only skips the query
+QUOTA_ERROR_REASONS = ("quotaExceeded", "dailyLimitExceeded")
 
 
-async def _get_youtube_client(api_key: str):
-    """Lazily initialize and cache the YouTube API client."""
-    global _youtube_client, _youtube_api_key_used
-    if _youtube_client is None or _youtube_api_key_used != api_key:
-        _youtube_client = await asyncio.to_thread(build, "youtube", "v3", developerKey=api_key)
-        _youtube_api_key_used = api_key
-        logger.info("YouTube API client initialized and cached.")
-    return _youtube_client
+async def _search_query(api_key: str, query: str) -> Optional[List[Tuple[str, str]]]:
+    """(video_id, title) results of one query; None if it got no answer (quota, API or network error)."""
+    if not _reserve_quota():
+        logger.warning(f"YouTube quota for today is used up ({YOUTUBE_DAILY_QUOTA} units). Skipping query '{query}'.")
+        return None
+    try:
+        items = await youtube_api.search_list(
+            api_key, query, max_results=3, order="relevance", relevanceLanguage="en", videoDefinition="high")
+        return [(item["videoId"], item["title"]) for item in items]
+    except YouTubeAPIError as e:
+        logger.error(f"YT HTTP error (Query: '{query}'): {e}")
+        if e.reason in QUOTA_ERROR_REASONS:
+            logger.error("YouTube quota exceeded. No more searches today.")
+            _mark_quota_exhausted()
+    except Exception as e:
+        logger.error(f"YT unexpected error (Query: '{query}'): {e!r}")
+    return None
+
+
+def _quota_stopped() -> bool:
+    return quota_remaining() < YOUTUBE_SEARCH_COST
+
+
+def _add_candidates(candidates: List[Tuple[str, str]], seen_ids: set, results: List[Tuple[str, str]], query: str) -> None:
+    for video_id, video_title in results:
+        if len(candidates) >= TRAILER_CANDIDATES:
+            break
+        if video_id in seen_ids:
+            continue
+        seen_ids.add(video_id)
+        trailer_url = f"https://www.youtube.com/watch?v={video_id}"
+        logger.info(f"Candidate: '{video_title}' — {trailer_url} (Query: '{query}')")
+        candidates.append((trailer_url, video_title))
+
+
+async def _search_first_wave(api_key: str, queries: List[str]) -> Tuple[List[Optional[list]], bool]:
+    """
+    Run `queries` concurrently. Stops early (cancelling the rest) once the queries finished
+    so far, taken in order from the first, hold TRAILER_CANDIDATES unique videos.
+    Returns the results in query order (None if not finished) and whether the quota stopped the search.
+    """
+    tasks = [asyncio.ensure_future(_search_query(api_key, q)) for q in queries]
+    try:
+        pending = set(tasks)
+        while pending:
+            _done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if _quota_stopped() and any(t.done() and t.result() is None for t in tasks):
+                break
+            seen = set()
+            for task in tasks:
+                if not task.done():
+                    break
+                seen.update(video_id for video_id, _ in task.result() or [])
+            if len(seen) >= TRAILER_CANDIDATES:
+                break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    results = [t.result() if t.done() and not t.cancelled() else None for t in tasks]
+    return results, _quota_stopped() and None in results
 
 
 async def search_trailer_on_youtube(
@@ -31,18 +258,24 @@ async def search_trailer_on_youtube(
     Returns up to 3 unique (url, title) candidates across all search queries,
     for the caller to validate and pick the best match.
     """
-    if not api_key:
-        return []
+    candidates, _complete = await find_trailer_candidates(game_title, api_key)
+    return candidates
 
-    cleaned_game_title = re.sub(r'\[.*?\]', '', game_title).strip()
-    cleaned_game_title = re.sub(
-        r'\b(Deluxe|Ultimate|Gold|Standard|Complete|GOTY|Edition)\b', '',
-        cleaned_game_title, flags=re.IGNORECASE
-    ).strip()
-    cleaned_game_title = re.sub(r'[^\w\s\-\:]+$', '', cleaned_game_title).strip()
 
+async def find_trailer_candidates(
+    game_title: str, api_key: Optional[str]
+) -> Tuple[List[Tuple[str, str]], bool]:
+    """
+    search_trailer_on_youtube() plus whether the search was complete: it found
+    TRAILER_CANDIDATES videos, or every query got an answer. False after an API/network
+    error or when the quota ran out.
+    """
+    if not api_key:
+        return [], False
+
+    cleaned_game_title = _clean_game_title(game_title)
     if not cleaned_game_title:
-        return []
+        return [], False
 
     search_queries = [
         f'"{cleaned_game_title}" Nintendo Switch Official Trailer',
@@ -62,47 +295,27 @@ async def search_trailer_on_youtube(
     candidates: List[Tuple[str, str]] = []
     seen_ids: set = set()
 
-    try:
-        youtube = await _get_youtube_client(api_key)
-        for query in search_queries:
-            if len(candidates) >= 3:
-                break
-            try:
-                list_call = youtube.search().list(
-                    q=query,
-                    part="id,snippet",
-                    type="video",
-                    order="relevance",
-                    maxResults=3,
-                    relevanceLanguage="en",
-                    videoDefinition="high"
-                )
-                search_response = await asyncio.to_thread(list_call.execute)
-                items = search_response.get("items", [])
-                for item in items:
-                    if len(candidates) >= 3:
-                        break
-                    video_id = item["id"]["videoId"]
-                    if video_id in seen_ids:
-                        continue
-                    seen_ids.add(video_id)
-                    video_title = item["snippet"]["title"]
-                    trailer_url = f"https://www.youtube.com/watch?v={video_id}"
-                    logger.info(f"Candidate: '{video_title}' — {trailer_url} (Query: '{query}')")
-                    candidates.append((trailer_url, video_title))
-
-            except HttpError as e:
-                logger.error(f"YT HTTP error (Query: '{query}'): {e}")
-                if hasattr(e, 'resp') and e.resp.status == 403:
-                    logger.error("YouTube quota likely exceeded.")
-                    break
-            except Exception as e:
-                logger.error(f"YT unexpected error (Query: '{query}'): {e}")
+    if _quota_stopped():
+        logger.warning(f"YouTube quota for today is used up. Skipping trailer search for '{cleaned_game_title}'.")
+        return [], False
 
-        return candidates
+    first_wave = search_queries[:YOUTUBE_PARALLEL_QUERIES]
+    results, quota_stop = await _search_first_wave(api_key, first_wave)
+    unanswered = None in results
+    for query, query_results in zip(first_wave, results):
+        _add_candidates(candidates, seen_ids, query_results or [], query)
 
-    except Exception as e:
-        logger.error(f"Failed to build YouTube API service: {e}")
-        return []
+    for query in search_queries[YOUTUBE_PARALLEL_QUERIES:]:
+        if quota_stop or len(candidates) >= TRAILER_CANDIDATES:
+            break
+        query_results = await _search_query(api_key, query)
+        if query_results is None:
+            unanswered = True
+            if _quota_stopped():
+                break
+            continue
+        _add_candidates(candidates, seen_ids, query_results, query)
+
+    return candidates, len(candidates) >= TRAILER_CANDIDATES or not unanswered
 
 # --- END OF FILE youtube_search.py ---
@@ -5,8 +5,11 @@ import urllib.request
 import urllib.error
 import argparse
 import logging
+import time
 from typing import Dict
 
+from core.state_store import STATE_FILES, export_state_files, import_state_files
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -31,10 +34,16 @@ FILES_TO_SYNC = [
     "eshop_wishlist.json",
     "user_subscriptions.json",
     "hb_descriptions.json",
-    "translations_cache.json"
+    "translations_cache.json",
+    "telegram_media_cache.json",
+    "yt_validation_cache.json",
+    "yt_trailer_cache.json",
+    "youtube_quota.json",
+    "parsed_entries.json"
 ]
 
 DATA_DIR = "data"
+STATE_DB = os.path.join(DATA_DIR, "state.db")
 
 def get_gist_headers(token: str = None) -> Dict[str, str]:
     headers = {
@@ -101,6 +110,7 @@ def download_state(gist_id: str, token: str, target_files: list = None):
                 else:
                     logger.warning(f"{filename} not found in Gist, will be created locally if needed.")
                     
+        import_state_files(STATE_DB, DATA_DIR)
         logger.info("Download complete.")
     except urllib.error.HTTPError as e:
         logger.error(f"HTTP Error: {e.code} - {e.read().decode()}")
@@ -209,6 +219,35 @@ def merge_json_files(filename: str, local_content: str, gist_content: str) -> st
                     merged_state[k] = v
         return json.dumps(merged_state, ensure_ascii=False, indent=2)
 
+    elif filename == "translations_cache.json":
+        # Translations of the same key are interchangeable: keep everything, local entries first
+        if not isinstance(local_data, dict): local_data = {}
+        if not isinstance(gist_data, dict): gist_data = {}
+        merged_translations = dict(local_data)
+        for k, v in gist_data.items():
+            merged_translations.setdefault(k, v)
+        return json.dumps(merged_translations, ensure_ascii=False, indent=2)
+
+    elif filename in ("yt_validation_cache.json", "yt_trailer_cache.json"):
+        # Trailer verdicts and lookups: keep both sides, the newer entry wins
+        if not isinstance(local_data, dict): local_data = {}
+        if not isinstance(gist_data, dict): gist_data = {}
+        merged_verdicts = dict(gist_data)
+        for k, v in local_data.items():
+            if k not in merged_verdicts or v.get("stored_at", 0) >= merged_verdicts[k].get("stored_at", 0):
+                merged_verdicts[k] = v
+        return json.dumps(merged_verdicts, ensure_ascii=False, indent=2)
+
+    elif filename == "youtube_quota.json":
+        # Runs start from the downloaded count, so on the same quota day the larger count is current
+        if not isinstance(local_data, dict): local_data = {}
+        if not isinstance(gist_data, dict): gist_data = {}
+        if local_data.get("day", "") != gist_data.get("day", ""):
+            newer = local_data if local_data.get("day", "") > gist_data.get("day", "") else gist_data
+            return json.dumps(newer, ensure_ascii=False, indent=2)
+        merged_quota = {"day": local_data.get("day", ""), "used": max(local_data.get("used", 0), gist_data.get("used", 0))}
+        return json.dumps(merged_quota, ensure_ascii=False, indent=2)
+
     elif filename == "custom_releases_state.json":
         if not isinstance(local_data, dict): local_data = {}
         if not isinstance(gist_data, dict): gist_data = {}
@@ -237,6 +276,22 @@ def merge_json_files(filename: str, local_content: str, gist_content: str) -> st
 def upload_state(gist_id: str, token: str, force: bool = False, target_files: list = None):
     sync_list = normalize_target_files(target_files)
     logger.info(f"Uploading state to Gist {gist_id} (force={force}, files: {', '.join(sync_list)})...")
+
+    if "translations_cache.json" in sync_list:
+        # The bot keeps translations in SQLite; the Gist gets its JSON export
+        from services.translation_cache import export_translation_cache
+        exported = export_translation_cache(os.path.join(DATA_DIR, "translations_cache.db"),
+                                            os.path.join(DATA_DIR, "translations_cache.json"))
+        if exported is not None:
+            logger.info(f"Exported {exported} cached translations to translations_cache.json.")
+
+    # Collections of the state store go up as their JSON files
+    exported_at = time.time()
+    state_names = [name for name, filename in STATE_FILES.items() if filename in sync_list]
+    if state_names:
+        exported = export_state_files(STATE_DB, DATA_DIR, state_names)
+        if exported:
+            logger.info(f"Exported state store collections: {', '.join(f'{n} ({c})' for n, c in exported.items())}.")
     
     # 1. Download current Gist content first to perform a safe merge unless force is True
     gist_files = {}
@@ -302,6 +357,10 @@ def upload_state(gist_id: str, token: str, force: bool = False, target_files: li
         else:
             logger.warning(f"File {filename} not found locally, skipping.")
             
+    # Merged files were written back: the state store picks up the Gist's additions. Rows the
+    # bot wrote since the export (the daemon keeps serving commands during an upload) are kept.
+    import_state_files(STATE_DB, DATA_DIR, keep_newer_than=exported_at)
+
     if not files_payload:
         logger.warning("No files found to upload.")
         return
@@ -324,14 +383,8 @@ def upload_state(gist_id: str, token: str, force: bool = False, target_files: li
         logger.error(f"Error uploading state: {e}")
         raise
 
-def main():
-    parser = argparse.ArgumentParser(description="Synchronize bot state with GitHub Gist")
-    parser.add_argument("action", choices=["download", "upload"], help="Action to perform")
-    parser.add_argument("files", nargs="*", default=None, help="Optional specific file(s) to sync (e.g. manual_releases.json)")
-    parser.add_argument("-f", "--force", action="store_true", help="Force upload local files directly without merging")
-    
-    args = parser.parse_args()
-    
+def get_gist_credentials():
+    """(gist_id, token, used_github_token) from the environment, else config/local_settings.json."""
     gist_id = os.environ.get("GIST_ID")
     token = os.environ.get("GIST_TOKEN")
     used_github_token = False
@@ -347,6 +400,17 @@ def main():
                     used_github_token = bool(token)
         except Exception as e:
             logger.debug(f"Could not load Gist settings from config: {e}")
+    return gist_id, token, used_github_token
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronize bot state with GitHub Gist")
+    parser.add_argument("action", choices=["download", "upload"], help="Action to perform")
+    parser.add_argument("files", nargs="*", default=None, help="Optional specific file(s) to sync (e.g. manual_releases.json)")
+    parser.add_argument("-f", "--force", action="store_true", help="Force upload local files directly without merging")
+    
+    args = parser.parse_args()
+    
+    gist_id, token, used_github_token = get_gist_credentials()
 
     if not gist_id:
         logger.error(
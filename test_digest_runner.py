@@ -50,7 +50,10 @@ def test_cooldown():
             os.environ['FORCE_TASK'] = orig_env
 
 
-def test_collect_target_groups():
+def test_collect_target_groups(tmp_path, monkeypatch):
+    from core import state_store
+    # No user subscriptions: only the configured groups
+    monkeypatch.setattr(state_store, "_store", state_store.StateStore(str(tmp_path / "state.db"), data_dir=None))
     config = {
         'GROUPS': [{'group_name': 'A', 'chat_id': 1, 'topic_id': '5', 'language': 'UA'},
                    {'chat_id': 2}],
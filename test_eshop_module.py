@@ -156,8 +156,8 @@ def test_overlay_platform_badge():
 
 def test_wishlist_service(tmp_path):
     from services.eshop.wishlist_service import WishlistService
-    test_file = str(tmp_path / "test_wishlist.json")
-    wl = WishlistService(filepath=test_file)
+    from core.state_store import StateStore
+    wl = WishlistService(store=StateStore(str(tmp_path / "state.db"), data_dir=None))
 
     # 1. Add game
     item = wl.add_game(chat_id=12345, title="Hollow Knight", nsuid="70010000003208", topic_id=561344)
@@ -186,8 +186,8 @@ def test_wishlist_service(tmp_path):
 
 def test_subscription_service(tmp_path):
     from services.subscription_service import SubscriptionService
-    test_file = str(tmp_path / "test_user_subscriptions.json")
-    srv = SubscriptionService(filepath=test_file)
+    from core.state_store import StateStore
+    srv = SubscriptionService(store=StateStore(str(tmp_path / "state.db"), data_dir=None))
 
     # 1. Default should be all False
     subs = srv.get_subscriptions(chat_id=99999)
@@ -325,6 +325,37 @@ async def test_strict_deletion_guardrail():
         assert result_topic_blocked is False
 
 
+@pytest.mark.asyncio
+async def test_changed_platform_badge_is_uploaded_again(monkeypatch):
+    import io
+    from types import SimpleNamespace
+    import send_eshop_deals
+    from services import media_cache
+
+    monkeypatch.setattr(media_cache, "_cache_memory", {})
+    monkeypatch.setattr(media_cache, "_save_cache", lambda: None)
+    sent = []
+
+    async def fake_send_photo(chat_id, photo, **kw):
+        sent.append(photo)
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=f"fid-{len(sent)}")])
+
+    async def fake_badge(deal):
+        return io.BytesIO(b"cover with " + deal.system_names[-1].encode())
+
+    monkeypatch.setattr(send_eshop_deals, "scheduled_bot", SimpleNamespace(send_photo=fake_send_photo))
+    monkeypatch.setattr(send_eshop_deals, "download_and_badge_cover", fake_badge)
+    deal = GameDeal(fs_id="1", title="Game", regular_price=10.0, discount_price=5.0, discount_percent=50.0,
+                    image_url="http://img/cover.jpg", system_names=["Nintendo Switch"])
+
+    await send_eshop_deals.send_deal_photo(-1, None, deal, "caption")
+    await send_eshop_deals.send_deal_photo(-1, None, deal, "caption")
+    deal.system_names = ["Nintendo Switch", "Nintendo Switch 2"]  # now drawn as "Switch 1 & 2"
+    await send_eshop_deals.send_deal_photo(-1, None, deal, "caption")
+
+    assert sent == [b"cover with Nintendo Switch", "fid-1", b"cover with Nintendo Switch 2"]
+
+
 def test_parse_deal_command_args():
     from services.eshop.bot_commands import parse_deal_command_args
 
@@ -432,17 +463,23 @@ def test_title_similarity_guardrail():
 
 
 @pytest.mark.asyncio
-async def test_cmd_remove_deals():
+async def test_cmd_remove_deals(tmp_path):
     from telebot.async_telebot import AsyncTeleBot
     from telebot.types import Message, Chat
     from services.eshop.bot_commands import register_eshop_handlers
+    from services.eshop.wishlist_service import WishlistService
+    from services.subscription_service import SubscriptionService
+    from core.state_store import StateStore
     from unittest.mock import AsyncMock, patch
 
     bot = AsyncTeleBot("123456:dummy_token")
     mock_eshop = AsyncMock()
     mock_engine = AsyncMock()
     mock_criteria = AsyncMock()
-    register_eshop_handlers(bot, mock_engine, mock_eshop, mock_criteria)
+    store = StateStore(str(tmp_path / "state.db"), data_dir=None)
+    register_eshop_handlers(bot, mock_engine, mock_eshop, mock_criteria,
+                            wishlist_service=WishlistService(store=store),
+                            subscription_service=SubscriptionService(store=store))
 
     msg = Message(
         message_id=555,
@@ -0,0 +1,129 @@
+"""parsers.flaresolverr against a local fake FlareSolverr: session reuse, clearance caching and expiry."""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+
+import core.http_pool as http_pool
+import core.settings_loader as settings_loader
+import parsers.flaresolverr as flaresolverr
+import parsers.tracker_parser as tracker_parser
+from parsers import page_cache
+
+FS_USER_AGENT = "Mozilla/5.0 (FlareSolverr test browser)"
+
+
+@pytest.fixture
+async def fake_flaresolverr(monkeypatch, tmp_path):
+    commands = []
+
+    async def handle(request):
+        body = await request.json()
+        commands.append(body)
+        if body["cmd"] == "sessions.create":
+            return web.json_response({"status": "ok", "session": "fs-1"})
+        if body["cmd"] == "sessions.destroy":
+            return web.json_response({"status": "ok"})
+        return web.json_response({"status": "ok", "solution": {
+            "url": body["url"],
+            "response": "<html><p>solved</p></html>",
+            "userAgent": FS_USER_AGENT,
+            "cookies": [{"name": "cf_clearance", "value": "clear-1", "domain": ".rutracker.org",
+                         "expiry": int(time.time()) + 3600}],
+        }})
+
+    app = web.Application()
+    app.router.add_post("/v1", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    monkeypatch.setattr(flaresolverr, "FLARESOLVERR_URL", f"http://127.0.0.1:{port}/v1")
+    monkeypatch.setattr(flaresolverr, "CLEARANCE_FILE", str(tmp_path / "cf_clearance.json"))
+    monkeypatch.setattr(flaresolverr, "RUTRACKER_COOKIES", None)
+    monkeypatch.setattr(flaresolverr, "_clearance_memory", None)
+    monkeypatch.setattr(flaresolverr, "_fs_session_id", None)
+    monkeypatch.setattr(flaresolverr, "_fs_sessions_supported", True)
+    monkeypatch.setattr(http_pool, "RUTRACKER_COOKIES", None)
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_DIR", str(tmp_path / "page_cache"))
+    monkeypatch.setattr(page_cache, "_index_memory", None)
+    monkeypatch.setattr(settings_loader, "app_session", None)  # bind the aiohttp session to this test's loop
+    monkeypatch.chdir(tmp_path)
+    yield commands
+    await flaresolverr.close_flaresolverr_session()
+    await http_pool.close_curl_session()
+    await settings_loader.get_session().close()
+    await runner.cleanup()
+
+
+async def test_one_browser_session_and_cached_clearance(fake_flaresolverr, tmp_path):
+    url = "https://rutracker.org/forum/viewtopic.php?t=1"
+
+    soup = await tracker_parser.fetch_via_flaresolverr(url)
+    await tracker_parser.fetch_via_flaresolverr(url + "&start=30")
+
+    assert soup.find("p").text == "solved"
+    assert [c["cmd"] for c in fake_flaresolverr] == ["sessions.create", "request.get", "request.get"]
+    assert all(c.get("session") == "fs-1" for c in fake_flaresolverr[1:])
+
+    # Persisted for the next run
+    saved = json.loads((tmp_path / "cf_clearance.json").read_text(encoding="utf-8"))
+    assert saved["rutracker.org"]["user_agent"] == FS_USER_AGENT
+    flaresolverr._clearance_memory = None
+    assert flaresolverr.apply_clearance(url) == FS_USER_AGENT
+    assert http_pool.get_curl_session().cookies.get("cf_clearance") == "clear-1"
+
+
+async def test_concurrent_challenges_share_one_session_and_solve(fake_flaresolverr):
+    urls = [f"https://rutracker.org/forum/viewtopic.php?t=1&start={i * 30}" for i in range(3)]
+
+    pages = await asyncio.gather(*(flaresolverr.solve_challenge(url) for url in urls))
+
+    assert all(page for page in pages)
+    assert [c["cmd"] for c in fake_flaresolverr].count("sessions.create") == 1
+    gets = [c for c in fake_flaresolverr if c["cmd"] == "request.get"]
+    # One at a time: the first earns the clearance, the others are sent with it
+    assert "cookies" not in gets[0]
+    assert all(c["cookies"][0]["value"] == "clear-1" for c in gets[1:])
+
+
+async def test_valid_clearance_skips_flaresolverr(fake_flaresolverr, monkeypatch):
+    url = "https://rutracker.org/forum/viewtopic.php?t=2"
+    await flaresolverr.solve_challenge(url)
+    solver_calls = len(fake_flaresolverr)
+
+    seen_agents = []
+
+    class ClearedCurlSession:
+        async def get(self, url, headers=None, **kw):
+            seen_agents.append(headers.get("User-Agent"))
+            ok = headers.get("User-Agent") == FS_USER_AGENT
+            return SimpleNamespace(status_code=200 if ok else 403,
+                                   text="ok" if ok else "Just a moment...",
+                                   content=b"<html><p>direct</p></html>", headers={})
+
+    fake_session = ClearedCurlSession()
+    monkeypatch.setattr(tracker_parser, "get_curl_session", lambda: fake_session)
+    monkeypatch.setattr(http_pool, "get_curl_session", lambda: fake_session)
+    monkeypatch.setattr(flaresolverr, "absorb_cookies", lambda cookies: None)
+
+    soup = await tracker_parser.fetch_page_content(url)
+
+    assert soup.find("p").text == "direct"
+    assert seen_agents == [FS_USER_AGENT]
+    assert len(fake_flaresolverr) == solver_calls
+
+
+async def test_expired_clearance_is_ignored(fake_flaresolverr):
+    url = "https://rutracker.org/forum/viewtopic.php?t=3"
+    await flaresolverr.solve_challenge(url)
+    flaresolverr._get_clearances()["rutracker.org"]["expires_at"] = time.time() + 10  # inside the safety margin
+    assert flaresolverr.get_clearance(url) is None
+
+    flaresolverr.invalidate_clearance(url)
+    assert "rutracker.org" not in flaresolverr._get_clearances()
@@ -0,0 +1,109 @@
+"""services.gpt.complete: streaming, hedged fallback on a slow first token, adaptive model order."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services import gpt
+
+
+class FakeStream:
+    def __init__(self, first_delay, text, chunk_delay=0.0):
+        self.first_delay, self.text, self.chunk_delay = first_delay, text, chunk_delay
+        self.closed = False
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.first_delay)
+        for n, word in enumerate(self.text.split(" ")):
+            if n:
+                await asyncio.sleep(self.chunk_delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=(" " if n else "") + word))])
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_client(monkeypatch, tmp_path):
+    """Models behave as set in `behaviour`: (first-token delay, text) or an exception."""
+    behaviour, started, streams = {}, [], []
+
+    async def create(model, messages, stream=False, **extra):
+        started.append(model)
+        result = behaviour[model]
+        if isinstance(result, Exception):
+            raise result
+        streams.append(FakeStream(*result))
+        return streams[-1]
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(gpt, "get_openai_client", lambda: client)
+    monkeypatch.setattr(gpt, "GPT_STREAMING", True)
+    monkeypatch.setattr(gpt, "GPT_FIRST_TOKEN_SECONDS", 0.1)
+    monkeypatch.setattr(gpt, "MODEL_STATS_FILE", str(tmp_path / "gpt_model_stats.json"))
+    monkeypatch.setattr(gpt, "_stats_memory", None)
+    return SimpleNamespace(behaviour=behaviour, started=started, streams=streams)
+
+
+async def test_streams_primary_without_hedging(fake_client):
+    fake_client.behaviour.update({gpt.DEFAULT_MODEL: (0.01, "hello there world", 0.08)})
+    assert await gpt.complete("p", 10) == "hello there world"
+    assert fake_client.started == [gpt.DEFAULT_MODEL]  # tokens flowed before the deadline
+    stats = gpt._get_stats()[gpt.DEFAULT_MODEL]
+    assert stats.calls == 1 and stats.first_token_seconds < stats.latency_seconds
+
+
+async def test_stalled_primary_is_hedged_and_cancelled(fake_client):
+    fake_client.behaviour.update({gpt.DEFAULT_MODEL: (5.0, "late"), gpt.FALLBACK_MODEL: (0.01, "fast answer")})
+    started = time.monotonic()
+    assert await gpt.complete("p", 10) == "fast answer"
+    assert time.monotonic() - started < 1.0
+    assert fake_client.started == [gpt.DEFAULT_MODEL, gpt.FALLBACK_MODEL]
+    assert fake_client.streams[0].closed  # the stalled stream was abandoned
+
+
+async def test_primary_that_always_stalls_is_demoted(fake_client):
+    fake_client.behaviour.update({gpt.DEFAULT_MODEL: (5.0, "late"), gpt.FALLBACK_MODEL: (0.01, "fast answer")})
+    for _ in range(gpt.MODEL_DEMOTE_AFTER_ERRORS):
+        assert await gpt.complete("p", 10) == "fast answer"
+    assert fake_client.started.count(gpt.DEFAULT_MODEL) == gpt.MODEL_DEMOTE_AFTER_ERRORS
+    assert gpt._get_stats()[gpt.DEFAULT_MODEL].consecutive_errors == gpt.MODEL_DEMOTE_AFTER_ERRORS
+    assert gpt.attempt_order(gpt.DEFAULT_MODEL)[-1] == gpt.DEFAULT_MODEL
+
+    # Demoted: the next call no longer waits GPT_FIRST_TOKEN_SECONDS for it
+    fake_client.started.clear()
+    started = time.monotonic()
+    assert await gpt.complete("p", 10) == "fast answer"
+    assert fake_client.started == [gpt.FALLBACK_MODEL] and time.monotonic() - started < 0.1
+
+
+async def test_failure_moves_on_immediately_and_demotes(fake_client):
+    fake_client.behaviour.update({gpt.DEFAULT_MODEL: RuntimeError("502"), gpt.FALLBACK_MODEL: RuntimeError("429"),
+                                  gpt.SECONDARY_FALLBACK: (0.0, "third")})
+    for _ in range(gpt.MODEL_DEMOTE_AFTER_ERRORS):
+        assert await gpt.complete("p", 10) == "third"
+    # The first call also failed on FALLBACK_MODEL; after that the faster SECONDARY_FALLBACK went first
+    assert fake_client.started.count(gpt.FALLBACK_MODEL) == 1
+    assert gpt.attempt_order(gpt.DEFAULT_MODEL) == [gpt.SECONDARY_FALLBACK, gpt.FALLBACK_MODEL, gpt.DEFAULT_MODEL]
+
+    fake_client.started.clear()
+    assert await gpt.complete("p", 10) == "third"
+    assert fake_client.started == [gpt.SECONDARY_FALLBACK]
+
+    gpt._stats_memory = None  # stats survive a restart
+    assert gpt._get_stats()[gpt.DEFAULT_MODEL].consecutive_errors == gpt.MODEL_DEMOTE_AFTER_ERRORS
+
+
+async def test_fallbacks_ordered_by_first_token_latency(fake_client):
+    gpt._record(gpt.FALLBACK_MODEL, True, first_token=2.0, latency=3.0)
+    gpt._record(gpt.SECONDARY_FALLBACK, True, first_token=0.5, latency=1.0)
+    assert gpt.attempt_order(gpt.DEFAULT_MODEL) == [gpt.DEFAULT_MODEL, gpt.SECONDARY_FALLBACK, gpt.FALLBACK_MODEL]
+    assert gpt.attempt_order(gpt.FALLBACK_MODEL) == [gpt.FALLBACK_MODEL, gpt.SECONDARY_FALLBACK]
+
+
+async def test_all_models_failing_returns_none(fake_client):
+    for model in (gpt.DEFAULT_MODEL, gpt.FALLBACK_MODEL, gpt.SECONDARY_FALLBACK):
+        fake_client.behaviour[model] = (0.0, "")  # empty completions count as failures
+    assert await gpt.complete("p", 10) is None
+    assert len(fake_client.started) == 3
@@ -0,0 +1,76 @@
+"""Single-parse description pipeline: node-based cleaning must match the string round-trip."""
+import pytest
+from bs4 import BeautifulSoup
+
+import parsers.tracker_parser as tracker_parser
+from utils.html_utils import (
+    clean_description_html, parse_page, sanitize_html_for_telegram, sanitize_soup_for_telegram,
+)
+
+POST_BODY = """<div class="post_body" id="p-1">
+<span style="font-size: 24px; line-height: normal;">Super Game Deluxe</span> <i>&amp; friends</i><span class="post-br"><br></span>
+<var class="postImg postImgAligned img-right" title="https://i.example/cover.jpg">&#10;</var>
+<b>Год выпуска</b>: 2024<br>
+<b>Жанр</b>: <a href="tracker.php?f=1605&amp;nm=Action" class="postLink">Action</a>, Adventure<br>
+<b>Разработчик</b>: Studio &amp; Co.<br>
+<b>Издатель</b>: Big &amp;amp; Pub<br>
+<b>Язык интерфейса</b>: английский, русский<br>
+<hr class="post-hr">
+<b>Описание</b>: This is great. <b>Second Title</b> follows. Also ok! <b>Third</b><br>
+<span class="post-b">Bold span</span> <b>Другой</b> and &lt;b&gt;escaped&lt;/b&gt; text &amp;quot;quoted&amp;quot;.<br>
+<ul><li>Item one</li><li>Item <i>two</i></li></ul>
+<div class="sp-wrap"><div class="sp-head folded"><span class="plusmn"></span>Особенности</div><div class="sp-body">
+<p>Feature A</p><hr>Feature B<span class="post-br"><br></span><div class="c-wrap"><div class="c-head">Код:</div><div class="c-body">code here</div></div>
+<div class="q-wrap"><div class="q-head">nested</div><div class="q">inner quote</div></div>
+</div></div>
+<div class="q-wrap"><div class="q-head"><b>User</b> писал(а):</div><div class="q">Quoted <a href="viewtopic.php?t=1">link</a> text<br>second line</div></div>
+<div class="c-wrap"><div class="c-head">Код:</div><div class="c-body">top level &lt;code&gt;</div></div>
+<pre class="post-pre">pre &amp; text</pre>
+<a href="https://example.com/x?a=1&amp;b=2">External</a> <a href="https://e.com"> </a>
+<b>Системные требования</b>:<br>• Nintendo Switch<br>
+<span class="post-i">italic</span> <span class="post-u">under</span> <span class="post-strike">strike</span>
+<!-- comment -->
+<div class="attach_wrap">remove me</div><div class="signature">sig</div>
+<i>Ends.</i> <b>After Italic</b> text. <strong>Strong Title</strong>
+</div>"""
+
+PAGE = f"""<html><head><title>Super Game Deluxe [Nintendo Switch] :: RuTracker.org</title></head><body>
+<table><tbody class="row1"><tr><td><p class="nick">Uploader</p>{POST_BODY}</td></tr></tbody></table>
+<a class="magnet-link" href="magnet:?xt=urn:btih:ABCDEF0123&amp;tr=x">magnet</a>
+<span id="tor-size-humn">1.5 GB</span>
+</body></html>"""
+
+PARSERS = ["html.parser"] + (["lxml"] if parse_page("<p></p>").builder.NAME == "lxml" else [])
+
+
+def _post_nodes(parser):
+    return list(BeautifulSoup(PAGE, parser).find("div", class_="post_body").children)
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_clean_description_from_nodes_matches_string_input(parser):
+    expected = clean_description_html("".join(str(n) for n in _post_nodes("html.parser")))
+    assert clean_description_html(_post_nodes(parser)) == expected
+    assert "<b>Second Title</b>" in expected and "&lt;b&gt;" not in expected
+
+
+def test_sanitize_soup_matches_sanitize_html():
+    fragment = ('Intro. <b>Title</b> text<br>&amp;lt;i&amp;gt;x&amp;lt;/i&amp;gt; <i>a</i> <b>Next</b>\n\n\n'
+                '<span class="x">  </span><pre>  keep  </pre>')
+    assert sanitize_soup_for_telegram(BeautifulSoup(fragment, "html.parser")) == sanitize_html_for_telegram(fragment)
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+async def test_parse_tracker_entry_reads_the_page_once(monkeypatch, parser):
+    async def fake_fetch(url, *a, **kw):
+        return BeautifulSoup(PAGE, parser)
+    monkeypatch.setattr(tracker_parser, "fetch_page_content", fake_fetch)
+
+    parsed = await tracker_parser.parse_tracker_entry("https://rutracker.org/forum/viewtopic.php?t=1", "Super Game [1.5 GB]")
+
+    assert parsed.display_title == "Super Game Deluxe"
+    assert parsed.search_title == "Super Game Deluxe & friends"
+    assert parsed.image_url == "https://i.example/cover.jpg"
+    assert parsed.magnet_link == "magnet:?xt=urn:btih:ABCDEF0123"
+    assert (parsed.torrent_size, parsed.torrent_language, parsed.genres) == ("1.5 GB", "ENG", ["Action", "Adventure"])
+    assert "Studio &amp; Co." in parsed.description and parsed.update_text is None
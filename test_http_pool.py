@@ -0,0 +1,55 @@
+"""core.http_pool: one keep-alive curl_cffi session per loop, shared cookies, per-host limits."""
+import asyncio
+from types import SimpleNamespace
+
+import core.http_pool as http_pool
+import parsers.tracker_parser as tracker_parser
+from parsers import page_cache
+from core.settings_loader import close_clients
+
+
+class FakeCurlSession:
+    def __init__(self):
+        self.urls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get(self, url, **kw):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.urls.append(url)
+        return SimpleNamespace(status_code=200, text="<html></html>", content=b"<html><p>ok</p></html>", headers={})
+
+
+def test_session_is_reused_per_loop_and_closed_by_close_clients():
+    async def run():
+        first = http_pool.get_curl_session()
+        assert http_pool.get_curl_session() is first
+        http_pool.absorb_cookies([{"name": "cf_clearance", "value": "abc"}, {"bad": "entry"}])
+        assert first.cookies.get("cf_clearance") == "abc"
+        await close_clients()
+        assert http_pool._curl_session is None
+        return first
+
+    one = asyncio.run(run())
+    two = asyncio.run(run())
+    assert one is not two
+
+
+async def test_fetches_share_the_session_and_respect_the_host_limit(monkeypatch, tmp_path):
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(page_cache, "_index_memory", None)
+    fake = FakeCurlSession()
+    monkeypatch.setattr(tracker_parser, "get_curl_session", lambda: fake)
+    monkeypatch.setattr(http_pool, "get_curl_session", lambda: fake)
+    monkeypatch.setattr(http_pool, "RUTRACKER_MAX_CONCURRENCY", 2)
+    http_pool._host_limits.clear()
+
+    urls = [f"https://rutracker.org/forum/viewtopic.php?t={i}" for i in range(6)]
+    soups = await asyncio.gather(*(tracker_parser.fetch_page_content(u) for u in urls))
+
+    assert all(s.find("p").text == "ok" for s in soups)
+    assert sorted(fake.urls) == sorted(urls)
+    assert fake.peak == 2
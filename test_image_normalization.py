@@ -0,0 +1,70 @@
+"""Image normalization before Telegram upload: downscaling, size cap, pass-through cases and cached screenshots."""
+import os
+from io import BytesIO
+
+from PIL import Image
+
+from services.titledb_manager import TitleDBManager
+from utils import telegram_utils
+from utils.telegram_utils import normalize_image, normalize_image_bytes
+
+
+def image_bytes(size, fmt="PNG", mode="RGB", noise=True, **save_kw):
+    img = Image.frombytes(mode, size, os.urandom(size[0] * size[1] * len(mode))) if noise else Image.new(mode, size, "red")
+    out = BytesIO(); img.save(out, fmt, **save_kw)
+    return out.getvalue()
+
+
+def test_large_png_is_downscaled_and_capped():
+    data = image_bytes((3200, 1800))
+    result = normalize_image_bytes(data, max_bytes=900 * 1024)
+    assert result.changed and result.extension == ".jpg"
+    assert len(result.data) <= 900 * 1024 and result.bytes_saved > 10 * 1024 * 1024
+    with Image.open(BytesIO(result.data)) as img:
+        assert img.format == "JPEG" and max(img.size) <= 2560 and img.size == result.size
+        assert abs(img.width / img.height - 16 / 9) < 0.01
+
+
+def test_small_and_unsupported_images_pass_through():
+    small_jpeg = image_bytes((800, 600), "JPEG", quality=80)
+    for data in (small_jpeg, b"not an image", image_bytes((50, 50), "GIF", noise=False, save_all=True,
+                                                          append_images=[Image.new("RGB", (50, 50), "blue")])):
+        result = normalize_image_bytes(data)
+        assert result.data == data and not result.changed and result.bytes_saved == 0
+
+
+def test_transparent_png_becomes_jpeg_on_white():
+    img = Image.new("RGBA", (3000, 100), (0, 0, 0, 0))
+    out = BytesIO(); img.save(out, "PNG")
+    result = normalize_image_bytes(out.getvalue())
+    with Image.open(BytesIO(result.data)) as converted:
+        assert converted.mode == "RGB" and converted.getpixel((10, 10)) == (255, 255, 255)
+
+
+def test_webp_output():
+    result = normalize_image_bytes(image_bytes((3000, 2000), noise=False), output_format="WEBP")
+    assert result.extension == ".webp" and Image.open(BytesIO(result.data)).format == "WEBP"
+
+
+async def test_screenshots_are_stored_normalized(tmp_path, monkeypatch):
+    png = image_bytes((3000, 1500), noise=False)
+    manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"),
+                             screenshot_cache_dir=str(tmp_path / "cache"))
+    downloads, normalized_before = [], telegram_utils._images_normalized
+
+    async def fake_download(url, part_path, timeout=15):
+        downloads.append(url)
+        with open(part_path, "wb") as f:
+            f.write(png)
+        return True
+    monkeypatch.setattr(manager, "_download_to_file", fake_download)
+
+    paths = await manager.download_screenshots(["https://img.example/shot.png"], nsuid="70010")
+    again = await manager.download_screenshots(["https://img.example/shot.png"], nsuid="70010")
+
+    assert paths == again and paths[0].endswith(".jpg") and downloads == ["https://img.example/shot.png"]
+    assert os.listdir(tmp_path / "cache") == [os.path.basename(paths[0])]
+    with Image.open(paths[0]) as img:
+        assert img.size == (2560, 1280)
+    assert (await normalize_image(open(paths[0], "rb").read())).changed is False
+    assert telegram_utils._images_normalized == normalized_before + 1
@@ -0,0 +1,77 @@
+"""main.process_entries: parallel preparation, ordered publishing, stop on fetch errors."""
+import asyncio
+
+import main
+
+
+def _run(entries, prepare_delays, stop_at=None, workers=3):
+    published, active, peak = [], [0], [0]
+
+    async def fake_prepare(entry):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        try:
+            await asyncio.sleep(prepare_delays[entry['link']])
+        finally:
+            active[0] -= 1
+        if entry['link'] == stop_at:
+            return {'status': 'stop', 'link': entry['link']}
+        if entry['link'].endswith('skip'):
+            return {'status': 'skip', 'link': entry['link']}
+        return {'status': 'ready', 'link': entry['link']}
+
+    async def fake_publish(prepared, cycle_log_file):
+        published.append(prepared['link'])
+        return True
+
+    orig = main.prepare_entry, main.publish_entry, main.PIPELINE_WORKERS, main.POST_DELAY_SECONDS
+    main.prepare_entry, main.publish_entry = fake_prepare, fake_publish
+    main.PIPELINE_WORKERS, main.POST_DELAY_SECONDS = workers, 0
+    try:
+        sent = asyncio.run(main.process_entries(entries, "unused.log"))
+    finally:
+        main.prepare_entry, main.publish_entry, main.PIPELINE_WORKERS, main.POST_DELAY_SECONDS = orig
+    return sent, published, peak[0]
+
+
+def test_publishes_in_feed_order():
+    entries = [{'link': f'e{i}'} for i in range(6)]
+    # later entries finish preparing first
+    delays = {f'e{i}': 0.06 - i * 0.01 for i in range(6)}
+    sent, published, peak = _run(entries, delays, workers=3)
+    assert published == [f'e{i}' for i in range(6)]
+    assert sent == 6
+    assert peak == 3  # bounded pool
+
+
+def test_skip_and_stop():
+    entries = [{'link': 'a'}, {'link': 'b-skip'}, {'link': 'c'}, {'link': 'd'}, {'link': 'e'}]
+    delays = {e['link']: 0.01 for e in entries}
+    sent, published, _ = _run(entries, delays, stop_at='d')
+    # skipped entry is dropped, everything from the fetch failure on waits for the next run
+    assert published == ['a', 'c']
+    assert sent == 2
+
+
+def test_single_worker_is_sequential():
+    entries = [{'link': 'x'}, {'link': 'y'}]
+    _, published, peak = _run(entries, {'x': 0.01, 'y': 0.0}, workers=1)
+    assert published == ['x', 'y'] and peak == 1
+
+
+def test_update_description_truncation():
+    raw = '<b><a href="https://rutracker.org/forum/viewtopic.php?p=1">Оновлено:</a></b>\n<blockquote>' + 'v1.2 & fixes ' * 30 + '</blockquote>'
+    desc = main._build_update_description(raw)
+    assert desc.startswith('<a href="https://rutracker.org/forum/viewtopic.php?p=1">')
+    assert len(desc) <= 204
+    assert '&amp;' in desc and '<blockquote>' not in desc
+    assert desc.count('<a ') == desc.count('</a>')
+    assert main._build_update_description(None) is None
+
+
+if __name__ == "__main__":
+    for name, fn in sorted(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  {name} ok")
+    print("main pipeline ok")
@@ -0,0 +1,74 @@
+"""services.media_cache: content-hash checks, TTL expiry, LRU trimming and persistence."""
+import json
+
+from services import media_cache
+
+
+def _fresh(monkeypatch, tmp_path, max_entries=None):
+    cache_file = tmp_path / "telegram_media_cache.json"
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_FILE", str(cache_file))
+    monkeypatch.setattr(media_cache, "_cache_memory", None)
+    monkeypatch.setattr(media_cache, "_dirty", False)
+    monkeypatch.chdir(tmp_path)
+    if max_entries is not None:
+        monkeypatch.setattr(media_cache, "MEDIA_CACHE_MAX_ENTRIES", max_entries)
+    return cache_file
+
+
+def test_hit_requires_matching_content(monkeypatch, tmp_path):
+    _fresh(monkeypatch, tmp_path)
+    media_cache.remember_file_id("http://img/a.jpg", "fid-a", b"old bytes")
+
+    assert media_cache.get_file_id("http://img/a.jpg", b"old bytes") == "fid-a"
+    assert media_cache.get_file_id("http://img/a.jpg", b"new bytes") is None
+    assert media_cache.get_file_id("http://img/a.jpg") == "fid-a"
+    assert media_cache.get_file_id("http://img/other.jpg") is None
+
+
+def test_entries_expire_and_persist(monkeypatch, tmp_path):
+    cache_file = _fresh(monkeypatch, tmp_path)
+    media_cache.remember_file_id("badged:http://img/b.jpg", "fid-b")
+    media_cache.flush()
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["badged:http://img/b.jpg"]["file_id"] == "fid-b"
+
+    monkeypatch.setattr(media_cache, "_cache_memory", None)  # reload from disk
+    assert media_cache.get_file_id("badged:http://img/b.jpg") == "fid-b"
+
+    media_cache._get_cache()["badged:http://img/b.jpg"]["stored_at"] -= media_cache.MEDIA_CACHE_TTL_SECONDS + 1
+    assert media_cache.get_file_id("badged:http://img/b.jpg") is None
+
+
+def test_least_recently_used_entries_are_trimmed(monkeypatch, tmp_path):
+    _fresh(monkeypatch, tmp_path, max_entries=2)
+    media_cache.remember_file_id("one", "fid-1")
+    media_cache.remember_file_id("two", "fid-2")
+    media_cache._get_cache()["one"]["last_used"] += 10  # "one" was used more recently
+    media_cache.remember_file_id("three", "fid-3")
+    media_cache.flush()
+
+    assert set(media_cache._get_cache()) == {"one", "three"}
+
+
+def test_writes_are_saved_once_per_flush(monkeypatch, tmp_path):
+    cache_file = _fresh(monkeypatch, tmp_path)
+    saves = []
+    real_save = media_cache._save_cache
+    monkeypatch.setattr(media_cache, "_save_cache", lambda: (saves.append(1), real_save()))
+
+    for i in range(5):  # e.g. a cover and four screenshots of one post
+        media_cache.remember_file_id(f"file:shot{i}.jpg", f"fid-{i}")
+    assert not cache_file.exists()
+    media_cache.flush()
+    media_cache.flush()  # nothing new
+
+    assert len(saves) == 1 and len(json.loads(cache_file.read_text(encoding="utf-8"))) == 5
+
+
+def test_forget_and_file_id_errors(monkeypatch, tmp_path):
+    _fresh(monkeypatch, tmp_path)
+    media_cache.remember_file_id("one", "fid-1")
+    media_cache.forget("one")
+    assert media_cache.get_file_id("one") is None
+
+    assert media_cache.is_file_id_error(Exception("Bad Request: wrong file identifier/HTTP URL specified"))
+    assert not media_cache.is_file_id_error(Exception("Bad Request: chat not found"))
@@ -0,0 +1,90 @@
+"""parsers.page_cache: conditional GETs from fetch_page_content, eviction and offline replay."""
+import gzip
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import core.http_pool as http_pool
+import parsers.tracker_parser as tracker_parser
+from parsers import page_cache
+
+URL = "https://rutracker.org/forum/viewtopic.php?t=42"
+
+
+class ConditionalCurlSession:
+    """Serves one page with an ETag and answers 304 when the client already has it."""
+
+    def __init__(self, body=b"<html><p>page v1</p></html>", etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    async def get(self, url, headers=None, **kw):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return SimpleNamespace(status_code=304, text="", content=b"", headers={})
+        return SimpleNamespace(status_code=200, text=self.body.decode(), content=self.body,
+                               headers={"ETag": self.etag, "Last-Modified": "Sat, 17 Oct 2026 10:00:00 GMT"})
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(page_cache, "_index_memory", None)
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_OFFLINE", False)
+    monkeypatch.setattr(tracker_parser, "apply_clearance", lambda url: None)
+    return tmp_path
+
+
+def _use_session(monkeypatch, session):
+    monkeypatch.setattr(tracker_parser, "get_curl_session", lambda: session)
+    monkeypatch.setattr(http_pool, "get_curl_session", lambda: session)
+
+
+async def test_second_fetch_is_conditional_and_served_from_disk(monkeypatch, cache_dir):
+    server = ConditionalCurlSession()
+    _use_session(monkeypatch, server)
+
+    first = await tracker_parser.fetch_page_content(URL)
+    second = await tracker_parser.fetch_page_content(URL)
+
+    assert first.find("p").text == second.find("p").text == "page v1"
+    assert "If-None-Match" not in server.requests[0]
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert server.requests[1]["If-Modified-Since"] == "Sat, 17 Oct 2026 10:00:00 GMT"
+
+    stored = [f for f in os.listdir(cache_dir) if f.endswith(".html.gz")]
+    assert len(stored) == 1
+    with gzip.open(cache_dir / stored[0]) as f:
+        assert f.read() == server.body
+
+
+async def test_offline_replay_skips_the_network(monkeypatch, cache_dir):
+    page_cache.store(URL, b"<html><p>recorded</p></html>")
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_OFFLINE", True)
+    server = ConditionalCurlSession()
+    _use_session(monkeypatch, server)
+
+    soup = await tracker_parser.fetch_page_content(URL)
+
+    assert soup.find("p").text == "recorded"
+    assert server.requests == []
+
+
+def test_expired_and_least_recently_used_pages_are_evicted(monkeypatch, cache_dir):
+    page_cache.store(URL, b"old page")
+    page_cache._get_index()[page_cache._key(URL)]["fetched_at"] -= page_cache.PAGE_CACHE_MAX_AGE_HOURS * 3600 + 1
+    assert page_cache.conditional_headers(URL) == {}
+    assert page_cache.load(URL) is None
+
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_MAX_MB", 2.5 * len(gzip.compress(os.urandom(4000))) / (1024 * 1024))
+    page_cache.store(f"{URL}&start=0", os.urandom(4000))
+    page_cache.store(f"{URL}&start=1", os.urandom(4000))
+    page_cache._get_index()[page_cache._key(f"{URL}&start=1")]["last_used"] -= 10
+    page_cache.store(f"{URL}&start=2", os.urandom(4000))
+
+    assert page_cache.load(f"{URL}&start=0") is not None
+    assert page_cache.load(f"{URL}&start=1") is None
+    assert page_cache.load(f"{URL}&start=2") is not None
+    assert page_cache._key(URL) not in page_cache._get_index()
@@ -0,0 +1,90 @@
+"""ParsedEntry: JSON round-trip and reuse of a stored parse after a failed Telegram send."""
+import asyncio
+import json
+
+import pytest
+
+import main
+import parsers.parsed_entry as parsed_entry
+from parsers.parsed_entry import ParsedEntry
+
+URL = "https://rutracker.org/forum/viewtopic.php?t=42"
+FEED_TITLE = "Game [Обновлено] [1 GB]"
+
+
+@pytest.fixture(autouse=True)
+def parsed_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(parsed_entry, "PARSED_ENTRIES_FILE", str(tmp_path / "parsed_entries.json"))
+    monkeypatch.setattr(parsed_entry, "_cache_memory", None)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "parsed_entries.json"
+
+
+def make_entry(**overrides):
+    values = dict(url=URL, feed_title=FEED_TITLE, display_title="Game", search_title="Game",
+                  image_url="https://i.example/c.jpg", magnet_link="magnet:?xt=urn:btih:AA",
+                  description="<b>Жанр:</b> Action", genres=["Action"], update_text="<b>Оновлено:</b>")
+    values.update(overrides)
+    return ParsedEntry(**values)
+
+
+def test_json_round_trip_and_slots(parsed_store):
+    entry = make_entry()
+    assert not hasattr(entry, "__dict__")
+    assert entry.is_updated
+
+    parsed_entry.remember_parsed_entry(entry)
+    stored = json.loads(parsed_store.read_text(encoding="utf-8"))
+    assert ParsedEntry.from_dict({**stored[URL], "unknown_field": 1}) == entry
+
+    parsed_entry._cache_memory = None
+    assert parsed_entry.get_parsed_entry(URL, FEED_TITLE) == entry
+    assert parsed_entry.get_parsed_entry(URL, "Game [Обновлено] v2") is None  # topic updated since
+
+    parsed_entry.forget_parsed_entry(URL)
+    assert parsed_entry.get_parsed_entry(URL, FEED_TITLE) is None
+
+
+def test_expired_entry_is_not_reused():
+    parsed_entry.remember_parsed_entry(make_entry(parsed_at=0))
+    assert parsed_entry.get_parsed_entry(URL, FEED_TITLE) is None
+
+
+def test_retry_after_failed_send_skips_parsing(monkeypatch):
+    parse_calls, sends = [], []
+
+    async def fake_parse(url, feed_title):
+        parse_calls.append(url)
+        return make_entry()
+
+    async def no_trailer(title):
+        return None, None
+
+    async def no_screenshots(*args):
+        return []
+
+    async def fake_send(*args, **kw):
+        sends.append(args)
+        if len(sends) == 1:
+            raise RuntimeError("Telegram is down")
+
+    async def fake_texts(*args):
+        return {}
+
+    monkeypatch.setattr(main, "parse_tracker_entry", fake_parse)
+    monkeypatch.setattr(main, "get_posted_link", lambda url: None)
+    monkeypatch.setattr(main, "_find_trailer", no_trailer)
+    monkeypatch.setattr(main, "_find_screenshots", no_screenshots)
+    monkeypatch.setattr(main, "prepare_message_texts", fake_texts)
+    monkeypatch.setattr(main, "send_to_telegram", fake_send)
+    monkeypatch.setattr(main, "IS_TEST_MODE", True)
+
+    async def run_once():
+        prepared = await main.prepare_entry({"link": URL, "title": FEED_TITLE})
+        return await main.publish_entry(prepared, "unused.log")
+
+    assert asyncio.run(run_once()) is False
+    assert asyncio.run(run_once()) is True
+    assert parse_calls == [URL]  # second run reused the stored parse
+    assert sends[1][2] == "magnet:?xt=urn:btih:AA"
+    assert parsed_entry.get_parsed_entry(URL, FEED_TITLE) is None  # dropped once sent
@@ -0,0 +1,147 @@
+"""core.scheduler triggers and the daemon's job loop: cron matching, catch-up, no overlap, failing jobs."""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import scheduler_daemon
+from core import scheduler as sched
+from core import settings_loader
+from core.scheduler import CronTrigger, IntervalTrigger, Scheduler
+from digest import runner
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_cron_next_after():
+    daily = CronTrigger("0 6 * * *")
+    assert daily.next_after(utc(2026, 10, 17, 5, 59)) == utc(2026, 10, 17, 6, 0)
+    assert daily.next_after(utc(2026, 10, 17, 6, 0)) == utc(2026, 10, 18, 6, 0)  # strictly after
+    assert daily.next_after(utc(2026, 12, 31, 7, 0)) == utc(2027, 1, 1, 6, 0)
+
+    assert CronTrigger("*/15 * * * *").next_after(utc(2026, 10, 17, 8, 16, 30)) == utc(2026, 10, 17, 8, 30)
+    # 2026-10-17 is a Saturday: weekdays only -> Monday
+    assert CronTrigger("30 8 * * 1-5").next_after(utc(2026, 10, 17, 9, 0)) == utc(2026, 10, 19, 8, 30)
+    # Both day fields restricted: the 1st of the month OR a Sunday (7 = 0)
+    assert CronTrigger("0 0 1 * 7").next_after(utc(2026, 10, 17, 0, 0)) == utc(2026, 10, 18, 0, 0)
+    assert CronTrigger("0 0 29 2 *").next_after(utc(2026, 3, 1)) == utc(2028, 2, 29)
+
+    for bad in ("0 6 * *", "60 * * * *", "0 6 * * 8", "*/0 * * * *", "0 6 31 2 *"):
+        with pytest.raises(ValueError):
+            CronTrigger(bad).next_after(utc(2026, 1, 1))
+
+
+def test_first_run_catches_up_from_the_last_run():
+    now = utc(2026, 10, 17, 12, 0)
+    daily = CronTrigger("0 6 * * *")
+    s = Scheduler()
+    missed = s.add_job("missed", None, daily, last_run=lambda: utc(2026, 10, 16, 6, 0))
+    done = s.add_job("done", None, daily, last_run=lambda: utc(2026, 10, 17, 6, 1))
+    never = s.add_job("never", None, daily, last_run=lambda: None)
+    plain = s.add_job("plain", None, daily)
+    interval = s.add_job("interval", None, IntervalTrigger(900))
+    upload = s.add_job("upload", None, IntervalTrigger(900), last_run=lambda: now)
+    broken = s.add_job("broken", None, daily, last_run=lambda: 1 / 0)
+    s.schedule(now)
+
+    assert missed.next_run == now  # the 2026-10-17 06:00 run was missed
+    assert done.next_run == utc(2026, 10, 18, 6, 0)
+    assert never.next_run == now and broken.next_run == now
+    assert plain.next_run == utc(2026, 10, 18, 6, 0)
+    assert interval.next_run == now
+    assert upload.next_run == now + timedelta(minutes=15)
+
+    with pytest.raises(ValueError):
+        s.add_job("plain", None, daily)
+
+
+async def test_jobs_never_overlap_and_failures_do_not_stop_the_schedule(monkeypatch):
+    monkeypatch.setattr(sched, "MAX_SLEEP_SECONDS", 0.01)
+    s = Scheduler()
+    running, order, overlaps = [], [], []
+
+    def job(name, error=None, delay=0.02):
+        async def run():
+            running.append(name)
+            overlaps.append(len(running) > 1)
+            order.append(name)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                running.remove(name)
+            if error:
+                raise error
+            if len(order) >= 12:
+                s.stop()
+        return run
+
+    s.add_job("slow", job("slow", delay=0.05), IntervalTrigger(0.01))
+    s.add_job("exits", job("exits", SystemExit(1)), IntervalTrigger(0.01))
+    s.add_job("raises", job("raises", RuntimeError("boom")), IntervalTrigger(0.01))
+    s.add_job("hangs", job("hangs", delay=10), IntervalTrigger(0.01), timeout=0.05)
+    await asyncio.wait_for(s.run_forever(), 10)
+
+    assert not any(overlaps)
+    assert order[:4] == ["slow", "exits", "raises", "hangs"]  # all due at once: registration order
+    assert {"slow", "exits", "raises", "hangs"} <= set(order[4:])
+    counts = {job.name: (job.runs, job.failures) for job in s.jobs}
+    assert counts["slow"][1] == 0
+    assert all(runs == failures for name, (runs, failures) in counts.items() if name != "slow")
+
+
+async def test_stop_before_start_and_while_sleeping():
+    s = Scheduler()
+    s.add_job("later", None, CronTrigger("0 6 * * *"))
+    s.stop()
+    await asyncio.wait_for(s.run_forever(), 1)
+
+    s = Scheduler()
+    s.add_job("later", None, CronTrigger("0 6 * * *"))
+    task = asyncio.ensure_future(s.run_forever())
+    await asyncio.sleep(0.05)
+    s.stop()
+    await asyncio.wait_for(task, 1)
+
+
+async def test_clients_stay_open_between_jobs(monkeypatch):
+    monkeypatch.setattr(settings_loader, "app_session", None)
+    session = settings_loader.get_session()
+    settings_loader.keep_clients_open()
+    try:
+        await settings_loader.close_clients()  # what every script calls when it finishes
+        assert not session.closed
+        assert settings_loader.get_session() is session
+    finally:
+        settings_loader.keep_clients_open(False)
+    await settings_loader.close_clients()
+    assert session.closed
+
+
+def test_daemon_jobs_follow_the_workflow_and_stamp_files(monkeypatch, tmp_path):
+    monkeypatch.setattr(scheduler_daemon, "SCHEDULER_CRON", {"swuk_digest": "", "eshop_deals": "0 7 * * *"})
+    import send_daily_digest
+    import collect_swuk_updates
+    daily_file = tmp_path / "last_digest_run.json"
+    swuk_file = tmp_path / "last_swuk_collect_run.json"
+    monkeypatch.setattr(send_daily_digest, "LAST_RUN_FILE", str(daily_file))
+    monkeypatch.setattr(collect_swuk_updates, "LAST_RUN_FILE", str(swuk_file))
+
+    s = scheduler_daemon.build_scheduler(("gist", "token"))
+    jobs = {job.name: job for job in s.jobs}
+    assert list(jobs) == ["feed_check", "collect_homebrew", "collect_swuk", "daily_digest",
+                          "homebrew_digest", "eshop_deals", "gist_upload"]
+    assert jobs["eshop_deals"].trigger.expression == "0 7 * * *"
+
+    # The scripts' own stamps decide whether today's run already happened
+    runner.save_last_run_time(str(daily_file))
+    swuk_file.write_text(json.dumps({"last_run_time": (datetime.now() - timedelta(days=2)).isoformat()}))
+    now = datetime.now(timezone.utc)
+    s.schedule(now)
+    assert jobs["daily_digest"].next_run > now
+    assert jobs["collect_swuk"].next_run == now
+    assert jobs["gist_upload"].next_run > now
+
@@ -0,0 +1,88 @@
+"""TitleDBManager.download_screenshots: concurrent downloads per host, on-disk cache and eviction."""
+import asyncio
+import os
+import time
+
+import pytest
+from aiohttp import web
+
+import core.settings_loader as settings_loader
+from services import titledb_manager
+from services.titledb_manager import TitleDBManager
+
+
+@pytest.fixture
+async def image_server(monkeypatch):
+    stats = {"requests": [], "active": 0, "peak": 0}
+
+    async def handle(request):
+        stats["requests"].append(request.path)
+        stats["active"] += 1; stats["peak"] = max(stats["peak"], stats["active"])
+        try:
+            await asyncio.sleep(0.05)
+            if request.path.startswith("/missing"):
+                raise web.HTTPNotFound()
+            return web.Response(body=request.path.encode() * 1000, content_type="image/jpeg")
+        finally:
+            stats["active"] -= 1
+
+    app = web.Application()
+    app.router.add_get("/{name}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(settings_loader, "app_session", None)  # bind the aiohttp session to this test's loop
+    stats["base"] = f"http://127.0.0.1:{port}"
+    yield stats
+    await settings_loader.get_session().close()
+    await runner.cleanup()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"),
+                          screenshot_cache_dir=str(tmp_path / "cache"))
+
+
+async def test_downloads_run_concurrently_in_order(image_server, manager, monkeypatch):
+    monkeypatch.setattr(titledb_manager, "SCREENSHOT_HOST_CONCURRENCY", 3)
+    urls = [f"{image_server['base']}/shot{i}.jpg" for i in range(8)]
+
+    started = time.perf_counter()
+    paths = await manager.download_screenshots(urls, nsuid="7001", max_screenshots=8)
+
+    assert image_server["peak"] == 3
+    assert time.perf_counter() - started < 8 * 0.05
+    assert len(paths) == 8
+    for i, path in enumerate(paths):
+        assert os.path.basename(path).startswith("7001_")
+        with open(path, "rb") as f:
+            assert f.read() == f"/shot{i}.jpg".encode() * 1000
+
+
+async def test_cached_screenshots_are_not_downloaded_again(image_server, manager):
+    urls = [f"{image_server['base']}/a.jpg", f"{image_server['base']}/missing.jpg", f"{image_server['base']}/b.jpg"]
+    first = await manager.download_screenshots(urls, game_title="Some Game: Deluxe")
+    assert [os.path.basename(p).split("_")[0] for p in first] == ["some", "some"]
+    assert not [n for n in os.listdir(manager.screenshot_cache_dir) if n.endswith(".part")]
+
+    second = await manager.download_screenshots(urls, game_title="Some Game: Deluxe")
+
+    assert second == first
+    assert sorted(image_server["requests"]) == ["/a.jpg", "/b.jpg", "/missing.jpg", "/missing.jpg"]
+
+
+def test_eviction_by_age_and_size(manager, monkeypatch):
+    monkeypatch.setattr(settings_loader, "SCREENSHOT_CACHE_MAX_MB", 2.5 / 1024)  # 2.5 KB
+    now = time.time()
+    for name, age_days in [("new", 0), ("mid", 1), ("old", 2), ("stale", 40)]:
+        path = os.path.join(manager.screenshot_cache_dir, f"{name}.jpg")
+        with open(path, "wb") as f:
+            f.write(b"x" * 1024)
+        os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+
+    manager._evict_screenshot_cache()
+
+    assert sorted(os.listdir(manager.screenshot_cache_dir)) == ["mid.jpg", "new.jpg"]
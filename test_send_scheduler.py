@@ -0,0 +1,135 @@
+"""Token-bucket pacing in services.send_scheduler: per-chat spacing, parallel chats, 429 retries."""
+import asyncio
+import io
+import time
+
+from services.send_scheduler import SendScheduler, TokenBucket
+
+
+class FakeApiError(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Too Many Requests")
+        self.error_code = 429
+        self.result_json = {'error_code': 429, 'parameters': {'retry_after': retry_after}}
+
+
+class FakeBot:
+    def __init__(self, fail_first=0):
+        self.calls = []
+        self.fail_first = fail_first
+        self.token = "not-a-chat-method"
+
+    async def send_message(self, chat_id, text, **kw):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise FakeApiError(0.05)
+        self.calls.append((chat_id, text, time.monotonic()))
+        return text
+
+    async def send_photo(self, chat_id, photo, **kw):
+        self.calls.append((chat_id, photo.read(), time.monotonic()))
+
+    async def send_media_group(self, chat_id, media, **kw):
+        self.calls.append((chat_id, media, time.monotonic()))
+
+
+def test_token_bucket_reservations():
+    bucket = TokenBucket(rate=10.0, capacity=2.0)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # third token is 0.1s away, fourth 0.2s
+    assert 0.08 < bucket.reserve() <= 0.1
+    assert 0.18 < bucket.reserve() <= 0.2
+
+
+def test_same_chat_paced_other_chats_parallel():
+    fake = FakeBot()
+    sched = SendScheduler(fake, global_rate=1000, chat_rate=20, group_rate=1000, group_burst=1000)
+
+    async def go():
+        await asyncio.gather(*(sched.send_message(chat_id=1, text=f"a{i}") for i in range(4)),
+                             *(sched.send_message(chat_id=2, text=f"b{i}") for i in range(4)))
+    start = time.monotonic()
+    asyncio.run(go())
+    elapsed = time.monotonic() - start
+
+    for chat in (1, 2):
+        sent = [c for c in fake.calls if c[0] == chat]
+        assert [c[1][1:] for c in sent] == ['0', '1', '2', '3']  # call order kept per chat
+        gaps = [b[2] - a[2] for a, b in zip(sent, sent[1:])]
+        assert min(gaps) > 0.04, gaps
+    # two chats ran side by side: ~3 gaps of 50ms, not 7
+    assert elapsed < 0.3, elapsed
+
+
+def test_group_bucket_applies_to_negative_ids():
+    fake = FakeBot()
+    sched = SendScheduler(fake, global_rate=1000, chat_rate=1000, group_rate=20, group_burst=1)
+
+    async def go():
+        for i in range(3):
+            await sched.send_message(chat_id=-100, text=str(i))
+    asyncio.run(go())
+    gaps = [b[2] - a[2] for a, b in zip(fake.calls, fake.calls[1:])]
+    assert min(gaps) > 0.04, gaps
+
+
+def test_media_group_items_count_as_messages():
+    fake = FakeBot()
+    sched = SendScheduler(fake, global_rate=1000, chat_rate=1000, group_rate=20, group_burst=1)
+
+    async def go():
+        await sched.send_media_group(chat_id=-100, media=["a", "b", "c", "d", "e"])
+        await sched.send_message(chat_id=-100, text="after the album")
+    start = time.monotonic()
+    asyncio.run(go())
+
+    # five group tokens for the album (four of them borrowed), then one for the text
+    assert time.monotonic() - start > 0.24
+    assert fake.calls[1][2] - fake.calls[0][2] > 0.04
+
+
+def test_retry_after_429_and_rewind():
+    fake = FakeBot(fail_first=2)
+    sched = SendScheduler(fake, global_rate=1000, chat_rate=1000)
+    assert asyncio.run(sched.send_message(chat_id=5, text="hi")) == "hi"
+    assert len(fake.calls) == 1
+
+    # payload is rewound before a retry
+    photo_bot = FakeBot()
+    calls = {'n': 0}
+    orig = photo_bot.send_photo
+
+    async def flaky_photo(chat_id, photo, **kw):
+        calls['n'] += 1
+        if calls['n'] == 1:
+            photo.read()
+            raise FakeApiError(0.01)
+        return await orig(chat_id, photo, **kw)
+    photo_bot.send_photo = flaky_photo
+    sched = SendScheduler(photo_bot, global_rate=1000, chat_rate=1000)
+    asyncio.run(sched.send_photo(chat_id=5, photo=io.BytesIO(b"img")))
+    assert photo_bot.calls[0][1] == b"img"
+
+
+def test_other_errors_and_attributes_pass_through():
+    fake = FakeBot()
+    sched = SendScheduler(fake)
+    assert sched.token == "not-a-chat-method"
+
+    async def boom(chat_id, text, **kw):
+        raise ValueError("bad html")
+    fake.send_message = boom
+    try:
+        asyncio.run(sched.send_message(chat_id=1, text="x"))
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    for name, fn in sorted(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"  {name} ok")
+    print("send scheduler ok")
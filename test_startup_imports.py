@@ -0,0 +1,37 @@
+"""Cold start: entry points do not import the Telegram / OpenAI clients or Pillow until they are used."""
+import subprocess
+import sys
+
+import pytest
+
+import core.settings_loader as settings_loader
+
+HEAVY_MODULES = ("openai", "telebot", "PIL")
+
+
+@pytest.mark.parametrize("entry", ["main", "send_daily_digest", "send_eshop_deals", "collect_homebrew_updates",
+                                   "collect_custom_releases"])
+def test_entry_point_imports_no_heavy_clients(entry):
+    code = f"import sys, {entry}; print('HEAVY:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert "HEAVY:\n" in result.stdout, result.stdout
+
+
+async def test_clients_are_created_once_on_first_use(monkeypatch):
+    monkeypatch.setattr(settings_loader, "_bot", None)
+    monkeypatch.setattr(settings_loader, "_openai_client", None)
+    monkeypatch.setattr(settings_loader, "_openai_client_failed", False)
+    monkeypatch.setattr(settings_loader, "app_session", None)
+    await settings_loader.close_clients()  # closing creates nothing
+    assert settings_loader._bot is None and settings_loader._openai_client is None
+
+    bot = settings_loader.get_bot()
+    assert settings_loader.get_bot() is bot and settings_loader.bot is bot  # old attribute access still works
+    from core.settings_loader import bot as imported_bot
+    assert imported_bot is bot
+
+    monkeypatch.setattr(settings_loader, "OPENAI_CONFIGURED", False)
+    assert settings_loader.get_openai_client() is None and settings_loader.openai_client is None
+    with pytest.raises(AttributeError):
+        settings_loader.no_such_setting
@@ -0,0 +1,191 @@
+"""SQLite state store: keyed collections, transactions, the JSON layouts used for Gist sync, and its users."""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+import sync_gist_state
+from core.state_store import StateStore, export_state_files, import_state_files
+from services.eshop import region_price_service
+from services.eshop.region_price_service import RegionPriceService
+from services.subscription_service import SubscriptionService
+
+
+def make_store(tmp_path, data_dir=True):
+    return StateStore(str(tmp_path / "state.db"), str(tmp_path) if data_dir else None)
+
+
+def test_keyed_reads_and_writes(tmp_path):
+    store = make_store(tmp_path)
+    links = store.collection("posted_links")
+    links.put("https://a", "2026-10-17T10:00:00")
+    links.put("https://b", {"nested": ["значення", 1]})
+    links.put("https://a", "2026-10-17T11:00:00")
+    assert links.get("https://a") == "2026-10-17T11:00:00"
+    assert links.get("https://b") == {"nested": ["значення", 1]}
+    assert links.get("missing", "default") == "default"
+    assert "https://b" in links and "missing" not in links and len(links) == 2
+    assert [key for key, _ in links.items()] == ["https://a", "https://b"]  # insertion order
+    assert store.collection("other").get("https://a") is None  # collections are separate
+
+    assert links.delete("https://a") is True and links.delete("https://a") is False
+    assert links.delete_if(lambda key, value: "nested" in value) == 1 and len(links) == 0
+    store.close()
+
+
+def test_transactions_are_atomic(tmp_path):
+    store = make_store(tmp_path)
+    subs = store.collection("user_subscriptions")
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            subs.put("1", {"a": 1})
+            with store.transaction():  # joins the outer one
+                subs.put("2", {"b": 2})
+            raise RuntimeError("crash mid-update")
+    assert len(subs) == 0
+
+    with store.transaction():
+        subs.put("1", {"a": 1}); subs.put("2", {"b": 2})
+    # Committed writes are visible to another connection (e.g. the Gist sync thread)
+    other = StateStore(str(tmp_path / "state.db"), data_dir=None)
+    assert other.collection("user_subscriptions").to_dict() == {"1": {"a": 1}, "2": {"b": 2}}
+    other.close(); store.close()
+
+
+def test_json_files_are_imported_when_changed_and_exported_in_the_same_layout(tmp_path):
+    legacy = {"https://x": "2026-10-01T00:00:00", "https://y": "2026-10-02T00:00:00"}
+    path = tmp_path / "posted_links.json"
+    path.write_text(json.dumps(legacy, indent=2), encoding="utf-8")
+    (tmp_path / "user_subscriptions.json").write_text("[1, 2]", encoding="utf-8")  # not an object: skipped
+
+    store = make_store(tmp_path)
+    links = store.collection("posted_links")
+    assert links.to_dict() == legacy
+    assert len(store.collection("user_subscriptions")) == 0
+
+    links.put("https://z", "2026-10-03T00:00:00")
+    assert store.export_json("posted_links") == 3
+    assert json.loads(path.read_text(encoding="utf-8")) == {**legacy, "https://z": "2026-10-03T00:00:00"}
+    assert store.import_changed_json() == []  # our own export is not imported back
+
+    # A Gist download replaces the collection, deletions included
+    os.utime(path, ns=(0, 0))
+    path.write_text(json.dumps({"https://y": "2026-10-02T00:00:00"}), encoding="utf-8")
+    assert store.import_changed_json() == ["posted_links"]
+    assert links.to_dict() == {"https://y": "2026-10-02T00:00:00"}
+    store.close()
+
+
+def test_export_and_import_helpers_need_an_existing_database(tmp_path):
+    db_path, data_dir = str(tmp_path / "state.db"), str(tmp_path)
+    assert export_state_files(db_path, data_dir) is None
+    assert import_state_files(db_path, data_dir) == []
+    assert not os.path.exists(db_path)
+
+    store = make_store(tmp_path)
+    store.collection("eshop_wishlist").put("42", {"items": []})
+    store.close()
+    assert export_state_files(db_path, data_dir, ["eshop_wishlist"]) == {"eshop_wishlist": 1}
+    assert not (tmp_path / "posted_links.json").exists()
+    assert json.loads((tmp_path / "eshop_wishlist.json").read_text(encoding="utf-8")) == {"42": {"items": []}}
+
+
+def test_upload_sends_the_store_as_json(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    store.collection("user_subscriptions").put("7", {"chat_id": 7, "subscriptions": {"deals": True}})
+    store.close()
+    monkeypatch.setattr(sync_gist_state, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(sync_gist_state, "STATE_DB", str(tmp_path / "state.db"))
+    sent = {}
+
+    class Response:
+        status = 200
+        def __enter__(self): return self
+        def __exit__(self, *exc): return False
+
+    def fake_urlopen(request):
+        sent.update(json.loads(request.data))
+        return Response()
+
+    monkeypatch.setattr(sync_gist_state.urllib.request, "urlopen", fake_urlopen)
+    sync_gist_state.upload_state("gist", "token", force=True, target_files=["user_subscriptions.json"])
+    assert json.loads(sent["files"]["user_subscriptions.json"]["content"]) == {
+        "7": {"chat_id": 7, "subscriptions": {"deals": True}}}
+
+
+def test_upload_keeps_writes_made_while_it_runs(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    links = store.collection("posted_links")
+    links.put("https://a", "2026-10-01T00:00:00")
+    monkeypatch.setattr(sync_gist_state, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(sync_gist_state, "STATE_DB", str(tmp_path / "state.db"))
+    gist = {"files": {"posted_links.json": {"content": json.dumps({"https://gist": "2026-10-02T00:00:00"})}}}
+
+    class Response:
+        status = 200
+        def __init__(self, body=b""): self.body = body
+        def read(self): return self.body
+        def __enter__(self): return self
+        def __exit__(self, *exc): return False
+
+    def fake_urlopen(request):
+        if request.get_method() == "GET":
+            # The bot keeps posting while the upload waits for the Gist (scheduler_daemon.py --interactive)
+            links.put("https://a", "2026-10-17T12:00:00")
+            links.put("https://new", "2026-10-17T12:00:00")
+            return Response(json.dumps(gist).encode())
+        return Response()
+
+    monkeypatch.setattr(sync_gist_state.urllib.request, "urlopen", fake_urlopen)
+    sync_gist_state.upload_state("gist", "token", target_files=["posted_links.json"])
+    assert links.to_dict() == {"https://a": "2026-10-17T12:00:00", "https://new": "2026-10-17T12:00:00",
+                               "https://gist": "2026-10-02T00:00:00"}
+    store.close()
+
+
+def test_posted_links(tmp_path, monkeypatch):
+    store = make_store(tmp_path, data_dir=False)
+    monkeypatch.setattr(main, "get_state_store", lambda: store)
+    links = store.collection("posted_links")
+    links.put("https://old", (datetime.now() - timedelta(days=31)).isoformat())
+
+    main.save_posted_link("https://new")
+    assert main.get_posted_link("https://new") is not None and main.get_posted_link("https://other") is None
+    assert set(main.load_posted_links()) == {"https://old", "https://new"}
+    main.prune_posted_links()
+    assert set(links.to_dict()) == {"https://new"}
+
+
+def test_subscriptions_are_one_row_per_chat(tmp_path):
+    store = make_store(tmp_path, data_dir=False)
+    srv = SubscriptionService(store=store)
+    srv.set_subscription(chat_id=1, sub_type="deals", enabled=True, title="One")
+    srv.set_subscription(chat_id=2, sub_type="digests", enabled=True, topic_id=5)
+    records = store.collection("user_subscriptions")
+    assert set(records.to_dict()) == {"1", "2_5"}
+    assert records.get("1")["title"] == "One"
+    assert [s["chat_id"] for s in SubscriptionService(store=store).get_subscribers_for("digests")] == [2]
+
+
+def test_region_prices_are_cached_in_the_store(tmp_path):
+    store = make_store(tmp_path, data_dir=False)
+    cache = store.collection("eshop_region_prices")
+    price = {"country_code": "PL", "country_name": "Poland", "currency": "PLN", "regular_price": 100.0,
+             "discount_price": 50.0, "discount_percent": 50.0, "converted_usd": 12.5, "converted_uah": 520.0,
+             "is_discount": True}
+    cache.put("7001_Game", {"timestamp": datetime.now().timestamp(), "prices": [price]})
+    cache.put("stale", {"timestamp": 0, "prices": [price]})
+
+    async def run():
+        service = RegionPriceService(store=store)
+        prices = await service.get_regional_prices_for_game("7001", "Game")  # no network: cached
+        await service.close()
+        return prices
+
+    prices = asyncio.run(run())
+    assert [(p.country_code, p.discount_price) for p in prices] == [("PL", 50.0)]
+    assert set(cache.to_dict()) == {"7001_Game"}  # expired entries dropped on close
+    assert region_price_service.CACHE_TTL_SECONDS == 12 * 3600
@@ -0,0 +1,175 @@
+"""send_to_telegram fan-out: one translation per language, uploads once, file_ids afterwards."""
+import asyncio
+import io
+from types import SimpleNamespace
+
+import services.telegram_sender as sender
+from services import media_cache
+
+
+class FakeBot:
+    def __init__(self, fail_chats=()):
+        self.photos = []
+        self.groups = []
+        self.texts = []
+        self.fail_chats = set(fail_chats)
+        self.counter = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    def _message(self, prefix):
+        self.counter += 1
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=f"{prefix}-small"),
+                                      SimpleNamespace(file_id=f"{prefix}-{self.counter}")])
+
+    async def send_photo(self, chat_id, photo, **kw):
+        if chat_id in self.fail_chats:
+            raise RuntimeError("chat not found")
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.photos.append((chat_id, photo))
+        return self._message("photo")
+
+    async def send_media_group(self, chat_id, media, **kw):
+        self.groups.append((chat_id, [m.media for m in media]))
+        return [self._message("shot") for _ in media]
+
+    async def send_message(self, chat_id, text, **kw):
+        self.texts.append((chat_id, text))
+
+
+def _setup(monkeypatch, groups, fail_chats=(), cache_file=None):
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_FILE", str(cache_file or "/nonexistent/media_cache.json"))
+    monkeypatch.setattr(media_cache, "_cache_memory", {})
+    monkeypatch.setattr(media_cache, "_save_cache", lambda: None)
+    fake = FakeBot(fail_chats)
+    translations = []
+    errors = []
+
+    async def fake_translate(text):
+        translations.append(text)
+        return "UA " + text
+
+    async def fake_cover(url):
+        return io.BytesIO(b"cover-bytes")
+
+    async def fake_thumb(video_id):
+        return None, None
+
+    async def fake_error(message, entry_url=None):
+        errors.append(message)
+
+    monkeypatch.setattr(sender, "scheduled_bot", fake)
+    monkeypatch.setattr(sender, "_collect_target_groups", lambda: groups)
+    monkeypatch.setattr(sender, "_translate_message_text", fake_translate)
+    monkeypatch.setattr(sender, "download_cover_image_tg", fake_cover)
+    monkeypatch.setattr(sender, "download_trailer_thumbnail_tg", fake_thumb)
+    monkeypatch.setattr(sender, "send_error_to_telegram", fake_error)
+    return fake, translations, errors
+
+
+def _groups(n, language="UA"):
+    return [{'chat_id': -100 - i, 'group_name': f"g{i}", 'language': language} for i in range(n)]
+
+
+async def test_first_group_uploads_then_file_ids_are_reused(monkeypatch, tmp_path):
+    shot = tmp_path / "shot.jpg"
+    shot.write_bytes(b"shot")
+    fake, translations, _ = _setup(monkeypatch, _groups(4))
+
+    await sender.send_to_telegram("T", "http://cover", "magnet", "desc", "http://entry",
+                                  local_screenshot_paths=[str(shot)],
+                                  prepared_texts={"RU": "text"})
+
+    assert translations == ["text"]  # one UA translation for all four groups
+    first_chat, first_photo = fake.photos[0]
+    assert first_chat == -100 and hasattr(first_photo, 'read')
+    assert all(photo == "photo-1" for _, photo in fake.photos[1:])
+    assert len(fake.photos) == 4
+    assert all(media == ["shot-2"] for _, media in fake.groups[1:])
+
+
+async def test_fanout_is_bounded(monkeypatch):
+    monkeypatch.setattr(sender, "SEND_FANOUT_LIMIT", 2)
+    fake, _, _ = _setup(monkeypatch, _groups(7, language="RU"))
+
+    await sender.send_to_telegram("T", "http://cover", "magnet", "desc", "http://entry",
+                                  prepared_texts={"RU": "text"})
+
+    assert len(fake.photos) == 7
+    assert fake.peak == 2
+
+
+async def test_failed_first_group_falls_through_to_next(monkeypatch):
+    fake, _, errors = _setup(monkeypatch, _groups(3, language="RU"), fail_chats={-100})
+
+    await sender.send_to_telegram("T", "http://cover", "magnet", "desc", "http://entry",
+                                  prepared_texts={"RU": "text"})
+
+    assert [chat for chat, _ in fake.photos] == [-101, -102]
+    assert hasattr(fake.photos[0][1], 'read') and fake.photos[1][1] == "photo-1"
+    assert len(errors) == 1
+
+
+async def test_file_ids_are_reused_across_posts(monkeypatch):
+    fake, _, _ = _setup(monkeypatch, _groups(1, language="RU"))
+
+    await sender.send_to_telegram("T", "http://cover", "magnet", "desc", "http://entry", prepared_texts={"RU": "a"})
+    await sender.send_to_telegram("T", "http://cover", "magnet", "desc", "http://entry", prepared_texts={"RU": "b"})
+
+    assert hasattr(fake.photos[0][1], 'read')
+    assert fake.photos[1][1] == "photo-1"
+
+
+async def test_rejected_cached_file_id_is_uploaded_again(monkeypatch):
+    fake, _, errors = _setup(monkeypatch, _groups(1, language="RU"))
+    media_cache.remember_file_id("http://cover", "stale-id", b"cover-bytes")
+    real_send_photo = fake.send_photo
+
+    async def picky_send_photo(chat_id, photo, **kw):
+        if photo == "stale-id":
+            raise RuntimeError("A request to the Telegram API was unsuccessful. Error code: 400. "
+                               "Description: Bad Request: wrong file identifier/HTTP URL specified")
+        return await real_send_photo(chat_id, photo, **kw)
+    fake.send_photo = picky_send_photo
+
+    await sender.send_to_telegram("T", "http://cover", "magnet", "desc", "http://entry", prepared_texts={"RU": "a"})
+
+    assert len(fake.photos) == 1 and hasattr(fake.photos[0][1], 'read')
+    assert not errors
+    assert media_cache.get_file_id("http://cover", b"cover-bytes") == "photo-1"
+
+
+async def test_rejected_file_id_retries_only_the_failed_call(monkeypatch, tmp_path):
+    shot = tmp_path / "shot.jpg"
+    shot.write_bytes(b"shot")
+    fake, _, errors = _setup(monkeypatch, _groups(1, language="RU"))
+    media_cache.remember_file_id(f"file:{shot.name}", "stale-shot", b"shot")
+    real_send_media_group = fake.send_media_group
+
+    async def picky_send_media_group(chat_id, media, **kw):
+        if any(m.media == "stale-shot" for m in media):
+            raise RuntimeError("Bad Request: wrong file identifier/HTTP URL specified")
+        return await real_send_media_group(chat_id, media, **kw)
+    fake.send_media_group = picky_send_media_group
+
+    long_text = "###GAP###".join(["word " * 150] * 3)  # a caption plus a text message
+    await sender.send_to_telegram("T", "http://cover", "magnet", "desc", "http://entry",
+                                  local_screenshot_paths=[str(shot)], prepared_texts={"RU": long_text})
+
+    # The cover and the text went out once; only the screenshot group was sent again, uploaded
+    assert len(fake.photos) == 1 and len(fake.texts) == 1
+    assert len(fake.groups) == 1 and hasattr(fake.groups[0][1][0], 'read')
+    assert not errors
+
+
+def test_duplicate_and_invalid_groups_are_dropped():
+    targets = sender._resolve_send_targets([
+        {'chat_id': "-5", 'topic_id': "7", 'group_name': "a"},
+        {'chat_id': -5, 'topic_id': 7, 'group_name': "a again"},
+        {'chat_id': "oops", 'group_name': "bad"},
+        {'chat_id': -6, 'language': "ua", 'group_name': "b"},
+    ])
+    assert [(t['chat_id'], t['topic_id'], t['language']) for t in targets] == [(-5, 7, "RU"), (-6, None, "UA")]
@@ -0,0 +1,70 @@
+"""services.title_matching: token normalization, ranking, and TitleDB candidates across regions."""
+import json
+
+import pytest
+
+from services.title_matching import TitleMatcher, title_tokens, titles_match, token_set_score
+from services.titledb_manager import TitleDBManager
+
+
+def test_tokens_ignore_punctuation_numerals_and_editions():
+    assert title_tokens("DARK SOULS™ II: Scholar (Switch) [EU]") == title_tokens("Dark Souls 2 - Scholar")
+    assert title_tokens("Assassin's Creed: The Ezio Collection") == {"assassins", "creed", "ezio", "collection"}
+    assert title_tokens("Hogwarts Legacy Digital Deluxe Edition") == {"hogwarts", "legacy"}
+    assert title_tokens("The Game") == {"the", "game"}  # only stop words: keep them
+
+
+def test_scores_rank_closer_titles_first():
+    matcher = TitleMatcher()
+    for title in ["Sonic Origins Plus", "Sonic Frontiers", "Sonic Origins", "Origins of Sonic Mania"]:
+        matcher.add(title, payload=title.upper())
+
+    ranked = matcher.find_candidates("Sonic Origins", k=3)
+
+    assert [c.title for c in ranked] == ["Sonic Origins", "Sonic Origins Plus", "Origins of Sonic Mania"]
+    assert ranked[0].score == 1.0 and ranked[0].payload == "SONIC ORIGINS"
+    assert matcher.best_match("Tetris", min_score=0.5) is None
+    assert token_set_score(title_tokens("Tetris"), title_tokens("Tetris Effect: Connected")) < 0.85
+    assert titles_match("Hogwarts Legacy", "Hogwarts Legacy: Digital Deluxe Edition")
+    assert not titles_match("Hogwarts Legacy", "Dice Legacy")
+
+
+@pytest.mark.parametrize("sequel, original", [
+    ("Hollow Knight: Silksong", "Hollow Knight"),
+    ("Super Mario Bros. Wonder", "Super Mario Bros."),
+    ("Persona 5 Tactica", "Persona 5"),
+    ("Persona 5 Strikers", "Persona 5"),
+])
+def test_sequels_are_not_near_duplicates(sequel, original, tmp_path):
+    matcher = TitleMatcher()
+    matcher.add(original)
+    assert matcher.near_duplicate(sequel) is None
+    assert matcher.near_duplicate(f"{original} Deluxe Edition").title == original
+
+    (tmp_path / "GB.en.json").write_text(json.dumps({"1": {"id": "A", "name": original}}), encoding="utf-8")
+    manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"))
+    # The leading article gets past levels 1-4: only the fuzzy level 5 could attach the original's data
+    assert manager.find_game_data(f"The {sequel}", regions_to_check=[("GB", "en")]) is None
+    assert manager.find_game_data(f"The {original}", regions_to_check=[("GB", "en")])["id"] == "A"
+
+
+def test_titledb_candidates_across_regions_and_fuzzy_level(tmp_path):
+    regions = {
+        "GB.en.json": {"1": {"id": "A", "name": "DARK SOULS™: REMASTERED"},
+                       "2": {"id": "B", "name": "Dark Souls II"},
+                       "5": {"id": "D", "name": "Witcher 3: Wild Hunt"}},
+        "US.en.json": {"3": {"id": "B", "name": "Dark Souls 2"},  # same title id as GB: listed once
+                       "4": {"id": "C", "name": "Dark Souls III Deluxe Edition"}},
+        "JP.ja.json": {},
+    }
+    for name, games in regions.items():
+        (tmp_path / name).write_text(json.dumps(games), encoding="utf-8")
+    manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"))
+
+    candidates = manager.find_candidates("Dark Souls 3", k=3)
+
+    assert [game["id"] for _, game in candidates] == ["C", "A", "B"]
+    assert candidates[0][0] == 1.0
+    # Levels 1-4 miss it (leading article, Roman numeral); level 5 finds it
+    assert manager.find_game_data("The Witcher III: Wild Hunt (Switch)")["id"] == "D"
+    assert manager.find_game_data("Completely Different") is None
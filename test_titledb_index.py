@@ -0,0 +1,81 @@
+"""TitleDBManager.find_game_data: the title index returns what the former linear scan did."""
+import json
+import random
+import time
+
+import pytest
+
+from services import titledb_manager
+from services.titledb_manager import TitleDBManager, normalize_title_for_comparison as norm
+
+WORDS = ["super", "mario", "zelda", "legend", "of", "the", "dark", "souls", "kart", "party",
+         "deluxe", "edition", "Pokémon", "hero", "quest", "2", "II", "—", "™", "saga", "X"]
+REGIONS = [("GB", "en"), ("US", "en"), ("JP", "ja")]
+
+
+def normalized_rows(manager):
+    return [[(game, norm(game['name']), norm(game['name'], False))
+             for game in (manager._load_region_data(region, language) or {}).values()
+             if isinstance(game, dict) and 'name' in game] for region, language in REGIONS]
+
+
+def linear_find(rows, game_title):
+    """The lookup as it was before the index: scan every row of every region."""
+    tight, spaced = norm(game_title), norm(game_title, False)
+    before = game_title.split(':', 1)[0].strip()
+    before_colon = norm(before, False) if before != game_title else None
+    words = spaced.split(); first_two = " ".join(words[:2]) if len(words) >= 2 else None
+    if not tight: return None
+    best_level, best = 99, None
+    for region_rows in rows:
+        for game, db_tight, db_spaced in region_rows:
+            level = 99
+            if tight == db_tight: level = 1
+            elif len(tight) >= 5 and tight in db_tight: level = 2
+            elif before_colon and before_colon == db_spaced: level = 3
+            elif first_two and db_spaced.startswith(first_two): level = 4
+            if level < best_level: best_level, best = level, game
+        if best_level == 1: break
+    return best
+
+
+def random_title(rng):
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 5)))
+    return title + (f": {rng.choice(WORDS)} {rng.choice(WORDS)}" if rng.random() < 0.3 else "")
+
+
+@pytest.fixture(params=[False, True], ids=["memory-index", "snapshot"])
+def manager(request, tmp_path):
+    rng = random.Random(7)
+    for n, (region, language) in enumerate(REGIONS):
+        rows = {f"{n}{i:05d}": {"id": f"0100{n}{i:05d}", "name": random_title(rng)} for i in range(1500)}
+        rows["broken"] = {"no_name": True}
+        (tmp_path / f"{region}.{language}.json").write_text(json.dumps(rows), encoding="utf-8")
+    return TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"), use_snapshots=request.param)
+
+
+def test_index_matches_linear_scan(manager, monkeypatch):
+    monkeypatch.setattr(titledb_manager, "FUZZY_MATCH_MIN_SCORE", 2.0)  # levels 1-4 only
+    rng = random.Random(11)
+    queries = [random_title(rng) for _ in range(300)]
+    queries += [q[2:-2] for q in queries[:50]]                        # substrings
+    queries += ["Super Mario: Something Else", "zelda", "Unknown Game", "™", "the legend"]
+    rows = normalized_rows(manager)
+    for query in queries:
+        expected = linear_find(rows, query)
+        assert (manager.find_game_data(query) or {}).get("id") == (expected or {}).get("id"), query
+
+
+def test_lookups_reuse_the_index(manager):
+    if manager.use_snapshots:
+        pytest.skip("snapshot reuse is covered by test_titledb_snapshot.py")
+    manager.find_game_data("warm up")
+    index = manager._get_region_index("GB", "en")
+    started = time.perf_counter()
+    for _ in range(200):
+        manager.find_game_data("mario kart deluxe")
+    assert manager._get_region_index("GB", "en") is index
+    assert (time.perf_counter() - started) / 200 < 0.005
+
+    manager._last_load_time.clear()  # file reloaded after the TTL -> index rebuilt
+    assert manager._get_region_index("GB", "en") is not index
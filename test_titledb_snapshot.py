@@ -0,0 +1,99 @@
+"""services.titledb_snapshot: compiled region snapshots, field reduction and mtime invalidation."""
+import json
+import os
+
+from services import titledb_snapshot
+from services.titledb_manager import TitleDBManager
+
+GAMES = {
+    "70010000000001": {"id": "0100000000010000", "nsuId": 70010000000001, "name": "Super Mario Odyssey™",
+                       "screenshots": ["https://img/1.jpg"], "bannerUrl": "b", "iconUrl": "i",
+                       "description": "x" * 5000, "ratingContent": ["Violence"]},
+    "70010000000002": {"id": "0100000000020000", "nsuId": 70010000000002, "name": "Zelda: Tears of the Kingdom"},
+    "broken": {"nothing": True},
+}
+
+
+def write_region(tmp_path, games, name="GB.en.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(games), encoding="utf-8")
+    return str(path)
+
+
+def test_snapshot_keeps_used_fields_and_skips_the_json(tmp_path, monkeypatch):
+    write_region(tmp_path, GAMES)
+    manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"))
+    monkeypatch.setattr(manager, "_load_region_data", lambda *a: (_ for _ in ()).throw(AssertionError("JSON loaded")))
+
+    game = manager.find_game_data("Super Mario Odyssey", regions_to_check=[("GB", "en")])
+
+    assert game == {k: GAMES["70010000000001"][k] for k in titledb_snapshot.SNAPSHOT_FIELDS}
+    assert manager.find_game_data("Zelda Tears (Switch)", regions_to_check=[("GB", "en")])["nsuId"] == 70010000000002
+    assert os.path.exists(tmp_path / "GB.en.snapshot.db")
+
+
+def test_changed_json_recompiles_and_missing_json_keeps_snapshot(tmp_path):
+    json_file = write_region(tmp_path, GAMES)
+    manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"))
+    assert manager.find_game_data("Metroid Dread", regions_to_check=[("GB", "en")]) is None
+
+    write_region(tmp_path, {**GAMES, "70010000000003": {"id": "0100000000030000", "name": "Metroid Dread"}})
+    st = os.stat(json_file)
+    os.utime(json_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert manager.find_game_data("Metroid Dread", regions_to_check=[("GB", "en")])["id"] == "0100000000030000"
+
+    os.remove(json_file)  # the compiled snapshot alone is enough
+    fresh = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"))
+    assert fresh.find_game_data("Metroid Dread", regions_to_check=[("GB", "en")])["id"] == "0100000000030000"
+
+
+def test_falls_back_to_json_when_snapshot_cannot_be_built(tmp_path, monkeypatch):
+    write_region(tmp_path, GAMES)
+    monkeypatch.setattr(titledb_snapshot, "compile_snapshot", lambda json_file: None)
+    manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"))
+
+    game = manager.find_game_data("Super Mario Odyssey", regions_to_check=[("GB", "en")])
+
+    assert game["description"] == "x" * 5000  # full JSON row
+
+
+def test_snapshot_is_retried_once_the_region_file_changes(tmp_path, monkeypatch):
+    json_file = write_region(tmp_path, GAMES)
+    real_compile = titledb_snapshot.compile_snapshot
+    monkeypatch.setattr(titledb_snapshot, "compile_snapshot", lambda json_file: None)
+    manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"))
+    manager.find_game_data("Super Mario Odyssey", regions_to_check=[("GB", "en")])
+    assert ("GB", "en") not in manager._snapshots
+
+    # A long-running daemon downloads a fresh region file: the snapshot is tried again
+    monkeypatch.setattr(titledb_snapshot, "compile_snapshot", real_compile)
+    manager.find_game_data("Super Mario Odyssey", regions_to_check=[("GB", "en")])
+    assert ("GB", "en") not in manager._snapshots  # same file, no new attempt
+    stat = os.stat(json_file)
+    os.utime(json_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    game = manager.find_game_data("Super Mario Odyssey", regions_to_check=[("GB", "en")])
+
+    assert game["id"] == "0100000000010000"
+    assert ("GB", "en") in manager._snapshots
+    manager._snapshots.pop(("GB", "en")).close()
+
+
+def test_fuzzy_candidates_come_from_stored_token_postings(tmp_path):
+    games = {**GAMES, "70010000000003": {"id": "0100000000030000", "name": "Super Mario Bros. Wonder"},
+             "70010000000004": {"id": "0100000000040000", "name": "Tetris 99"}}
+    json_file = write_region(tmp_path, games)
+    snapshot = titledb_snapshot.open_snapshot(json_file)
+    try:
+        # Only games sharing a token are read: no pass over every title
+        assert [pos for pos, _, _ in snapshot.token_candidates(frozenset({"mario", "wonder"}))] == [0, 2]
+        assert snapshot.token_candidates(frozenset({"metroid"})) == []
+    finally:
+        snapshot.close()
+
+    ranked = {}
+    for use_snapshots in (True, False):
+        manager = TitleDBManager(str(tmp_path), tmp_screenshot_dir=str(tmp_path / "shots"), use_snapshots=use_snapshots)
+        ranked[use_snapshots] = [(round(score, 3), game["id"]) for score, game in
+                                 manager.find_candidates("Super Mario Wonder", k=3, regions_to_check=[("GB", "en")])]
+    assert ranked[True] == ranked[False]
+    assert [title_id for _, title_id in ranked[True]] == ["0100000000030000", "0100000000010000"]
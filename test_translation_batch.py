@@ -0,0 +1,130 @@
+"""Batched short translations: one request for concurrent texts, budget splits and per-item fallback."""
+import asyncio
+import json
+import re
+
+import pytest
+
+from services import gpt, translation, translation_batch
+from services.translation_batch import TranslationBatcher, parse_batch_answer
+from services.translation_cache import TranslationCache
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    """gpt.complete answering batch prompts with JSON ("UA:" + text) and single prompts with plain text."""
+    calls = {"batch": [], "single": [], "broken_batches": False}
+
+    async def complete(prompt, max_tokens, model=gpt.DEFAULT_MODEL, temperature=None, label="GPT"):
+        await asyncio.sleep(0)
+        match = re.search(r"\*\*Items \(JSON\):\*\*\n(.*)$", prompt, re.DOTALL)
+        if match:
+            items = json.loads(match.group(1))
+            calls["batch"].append([item["text"] for item in items])
+            if calls["broken_batches"]:
+                return "Sorry, here is the translation: " + items[0]["text"]
+            answer = {item["id"]: f"UA: {item['text']}" for item in items if "skip me" not in item["text"]}
+            return "```json\n" + json.dumps(answer, ensure_ascii=False) + "\n```"
+        calls["single"].append(prompt)
+        return "UA single"
+
+    monkeypatch.setattr(gpt, "complete", complete)
+    monkeypatch.setattr(translation, "_cache", TranslationCache(str(tmp_path / "translations_cache.db"), None))
+    monkeypatch.setattr(translation_batch, "BATCH_WINDOW_SECONDS", 0.01)
+    return calls
+
+
+async def test_concurrent_descriptions_share_one_request(fake_llm):
+    texts = [f"App number {i} does things." for i in range(8)]
+    results = await asyncio.gather(*(translation.translate_short_description(t) for t in texts))
+
+    assert results == [f"UA: {t}" for t in texts]
+    assert fake_llm["batch"] == [texts] and fake_llm["single"] == []
+    # cached per text, as before
+    assert await translation.translate_short_description(texts[3]) == f"UA: {texts[3]}"
+    assert len(fake_llm["batch"]) == 1
+
+
+async def test_missing_items_fall_back_to_single_requests(fake_llm):
+    texts = ["first app", "please skip me", "third app"]
+    results = await asyncio.gather(*(translation.translate_short_description(t) for t in texts))
+
+    assert results == ["UA: first app", "UA single", "UA: third app"]
+    assert len(fake_llm["single"]) == 1 and "please skip me" in fake_llm["single"][0]
+
+
+async def test_unparseable_batch_falls_back_for_every_item(fake_llm):
+    fake_llm["broken_batches"] = True
+    notes = ["Fixed a crash.", "Added a menu."]
+    assert await asyncio.gather(*(translation.summarize_update_notes(n) for n in notes)) == ["UA single"] * 2
+    assert len(fake_llm["batch"]) == 1 and len(fake_llm["single"]) == 2
+
+
+async def test_cancelled_batch_does_not_leave_submitters_hanging(fake_llm, monkeypatch):
+    started = asyncio.Event()
+
+    async def stuck_complete(*args, **kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(gpt, "complete", stuck_complete)
+    batcher = TranslationBatcher("Test", "Translate.", max_tokens_per_item=50)
+    submitters = [asyncio.ensure_future(batcher.submit(text, stuck_complete)) for text in ("one", "two")]
+    await started.wait()
+
+    assert len(batcher._tasks) == 1  # the running batch is referenced until it finishes
+    for task in list(batcher._tasks):
+        task.cancel()
+    results = await asyncio.wait_for(asyncio.gather(*submitters, return_exceptions=True), timeout=1)
+
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert not batcher._tasks
+
+
+async def test_token_budget_and_item_limit_split_batches(fake_llm, monkeypatch):
+    monkeypatch.setattr(translation_batch, "BATCH_TOKEN_BUDGET", 100)
+    monkeypatch.setattr(translation_batch, "BATCH_MAX_ITEMS", 3)
+    batcher = TranslationBatcher("Test", "Translate.", max_tokens_per_item=50)
+    texts = ["x" * 160, "y" * 160, "z" * 160] + [f"short {i}" for i in range(4)]
+
+    async def no_single():
+        raise AssertionError("unexpected single request")
+    results = await asyncio.gather(*(batcher.submit(t, no_single) for t in texts))
+
+    assert results == [f"UA: {t}" for t in texts]
+    assert [len(b) for b in fake_llm["batch"]] == [2, 3, 2]  # 2 x 41 tokens fit 100; then 3 items max
+    assert batcher.requests_sent == 3
+
+
+async def test_eshop_synopses_batch_and_cache_under_all_keys(fake_llm):
+    results = await asyncio.gather(
+        translation.translate_eshop_synopsis("Game A", "A fun game.", fs_id="1"),
+        translation.translate_eshop_synopsis("Game B", "Another game."),
+    )
+    assert results == ["UA: Game Title: Game A\nOriginal Synopsis:\nA fun game.",
+                       "UA: Game Title: Game B\nOriginal Synopsis:\nAnother game."]
+    assert translation._get_cache().get("eshop_fsid_1") == results[0]
+    assert len(fake_llm["batch"]) == 1
+
+
+def test_parse_batch_answer_tolerates_wrapping():
+    assert parse_batch_answer('Here you go: {"1": " a ", "2": 5, "3": ""} thanks', ["1", "2", "3"]) == {"1": "a"}
+    assert parse_batch_answer("not json", ["1"]) == {} and parse_batch_answer(None, ["1"]) == {}
+
+
+async def test_homebrew_digest_entries_share_batches_and_keep_order(fake_llm, monkeypatch, tmp_path):
+    import collect_homebrew_updates as hb
+    added = []
+    monkeypatch.setattr(hb.homebrew_digest_manager, "add_entry", lambda **entry: added.append(entry))
+    collector = hb.HomebrewUpdatesCollector(str(tmp_path / "list_hb.json"), state_path=str(tmp_path / "state.json"))
+    collector._descriptions = {}
+
+    pending = []
+    for i in range(3):
+        description = collector._get_description_cached(f"udb:app{i}", None, f"App {i}", f"app{i}")
+        collector._queue_digest_entry(pending, description, "Fixed bugs." if i != 1 else None, app_name=f"app{i}")
+    await collector._add_queued_digest_entries(pending)
+
+    assert [e["app_name"] for e in added] == ["app0", "app1", "app2"]
+    assert added[0]["description"] == "UA: App 0\n<i>UA: Fixed bugs.</i>" and added[1]["description"] == "UA: App 1"
+    assert len(fake_llm["batch"]) == 2 and fake_llm["single"] == []  # descriptions + notes, one request each
@@ -0,0 +1,70 @@
+"""SQLite translation cache: upserts, hit stats, eviction and the JSON format used for Gist sync."""
+import json
+import os
+import time
+
+import sync_gist_state
+from services.translation_cache import TranslationCache, export_translation_cache
+
+
+def make_cache(tmp_path, **kw):
+    return TranslationCache(str(tmp_path / "translations_cache.db"), str(tmp_path / "translations_cache.json"), **kw)
+
+
+def test_put_get_and_hit_stats(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("a", "перший"); cache.put_many(["b", "c"], "другий")
+    assert cache.get("a") == "перший" and cache.get("missing") is None
+    cache.get("a")
+    assert cache.stats("a")["hits"] == 2 and cache.stats("b")["hits"] == 0
+    cache.put("a", "новий")
+    assert cache.get("a") == "новий" and len(cache) == 3
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("c") == "другий" and reopened.stats("a")["hits"] == 3
+
+
+def test_legacy_json_is_merged_once_and_exported_back(tmp_path):
+    json_path = tmp_path / "translations_cache.json"
+    json_path.write_text(json.dumps({"old": "стара", "short_x": "коротка", "bad": 5}), encoding="utf-8")
+    cache = make_cache(tmp_path)
+    assert cache.get("old") == "стара" and len(cache) == 2
+    cache.put("new", "нова")
+
+    assert cache.export_json() == 3
+    exported = json.loads(json_path.read_text(encoding="utf-8"))
+    assert list(exported)[0] == "new" and exported["short_x"] == "коротка"
+    cache.close()
+
+    # a Gist download replaces the JSON: its new entries are merged, local ones kept
+    json_path.write_text(json.dumps({"old": "з gist", "gist_only": "gist"}), encoding="utf-8")
+    cache = make_cache(tmp_path)
+    assert cache.get("gist_only") == "gist" and cache.get("old") == "стара" and cache.get("new") == "нова"
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    cache = make_cache(tmp_path, max_mb=1, max_age_days=30)
+    for i in range(6):
+        cache.put(f"k{i}", "x" * 300_000)
+    cache.put("stale", "y")
+    cache._conn.execute("UPDATE translations SET last_used = ? WHERE key = 'stale'", (time.time() - 40 * 86400,))
+    cache._conn.execute("UPDATE translations SET last_used = last_used - 100 WHERE key IN ('k4', 'k5')")
+    cache.get("k0")  # recently used again
+
+    assert cache.evict() == 4
+    assert {k for k in ("k0", "k1", "k2", "k3", "k4", "k5", "stale") if cache.stats(k)} == {"k0", "k2", "k3"}
+
+
+def test_gist_upload_exports_and_merges(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_gist_state, "DATA_DIR", str(tmp_path))
+    cache = make_cache(tmp_path)
+    cache.put("local", "локальна"); cache.close()
+    assert export_translation_cache(str(tmp_path / "translations_cache.db"), str(tmp_path / "translations_cache.json")) == 1
+
+    merged = json.loads(sync_gist_state.merge_json_files(
+        "translations_cache.json", json.dumps({"local": "локальна", "shared": "моя"}),
+        json.dumps({"shared": "з gist", "remote": "віддалена"})))
+    assert merged == {"local": "локальна", "shared": "моя", "remote": "віддалена"}
+    assert export_translation_cache(str(tmp_path / "none.db"), str(tmp_path / "none.json")) is None
+    assert not os.path.exists(tmp_path / "none.db")
@@ -0,0 +1,73 @@
+"""Segment-level translation memory: only changed sections of a post are sent to the LLM."""
+import re
+
+import pytest
+
+from services import gpt, translation
+from services.translation import split_translation_segments
+from services.translation_cache import TranslationCache
+
+DESCRIPTION = (
+    "<b>Год выпуска</b>: 2024\n<b>Жанр</b>: Action\n\n"
+    "<b>Описание</b>: Русский текст про игру.\n\n"
+    "<b>Особенности:</b>\nXBQSX\n• первая\n\n• вторая\nXBQEX\n\n"
+    "<b>Системные требования</b>: Русская консоль"
+)
+
+
+def post(version="1.0.2", description=DESCRIPTION):
+    return f"<b>Игра v{version}</b>###GAP###<b>Скачать:</b>\n<code>magnet:?xt=1</code>###GAP###{description}"
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    """Translate by upper-casing Cyrillic; records the text of each request."""
+    requests = {"texts": [], "drop_gaps": False}
+
+    async def complete(prompt, max_tokens, model=gpt.DEFAULT_MODEL, temperature=None, label="GPT"):
+        text = re.search(r"\*\*Text to translate:\*\*\n(.*)\n\n\*\*Beautiful", prompt, re.DOTALL).group(1)
+        requests["texts"].append(text)
+        answer = re.sub(r"[а-яё]", lambda m: m.group(0).upper(), text)
+        return answer.replace("###GAP###", "") if requests["drop_gaps"] and len(requests["texts"]) == 1 else answer
+
+    monkeypatch.setattr(gpt, "complete", complete)
+    monkeypatch.setattr(translation, "_cache", TranslationCache(str(tmp_path / "t.db"), None))
+    return requests
+
+
+def test_segments_round_trip_and_keep_quotes_whole():
+    text = post()
+    segments = split_translation_segments(text)
+    assert "".join(s + sep for s, sep in segments) == text
+    assert [s[:12] for s, _ in segments] == ["<b>Игра v1.0", "<b>Скачать:<", "<b>Год выпус", "<b>Описание<",
+                                             "<b>Особеннос", "<b>Системные"]
+    assert "• первая\n\n• вторая\nXBQEX" in segments[4][0]
+
+
+async def test_update_repost_only_translates_changed_sections(fake_llm):
+    first = await translation.translate_ru_to_ua_gpt(post())
+    assert len(fake_llm["texts"]) == 1 and fake_llm["texts"][0].count("###GAP###") == 5
+    assert "РУССКИЙ ТЕКСТ ПРО ИГРУ" in first and "<blockquote>" in first and "###GAP###" in first
+
+    changed = DESCRIPTION.replace("Action", "Action, RPG")
+    second = await translation.translate_ru_to_ua_gpt(post("1.0.3", changed))
+
+    assert len(fake_llm["texts"]) == 2
+    sent = fake_llm["texts"][1]
+    assert "v1.0.3" in sent and "RPG" in sent and "Описание" not in sent and "Скачать" not in sent
+    assert second == first.replace("v1.0.2", "v1.0.3").replace("Action", "Action, RPG")
+
+
+async def test_identical_sections_reassembled_without_llm(fake_llm):
+    await translation.translate_ru_to_ua_gpt(post())
+    reordered = post(description=DESCRIPTION.replace("<b>Год выпуска</b>: 2024\n<b>Жанр</b>: Action\n\n", ""))
+    result = await translation.translate_ru_to_ua_gpt(reordered)
+    assert len(fake_llm["texts"]) == 1 and "ЖАНР" not in result and "РУССКАЯ КОНСОЛЬ" in result
+
+
+async def test_segment_count_mismatch_falls_back_to_whole_text(fake_llm):
+    fake_llm["drop_gaps"] = True
+    result = await translation.translate_ru_to_ua_gpt(post())
+    assert len(fake_llm["texts"]) == 2 and fake_llm["texts"][1] == post()
+    assert "РУССКИЙ ТЕКСТ" in result
+    assert translation._get_cache().get(translation._segment_key("<b>Описание</b>: Русский текст про игру.")) is None
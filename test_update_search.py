@@ -0,0 +1,80 @@
+"""get_last_post_with_phrase: one concurrent pass over the tail pages for all update phrases."""
+import asyncio
+
+from bs4 import BeautifulSoup
+
+import parsers.tracker_parser as tracker_parser
+
+BASE_URL = "https://rutracker.org/forum/viewtopic.php?t=1"
+
+
+def topic_page(offset, posts):
+    rows = "".join(
+        f'<tbody class="row1"><tr><td><a class="p-link small" href="viewtopic.php?p={offset + i}">#</a>'
+        f'<div class="post_body">{body}</div></td></tr></tbody>'
+        for i, body in enumerate(posts)
+    )
+    pagination = '<a class="pg" href="viewtopic.php?t=1&amp;start=30">2</a><a class="pg" href="viewtopic.php?t=1&amp;start=60">3</a>'
+    return BeautifulSoup(f"<html><body>{pagination}<table>{rows}</table></body></html>", "html.parser")
+
+
+class FakeTopic:
+    def __init__(self, pages, delays=None):
+        self.pages = pages
+        self.delays = delays or {}
+        self.requested = []
+        self.finished = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def fetch(self, url, *a, **kw):
+        offset = int(url.split("&start=")[1]) if "&start=" in url else 0
+        self.requested.append(offset)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(offset, 0.01))
+        finally:
+            self.in_flight -= 1
+        self.finished.append(offset)
+        return self.pages[offset]
+
+
+async def test_newest_match_across_phrases_reuses_first_page(monkeypatch):
+    first = topic_page(0, ["Описание", "Раздача обновлена до 1.0.1"])
+    topic = FakeTopic({
+        30: topic_page(30, ["Distribution updated: 1.0.2", "<div class=\"q-wrap\">Раздача обновлена quoted</div>"]),
+        60: topic_page(60, ["thanks", "no news"]),
+    })
+    monkeypatch.setattr(tracker_parser, "fetch_page_content", topic.fetch)
+
+    result = await tracker_parser.get_last_post_with_phrase(tracker_parser.UPDATE_PHRASES, BASE_URL, first_page=first)
+
+    assert "viewtopic.php?p=30" in result and "1.0.2" in result
+    assert 0 not in topic.requested  # first page reused, not fetched again
+    assert sorted(topic.requested) == [30, 60]
+    assert topic.peak == 2  # tail pages fetched concurrently
+
+
+async def test_older_pages_are_cancelled_once_the_newest_matches(monkeypatch):
+    first = topic_page(0, ["Описание"])
+    topic = FakeTopic({
+        30: topic_page(30, ["old"]),
+        60: topic_page(60, ["Раздача обновлена: v2"]),
+    }, delays={30: 5})
+    monkeypatch.setattr(tracker_parser, "fetch_page_content", topic.fetch)
+
+    result = await asyncio.wait_for(
+        tracker_parser.get_last_post_with_phrase(tracker_parser.UPDATE_PHRASES, BASE_URL, first_page=first), 2)
+
+    assert "v2" in result
+    assert topic.finished == [60]
+
+
+async def test_no_match_scans_each_page_once(monkeypatch):
+    first = topic_page(0, ["nothing"])
+    topic = FakeTopic({30: topic_page(30, ["still nothing"]), 60: topic_page(60, ["nope"])})
+    monkeypatch.setattr(tracker_parser, "fetch_page_content", topic.fetch)
+
+    assert await tracker_parser._strategy_phrase_search(first, BASE_URL) is None
+    assert sorted(topic.requested) == [30, 60]
@@ -0,0 +1,198 @@
+"""youtube_search / youtube_api: concurrent first queries with early stop, quota accounting, lookup cache, fake Data API."""
+import asyncio
+import json
+import time
+
+import pytest
+from aiohttp import web
+
+import core.settings_loader as settings_loader
+from services import youtube_api, youtube_search
+from sync_gist_state import merge_json_files
+
+
+@pytest.fixture
+async def api_server(monkeypatch):
+    """Fake Data API: `results` maps a query substring to (delay, video ids) or (HTTP status, error reason)."""
+    state = {"results": {}, "queries": [], "requests": []}
+
+    async def search(request):
+        state["requests"].append(request)
+        query = request.query["q"]
+        state["queries"].append(query)
+        answer = next((v for k, v in state["results"].items() if k in query), (0.0, []))
+        if isinstance(answer[0], int):
+            return web.json_response({"error": {"code": answer[0], "message": "denied",
+                                                "errors": [{"reason": answer[1]}]}}, status=answer[0])
+        await asyncio.sleep(answer[0])
+        response = web.json_response({"items": [{"id": {"videoId": i}, "snippet": {"title": f"Video {i}"}} for i in answer[1]]})
+        response.enable_compression()
+        return response
+
+    async def videos(request):
+        state["requests"].append(request)
+        ids = [i for i in request.query["id"].split(",") if i != "gone"]
+        return web.json_response({"items": [{"id": i, "snippet": {"title": f"Video {i}"}} for i in ids]})
+
+    app = web.Application()
+    app.router.add_get("/youtube/v3/search", search)
+    app.router.add_get("/youtube/v3/videos", videos)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(settings_loader, "app_session", None)  # bind the aiohttp session to this test's loop
+    monkeypatch.setattr(youtube_api, "YOUTUBE_API_BASE", f"http://127.0.0.1:{port}/youtube/v3")
+    yield state
+    await settings_loader.get_session().close()
+    await runner.cleanup()
+
+
+@pytest.fixture
+def youtube(monkeypatch, tmp_path, api_server):
+    def install(results, quota=10000):
+        api_server["results"] = results
+        monkeypatch.setattr(youtube_search, "YOUTUBE_DAILY_QUOTA", quota)
+        return api_server
+    monkeypatch.setattr(youtube_search, "QUOTA_FILE", str(tmp_path / "youtube_quota.json"))
+    monkeypatch.setattr(youtube_search, "TRAILER_CACHE_FILE", str(tmp_path / "yt_trailer_cache.json"))
+    monkeypatch.setattr(youtube_search, "_quota_memory", None)
+    monkeypatch.setattr(youtube_search, "_cache_memory", None)
+    return install
+
+
+async def test_api_client_requests(api_server):
+    api_server["results"] = {"Hades": (0.0, ["a", "b"])}
+    assert await youtube_api.search_list("KEY", "Hades trailer", relevanceLanguage="en") == [
+        {"videoId": "a", "title": "Video a"}, {"videoId": "b", "title": "Video b"}]
+    request = api_server["requests"][-1]
+    assert request.query["key"] == "KEY" and request.query["relevanceLanguage"] == "en"
+    assert request.query["fields"] == "items(id/videoId,snippet/title)"
+    assert "gzip" in request.headers["Accept-Encoding"]
+
+    assert [v["id"] for v in await youtube_api.videos_list("KEY", ["a", "gone", "c"])] == ["a", "c"]
+    assert await youtube_api.videos_list("KEY", []) == []
+
+    api_server["results"] = {"Hades": (403, "quotaExceeded")}
+    with pytest.raises(youtube_api.YouTubeAPIError) as error:
+        await youtube_api.search_list("KEY", "Hades trailer")
+    assert error.value.status == 403 and error.value.reason == "quotaExceeded"
+
+
+async def test_first_queries_run_concurrently(youtube):
+    fake = youtube({"Official Trailer": (0.3, ["a"]), "Nintendo Switch Trailer": (0.3, ["b"]),
+                    "Switch Gameplay Trailer": (0.3, ["c", "a"])})
+    started = time.monotonic()
+    candidates = await youtube_search.search_trailer_on_youtube("Hades [NSP]", "key")
+    assert time.monotonic() - started < 0.6
+    assert [title for _, title in candidates] == ["Video a", "Video b", "Video c"]  # query order kept
+    assert len(fake["queries"]) == 3 and youtube_search._get_quota()["used"] == 300
+
+
+async def test_early_stop_once_enough_candidates(youtube):
+    fake = youtube({"Official Trailer": (0.0, ["a", "b", "c"]), "Trailer": (1.0, ["x"]), "Gameplay": (1.0, ["y"])})
+    started = time.monotonic()
+    candidates = await youtube_search.search_trailer_on_youtube("Hades", "key")
+    assert time.monotonic() - started < 0.5  # slower queries are not awaited
+    assert [title for _, title in candidates] == ["Video a", "Video b", "Video c"]
+
+
+async def test_remaining_queries_are_sequential_until_enough(youtube):
+    fake = youtube({"Official Trailer": (0.0, ["a"]), "Nintendo Switch Gameplay": (0.0, ["b", "c"])})
+    candidates = await youtube_search.search_trailer_on_youtube("Hades", "key")
+    assert len(candidates) == 3
+    assert len(fake["queries"]) == 4 and fake["queries"][-1] == "Hades Nintendo Switch Gameplay"
+
+
+async def test_quota_stops_searching(youtube):
+    fake = youtube({}, quota=450)
+    assert await youtube_search.search_trailer_on_youtube("Hades", "key") == []
+    assert len(fake["queries"]) == 4 and youtube_search.quota_remaining() == 50
+    assert await youtube_search.search_trailer_on_youtube("Celeste", "key") == []
+    assert len(fake["queries"]) == 4
+
+    youtube_search._quota_memory = None  # persisted; a new quota day starts from zero
+    assert youtube_search.quota_remaining() == 50
+    youtube_search._quota_memory["day"] = "2000-01-01"
+    assert youtube_search.quota_remaining() == 450
+
+
+async def test_403_marks_quota_exhausted(youtube):
+    fake = youtube({"Official Trailer": (403, "quotaExceeded"), "Trailer": (0.05, ["b"]), "Gameplay": (0.05, ["c"])})
+    await youtube_search.search_trailer_on_youtube("Hades", "key")
+    assert youtube_search.quota_remaining() == 0
+    assert len(fake["queries"]) <= 3
+
+
+async def test_other_403_only_skips_the_query(youtube):
+    youtube({"Official Trailer": (403, "keyInvalid"), "Nintendo Switch Trailer": (0.0, ["b"])})
+    candidates, complete = await youtube_search.find_trailer_candidates("Hades", "key")
+    assert [title for _, title in candidates] == ["Video b"] and not complete
+    assert youtube_search.quota_remaining() > 0
+
+
+async def test_failed_query_leaves_the_search_incomplete(youtube):
+    youtube({"Official Trailer": (500, "backendError"), "Nintendo Switch Trailer": (0.0, ["b"])})
+    candidates, complete = await youtube_search.find_trailer_candidates("Hades", "key")
+    assert [title for _, title in candidates] == ["Video b"] and not complete
+
+    youtube({})  # every query answered, nothing found: a real "no trailer"
+    assert await youtube_search.find_trailer_candidates("Celeste", "key") == ([], True)
+
+
+async def test_no_trailer_is_not_cached_after_failures(youtube, monkeypatch, tmp_path):
+    import main
+    from services import ai_validator, gpt
+
+    async def no_answer(*args, **kwargs):
+        return None
+
+    async def no_notify(*args):
+        pass
+
+    monkeypatch.setattr(main, "YOUTUBE_API_KEY", "key")
+    monkeypatch.setattr(main, "notify_mismatched_trailer", no_notify)
+    monkeypatch.setattr(gpt, "complete", no_answer)
+    monkeypatch.setattr(ai_validator, "VERDICT_CACHE_FILE", str(tmp_path / "yt_validation_cache.json"))
+    monkeypatch.setattr(ai_validator, "_cache_memory", None)
+
+    youtube({"Official Trailer": (0.0, ["a", "b", "c"])})
+    assert await main._find_trailer("Obscure Game") == (None, None)  # the model never answered
+    assert youtube_search.get_cached_trailer("Obscure Game") is None
+
+    youtube({"Official Trailer": (503, "backendError")})
+    assert await main._find_trailer("Celeste") == (None, None)  # a query failed
+    assert youtube_search.get_cached_trailer("Celeste") is None
+
+    youtube({})
+    assert await main._find_trailer("Celeste") == (None, None)
+    assert youtube_search.get_cached_trailer("Celeste").video_id is None
+
+
+def test_trailer_cache_positive_and_negative(youtube, monkeypatch):
+    youtube({})
+    candidates = [("https://www.youtube.com/watch?v=a", "Video a")]
+    youtube_search.remember_trailer("Hades II [NSP] Deluxe Edition", candidates, "a")
+    youtube_search.remember_trailer("Celeste", [], None)
+    youtube_search._cache_memory = None
+
+    hit = youtube_search.get_cached_trailer("hades  II")
+    assert hit.video_id == "a" and hit.url == "https://www.youtube.com/watch?v=a" and hit.candidates == candidates
+    assert youtube_search.get_cached_trailer("Celeste").video_id is None
+
+    monkeypatch.setattr(youtube_search, "YOUTUBE_NEGATIVE_TTL_HOURS", 0)  # negative results expire sooner
+    assert youtube_search.get_cached_trailer("Celeste") is None
+    assert youtube_search.get_cached_trailer("Hades II") is not None
+
+
+def test_negative_result_not_cached_when_quota_ran_out(youtube):
+    youtube({}, quota=0)
+    youtube_search.remember_trailer("Celeste", [], None)
+    assert youtube_search.get_cached_trailer("Celeste") is None
+
+
+def test_gist_merge_of_quota_state():
+    merge = lambda local, gist: json.loads(merge_json_files("youtube_quota.json", json.dumps(local), json.dumps(gist)))
+    assert merge({"day": "2026-10-17", "used": 300}, {"day": "2026-10-17", "used": 900})["used"] == 900
+    assert merge({"day": "2026-10-18", "used": 100}, {"day": "2026-10-17", "used": 900}) == {"day": "2026-10-18", "used": 100}
@@ -0,0 +1,93 @@
+"""ai_validator: cached Layer 3 verdicts and one batched LLM request for all YouTube candidates."""
+import asyncio
+import json
+import re
+
+import pytest
+
+from services import ai_validator, gpt
+from sync_gist_state import merge_json_files
+
+
+@pytest.fixture
+def fake_gpt(monkeypatch, tmp_path):
+    """Answers single prompts with `relevant` and batch prompts line by line; records every prompt."""
+    state = {"prompts": [], "relevant": set(), "best": None, "drop": set()}
+
+    async def complete(prompt, max_tokens, model=gpt.DEFAULT_MODEL, temperature=None, label="GPT"):
+        state["prompts"].append(prompt)
+        await asyncio.sleep(0.01)
+        titles = re.findall(r'^\d+\. "(.*)"$', prompt, re.MULTILINE)
+        if titles:
+            lines = [f"{n}: {'Yes' if t in state['relevant'] else 'No'} — because"
+                     for n, t in enumerate(titles, 1) if t not in state["drop"]]
+            best = state["best"] or next((n for n, t in enumerate(titles, 1) if t in state["relevant"]), 0)
+            return "\n".join(lines + [f"BEST: {best}"])
+        found = re.search(r'Found YouTube Video Title: "(.*)"', prompt).group(1)
+        return f"RELEVANT: {'Yes' if found in state['relevant'] else 'No'}\nREASON: because"
+
+    monkeypatch.setattr(gpt, "complete", complete)
+    monkeypatch.setattr(ai_validator, "VERDICT_CACHE_FILE", str(tmp_path / "yt_validation_cache.json"))
+    monkeypatch.setattr(ai_validator, "_cache_memory", None)
+    return state
+
+
+CANDIDATES = ["Nintendo Direct 2026 full", "SMB Wonder launch trailer", "Mario gameplay 10 min"]
+
+
+async def test_one_request_for_all_candidates_then_cached(fake_gpt):
+    fake_gpt["relevant"] = {"SMB Wonder launch trailer", "Mario gameplay 10 min"}
+    fake_gpt["best"] = 3  # the model's pick wins over the higher-ranked relevant one
+    assert await ai_validator.select_yt_candidate("Super Mario Bros. Wonder [NSP]", CANDIDATES) == 2
+    assert len(fake_gpt["prompts"]) == 1
+
+    ai_validator._cache_memory = None  # verdicts persist; the re-run needs no request
+    assert await ai_validator.select_yt_candidate("super mario bros.  wonder", CANDIDATES) == 1
+    assert len(fake_gpt["prompts"]) == 1
+
+
+async def test_cheap_layers_short_circuit(fake_gpt):
+    titles = ["Random video", "Hollow Knight Silksong - Official Trailer", "Other"]
+    assert await ai_validator.select_yt_candidate("Hollow Knight Silksong", titles) == 1
+    # Only the candidate ranked above the accepted one is sent; "Other" is never judged
+    assert len(fake_gpt["prompts"]) == 1 and "Other" not in fake_gpt["prompts"][0]
+
+    assert await ai_validator.select_yt_candidate("Hollow Knight Silksong", titles[1:]) == 0
+    assert len(fake_gpt["prompts"]) == 1
+
+
+async def test_no_relevant_candidate(fake_gpt):
+    assert await ai_validator.select_yt_candidate("Some Game", CANDIDATES) is None
+    assert await ai_validator.select_yt_candidate("Some Game", CANDIDATES) is None
+    assert len(fake_gpt["prompts"]) == 1
+    assert await ai_validator.select_yt_candidate("Some Game", []) is None
+
+
+async def test_candidates_missing_from_batch_answer_are_validated_singly(fake_gpt):
+    fake_gpt["relevant"] = {"Mario gameplay 10 min"}
+    fake_gpt["drop"] = {"SMB Wonder launch trailer", "Mario gameplay 10 min"}
+    fake_gpt["best"] = 0
+    assert await ai_validator.select_yt_candidate("Super Mario Bros. Wonder", CANDIDATES) == 2
+    assert len(fake_gpt["prompts"]) == 3  # batch + the two candidates it left out
+
+
+async def test_concurrent_validations_share_one_request(fake_gpt):
+    fake_gpt["relevant"] = {"SMB Wonder launch trailer"}
+    results = await asyncio.gather(*(ai_validator.validate_yt_title_with_gpt("Super Mario Bros. Wonder", "SMB Wonder launch trailer")
+                                     for _ in range(3)))
+    assert results == [True, True, True] and len(fake_gpt["prompts"]) == 1
+    assert await ai_validator.validate_yt_title_with_gpt("Super Mario Bros. Wonder", "smb wonder  LAUNCH trailer") is True
+    assert len(fake_gpt["prompts"]) == 1
+
+
+def test_parse_batch_verdicts():
+    raw = "1: Yes — official trailer\n2. no - a compilation\n7: Yes\nBEST: 1"
+    assert ai_validator.parse_batch_verdicts(raw, 3) == ({0: (True, "official trailer"), 1: (False, "a compilation")}, 0)
+    assert ai_validator.parse_batch_verdicts(None, 3) == ({}, None)
+
+
+def test_gist_merge_keeps_newer_verdicts():
+    local = {"a": {"relevant": True, "stored_at": 20}, "b": {"relevant": False, "stored_at": 5}}
+    gist = {"b": {"relevant": True, "stored_at": 10}, "c": {"relevant": False, "stored_at": 1}}
+    merged = json.loads(merge_json_files("yt_validation_cache.json", json.dumps(local), json.dumps(gist)))
+    assert {k: v["relevant"] for k, v in merged.items()} == {"a": True, "b": True, "c": False}
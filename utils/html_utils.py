@@ -1,8 +1,23 @@
 # --- START OF FILE html_utils.py ---
 import re
 import html
-from bs4 import BeautifulSoup, NavigableString, Tag
-from typing import Optional, List # Import Optional, List needed for clean_description_html
+from bs4 import BeautifulSoup, NavigableString, PageElement, Tag
+from typing import Iterable, Optional, List, Union # Import Optional, List needed for clean_description_html
+
+try:
+    import lxml  # noqa: F401 — optional, several times faster than html.parser on full pages
+    PAGE_PARSER = "lxml"
+except ImportError:
+    PAGE_PARSER = "html.parser"
+
+
+def parse_page(markup) -> BeautifulSoup:
+    """
+    Parses a whole fetched page with the fastest available backend: lxml when it is
+    installed, html.parser otherwise. Fragments and generated markup stay on html.parser,
+    whose handling of partial HTML the sanitizers rely on.
+    """
+    return BeautifulSoup(markup, PAGE_PARSER)
 
 def normalize_colons(text: str) -> str:
     """Glue every colon to the preceding word/tag and leave exactly one space after it.
@@ -60,7 +75,74 @@ def sanitize_html_for_telegram(html_str: str) -> str:
     html_str = re.sub(r'(</(?:b|strong|i|em|u|ins|s|strike|del|code)>)[ \t]+(<(?:b|strong)>[A-ZА-ЯЁІЇЄҐ0-9][^<]*?</(?:b|strong)>)', r'\1\n\2', html_str)
     
     soup = BeautifulSoup(html_str, 'html.parser')
-    
+    return _sanitize_parsed(soup)
+
+
+def sanitize_soup_for_telegram(soup: BeautifulSoup) -> str:
+    """
+    sanitize_html_for_telegram() for an already parsed fragment, without serializing and
+    re-parsing it. The string pre-passes (entity unescape, <br> -> newline, splitting bold
+    titles onto their own lines) are applied to the tree instead. Modifies `soup` in place.
+    """
+    # The string version unescapes the serialized markup before parsing it, which turns every
+    # text node back into markup: pre-escaped entities ("&lt;", "&amp;quot;") are decoded once
+    # and any tags written into the text become real tags. Re-parse just those text nodes.
+    for text_node in list(soup.find_all(string=True)):
+        if type(text_node) is not NavigableString or ('&' not in text_node and '<' not in text_node):
+            continue
+        fragment = BeautifulSoup(str(text_node), 'html.parser')
+        if len(fragment.contents) == 1 and type(fragment.contents[0]) is NavigableString:
+            if str(fragment.contents[0]) != str(text_node):
+                text_node.replace_with(str(fragment.contents[0]))
+            continue
+        for child in list(fragment.contents):
+            text_node.insert_before(child.extract())
+        text_node.extract()
+    for tag in soup.find_all(True):
+        for attr, value in tag.attrs.items():
+            if isinstance(value, str) and '&' in value:
+                tag[attr] = html.unescape(value)
+
+    for br in soup.find_all('br'):
+        br.replace_with('\n')
+    soup.smooth()
+
+    title_start = re.compile(r'[A-ZА-ЯЁІЇЄҐ0-9]')
+    split_after_tags = {'b', 'strong', 'i', 'em', 'u', 'ins', 's', 'strike', 'del', 'code'}
+    for bold in soup.find_all(['b', 'strong']):
+        # Only plain <b>Title</b> qualifies, exactly like the string patterns
+        if bold.attrs or len(bold.contents) != 1 or type(bold.contents[0]) is not NavigableString:
+            continue
+        if not title_start.match(bold.contents[0]):
+            continue
+        before = bold.previous_sibling
+        if type(before) is not NavigableString:
+            continue
+        # "Atmosphere 1.5.3. <b>Farm Tycoon</b>" -> "Atmosphere 1.5.3.\n<b>Farm Tycoon</b>"
+        split = re.sub(r'(?<=[\.!\?])[ \t]+$', '\n', before)
+        if split == before and re.fullmatch(r'[ \t]+', before):
+            # "<b>Ключевые игры:</b> <b>Farming Simulator</b>" -> tag, newline, tag
+            tag_before = before.previous_sibling
+            if isinstance(tag_before, Tag) and tag_before.name in split_after_tags:
+                split = '\n'
+        if split != before:
+            before.replace_with(split)
+
+    # html.parser collapses whitespace-only strings to one newline or space; do the same
+    for text_node in list(soup.find_all(string=True)):
+        if type(text_node) is NavigableString and not text_node:
+            text_node.extract()
+        elif type(text_node) is NavigableString and not text_node.strip(' \t\n\r\x0c') \
+                and not text_node.find_parent(['pre', 'textarea']):
+            collapsed = '\n' if '\n' in text_node else ' '
+            if str(text_node) != collapsed:
+                text_node.replace_with(collapsed)
+
+    return _sanitize_parsed(soup)
+
+
+def _sanitize_parsed(soup: BeautifulSoup) -> str:
+    """Tag filtering and text normalization shared by both sanitize entry points."""
     # 1. Tags to completely remove (and their content)
     tags_to_remove = ['script', 'style', 'iframe', 'object', 'embed', 'var', 'img', 'hr']
     for tag_name in tags_to_remove:
@@ -423,9 +505,25 @@ def sanitize_html_for_telegram(html_str: str) -> str:
     return cleaned_html
 
 
-def clean_description_html(description_html_str: str) -> str:
-    if not description_html_str: return ""
-    description_soup = BeautifulSoup(description_html_str, 'html.parser')
+def clean_description_html(description_html: Union[str, Iterable[PageElement]]) -> str:
+    """
+    Converts a RuTracker post description into Telegram HTML.
+    Accepts the markup, or the already parsed nodes of the post (they are moved out of their
+    page tree), so the description is parsed once and never round-trips through a string.
+    """
+    if isinstance(description_html, str):
+        if not description_html: return ""
+        description_soup = BeautifulSoup(description_html, 'html.parser')
+    else:
+        nodes = list(description_html)
+        if not nodes: return ""
+        description_soup = BeautifulSoup("", 'html.parser')
+        for node in nodes:
+            node = node.extract()
+            if isinstance(node, NavigableString) and type(node) is not NavigableString:
+                # Top-level comments/CDATA count as their plain text, as they did when joined with str()
+                node = NavigableString(str(node))
+            description_soup.append(node)
     
     # Sections (identified by class) to remove - Keep sp-head initially for spoiler titles
     sections_to_remove_classes = ['attach_wrap', 'attach_fu', 'signature'] 
@@ -630,13 +728,8 @@ def clean_description_html(description_html_str: str) -> str:
     # Replace <br> and specific span breaks with newlines
     for br_like in description_soup.find_all(['br', 'span'], class_="post-br"): br_like.replace_with('\n')
 
-    # Get the processed HTML content
-    intermediate_html = description_soup.decode_contents()
-
-    # Use the shared sanitizer for final cleanup
-    cleaned_html = sanitize_html_for_telegram(intermediate_html)
-
-    return cleaned_html
+    # Use the shared sanitizer for final cleanup, on the same tree
+    return sanitize_soup_for_telegram(description_soup)
 
 
 def convert_markdown_to_html(text: str) -> str:
@@ -2,17 +2,26 @@
 import aiohttp
 import asyncio
 import re
+from dataclasses import dataclass
 from io import BytesIO
 from html.parser import HTMLParser
-from typing import List, Optional, Tuple, Set
+from typing import TYPE_CHECKING, List, Optional, Tuple, Set
 import logging
 from core.settings_loader import get_session
 from utils.html_utils import normalize_colons
 
+if TYPE_CHECKING:  # Pillow is imported when the first image is normalized
+    from PIL import Image
+
 logger = logging.getLogger(__name__)
 
 MAX_CAPTION_LENGTH = 1024
 MAX_MESSAGE_LENGTH = 4096
+# Photos are normalized before upload: Telegram shows them at most 2560px on a side and rejects photos over 10 MB
+IMAGE_MAX_SIDE = 2560
+IMAGE_MAX_BYTES = 1536 * 1024
+IMAGE_QUALITY_STEPS = (85, 75, 65)
+IMAGE_OUTPUT_FORMAT = "JPEG"  # or "WEBP"
 
 # --- HTML Parsing for Splitting ---
 
@@ -350,6 +359,86 @@ def split_text(text: str, max_length: int) -> List[str]:
     
     return [p.strip().lstrip(':').strip() for p in full_content.split('###SPLIT_MARKER###') if p.strip()]
 
+# --- Image Normalization for Telegram ---
+
+_IMAGE_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp"}
+_images_normalized = 0
+_image_bytes_saved = 0
+
+
+@dataclass(slots=True)
+class NormalizedImage:
+    """Result of normalize_image_bytes(): the bytes to upload and what the normalization changed."""
+    data: bytes
+    original_bytes: int
+    extension: Optional[str] = None  # file extension of the re-encoded format; None if `data` is the original
+    size: Optional[Tuple[int, int]] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.extension is not None
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+
+def _encode_image(img: "Image.Image", output_format: str, max_bytes: int) -> Tuple[bytes, Tuple[int, int]]:
+    """Encode at falling quality, then at 3/4 the size, until the result fits `max_bytes` (or 640px is reached)."""
+    from PIL import Image
+    while True:
+        for quality in IMAGE_QUALITY_STEPS:
+            out = BytesIO()
+            img.save(out, output_format, quality=quality, optimize=True)
+            if out.tell() <= max_bytes:
+                return out.getvalue(), img.size
+        if max(img.size) <= 640:
+            return out.getvalue(), img.size
+        img = img.resize((max(1, img.width * 3 // 4), max(1, img.height * 3 // 4)), Image.LANCZOS)
+
+
+def normalize_image_bytes(data: bytes, max_side: int = IMAGE_MAX_SIDE, max_bytes: int = IMAGE_MAX_BYTES,
+                          output_format: str = IMAGE_OUTPUT_FORMAT) -> NormalizedImage:
+    """
+    Downscale an image to at most `max_side` px and re-encode it as JPEG/WebP of at most `max_bytes`.
+    Images already within both limits, animations and undecodable data are returned as they are,
+    as is a re-encode that would come out larger than the original.
+    """
+    from PIL import Image, ImageOps
+    try:
+        with Image.open(BytesIO(data)) as img:
+            if getattr(img, "is_animated", False):
+                return NormalizedImage(data, len(data))
+            if max(img.size) <= max_side and len(data) <= max_bytes and img.format == output_format:
+                return NormalizedImage(data, len(data))
+            original_size = img.size
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA", "P") and output_format == "JPEG":
+                rgba = img.convert("RGBA")
+                img = Image.new("RGB", rgba.size, (255, 255, 255)); img.paste(rgba, mask=rgba.getchannel("A"))
+            elif img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGB")
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            encoded, size = _encode_image(img, output_format, max_bytes)
+    except Exception as e:  # Pillow raises various errors on corrupt or unsupported data
+        logger.warning(f"TG: Image normalization skipped ({type(e).__name__}: {e})")
+        return NormalizedImage(data, len(data))
+    if len(encoded) >= len(data) and len(data) <= max_bytes and max(original_size) <= max_side:
+        return NormalizedImage(data, len(data))
+    return NormalizedImage(encoded, len(data), _IMAGE_EXTENSIONS[output_format], size)
+
+
+async def normalize_image(data: bytes) -> NormalizedImage:
+    """normalize_image_bytes() in a worker thread (Pillow releases the GIL while decoding and encoding)."""
+    global _images_normalized, _image_bytes_saved
+    result = await asyncio.to_thread(normalize_image_bytes, data)
+    if result.changed:
+        _images_normalized += 1; _image_bytes_saved += result.bytes_saved
+        logger.info(f"TG: Image normalized to {result.size[0]}x{result.size[1]}: "
+                    f"{result.original_bytes / 1024:.0f} KB -> {len(result.data) / 1024:.0f} KB "
+                    f"(saved {_image_bytes_saved / 1024 / 1024:.1f} MB over {_images_normalized} images)")
+    return result
+
 # --- Image Downloading for Telegram ---
 
 async def _try_download_image_tg(image_url: str, timeout: int = 15) -> Optional[BytesIO]:
@@ -391,7 +480,7 @@ async def download_cover_image_tg(image_url: Optional[str], timeout: int = 15) -
 
     if image:
         logger.debug("TG: Cover image downloaded successfully.")
-        return image
+        return BytesIO((await normalize_image(image.getvalue())).data)
     else:
         logger.warning("TG: Cover download failed or URL was empty. Trying fallback...")
         if image_url != fallback_url: